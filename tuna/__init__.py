@@ -1,3 +1,10 @@
+# the import timer has to start before the tuna imports anything
+import os as _os
+import sys as _sys
+if '--importtime' in _sys.argv[1:] or _os.environ.get('TUNA_IMPORTTIME'):
+    from tuna.infrastructure.importtimer import start as _start_import_timer
+    _start_import_timer()
+
 # some constants
 LOG_TIMESTAMP = "%Y-%m-%d %H:%M:%S"
 GLOBAL_NAME = "TUNA"
@@ -0,0 +1,122 @@
+
+# python standard library
+from collections import deque
+import threading
+import time
+
+# this package
+from tuna import TunaError
+
+
+class ChannelLimiter(object):
+    """
+    A first-come first-served counting semaphore
+    """
+    def __init__(self, limit=1, timeout=None, poll_interval=0.1):
+        """
+        ChannelLimiter constructor
+
+        :param:
+
+         - `limit`: maximum number of callers allowed in at once
+         - `timeout`: seconds to wait when used as a context manager (None means forever)
+         - `poll_interval`: seconds between checks of the held slots while waiting
+        """
+        self.limit = limit
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.active = 0
+        self.waiting = deque()
+        self.held = []
+        self.condition = threading.Condition()
+        return
+
+    def acquire(self, timeout=None):
+        """
+        Waits for a slot (in order of arrival)
+
+        :param:
+
+         - `timeout`: seconds to wait before giving up (None means wait forever)
+
+        :return: True if a slot was acquired, False if it timed out
+        """
+        ticket = object()
+        end_time = None
+        if timeout is not None:
+            end_time = time.time() + timeout
+        with self.condition:
+            self.waiting.append(ticket)
+            while self.waiting[0] is not ticket or self.active >= self.limit:
+                if self.held and self.reap():
+                    continue
+                remaining = None
+                if end_time is not None:
+                    remaining = end_time - time.time()
+                    if remaining <= 0:
+                        self.waiting.remove(ticket)
+                        self.condition.notify_all()
+                        return False
+                if self.held and (remaining is None or remaining > self.poll_interval):
+                    # the held slots don't notify anyone when they close
+                    remaining = self.poll_interval
+                self.condition.wait(remaining)
+            self.waiting.popleft()
+            self.active += 1
+            # the next in line might also fit
+            self.condition.notify_all()
+        return True
+
+    def release(self):
+        """
+        Gives up a slot
+        """
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+        return
+
+    def hold(self, closed):
+        """
+        Keeps an acquired slot until `closed` returns True
+
+        :param:
+
+         - `closed`: callable that returns True once the slot can be given back
+        """
+        with self.condition:
+            self.held.append(closed)
+        return
+
+    def reap(self):
+        """
+        Releases the held slots whose `closed` callables return True
+
+        :return: number of slots released
+        """
+        with self.condition:
+            still_open = [closed for closed in self.held if not closed()]
+            released = len(self.held) - len(still_open)
+            if released:
+                self.held = still_open
+                self.active -= released
+                self.condition.notify_all()
+        return released
+
+    def __enter__(self):
+        """
+        Acquires a slot
+
+        :raise: TunaError if self.timeout is exceeded
+        """
+        if not self.acquire(self.timeout):
+            raise TunaError("Timed out after {0} seconds waiting for a channel".format(self.timeout))
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        """
+        Releases the slot
+        """
+        self.release()
+        return False
+# end class ChannelLimiter
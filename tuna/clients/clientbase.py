@@ -49,7 +49,7 @@ class BaseClient(BaseClass):
         return
 
     @abstractmethod
-    def exec_command(self, command, timeout=TIMEOUT):
+    def exec_command(self, command, timeout=TIMEOUT, idempotent=False):
         """
         The main interface with the client
 
@@ -57,6 +57,7 @@ class BaseClient(BaseClass):
 
          - `command`: A string to send to the client.
          - `timeout`: Set non-blocking timeout.
+         - `idempotent`: True if the command is safe to send again (e.g. after a reconnect)
 
         :rtype: tuple
         :return: stdin, stdout, stderr
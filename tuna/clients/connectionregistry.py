@@ -0,0 +1,137 @@
+
+# python standard library
+from collections import namedtuple
+import hashlib
+import threading
+
+# this package
+from tuna import BaseClass
+from tuna.infrastructure.metrics import METRICS
+
+
+ConnectionKey = namedtuple('ConnectionKey', 'hostname port username connection_type credentials'.split())
+
+
+def credentials_digest(kwargs):
+    """
+    Makes a digest of the connection arguments
+
+    :param:
+
+     - `kwargs`: dict of the arguments the client is connected with
+
+    :return: hex-digest of the sorted arguments
+    """
+    return hashlib.sha1(repr(sorted((str(name), str(value))
+                                    for name, value in kwargs.iteritems()))).hexdigest()
+
+
+class ConnectionRegistry(BaseClass):
+    """
+    A holder of shared, reference-counted clients
+    """
+    def __init__(self):
+        """
+        ConnectionRegistry constructor
+        """
+        super(ConnectionRegistry, self).__init__()
+        self.clients = {}
+        self._references = {}
+        self.lock = threading.RLock()
+        self.opened = 0
+        self.reused = 0
+        self.closed = 0
+        METRICS.connection_registries.add(self)
+        return
+
+    def acquire(self, key, constructor):
+        """
+        Gets the client for the key (building it if it doesn't exist)
+
+        :param:
+
+         - `key`: ConnectionKey for the client
+         - `constructor`: callable that builds the client if needed
+
+        :return: shared client
+        """
+        with self.lock:
+            if key in self.clients:
+                self._references[key] += 1
+                self.reused += 1
+                self.logger.debug("Re-using connection to {0} ({1} users)".format(key.hostname,
+                                                                                  self._references[key]))
+            else:
+                self.clients[key] = constructor()
+                self._references[key] = 1
+                self.opened += 1
+                self.logger.debug("Opened connection to {0}".format(key.hostname))
+            return self.clients[key]
+
+    def release(self, key):
+        """
+        Removes a reference to the client, closing it if it was the last one
+
+        :param:
+
+         - `key`: ConnectionKey used to acquire the client
+        """
+        with self.lock:
+            if key not in self.clients:
+                return
+            self._references[key] -= 1
+            if self._references[key] > 0:
+                return
+            client = self.clients.pop(key)
+            del self._references[key]
+            self.closed += 1
+        self.logger.debug("Closing connection to {0}".format(key.hostname))
+        client.close()
+        return
+
+    def references(self, key):
+        """
+        :param:
+
+         - `key`: ConnectionKey for the client
+
+        :return: number of users of the client
+        """
+        with self.lock:
+            return self._references.get(key, 0)
+
+    @property
+    def counters(self):
+        """
+        dict of opened, reused, closed and active counts (and the active clients' reconnect counts)
+        """
+        with self.lock:
+            counters = dict(opened=self.opened,
+                            reused=self.reused,
+                            closed=self.closed,
+                            active=len(self.clients),
+                            reconnects=0,
+                            reconnect_failures=0,
+                            reruns=0,
+                            reconnect_seconds=0.0)
+            for client in self.clients.itervalues():
+                supervision = getattr(client, 'counters', None)
+                if not isinstance(supervision, dict):
+                    continue
+                for counter in ('reconnects', 'reconnect_failures', 'reruns', 'reconnect_seconds'):
+                    counters[counter] += supervision.get(counter, 0)
+            return counters
+
+    def close(self):
+        """
+        Closes all the clients (whether or not they've been released)
+        """
+        with self.lock:
+            clients = self.clients.values()
+            self.closed += len(clients)
+            self.clients.clear()
+            self._references.clear()
+        for client in clients:
+            client.close()
+        return
+# end class ConnectionRegistry
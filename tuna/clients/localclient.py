@@ -0,0 +1,285 @@
+
+# python standard library
+from collections import deque
+import os
+import select
+import signal
+import socket
+import subprocess
+import threading
+
+# this package
+from tuna import BaseClass, TunaError
+from tuna.clients.clientbase import BaseClient
+from tuna.clients.streamloop import LineBuffer
+
+
+TIMEOUT = 10
+EMPTY_STRING = ''
+CHUNK_SIZE = 4096
+SHELL = '/bin/sh'
+
+
+class LocalOutput(BaseClass):
+    """
+    A file-like reader of a local process's output
+    """
+    def __init__(self, pipe, process, timeout=TIMEOUT):
+        """
+        LocalOutput constructor
+
+        :param:
+
+         - `pipe`: the process's stdout or stderr
+         - `process`: the subprocess.Popen that owns the pipe
+         - `timeout`: seconds to wait for output before raising socket.timeout (None means forever)
+        """
+        super(LocalOutput, self).__init__()
+        self.pipe = pipe
+        self.process = process
+        self.timeout = timeout
+        self.buffer = LineBuffer()
+        self.lines = deque()
+        self.finished = False
+        return
+
+    def readline(self):
+        """
+        Reads a single line of output
+
+        :return: the next line (empty string once the output is finished)
+        :raise: socket.timeout if no output arrives within the timeout
+        """
+        while not self.lines and not self.finished:
+            self.fill()
+        if self.lines:
+            return self.lines.popleft()
+        return EMPTY_STRING
+
+    def fill(self):
+        """
+        Reads the next chunk of output into the lines
+
+        :raise: socket.timeout if no output arrives within the timeout
+        """
+        readable, writeable, exceptional = select.select([self.pipe], [], [], self.timeout)
+        if not readable:
+            self.time_out()
+        self.receive(os.read(self.pipe.fileno(), CHUNK_SIZE))
+        if self.finished and not self.process.stdin.closed:
+            # the command is done with its output so it's done reading its input
+            self.process.stdin.close()
+        return
+
+    def time_out(self):
+        """
+        :raise: socket.timeout
+        """
+        raise socket.timeout("No output from '{0}' after {1} seconds".format(self.process.command,
+                                                                             self.timeout))
+
+    def receive(self, data):
+        """
+        Adds the complete lines in the data (an empty string is the end of the output)
+
+        :param:
+
+         - `data`: string read from the pipe
+        """
+        if data:
+            self.lines.extend(self.buffer.feed(data))
+            return
+        self.finished = True
+        partial = self.buffer.flush()
+        if partial:
+            self.lines.append(partial)
+        return
+
+    def readlines(self):
+        """
+        Reads all the lines
+
+        :return: list of lines
+        """
+        return list(self)
+
+    def read(self):
+        """
+        Reads all the output
+
+        :return: string of output
+        """
+        return EMPTY_STRING.join(self)
+
+    def __iter__(self):
+        """
+        Traverses the output line by line
+        """
+        line = self.readline()
+        while line:
+            yield line
+            line = self.readline()
+        return
+
+    def close(self):
+        """
+        Closes the pipe
+        """
+        self.pipe.close()
+        return
+# end class LocalOutput
+
+
+class DrainedOutput(LocalOutput):
+    """
+    A LocalOutput whose pipe is read by a thread as the output arrives
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        DrainedOutput constructor (takes the same arguments as the LocalOutput)
+        """
+        super(DrainedOutput, self).__init__(*args, **kwargs)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.chunks = 0
+        self.thread = threading.Thread(target=self.drain,
+                                       name="drain {0}".format(self.process.pid))
+        self.thread.daemon = True
+        self.thread.start()
+        return
+
+    def drain(self):
+        """
+        Reads the pipe until the end of the output
+        """
+        data = None
+        while data != EMPTY_STRING:
+            try:
+                data = os.read(self.pipe.fileno(), CHUNK_SIZE)
+            except (OSError, ValueError) as error:
+                # the pipe was closed
+                self.logger.debug(error)
+                data = EMPTY_STRING
+            with self.condition:
+                if data:
+                    self.chunks += 1
+                if not self.closed or not data:
+                    self.receive(data)
+                self.condition.notify_all()
+        self.pipe.close()
+        return
+
+    def fill(self):
+        """
+        Waits for the thread to read more output
+
+        :raise: socket.timeout if no output arrives within the timeout
+        """
+        with self.condition:
+            chunks = self.chunks
+            if not self.lines and not self.finished:
+                self.condition.wait(self.timeout)
+            if self.chunks == chunks and not self.lines and not self.finished:
+                self.time_out()
+        return
+
+    def close(self):
+        """
+        Stops keeping the output (the thread closes the pipe once the process closes its end)
+        """
+        with self.condition:
+            self.closed = True
+            self.lines.clear()
+            self.buffer.flush()
+        return
+# end class DrainedOutput
+
+
+class LocalClient(BaseClient):
+    """
+    A client that runs commands on this machine
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        LocalClient constructor
+
+        :param:
+
+         - `hostname`: only used to identify the client (e.g. localhost)
+         - `timeout`: ignored (there's no connection to time out)
+         - `args, kwargs`: passed to the BaseClient and otherwise ignored
+        """
+        kwargs.pop('password', None)
+        super(LocalClient, self).__init__(*args, **kwargs)
+        self.processes = []
+        self.processes_lock = threading.Lock()
+        return
+
+    @property
+    def client(self):
+        """
+        There's no connection so the client is itself
+        """
+        return self
+
+    def __getattr__(self, attribute):
+        """
+        There's no client to pass un-implemented methods through to
+
+        :raise: AttributeError
+        """
+        raise AttributeError("'LocalClient' has no attribute '{0}'".format(attribute))
+
+    def exec_command(self, command, timeout=TIMEOUT, idempotent=False):
+        """
+        Starts the command in a shell
+
+        :param:
+
+         - `command`: A string to run
+         - `timeout`: seconds to wait for each line of output (None means forever)
+         - `idempotent`: ignored (there's no connection to lose)
+
+        :rtype: tuple
+        :return: stdin (closed once the output ends), stdout, stderr (read as it arrives)
+        :raise: TunaError if the shell can't be started
+        """
+        command = command.rstrip('\n')
+        self.logger.debug("({0}) Running -- '{1}', timeout={2}".format(self,
+                                                                    command,
+                                                                    timeout))
+        try:
+            process = subprocess.Popen(command, shell=True, executable=SHELL,
+                                       stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE,
+                                       close_fds=True,
+                                       preexec_fn=os.setsid)
+        except OSError as error:
+            self.logger.error(error)
+            raise TunaError("Unable to run '{0}' locally: {1}".format(command, error))
+        process.command = command
+        with self.processes_lock:
+            self.processes = [known for known in self.processes if known.poll() is None]
+            self.processes.append(process)
+        return (process.stdin,
+                LocalOutput(process.stdout, process, timeout=timeout),
+                DrainedOutput(process.stderr, process, timeout=timeout))
+
+    def close(self):
+        """
+        Terminates any processes that are still running (and closes their stdin)
+        """
+        with self.processes_lock:
+            processes, self.processes = self.processes, []
+        for process in processes:
+            if not process.stdin.closed:
+                process.stdin.close()
+            if process.poll() is None:
+                self.logger.debug("Terminating '{0}'".format(process.command))
+                try:
+                    os.killpg(process.pid, signal.SIGTERM)
+                except OSError as error:
+                    self.logger.debug(error)
+        return
+# end class LocalClient
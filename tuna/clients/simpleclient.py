@@ -1,13 +1,15 @@
 
 # python standard library
 import socket
-
-# third party
-import paramiko
+import threading
+import time
+import weakref
 
 # this package
 from tuna.clients.clientbase import BaseClient
+from tuna.clients.channellimiter import ChannelLimiter
 from tuna import TunaError
+from tuna.infrastructure.metrics import METRICS
 
 
 class ConnectionError(TunaError):
@@ -21,6 +23,17 @@ PORT = 22
 TIMEOUT = 10
 NEWLINE = '\n'
 SPACE_JOIN = "{prefix} {command}"
+# OpenSSH's default MaxSessions is 10
+MAX_CHANNELS = 8
+# seconds to wait for one of the open channels to close
+CHANNEL_TIMEOUT = 60
+# seconds between keepalives (0 turns them off)
+KEEPALIVE = 5
+# unanswered TCP keepalive probes before the kernel drops the connection
+KEEPALIVE_PROBES = 3
+RECONNECT_ATTEMPTS = 5
+BACKOFF = 0.5
+MAX_BACKOFF = 30
 
 
 class SimpleClient(BaseClient):
@@ -38,10 +51,31 @@ class SimpleClient(BaseClient):
          - `timeout`: Time to give the client to connect
          - `port`: TCP port of the server
          - `lock`: re-entrant lock to block exec_command calls
+         - `max_channels`: number of channels that can be open on the transport at once
+         - `channel_timeout`: seconds to wait for a channel before giving up (None means forever)
+         - `keepalive`: seconds between keepalives (0 turns them off)
+         - `reconnect_attempts`: number of times to try to reconnect before giving up
+         - `backoff`: seconds to wait after the first failed reconnect (doubles each time)
+         - `max_backoff`: longest time to wait between reconnect attempts
          - `args, kwargs`: anything else that the SSHClient.connect can use will be passed in to it
         """
+        max_channels = int(kwargs.pop('max_channels', MAX_CHANNELS))
+        channel_timeout = kwargs.pop('channel_timeout', CHANNEL_TIMEOUT)
+        self.channel_timeout = float(channel_timeout) if channel_timeout is not None else None
+        self.keepalive = float(kwargs.pop('keepalive', KEEPALIVE))
+        self.reconnect_attempts = int(kwargs.pop('reconnect_attempts', RECONNECT_ATTEMPTS))
+        self.backoff = float(kwargs.pop('backoff', BACKOFF))
+        self.max_backoff = float(kwargs.pop('max_backoff', MAX_BACKOFF))
         super(SimpleClient, self).__init__(*args, **kwargs)
         self._client = None        
+        self.channels = ChannelLimiter(limit=max_channels)
+        # re-entrant since reconnect uses the client property to connect
+        self.reconnect_lock = threading.RLock()
+        self.reconnects = 0
+        self.reconnect_failures = 0
+        self.reruns = 0
+        self.reconnect_seconds = 0.0
+        self.last_reconnect_seconds = None
         return
 
     @property
@@ -53,37 +87,144 @@ class SimpleClient(BaseClient):
         :return: An instance of SSHClient connected to remote host.
         :raise: ClientError if the connection fails.
         """
-        if self._client is None:
-            self._client = paramiko.SSHClient()
-            self._client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self._client.load_system_host_keys()
-            try:
-                self._client.connect(hostname=self.hostname,
-                                     username=self.username,
-                                     timeout=self.timeout,
-                                     port=self.port,
-                                     **self.kwargs)
-
-            # these are fatal exceptions, no one but the main program should catch them
-            except paramiko.AuthenticationException as error:
-                self.logger.error(error)
-                raise TunaError("There is a problem with the ssh-keys or password for \n{0}".format(self))
+        # the lock makes the other threads wait while the first one connects
+        with self.reconnect_lock:
+            if self._client is None:
+                import paramiko
+                self._client = paramiko.SSHClient()
+                self._client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                self._client.load_system_host_keys()
+                try:
+                    self._client.connect(hostname=self.hostname,
+                                         username=self.username,
+                                         timeout=self.timeout,
+                                         port=self.port,
+                                         **self.kwargs)
+
+                # these are fatal exceptions, no one but the main program should catch them
+                except paramiko.AuthenticationException as error:
+                    self.logger.error(error)
+                    raise TunaError("There is a problem with the ssh-keys or password for \n{0}".format(self))
             
-            except paramiko.PasswordRequiredException as error:
-                self.logger.error(error)
-                self.logger.error("Private Keys Not Set Up, Password Required.")
-                raise TunaError("SSH Key Error :\n {0}".format(self))
+                except paramiko.PasswordRequiredException as error:
+                    self.logger.error(error)
+                    self.logger.error("Private Keys Not Set Up, Password Required.")
+                    raise TunaError("SSH Key Error :\n {0}".format(self))
 
-            except socket.timeout as error:
-                self.logger.error(error)
-                raise TunaError("Paramiko is unable to connect to \n{0}".format(self))
+                except socket.timeout as error:
+                    self.logger.error(error)
+                    raise TunaError("Paramiko is unable to connect to \n{0}".format(self))
             
-            except socket.error as error:
-                self.logger.error(error)
-                if 'Connection refused' in error: 
-                    raise TunaError("SSH Server Not responding: check setup:\n {0}".format(self))
-                raise TunaError("Problem with connection to:\n {0}".format(self))
-        return self._client
+                except socket.error as error:
+                    self.logger.error(error)
+                    if 'Connection refused' in error: 
+                        raise TunaError("SSH Server Not responding: check setup:\n {0}".format(self))
+                    raise TunaError("Problem with connection to:\n {0}".format(self))
+                self.supervise(self._client)
+            return self._client
+
+    def supervise(self, client):
+        """
+        Turns on the SSH and TCP keepalives for the client's connection
+
+        :param:
+
+         - `client`: connected paramiko.SSHClient
+        """
+        if not self.keepalive:
+            return
+        transport = client.get_transport()
+        if transport is None:
+            return
+        transport.set_keepalive(int(max(self.keepalive, 1)))
+        connection = transport.sock
+        try:
+            connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            # these are linux-specific
+            for option, value in (('TCP_KEEPIDLE', self.keepalive),
+                                  ('TCP_KEEPINTVL', self.keepalive),
+                                  ('TCP_KEEPCNT', KEEPALIVE_PROBES)):
+                if hasattr(socket, option):
+                    connection.setsockopt(socket.IPPROTO_TCP, getattr(socket, option),
+                                          int(max(value, 1)))
+        except (socket.error, AttributeError) as error:
+            # e.g. a proxy-command's socket-like object
+            self.logger.debug("Unable to set the TCP keepalive: {0}".format(error))
+        return
+
+    @property
+    def alive(self):
+        """
+        True if there is a connection and its transport is still active
+        """
+        if self._client is None:
+            return False
+        transport = self._client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def reconnect(self, force=False):
+        """
+        Closes the connection and opens a new one (backing off between failed attempts)
+
+        :param:
+
+         - `force`: if True reconnect even if the transport looks active
+
+        :raise: ConnectionError if all the attempts fail
+        """
+        import paramiko
+        with self.reconnect_lock:
+            if not force and self.alive:
+                # another thread already reconnected
+                return
+            start = time.time()
+            if self._client is not None:
+                try:
+                    self._client.close()
+                except Exception as error:
+                    self.logger.debug(error)
+                self._client = None
+            delay = self.backoff
+            for attempt in xrange(1, self.reconnect_attempts + 1):
+                try:
+                    # the client property connects
+                    self.client
+                    break
+                except (TunaError, paramiko.SSHException, socket.error, EOFError) as error:
+                    self._client = None
+                    self.reconnect_failures += 1
+                    METRICS.ssh_reconnect_failures.increment()
+                    if attempt == self.reconnect_attempts:
+                        elapsed = time.time() - start
+                        self.reconnect_seconds += elapsed
+                        METRICS.ssh_reconnect_seconds.increment(elapsed)
+                        raise ConnectionError("Unable to reconnect to {0} after {1} attempts".format(self.hostname,
+                                                                                                     attempt))
+                    self.logger.warning("Reconnect attempt {0} to {1} failed ({2}), trying again in {3} seconds".format(attempt,
+                                                                                                                       self.hostname,
+                                                                                                                       error,
+                                                                                                                       delay))
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_backoff)
+            self.last_reconnect_seconds = time.time() - start
+            self.reconnect_seconds += self.last_reconnect_seconds
+            self.reconnects += 1
+            METRICS.ssh_reconnect_seconds.increment(self.last_reconnect_seconds)
+            METRICS.ssh_reconnects.increment()
+            self.logger.info("Reconnected to {0} in {1:.2f} seconds".format(self.hostname,
+                                                                        self.last_reconnect_seconds))
+        return
+
+    @property
+    def counters(self):
+        """
+        dict of the reconnect counts and times
+        """
+        return dict(reconnects=self.reconnects,
+                    reconnect_failures=self.reconnect_failures,
+                    reruns=self.reruns,
+                    reconnect_seconds=self.reconnect_seconds,
+                    last_reconnect_seconds=self.last_reconnect_seconds)
 
     @property
     def port(self):
@@ -114,29 +255,91 @@ class SimpleClient(BaseClient):
             self._port = new_port
         return
 
-    def exec_command(self, command, timeout=TIMEOUT):
+    def exec_command(self, command, timeout=TIMEOUT, idempotent=False):
         """
         A pass-through to the SSHClient's exec_command.
-        User re-entrant lock for threading
+        Reconnects first if the connection has died
 
         :param:
 
          - `command`: A string to send to the client.
          - `timeout`: Set non-blocking timeout.
+         - `idempotent`: if True, reconnect and send the command again if sending it fails
 
         :rtype: tuple
         :return: stdin, stdout, stderr
 
-        :raise: ConnectionError for paramiko or socket exceptions
+        :raise: ConnectionError for paramiko or socket exceptions, TunaError if no channel frees up
         """
         if not command.endswith(NEWLINE):
             command += NEWLINE
+        if self._client is not None and not self.alive:
+            self.logger.warning("The connection to {0} is down, reconnecting".format(self.hostname))
+            self.reconnect()
+        if not self.channels.acquire(self.channel_timeout):
+            raise TunaError("All {0} channels to {1} were still open after {2} seconds".format(self.channels.limit,
+                                                                                              self.hostname,
+                                                                                              self.channel_timeout))
+        try:
+            try:
+                stdin, stdout, stderr = self.send(command, timeout)
+            except TunaError as error:
+                if not idempotent:
+                    raise
+                self.logger.warning("Sending '{0}' failed ({1}), reconnecting to re-send it".format(command.rstrip(NEWLINE),
+                                                                                                 error))
+                self.reconnect(force=True)
+                self.reruns += 1
+                METRICS.ssh_reruns.increment()
+                stdin, stdout, stderr = self.send(command, timeout)
+        except:
+            self.channels.release()
+            raise
+        self.channels.hold(self.channel_closed(stdout))
+        return stdin, stdout, stderr
+
+    @staticmethod
+    def channel_closed(stdout):
+        """
+        Makes a check for the end of the command's channel
+
+        :param:
+
+         - `stdout`: the ChannelFile returned by exec_command
+
+        :return: callable that returns True once the channel is closed (or gone)
+        """
+        channel = getattr(stdout, 'channel', None)
+        if channel is None:
+            return lambda: True
+        # a weak reference so an abandoned channel can still be garbage-collected (and closed)
+        reference = weakref.ref(channel)
+        def closed():
+            channel = reference()
+            return channel is None or channel.closed
+        return closed
+
+    def send(self, command, timeout):
+        """
+        Sends the command over the SSHClient.
+        The caller has to hold one of the channel slots
+
+        :param:
+
+         - `command`: A string to send to the client.
+         - `timeout`: Set non-blocking timeout.
+
+        :rtype: tuple
+        :return: stdin, stdout, stderr
+
+        :raise: ConnectionError for paramiko or socket exceptions
+        """
+        import paramiko
         try:
             self.logger.debug("({0}) Sending to paramiko -- '{1}', timeout={2}".format(self,
                                                                                        command,
                                                                                        timeout))
-            with self.lock:
-                return self.client.exec_command(command, timeout=timeout)
+            return self.client.exec_command(command, timeout=timeout)
 
         except socket.timeout:
             self.logger.debug("socket timed out")
@@ -145,9 +348,11 @@ class SimpleClient(BaseClient):
         # this catches other socket errors so it should go after any other socket exceptions
         except (socket.error, paramiko.SSHException, AttributeError) as error:
             # the AttributeError is raised if no connection was actually made (probably the wrong IP address)
+            # (the message is made first since __str__ would try to re-connect once the client is gone)
+            message = "Problem with connection to:\n {0}".format(self)
             self._client = None
             self.logger.error(error)
-            raise TunaError("Problem with connection to:\n {0}".format(self))
+            raise TunaError(message)
         return
 # end class SimpleClient
 
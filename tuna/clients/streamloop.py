@@ -0,0 +1,543 @@
+
+# python standard library
+import errno
+import fcntl
+import os
+import select
+import signal
+import threading
+
+# this package
+from tuna import TunaError
+from tuna.infrastructure.baseclass import BaseThreadClass
+from tuna.parts.scheduler import monotonic
+
+
+NEWLINE = '\n'
+EMPTY_STRING = ''
+WAKE = 'x'
+
+
+class StreamLoopConstants(object):
+    """
+    Constants for the StreamLoop
+    """
+    __slots__ = ()
+    chunk_size = 4096
+    poll_interval = 1
+    stop_timeout = 5
+    # reasons a task finished
+    eof = 'eof'
+    timeout = 'timeout'
+    cancelled = 'cancelled'
+    stopped = 'stopped'
+    error = 'error'
+
+
+class LineBuffer(object):
+    """
+    A splitter of chunks into lines
+    """
+    def __init__(self):
+        """
+        LineBuffer constructor
+        """
+        self.partial = EMPTY_STRING
+        return
+
+    def feed(self, data):
+        """
+        Adds the data and returns the lines it completed
+
+        :param:
+
+         - `data`: string read from the stream
+
+        :return: list of complete lines (with their newlines)
+        """
+        lines = (self.partial + data).split(NEWLINE)
+        self.partial = lines.pop()
+        return [line + NEWLINE for line in lines]
+
+    def flush(self):
+        """
+        Gets (and clears) the partial line
+
+        :return: the partial line (may be an empty string)
+        """
+        partial, self.partial = self.partial, EMPTY_STRING
+        return partial
+# end class LineBuffer
+
+
+class ChannelSource(object):
+    """
+    A paramiko channel as a stream-source
+    """
+    def __init__(self, channel, chunk_size=StreamLoopConstants.chunk_size):
+        """
+        ChannelSource constructor
+
+        :param:
+
+         - `channel`: paramiko Channel that the command was sent on
+         - `chunk_size`: most bytes to read at once
+        """
+        self.channel = channel
+        self.chunk_size = chunk_size
+        self.errors = []
+        self.eof = False
+        self.channel.setblocking(0)
+        return
+
+    def fileno(self):
+        """
+        :return: the channel's file descriptor
+        """
+        return self.channel.fileno()
+
+    def read(self):
+        """
+        Reads what's available
+
+        :return: string (empty if there was nothing to read)
+        """
+        while self.channel.recv_stderr_ready():
+            self.errors.append(self.channel.recv_stderr(self.chunk_size))
+        if self.channel.recv_ready():
+            data = self.channel.recv(self.chunk_size)
+            self.eof = not data
+            return data
+        self.eof = self.channel.eof_received or self.channel.closed
+        return EMPTY_STRING
+
+    def close(self):
+        """
+        Closes the channel
+        """
+        self.channel.close()
+        return
+# end class ChannelSource
+
+
+class PipeSource(object):
+    """
+    A local process's output pipe as a stream-source
+    """
+    def __init__(self, pipe, process, chunk_size=StreamLoopConstants.chunk_size):
+        """
+        PipeSource constructor
+
+        :param:
+
+         - `pipe`: the process's stdout
+         - `process`: subprocess.Popen that owns the pipe
+         - `chunk_size`: most bytes to read at once
+        """
+        self.pipe = pipe
+        self.process = process
+        self.chunk_size = chunk_size
+        self.errors = []
+        self.eof = False
+        return
+
+    def fileno(self):
+        """
+        :return: the pipe's file descriptor
+        """
+        return self.pipe.fileno()
+
+    def read(self):
+        """
+        Reads what's available
+
+        :return: string (empty at the end of the output)
+        """
+        data = os.read(self.pipe.fileno(), self.chunk_size)
+        self.eof = not data
+        return data
+
+    def close(self):
+        """
+        Closes the pipe and stops the process if it's still running
+        """
+        if self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+            except OSError:
+                pass
+        self.pipe.close()
+        return
+# end class PipeSource
+
+
+class TelnetSource(object):
+    """
+    A telnet session as a stream-source
+    """
+    def __init__(self, telnet, prompt=None):
+        """
+        TelnetSource constructor
+
+        :param:
+
+         - `telnet`: telnetlib.Telnet that the command was sent on
+         - `prompt`: string that marks the end of the output
+        """
+        self.telnet = telnet
+        self.prompt = prompt
+        self.errors = []
+        self.eof = False
+        return
+
+    def fileno(self):
+        """
+        :return: the telnet socket's file descriptor
+        """
+        return self.telnet.fileno()
+
+    def read(self):
+        """
+        Reads what's available (stopping at the prompt)
+
+        :return: string (empty if there was nothing to read)
+        """
+        try:
+            data = self.telnet.read_very_eager()
+        except EOFError:
+            self.eof = True
+            return EMPTY_STRING
+        if self.prompt is not None and self.prompt in data:
+            data = data[:data.index(self.prompt)]
+            self.eof = True
+        return data
+
+    def close(self):
+        """
+        Does nothing (the session belongs to the TelnetClient)
+        """
+        return
+# end class TelnetSource
+
+
+class StreamTask(object):
+    """
+    A stream being read by the StreamLoop
+    """
+    def __init__(self, loop, source, callback, timeout=None, name=None, on_close=None):
+        """
+        StreamTask constructor
+
+        :param:
+
+         - `loop`: the StreamLoop reading the stream
+         - `source`: ChannelSource-like object
+         - `callback`: callable to send each line to
+         - `timeout`: seconds to read before cancelling (None means until the end)
+         - `name`: identifier for the log messages
+         - `on_close`: callable to call once the stream is finished
+        """
+        self.loop = loop
+        self.source = source
+        self.callback = callback
+        self.name = name
+        self.on_close = on_close
+        self.deadline = None
+        if timeout is not None:
+            self.deadline = monotonic() + timeout
+        self.buffer = LineBuffer()
+        self.lines = 0
+        self.errors = 0
+        self.reason = None
+        self.finished = threading.Event()
+        return
+
+    def cancel(self):
+        """
+        Asks the loop to stop reading the stream
+        """
+        self.loop.cancel(self)
+        return
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the task is finished
+
+        :param:
+
+         - `timeout`: seconds to wait (None means forever)
+
+        :return: True if the task finished
+        """
+        return self.finished.wait(timeout)
+
+    def __str__(self):
+        return "{0}".format(self.name)
+# end class StreamTask
+
+
+class StreamLoop(BaseThreadClass):
+    """
+    A single-threaded reader of many command-output streams
+    """
+    def __init__(self, poll_interval=StreamLoopConstants.poll_interval):
+        """
+        StreamLoop constructor
+
+        :param:
+
+         - `poll_interval`: most seconds to wait in `select` before checking the timeouts
+        """
+        super(StreamLoop, self).__init__()
+        self.poll_interval = poll_interval
+        self.tasks = {}
+        self.adding = []
+        self.cancelling = []
+        self.stopping = False
+        self.lock = threading.RLock()
+        self._wakeup = None
+        return
+
+    @property
+    def wakeup(self):
+        """
+        (read, write) file descriptors of the pipe used to wake the loop
+        """
+        if self._wakeup is None:
+            reader, writer = os.pipe()
+            # if the pipe is full the loop is already going to wake up
+            flags = fcntl.fcntl(writer, fcntl.F_GETFL)
+            fcntl.fcntl(writer, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+            self._wakeup = reader, writer
+        return self._wakeup
+
+    def wake(self):
+        """
+        Interrupts the loop's `select`
+        """
+        try:
+            os.write(self.wakeup[1], WAKE)
+        except OSError as error:
+            if error.errno != errno.EAGAIN:
+                raise
+        return
+
+    @staticmethod
+    def source(stdout):
+        """
+        Builds the source for the stdout returned by a client's exec_command
+
+        :param:
+
+         - `stdout`: paramiko ChannelFile, LocalOutput or TelnetOutput
+
+        :return: ChannelSource, PipeSource or TelnetSource
+        :raise: TunaError if the output isn't from an SSH, local or telnet client
+        """
+        if hasattr(stdout, 'channel'):
+            return ChannelSource(stdout.channel)
+        if hasattr(stdout, 'process'):
+            return PipeSource(stdout.pipe, stdout.process)
+        if hasattr(stdout, 'client') and hasattr(stdout.client, 'read_very_eager'):
+            return TelnetSource(stdout.client, prompt=getattr(stdout, 'prompt', None))
+        raise TunaError("Unable to stream the output of a {0}".format(type(stdout)))
+
+    def add(self, source, callback, timeout=None, name=None, on_close=None):
+        """
+        Adds a source to read (and starts the loop if it isn't running)
+
+        :param:
+
+         - `source`: ChannelSource-like object
+         - `callback`: callable to send each line to
+         - `timeout`: seconds to read before cancelling (None means until the end)
+         - `name`: identifier for the log messages
+         - `on_close`: callable to call once the stream is finished
+
+        :return: StreamTask
+        """
+        task = StreamTask(loop=self, source=source, callback=callback,
+                          timeout=timeout, name=name, on_close=on_close)
+        with self.lock:
+            self.adding.append(task)
+        self.start()
+        self.wake()
+        return task
+
+    def exec_command(self, connection, command, callback, timeout=None,
+                     name=None, on_close=None):
+        """
+        Sends the command and adds its output to the loop
+
+        :param:
+
+         - `connection`: TheHost-like object with an `exec_command` method
+         - `command`: string to send
+         - `callback`: callable to send each line to
+         - `timeout`: seconds to read before cancelling (None means until the end)
+         - `name`: identifier for the log messages (default is the command)
+         - `on_close`: callable to call once the stream is finished
+
+        :return: StreamTask
+        """
+        if name is None:
+            name = command
+        stdin, stdout, stderr = connection.exec_command(command, timeout=None)
+        return self.add(self.source(stdout), callback=callback, timeout=timeout,
+                        name=name, on_close=on_close)
+
+    def cancel(self, task):
+        """
+        Asks the loop to stop reading the task's stream
+
+        :param:
+
+         - `task`: StreamTask returned by `add`
+        """
+        with self.lock:
+            self.cancelling.append(task)
+        self.wake()
+        return
+
+    def start(self):
+        """
+        Starts the loop's thread if it isn't running
+        """
+        with self.lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self.stopping = False
+            self.reset()
+            self.thread.start()
+        return
+
+    def run(self):
+        """
+        Reads the streams until stopped
+        """
+        wake_reader = self.wakeup[0]
+        while True:
+            with self.lock:
+                adding, self.adding = self.adding, []
+                cancelling, self.cancelling = self.cancelling, []
+                stopping = self.stopping
+            for task in adding:
+                self.tasks[task.source.fileno()] = task
+            for task in cancelling:
+                self.finish(task, StreamLoopConstants.cancelled)
+            if stopping:
+                for task in self.tasks.values():
+                    self.finish(task, StreamLoopConstants.stopped)
+                return
+
+            now = monotonic()
+            wait = self.poll_interval
+            for task in self.tasks.values():
+                if task.deadline is None:
+                    continue
+                if task.deadline <= now:
+                    self.finish(task, StreamLoopConstants.timeout)
+                else:
+                    wait = min(wait, task.deadline - now)
+
+            try:
+                readable, writeable, exceptional = select.select([wake_reader] + self.tasks.keys(),
+                                                                 [], [], wait)
+            except select.error as error:
+                if error.args[0] == errno.EINTR:
+                    continue
+                raise
+            for descriptor in readable:
+                if descriptor == wake_reader:
+                    os.read(wake_reader, StreamLoopConstants.chunk_size)
+                elif descriptor in self.tasks:
+                    self.read(self.tasks[descriptor])
+        return
+
+    def read(self, task):
+        """
+        Reads the task's source and sends the complete lines to its callback
+
+        :param:
+
+         - `task`: StreamTask whose source is readable
+        """
+        try:
+            data = task.source.read()
+        except Exception as error:
+            self.log_error(error, " (stream {0})".format(task))
+            self.finish(task, StreamLoopConstants.error)
+            return
+        for line in task.buffer.feed(data):
+            self.dispatch(task, line)
+        if task.source.eof:
+            self.finish(task, StreamLoopConstants.eof)
+        return
+
+    def dispatch(self, task, line):
+        """
+        Sends a line to the task's callback (logging rather than raising errors)
+
+        :param:
+
+         - `task`: StreamTask the line came from
+         - `line`: line of output
+        """
+        task.lines += 1
+        try:
+            task.callback(line)
+        except Exception as error:
+            task.errors += 1
+            self.log_error(error, " (stream {0} callback)".format(task))
+        return
+
+    def finish(self, task, reason):
+        """
+        Removes the task, flushes its partial line, closes its source and calls `on_close`
+
+        :param:
+
+         - `task`: StreamTask to finish
+         - `reason`: why it finished (one of the StreamLoopConstants reasons)
+        """
+        if task.finished.is_set():
+            return
+        for descriptor, known in self.tasks.items():
+            if known is task:
+                del self.tasks[descriptor]
+        partial = task.buffer.flush()
+        if partial:
+            self.dispatch(task, partial)
+        for error in task.source.errors:
+            self.logger.error("{0}: {1}".format(task, error.rstrip()))
+        try:
+            task.source.close()
+        except Exception as error:
+            self.log_error(error, " (closing stream {0})".format(task))
+        if task.on_close is not None:
+            try:
+                task.on_close()
+            except Exception as error:
+                self.log_error(error, " (stream {0} on_close)".format(task))
+        task.reason = reason
+        self.logger.debug("{0} finished ({1}, {2} lines)".format(task, reason, task.lines))
+        task.finished.set()
+        return
+
+    def stop(self, timeout=StreamLoopConstants.stop_timeout):
+        """
+        Finishes all the tasks and stops the loop's thread
+
+        :param:
+
+         - `timeout`: seconds to wait for the thread to stop
+        """
+        with self.lock:
+            self.stopping = True
+            thread = self._thread
+        if thread is None:
+            return
+        self.wake()
+        thread.join(timeout)
+        return
+# end class StreamLoop
@@ -1,6 +1,9 @@
 
 # python Libraries
+from collections import deque
+import select
 import telnetlib
+import time
 import re
 from cStringIO import StringIO
 import random
@@ -196,7 +199,7 @@ class TelnetClient(BaseClient):
             raise TunaError("Unable to set the prompt to '{0}'".format(self.prompt))
         return
 
-    def exec_command(self, command, timeout=None):
+    def exec_command(self, command, timeout=None, idempotent=False):
         """
         The main interface.
 
@@ -207,6 +210,7 @@ class TelnetClient(BaseClient):
 
          - `command`: The command to execute on the device
          - `timeout`: The readline timeout
+         - `idempotent`: ignored (the telnet client doesn't reconnect)
 
         :return: TelnetOutput with the this object as client
         """
@@ -254,9 +258,11 @@ class TelnetClient(BaseClient):
 # end class TelnetClient
 
 
-MATCH_INDEX = 0
-MATCHING_STRING = 2
-TIMEOUT_INDEX = -1
+TIMEOUT_WARNING = "Output timed out without reaching the prompt"
+PROMPT_AT_END = r"(?:{0})\s*$"
+CHUNK_SIZE = 65536
+# telnetlib drops these from the output
+IGNORED = telnetlib.theNULL + '\021'
 
 
 class TelnetOutput(BaseClass):
@@ -277,47 +283,112 @@ class TelnetOutput(BaseClass):
         self.prompt = prompt
         self.end_of_line = end_of_line
         self.timeout = timeout
-        self.endings = [end_of_line, prompt]
-        self.line_ending_index = 0
-        self.prompt_index = 1
+        self.prompt_expression = re.compile(PROMPT_AT_END.format(prompt))
+        self.buffer = EMPTY_STRING
+        self.lines = deque()
         self.finished = False
         return
 
+    def receive(self):
+        """
+        Reads a chunk of output from the telnet client
+
+        :precondition: the client has queued output or its socket is readable
+        :return: string of output (may be empty if it was all telnet commands)
+        :raise: EOFError if the connection closed
+        """
+        client = self.client
+        if client.rawq:
+            # left over from telnetlib's own reads (e.g. the command's echo)
+            client.process_rawq()
+        if client.cookedq:
+            data, client.cookedq = client.cookedq, EMPTY_STRING
+            return data
+        data = client.sock.recv(CHUNK_SIZE)
+        if not data:
+            client.eof = True
+            raise EOFError("telnet connection closed")
+        if telnetlib.IAC in data or client.iacseq or client.sb:
+            client.rawq += data
+            client.process_rawq()
+            data, client.cookedq = client.cookedq, EMPTY_STRING
+            return data
+        return data.translate(None, IGNORED)
+
+    def fill(self):
+        """
+        Adds the next chunk of output to the buffer (waiting up to the timeout if there isn't any)
+
+        :return: False if it timed out or the connection closed, True otherwise
+        """
+        end_time = None
+        if self.timeout is not None:
+            end_time = time.time() + self.timeout
+        while True:
+            try:
+                if not (self.client.rawq or self.client.cookedq):
+                    remaining = None
+                    if end_time is not None:
+                        remaining = end_time - time.time()
+                        if remaining <= 0:
+                            return False
+                    readable, writeable, exceptional = select.select([self.client], [], [], remaining)
+                    if not readable:
+                        return False
+                data = self.receive()
+            except EOFError:
+                self.logger.debug("The telnet connection closed")
+                return False
+            except AttributeError as error:
+                self.logger.debug(error)
+                self.logger.debug('client already closed?')
+                return False
+            if data:
+                self.buffer += data
+                return True
+        return
+
+    def split(self):
+        """
+        Moves the complete lines from the buffer to the lines and checks the rest for the prompt
+
+        :postcondition:
+
+         - self.buffer has no line-endings in it
+         - self.finished is True if the buffer ended with the prompt
+        """
+        if self.end_of_line in self.buffer:
+            lines = self.buffer.split(self.end_of_line)
+            self.buffer = lines.pop()
+            self.lines.extend(line + self.end_of_line for line in lines)
+        match = self.prompt_expression.search(self.buffer)
+        if match:
+            # anything in front of the prompt is the last (unterminated) line
+            self.logger.debug("Stopping on : " + match.group())
+            if match.start():
+                self.lines.append(self.buffer[:match.start()])
+            self.buffer = EMPTY_STRING
+            self.finished = True
+        return
+
     def readline(self):
         """
         Reads a single line of output
         
-        :param:
-
-         - `timeout`: The readline timeout
-         
         :return: The next line of text
         """
-        self.logger.debug("calling expect with endings: {0} and timeout: {1}".format(self.endings,
-                                                                                         self.timeout))
-        try:
-            output = self.client.expect(self.endings, self.timeout)
-        except AttributeError as error:
-            self.logger.debug(error)
-            self.logger.debug('client already closed?')
-            return EOF
-
-        if output[MATCH_INDEX] == self.prompt_index:
-            # matched the prompt, this output is finished
-            self.logger.debug("Stopping on : " + output[MATCHING_STRING])
-            return EOF
-        if output[MATCH_INDEX] == self.line_ending_index:
-            self.logger.debug("Matched line ending")
-            return output[MATCHING_STRING]
-        if output[MATCH_INDEX] == TIMEOUT_INDEX:
-            # should this be an end of file?
-            self.logger.warning("Output timed out without reaching the prompt")
-            return EOF
-        else:
-            # this should never be reached -- something bad has happened
-            self.logger.error(output)
-            raise TunaError("There is a bug in the TelnetOutput. So sad.")
-        return 
+        while not self.lines and not self.finished:
+            if not self.fill():
+                self.logger.warning(TIMEOUT_WARNING)
+                if self.buffer:
+                    self.lines.append(self.buffer)
+                    self.buffer = EMPTY_STRING
+                self.finished = True
+                break
+            self.split()
+        if self.lines:
+            return self.lines.popleft()
+        return EOF
 
     def next(self):
         """
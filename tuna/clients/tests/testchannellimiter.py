@@ -0,0 +1,159 @@
+
+# python standard library
+import unittest
+import threading
+import time
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna import TunaError
+from tuna.clients.channellimiter import ChannelLimiter
+from tuna.clients.simpleclient import SimpleClient
+from tuna.hosts.host import TheHost
+
+
+class TestChannelLimiter(unittest.TestCase):
+    def setUp(self):
+        self.limiter = ChannelLimiter(limit=2, poll_interval=0.01)
+        return
+
+    def test_limit(self):
+        """
+        Does it let in up to `limit` callers and no more?
+        """
+        self.assertTrue(self.limiter.acquire(timeout=0))
+        self.assertTrue(self.limiter.acquire(timeout=0))
+        self.assertFalse(self.limiter.acquire(timeout=0.01))
+        self.limiter.release()
+        self.assertTrue(self.limiter.acquire(timeout=0))
+        self.assertEqual(2, self.limiter.active)
+        return
+
+    def test_fairness(self):
+        """
+        Are waiting callers let in in the order that they arrived?
+        """
+        limiter = ChannelLimiter(limit=1)
+        order = []
+        limiter.acquire()
+        threads = []
+        for index in xrange(5):
+            def caller(index=index):
+                with limiter:
+                    order.append(index)
+                return
+            thread = threading.Thread(target=caller)
+            thread.start()
+            threads.append(thread)
+            # wait for it to get in line
+            while len(limiter.waiting) < index + 1:
+                time.sleep(0.001)
+        limiter.release()
+        for thread in threads:
+            thread.join(1)
+        self.assertEqual(range(5), order)
+        return
+
+    def test_timeout(self):
+        """
+        Does a timed-out caller leave the line (without blocking the ones behind it)?
+        """
+        limiter = ChannelLimiter(limit=1, timeout=0.01)
+        limiter.acquire()
+        with self.assertRaises(TunaError):
+            with limiter:
+                pass
+        self.assertEqual(0, len(limiter.waiting))
+        limiter.release()
+        with limiter:
+            self.assertEqual(1, limiter.active)
+        self.assertEqual(0, limiter.active)
+        return
+
+    def test_hold(self):
+        """
+        Is a held slot only given back once its check says it's closed?
+        """
+        closed = [False]
+        self.limiter.acquire()
+        self.limiter.hold(lambda: closed[0])
+        self.limiter.acquire()
+        self.assertFalse(self.limiter.acquire(timeout=0.05))
+        self.assertEqual(0, self.limiter.reap())
+
+        closed[0] = True
+        self.assertTrue(self.limiter.acquire(timeout=0.05))
+        self.assertEqual([], self.limiter.held)
+        self.assertEqual(2, self.limiter.active)
+        return
+
+    def test_host_limit(self):
+        """
+        Does the host only start `max_concurrent` commands at once?
+        """
+        host = TheHost(hostname='dut', test_interface='10.0.0.1', max_concurrent=2)
+        lock = threading.Lock()
+        counts = dict(running=0, most=0)
+        full = threading.Event()
+        def exec_command(command, timeout, idempotent):
+            with lock:
+                counts['running'] += 1
+                counts['most'] = max(counts['most'], counts['running'])
+                if counts['running'] == 2:
+                    full.set()
+            # hold the slot until both are in use (so a third would show up if it got in)
+            full.wait(1)
+            time.sleep(0.02)
+            with lock:
+                counts['running'] -= 1
+            return None, None, None
+        host._client = MagicMock()
+        host._client.exec_command.side_effect = exec_command
+        threads = [threading.Thread(target=host.exec_command, args=('ls',))
+                   for thread in xrange(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(1)
+        self.assertEqual(6, host._client.exec_command.call_count)
+        self.assertEqual(2, counts['most'])
+
+        # telnet hosts only send one at a time
+        self.assertEqual(1, TheHost(hostname='dut', test_interface='10.0.0.1',
+                                    connection_type='telnet').channels.limit)
+        return
+
+    def test_client_channels(self):
+        """
+        Does the SimpleClient keep a slot until the command's channel closes?
+        """
+        client = SimpleClient(hostname='dut', username='tester', max_channels=1,
+                              channel_timeout=0.05)
+        client._client = MagicMock()
+        client._client.get_transport.return_value.is_active.return_value = True
+        stdout = MagicMock()
+        stdout.channel.closed = False
+        client._client.exec_command.return_value = (MagicMock(), stdout, MagicMock())
+        client.channels.poll_interval = 0.01
+
+        self.assertIs(stdout, client.exec_command('iperf -s')[1])
+        with self.assertRaises(TunaError):
+            client.exec_command('ls')
+        self.assertEqual(1, client._client.exec_command.call_count)
+
+        stdout.channel.closed = True
+        client.exec_command('ls')
+        self.assertEqual(2, client._client.exec_command.call_count)
+
+        # a failed send gives the slot back
+        stdout.channel.closed = True
+        client._client.exec_command.side_effect = EOFError("gone")
+        client.reconnect = MagicMock()
+        client.channels.reap()
+        with self.assertRaises(EOFError):
+            client.exec_command('ls')
+        self.assertEqual(0, client.channels.active)
+        return
+# end class TestChannelLimiter
@@ -0,0 +1,124 @@
+
+# python standard library
+import unittest
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna.clients.connectionregistry import ConnectionRegistry, ConnectionKey
+from tuna.infrastructure.metrics import METRICS
+from tuna.hosts.host import TheHost
+
+
+class TestConnectionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ConnectionRegistry()
+        self.key = ConnectionKey(hostname='dut', port='22', username='tester',
+                                 connection_type='ssh', credentials='abc')
+        self.client = MagicMock()
+        self.client.counters = dict(reconnects=1, reconnect_failures=2,
+                                    reruns=3, reconnect_seconds=0.5)
+        self.constructor = MagicMock(return_value=self.client)
+        return
+
+    def test_acquire(self):
+        """
+        Is the client only built the first time it's acquired?
+        """
+        self.assertIs(self.client, self.registry.acquire(self.key, self.constructor))
+        self.assertIs(self.client, self.registry.acquire(self.key, self.constructor))
+        self.assertEqual(1, self.constructor.call_count)
+        self.assertEqual(2, self.registry.references(self.key))
+
+        # a different key gets its own client
+        other = self.key._replace(credentials='def')
+        self.registry.acquire(other, MagicMock())
+        self.assertEqual(1, self.registry.references(other))
+        return
+
+    def test_release(self):
+        """
+        Is the client only closed when the last user releases it?
+        """
+        self.registry.acquire(self.key, self.constructor)
+        self.registry.acquire(self.key, self.constructor)
+        self.registry.release(self.key)
+        self.assertFalse(self.client.close.called)
+        self.assertEqual(1, self.registry.references(self.key))
+        self.registry.release(self.key)
+        self.client.close.assert_called_once_with()
+        self.assertEqual(0, self.registry.references(self.key))
+
+        # releasing an unknown key does nothing
+        self.registry.release(self.key)
+        self.assertEqual(1, self.client.close.call_count)
+
+        # after the last release a new client is built
+        self.registry.acquire(self.key, self.constructor)
+        self.assertEqual(2, self.constructor.call_count)
+        return
+
+    def test_counters(self):
+        """
+        Are the opened, reused, closed and active counts kept (with the clients' reconnect counts)?
+        """
+        self.registry.acquire(self.key, self.constructor)
+        self.registry.acquire(self.key, self.constructor)
+        counters = self.registry.counters
+        self.assertEqual(1, counters['opened'])
+        self.assertEqual(1, counters['reused'])
+        self.assertEqual(0, counters['closed'])
+        self.assertEqual(1, counters['active'])
+        self.assertEqual(1, counters['reconnects'])
+        self.assertEqual(2, counters['reconnect_failures'])
+        self.assertEqual(3, counters['reruns'])
+        self.assertEqual(0.5, counters['reconnect_seconds'])
+
+        self.registry.release(self.key)
+        self.registry.release(self.key)
+        counters = self.registry.counters
+        self.assertEqual(1, counters['closed'])
+        self.assertEqual(0, counters['active'])
+        self.assertEqual(0, counters['reconnects'])
+
+        # the metrics add up its counts
+        self.assertIn(self.registry, METRICS.connection_registries)
+        return
+
+    def test_close(self):
+        """
+        Does close close every client whether or not it was released?
+        """
+        other = MagicMock()
+        self.registry.acquire(self.key, self.constructor)
+        self.registry.acquire(self.key._replace(hostname='other'), MagicMock(return_value=other))
+        self.registry.close()
+        self.client.close.assert_called_once_with()
+        other.close.assert_called_once_with()
+        self.assertEqual(2, self.registry.counters['closed'])
+        self.assertEqual(0, self.registry.references(self.key))
+        return
+
+    def test_credentials(self):
+        """
+        Do hosts with different credentials for the same login get different keys?
+        """
+        first = TheHost(hostname='dut', test_interface='10.0.0.1', username='tester',
+                        password='first')
+        second = TheHost(hostname='dut', test_interface='10.0.0.1', username='tester',
+                         password='second')
+        third = TheHost(hostname='dut', test_interface='10.0.0.2', username='tester',
+                        password='first')
+        self.assertNotEqual(first.connection_key, second.connection_key)
+        self.assertEqual(first.connection_key, third.connection_key)
+        # the password isn't kept in the key
+        self.assertNotIn('first', str(first.connection_key))
+
+        # the port is part of the key on its own
+        fourth = TheHost(hostname='dut', test_interface='10.0.0.1', username='tester',
+                         password='first', port=2222)
+        self.assertEqual('2222', fourth.connection_key.port)
+        self.assertEqual(first.connection_key.credentials, fourth.connection_key.credentials)
+        return
+# end class TestConnectionRegistry
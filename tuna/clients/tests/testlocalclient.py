@@ -0,0 +1,97 @@
+
+# python standard library
+import unittest
+import socket
+import time
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna.clients.localclient import LocalClient, DrainedOutput
+
+
+class TestLocalClient(unittest.TestCase):
+    def setUp(self):
+        self.client = LocalClient(hostname='localhost')
+        self.client._logger = MagicMock()
+        return
+
+    def tearDown(self):
+        self.client.close()
+        return
+
+    def test_output(self):
+        """
+        Are stdout and stderr read as lines (with the last unterminated line kept)?
+        """
+        stdin, stdout, stderr = self.client.exec_command("echo one; echo two >&2; printf three",
+                                                         timeout=5)
+        self.assertEqual(['one\n', 'three'], stdout.readlines())
+        self.assertIsInstance(stderr, DrainedOutput)
+        self.assertEqual('two\n', stderr.read())
+        # the output is finished
+        self.assertEqual('', stdout.readline())
+        self.assertEqual('', stderr.readline())
+        return
+
+    def test_heavy_stderr(self):
+        """
+        Does a command that writes more to stderr than a pipe holds finish while only stdout is read?
+        """
+        size = 1000000
+        command = "head -c {0} /dev/zero | tr '\\0' x >&2; echo done".format(size)
+        stdin, stdout, stderr = self.client.exec_command(command, timeout=5)
+        self.assertEqual(['done\n'], stdout.readlines())
+        self.assertEqual(size, len(stderr.read()))
+
+        # once it's closed the stderr isn't kept
+        stdin, stdout, stderr = self.client.exec_command(command, timeout=5)
+        stderr.close()
+        self.assertEqual(['done\n'], stdout.readlines())
+        stderr.thread.join(5)
+        self.assertEqual('', stderr.read())
+        return
+
+    def test_stdin(self):
+        """
+        Is the stdin handed back (and closed once the output ends)?
+        """
+        stdin, stdout, stderr = self.client.exec_command("cat", timeout=5)
+        stdin.write('echoed\n')
+        stdin.close()
+        self.assertEqual(['echoed\n'], stdout.readlines())
+
+        stdin, stdout, stderr = self.client.exec_command("echo hello", timeout=5)
+        stdout.read()
+        self.assertTrue(stdin.closed)
+        return
+
+    def test_timeout(self):
+        """
+        Is socket.timeout raised (by both outputs) if nothing arrives in time?
+        """
+        stdin, stdout, stderr = self.client.exec_command("sleep 5", timeout=0.05)
+        with self.assertRaises(socket.timeout):
+            stdout.readline()
+        with self.assertRaises(socket.timeout):
+            stderr.readline()
+        return
+
+    def test_kill(self):
+        """
+        Does closing the client stop the commands that are still running?
+        """
+        stdin, stdout, stderr = self.client.exec_command("sleep 30; echo late", timeout=5)
+        process = self.client.processes[-1]
+        start = time.time()
+        self.client.close()
+        self.assertEqual([], stdout.readlines())
+        self.assertEqual('', stderr.read())
+        self.assertLess(time.time() - start, 5)
+        process.wait()
+        self.assertIsNotNone(process.returncode)
+        self.assertTrue(stdin.closed)
+        self.assertEqual([], self.client.processes)
+        return
+# end class TestLocalClient
@@ -0,0 +1,169 @@
+
+# python standard library
+import unittest
+import socket
+
+# third-party
+from mock import MagicMock, patch
+
+# this package
+from tuna import TunaError
+from tuna.clients.simpleclient import SimpleClient, ConnectionError
+from tuna.infrastructure.metrics import METRICS
+
+
+class TestSimpleClient(unittest.TestCase):
+    def setUp(self):
+        self.client = SimpleClient(hostname='dut', username='tester', keepalive=0,
+                                   reconnect_attempts=4, backoff=0.5, max_backoff=1)
+        self.client._logger = MagicMock()
+        return
+
+    def connection(self, active=True):
+        """
+        :return: mock SSHClient whose transport is (or isn't) active
+        """
+        connection = MagicMock()
+        connection.get_transport.return_value.is_active.return_value = active
+        return connection
+
+    def test_alive(self):
+        """
+        Is the client only alive if it has a transport that's active?
+        """
+        self.assertFalse(self.client.alive)
+        self.client._client = self.connection(active=False)
+        self.assertFalse(self.client.alive)
+        self.client._client.get_transport.return_value = None
+        self.assertFalse(self.client.alive)
+        self.client._client = self.connection()
+        self.assertTrue(self.client.alive)
+        return
+
+    @patch('tuna.clients.simpleclient.time.sleep')
+    @patch('paramiko.SSHClient')
+    def test_reconnect(self, ssh_client, sleep):
+        """
+        Does it back off (doubling the wait) between failed attempts and count them?
+        """
+        old = self.connection(active=False)
+        self.client._client = old
+        ssh_client.return_value.connect.side_effect = [socket.error("refused"),
+                                                       socket.error("refused"),
+                                                       None]
+        self.client.reconnect()
+        old.close.assert_called_once_with()
+        self.assertIs(ssh_client.return_value, self.client._client)
+        self.assertEqual([((0.5,),), ((1.0,),)], sleep.call_args_list)
+        counters = self.client.counters
+        self.assertEqual(1, counters['reconnects'])
+        self.assertEqual(2, counters['reconnect_failures'])
+        self.assertEqual(0, counters['reruns'])
+        self.assertIsNotNone(counters['last_reconnect_seconds'])
+
+        # an active connection is left alone unless forced
+        self.client._client = self.connection()
+        self.client.reconnect()
+        self.assertEqual(1, self.client.reconnects)
+        return
+
+    @patch('tuna.clients.simpleclient.time.sleep')
+    @patch('paramiko.SSHClient')
+    def test_give_up(self, ssh_client, sleep):
+        """
+        Does it raise a ConnectionError after the last attempt (with the back-off capped)?
+        """
+        ssh_client.return_value.connect.side_effect = socket.error("no route to host")
+        with self.assertRaises(ConnectionError):
+            self.client.reconnect(force=True)
+        self.assertEqual(4, ssh_client.return_value.connect.call_count)
+        # 0.5, 1, then capped at max_backoff (no sleep after the last attempt)
+        self.assertEqual([((0.5,),), ((1.0,),), ((1.0,),)], sleep.call_args_list)
+        self.assertEqual(4, self.client.reconnect_failures)
+        self.assertEqual(0, self.client.reconnects)
+        self.assertIsNone(self.client._client)
+        return
+
+    def test_down_before_sending(self):
+        """
+        Does it reconnect before sending if the transport died?
+        """
+        self.client._client = self.connection(active=False)
+        fresh = self.connection()
+        fresh.exec_command.return_value = (MagicMock(), MagicMock(), MagicMock())
+        def reconnect(force=False):
+            self.client._client = fresh
+        self.client.reconnect = MagicMock(side_effect=reconnect)
+        self.client.exec_command('cat /proc/net/wireless')
+        self.client.reconnect.assert_called_once_with()
+        fresh.exec_command.assert_called_once_with('cat /proc/net/wireless\n', timeout=10)
+        return
+
+    def test_rerun(self):
+        """
+        Is an idempotent command re-sent once (and counted) after sending it fails?
+        """
+        self.client._client = self.connection()
+        self.client._client.exec_command.side_effect = socket.error("broken pipe")
+        fresh = self.connection()
+        fresh.exec_command.return_value = (MagicMock(), MagicMock(), MagicMock())
+        def reconnect(force=False):
+            self.client._client = fresh
+        self.client.reconnect = MagicMock(side_effect=reconnect)
+        self.client.exec_command('iwconfig', idempotent=True)
+        self.client.reconnect.assert_called_once_with(force=True)
+        self.assertEqual(1, fresh.exec_command.call_count)
+        self.assertEqual(1, self.client.counters['reruns'])
+
+        # if the re-send fails too the error is raised (and the channel slot given back)
+        self.client._client.exec_command.side_effect = socket.error("broken pipe")
+        fresh = self.connection()
+        fresh.exec_command.side_effect = socket.error("broken pipe")
+        with self.assertRaises(TunaError):
+            self.client.exec_command('iwconfig', idempotent=True)
+        self.assertEqual(2, self.client.reruns)
+        self.client.channels.reap()
+        self.assertEqual(0, self.client.channels.active)
+        return
+
+    def test_no_rerun(self):
+        """
+        Is a command that isn't idempotent sent only once?
+        """
+        self.client._client = self.connection()
+        self.client._client.exec_command.side_effect = socket.error("broken pipe")
+        self.client.reconnect = MagicMock()
+        with self.assertRaises(TunaError):
+            self.client.exec_command('reboot')
+        self.assertFalse(self.client.reconnect.called)
+        self.assertEqual(0, self.client.reruns)
+        return
+
+    @patch('tuna.clients.simpleclient.time.sleep')
+    @patch('paramiko.SSHClient')
+    def test_metrics(self, ssh_client, sleep):
+        """
+        Are the reconnects, failed attempts and re-sent commands exported in the metrics?
+        """
+        METRICS.reset()
+        ssh_client.return_value.connect.side_effect = [socket.error("refused"), None]
+        self.client.reconnect(force=True)
+
+        self.client._client = self.connection()
+        self.client._client.exec_command.side_effect = socket.error("broken pipe")
+        fresh = self.connection()
+        fresh.exec_command.return_value = (MagicMock(), MagicMock(), MagicMock())
+        def reconnect(force=False):
+            self.client._client = fresh
+        self.client.reconnect = MagicMock(side_effect=reconnect)
+        self.client.exec_command('iwconfig', idempotent=True)
+
+        samples = dict(line.split() for line in METRICS.render().splitlines()
+                       if not line.startswith('#'))
+        self.assertEqual('1', samples['tuna_ssh_reconnects_total'])
+        self.assertEqual('1', samples['tuna_ssh_reconnect_failures_total'])
+        self.assertEqual('1', samples['tuna_ssh_reruns_total'])
+        self.assertIn('tuna_ssh_reconnect_seconds_total', samples)
+        METRICS.reset()
+        return
+# end class TestSimpleClient
@@ -0,0 +1,236 @@
+
+# python standard library
+import unittest
+import os
+import select
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna import TunaError
+from tuna.clients.streamloop import StreamLoop, StreamLoopConstants, LineBuffer
+from tuna.clients.streamloop import ChannelSource, TelnetSource
+
+
+class TestLineBuffer(unittest.TestCase):
+    def test_feed(self):
+        """
+        Does it only give back complete lines (keeping the partial one)?
+        """
+        buffer = LineBuffer()
+        self.assertEqual([], buffer.feed('abc'))
+        self.assertEqual(['abcdef\n', 'g\n'], buffer.feed('def\ng\nh'))
+        self.assertEqual('h', buffer.flush())
+        self.assertEqual('', buffer.flush())
+        return
+# end class TestLineBuffer
+
+
+class FakeChannel(object):
+    """
+    A paramiko Channel stand-in that reads from a pipe
+    """
+    def __init__(self):
+        self.reader, self.writer = os.pipe()
+        self.eof_received = False
+        self.closed = False
+        self.stderr = []
+        return
+
+    def setblocking(self, blocking):
+        return
+
+    def fileno(self):
+        return self.reader
+
+    def recv_ready(self):
+        return bool(select.select([self.reader], [], [], 0)[0])
+
+    def recv(self, size):
+        return os.read(self.reader, size)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr)
+
+    def recv_stderr(self, size):
+        return self.stderr.pop(0)
+
+    def send(self, text):
+        os.write(self.writer, text)
+        return
+
+    def end(self):
+        os.close(self.writer)
+        return
+
+    def close(self):
+        self.closed = True
+        os.close(self.reader)
+        return
+# end class FakeChannel
+
+
+class FakeTelnet(object):
+    """
+    A telnetlib.Telnet stand-in that reads from a pipe
+    """
+    def __init__(self):
+        self.reader, self.writer = os.pipe()
+        return
+
+    def fileno(self):
+        return self.reader
+
+    def read_very_eager(self):
+        data = os.read(self.reader, 4096)
+        if not data:
+            raise EOFError("telnet connection closed")
+        return data
+
+    def send(self, text):
+        os.write(self.writer, text)
+        return
+# end class FakeTelnet
+
+
+class TestStreamLoop(unittest.TestCase):
+    def setUp(self):
+        self.loop = StreamLoop(poll_interval=0.05)
+        self.lines = []
+        self.callback = self.lines.append
+        return
+
+    def tearDown(self):
+        self.loop.stop()
+        return
+
+    def test_channel_lines(self):
+        """
+        Are the channel's lines sent to the callback as they complete (and the rest at the end)?
+        """
+        channel = FakeChannel()
+        on_close = MagicMock()
+        task = self.loop.add(ChannelSource(channel), self.callback, name='iperf',
+                             on_close=on_close)
+        channel.send('first\nsec')
+        channel.send('ond\nthird')
+        channel.stderr.append('warning\n')
+        channel.end()
+        self.assertTrue(task.wait(1))
+        self.assertEqual(['first\n', 'second\n', 'third'], self.lines)
+        self.assertEqual(StreamLoopConstants.eof, task.reason)
+        self.assertEqual(3, task.lines)
+        self.assertTrue(channel.closed)
+        on_close.assert_called_once_with()
+        self.assertEqual({}, self.loop.tasks)
+        return
+
+    def test_telnet_prompt(self):
+        """
+        Does the telnet stream end at the prompt?
+        """
+        telnet = FakeTelnet()
+        task = self.loop.add(TelnetSource(telnet, prompt='#'), self.callback)
+        telnet.send('64 bytes from 10.0.0.1\n64 bytes')
+        telnet.send(' from 10.0.0.2\n# ')
+        self.assertTrue(task.wait(1))
+        self.assertEqual(['64 bytes from 10.0.0.1\n', '64 bytes from 10.0.0.2\n'], self.lines)
+        self.assertEqual(StreamLoopConstants.eof, task.reason)
+        return
+
+    def test_timeout(self):
+        """
+        Is a task that runs past its timeout cancelled (without stopping the other tasks)?
+        """
+        slow = FakeChannel()
+        other = FakeChannel()
+        slow_task = self.loop.add(ChannelSource(slow), self.callback, timeout=0.1)
+        other_lines = []
+        other_task = self.loop.add(ChannelSource(other), other_lines.append)
+        slow.send('partial')
+        self.assertTrue(slow_task.wait(1))
+        self.assertEqual(StreamLoopConstants.timeout, slow_task.reason)
+        # the partial line is flushed when it's cancelled
+        self.assertEqual(['partial'], self.lines)
+        self.assertTrue(slow.closed)
+
+        self.assertFalse(other_task.finished.is_set())
+        other.send('still here\n')
+        other.end()
+        self.assertTrue(other_task.wait(1))
+        self.assertEqual(['still here\n'], other_lines)
+        return
+
+    def test_cancel(self):
+        """
+        Does cancelling a task finish it right away?
+        """
+        channel = FakeChannel()
+        task = self.loop.add(ChannelSource(channel), self.callback)
+        channel.send('one\n')
+        task.cancel()
+        self.assertTrue(task.wait(1))
+        self.assertEqual(StreamLoopConstants.cancelled, task.reason)
+        self.assertTrue(channel.closed)
+        return
+
+    def test_stop(self):
+        """
+        Does stopping the loop finish every task (including ones not yet picked up) and end the thread?
+        """
+        channels = [FakeChannel() for index in xrange(3)]
+        closes = []
+        tasks = [self.loop.add(ChannelSource(channel), self.callback,
+                               on_close=lambda index=index: closes.append(index))
+                 for index, channel in enumerate(channels)]
+        # holding the lock makes the loop see the last task and the stop at the same time
+        with self.loop.lock:
+            late = FakeChannel()
+            late_task = self.loop.add(ChannelSource(late), self.callback)
+            self.loop.stopping = True
+        self.loop.stop(timeout=1)
+        self.assertFalse(self.loop.thread.is_alive())
+        for task in tasks + [late_task]:
+            self.assertTrue(task.finished.is_set())
+            self.assertEqual(StreamLoopConstants.stopped, task.reason)
+        self.assertEqual([0, 1, 2], sorted(closes))
+        self.assertTrue(all(channel.closed for channel in channels + [late]))
+        self.assertEqual({}, self.loop.tasks)
+
+        # adding after a stop starts the loop again
+        channel = FakeChannel()
+        task = self.loop.add(ChannelSource(channel), self.callback)
+        channel.send('again\n')
+        channel.end()
+        self.assertTrue(task.wait(1))
+        self.assertEqual(['again\n'], self.lines)
+        return
+
+    def test_callback_error(self):
+        """
+        Does a failing callback get logged rather than stopping the stream?
+        """
+        channel = FakeChannel()
+        callback = MagicMock(side_effect=[ValueError("bad line"), None])
+        task = self.loop.add(ChannelSource(channel), callback)
+        channel.send('one\ntwo\n')
+        channel.end()
+        self.assertTrue(task.wait(1))
+        self.assertEqual(2, callback.call_count)
+        self.assertEqual(1, task.errors)
+        self.assertEqual(StreamLoopConstants.eof, task.reason)
+        return
+
+    def test_source(self):
+        """
+        Does it pick the source that matches the client's output?
+        """
+        stdout = MagicMock(spec=['channel'])
+        self.assertIsInstance(StreamLoop.source(stdout), ChannelSource)
+        stdout = MagicMock(spec=['client', 'prompt'])
+        self.assertIsInstance(StreamLoop.source(stdout), TelnetSource)
+        with self.assertRaises(TunaError):
+            StreamLoop.source(object())
+        return
+# end class TestStreamLoop
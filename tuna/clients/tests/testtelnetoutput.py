@@ -0,0 +1,113 @@
+
+# python standard library
+import unittest
+import socket
+import telnetlib
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna.clients.telnetclient import TelnetOutput, TIMEOUT_WARNING
+
+
+PROMPT = 'root@dut#'
+CRLF = '\r\n'
+
+class TestTelnetOutput(unittest.TestCase):
+    def setUp(self):
+        self.device, local = socket.socketpair()
+        self.client = telnetlib.Telnet()
+        self.client.sock = local
+        self.output = TelnetOutput(client=self.client, prompt=PROMPT, timeout=0.05)
+        self.output._logger = MagicMock()
+        return
+
+    def tearDown(self):
+        self.device.close()
+        self.client.sock.close()
+        return
+
+    def test_lines(self):
+        """
+        Are the lines returned with their line-endings and the end marked by an empty string?
+        """
+        self.device.sendall('one' + CRLF + 'two' + CRLF + PROMPT)
+        self.assertEqual(['one' + CRLF, 'two' + CRLF, ''], self.output.readlines())
+        # the output is finished
+        self.assertEqual('', self.output.readline())
+        return
+
+    def test_split_prompt(self):
+        """
+        Is a prompt split across chunks still found?
+        """
+        self.device.sendall('one' + CRLF + 'tw')
+        self.assertEqual('one' + CRLF, self.output.readline())
+        self.device.sendall('o' + CRLF + PROMPT[:4])
+        self.assertEqual('two' + CRLF, self.output.readline())
+        self.device.sendall(PROMPT[4:] + ' ')
+        self.assertEqual('', self.output.readline())
+        self.assertTrue(self.output.finished)
+        self.assertFalse(self.output._logger.warning.called)
+        return
+
+    def test_prompt_tail(self):
+        """
+        Does a tail that's only the prompt end the output (and a line in front of it get returned)?
+        """
+        self.device.sendall(PROMPT)
+        self.assertEqual('', self.output.readline())
+        self.assertEqual(0, len(self.output.lines))
+
+        output = TelnetOutput(client=self.client, prompt=PROMPT, timeout=0.05)
+        self.device.sendall('one' + CRLF + 'unterminated' + PROMPT)
+        self.assertEqual(['one' + CRLF, 'unterminated', ''], output.readlines())
+
+        # a prompt in the middle of a line isn't the end
+        output = TelnetOutput(client=self.client, prompt=PROMPT, timeout=0.05)
+        self.device.sendall('echo ' + PROMPT + ' done' + CRLF + PROMPT)
+        self.assertEqual(['echo ' + PROMPT + ' done' + CRLF, ''], output.readlines())
+        return
+
+    def test_queued(self):
+        """
+        Is the output telnetlib already read (e.g. with the command's echo) used first?
+        """
+        self.client.cookedq = 'queued' + CRLF
+        self.device.sendall('next' + CRLF + PROMPT)
+        self.assertEqual(['queued' + CRLF, 'next' + CRLF, ''], self.output.readlines())
+        return
+
+    def test_telnet_commands(self):
+        """
+        Are telnet commands in a chunk handled by telnetlib rather than returned?
+        """
+        command = telnetlib.IAC + telnetlib.WILL + telnetlib.ECHO
+        self.device.sendall('one' + command + CRLF + PROMPT)
+        self.assertEqual(['one' + CRLF, ''], self.output.readlines())
+        # telnetlib refused the option
+        self.assertEqual(telnetlib.IAC + telnetlib.DONT + telnetlib.ECHO,
+                         self.device.recv(3))
+        return
+
+    def test_timeout(self):
+        """
+        If the prompt never comes, does it give back what it has once the timeout runs out?
+        """
+        self.device.sendall('one' + CRLF + 'partial')
+        self.assertEqual(['one' + CRLF, 'partial', ''], self.output.readlines())
+        self.output._logger.warning.assert_called_once_with(TIMEOUT_WARNING)
+        self.assertTrue(self.output.finished)
+        return
+
+    def test_closed(self):
+        """
+        Does the output end if the connection closes?
+        """
+        self.device.sendall('one' + CRLF)
+        self.device.close()
+        self.assertEqual(['one' + CRLF, ''], self.output.readlines())
+        self.assertTrue(self.client.eof)
+        return
+# end class TestTelnetOutput
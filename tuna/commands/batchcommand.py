@@ -0,0 +1,124 @@
+
+# python standard library
+import socket
+
+# this package
+from tuna import BaseClass
+from tuna import TunaError
+
+
+NEWLINE = '\n'
+SEMICOLON_JOIN = '; '
+
+
+class BatchCommandConstants(object):
+    """
+    Constants for the BatchCommand
+    """
+    __slots__ = ()
+    marker = '__tuna_batch__'
+    mark = "echo '{marker} {field}'; echo '{marker} {field}' >&2"
+
+
+class BatchCommand(BaseClass):
+    """
+    Runs a set of commands as one script
+    """
+    def __init__(self, connection, commands):
+        """
+        BatchCommand constructor
+
+        :param:
+
+         - `connection`: TheHost-like connection to send the script to
+         - `commands`: dict of field:TheCommand
+        """
+        super(BatchCommand, self).__init__()
+        self.connection = connection
+        self.commands = commands
+        self._script = None
+        self._timeout = None
+        return
+
+    @property
+    def script(self):
+        """
+        The commands joined into one line with markers in front of each command
+        """
+        if self._script is None:
+            self._script = SEMICOLON_JOIN.join(BatchCommandConstants.mark.format(marker=BatchCommandConstants.marker,
+                                                                                 field=field) +
+                                               SEMICOLON_JOIN + command.command_arguments.rstrip(NEWLINE)
+                                               for field, command in self.commands.iteritems())
+        return self._script
+
+    @property
+    def timeout(self):
+        """
+        The largest of the commands' timeouts
+        """
+        if self._timeout is None:
+            self._timeout = max(command.timeout for command in self.commands.itervalues())
+        return self._timeout
+
+    def split(self, lines):
+        """
+        Splits the lines up by the markers
+
+        :param:
+
+         - `lines`: iterable lines of output with markers in it
+
+        :return: dict of field:list of lines
+        """
+        outputs = {}
+        field = None
+        for line in lines:
+            while BatchCommandConstants.marker in line:
+                # a command whose output didn't end with a newline leaves the marker mid-line
+                before, after = line.split(BatchCommandConstants.marker, 1)
+                if field is not None and before:
+                    outputs[field].append(before)
+                # the marker is echoed on its own line so everything after it is the field
+                field, line = after.strip(), ''
+                outputs[field] = []
+            if field is not None and line:
+                outputs[field].append(line)
+        return outputs
+
+    def run_individually(self):
+        """
+        The fallback -- calls each command separately
+
+        :return: dict of field:data
+        """
+        return dict((field, command()) for field, command in self.commands.iteritems())
+
+    def __call__(self):
+        """
+        Sends the script and extracts each field's data from the output
+
+        :return: dict of field:data
+        :raise: TunaError if a command's error-expression matches its output
+        """
+        if getattr(self.connection, 'prefix', None) is not None:
+            return self.run_individually()
+        try:
+            stdin, stdout, stderr = self.connection.exec_command(self.script,
+                                                                 timeout=self.timeout,
+                                                                 idempotent=True)
+            outputs = self.split(stdout)
+            errors = self.split(stderr)
+        except (socket.error, TunaError) as error:
+            self.logger.warning("Batch failed ({0}), running the commands individually".format(error))
+            return self.run_individually()
+
+        data = {}
+        for field, command in self.commands.iteritems():
+            if field in outputs:
+                data[field] = command.process(outputs[field], errors.get(field, []))
+            else:
+                self.logger.warning("No output for '{0}' in the batch, running it individually".format(field))
+                data[field] = command()
+        return data
+# end class BatchCommand
@@ -218,7 +218,22 @@ class TheCommand(BaseClass):
         :raise: TunaError if data matched but no group found
         """
         stdin, stdout, stderr = self.connection.exec_command(self.command_arguments,
-                                                             timeout=self.timeout)
+                                                             timeout=self.timeout,
+                                                             idempotent=True)
+        return self.process(stdout, stderr)
+
+    def process(self, stdout, stderr):
+        """
+        Extracts the data from the output (this is separate so batched output can use it)
+
+        :param:
+
+         - `stdout`: iterable lines of standard output
+         - `stderr`: iterable lines of standard error
+
+        :return: the matched data or self.not_available
+        :raise: TunaError if data matched but no group found or the error-expression matched
+        """
         #data = self.not_available
         #for line in stdout:
         #    self.logger.debug(line)
@@ -236,7 +251,6 @@ class TheCommand(BaseClass):
         lines = (self.delimiter.join((group for group in match.groups() if group is not None))
                  for match in matches if match is not None)
         data = self.delimiter.join(lines)
-        print data
         if not data:
             self.logger.warning(CommandConstants.command_warning.format(self.data_expression.pattern,
                                                                         self.command_arguments.rstrip('\n')))
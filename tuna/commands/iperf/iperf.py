@@ -17,9 +17,14 @@ from iperfsettings import IperfConstants, IperfServerSettings, IperfClientSettin
 from iperfexpressions import HumanExpression, CsvExpression
 from iperfparser import IperfParser
 from tuna.parts.storage.file_writer import LogWriter, TimestampWriter
+from tuna.parts.storage.file_writer import BufferedTimestampWriter
 from tuna.infrastructure.baseconfiguration import BaseConfiguration
 from tuna import ConfigurationError
 from tuna.parts.eventtimer import EventTimer
+from tuna.hosts.host import HostEnum
+from tuna.parts.phasetimer import PhaseTimerConstants, phase
+from persistentserver import PersistentServer, ServerSession
+from persistentserver import PersistentServerConstants
 
 
 UNDERSCORE = '_'
@@ -28,6 +33,8 @@ IPERF = 'iperf {0}'
 CLIENT_PREFIX = 'client_'
 SERVER_PREFIX = 'server_'
 TIMESTAMP = '{timestamp}'
+READY_TIMEOUT = 10
+PROBE_INTERVAL = 0.5
 
 
 ClientServer = namedtuple('ClientServer', 'client server'.split())
@@ -38,7 +45,8 @@ class IperfClass(BaseClass):
     A runner of iperf tests
     """
     def __init__(self, dut, traffic_server, client_settings,
-                 server_settings, storage, parser=None, aggregator=None):
+                 server_settings, storage, parser=None, aggregator=None,
+                 persistent=False):
         """
         IperfClass Constructor
 
@@ -51,6 +59,7 @@ class IperfClass(BaseClass):
          - `storage`: File-like object to write output to
          - `parser`: parser to extract numeric values from the lines
          - `aggregator`: callable to reduce parser.intervals.values() to a number
+         - `persistent`: if True, leave the servers running between calls
         """
         super(IperfClass, self).__init__()
         self.dut = dut
@@ -65,8 +74,21 @@ class IperfClass(BaseClass):
         self._parser = parser
         self._aggregator = aggregator
         self.aggregated_value = None
+        self.persistent = persistent
+        self.kill_processes = True
+        self._servers = None
+        self.server_process = None
         return
 
+    @property
+    def servers(self):
+        """
+        A dict of {direction:PersistentServer} (only used if self.persistent)
+        """
+        if self._servers is None:
+            self._servers = {}
+        return self._servers
+
     @property
     def aggregator(self):
         """
@@ -79,14 +101,16 @@ class IperfClass(BaseClass):
     @property
     def event_timer(self):
         """
-        An event-timer instance to help the server block the client
+        An event-timer whose event is set once the server is ready
+
+        Its `seconds` is the longest time to wait for the server before giving up
         """
         if self._event_timer is None:
             try:
                 self._event_timer = EventTimer(seconds=self.server_settings.sleep)
             except AttributeError as error:
-                self.logger.debug('server_settings.sleep not given, using 1 second')
-                self._event_timer = EventTimer(seconds=1)
+                self.logger.debug('server_settings.sleep not given, using {0} seconds'.format(READY_TIMEOUT))
+                self._event_timer = EventTimer(seconds=READY_TIMEOUT)
         return self._event_timer
 
     @property
@@ -119,7 +143,7 @@ class IperfClass(BaseClass):
                                                                                               self.server_settings.get('udp')))
         return self._udp
         
-    def __call__(self, direction, filename):
+    def __call__(self, direction, filename, gate=None):
         """
         the main interface
 
@@ -127,6 +151,7 @@ class IperfClass(BaseClass):
 
          - `direction`: IperfConstants.up or IperfConstants.down (probably 'downstream' or 'upstream')
          - `filename`: path to use as basis for filename
+         - `gate`: optional StartingGate to wait at (once the server is ready) before starting the client
 
         :return: aggregated value (assumes side-effect of self.run is to set self.aggregated_value)
         """
@@ -140,10 +165,11 @@ class IperfClass(BaseClass):
         # this could be done with tuple-unpacking but I'm trying to get rid of ordering mix-ups
         client, server = client_server.client, client_server.server
         
-        # try to kill all the iperf sessions
-        self.logger.info(BLUE_BOLD_RESET.format("** Killing Iperf Processes **"))
-        client.kill_all('iperf')
-        server.kill_all('iperf')
+        if self.kill_processes and not self.persistent:
+            # try to kill all the iperf sessions
+            self.logger.info(BLUE_BOLD_RESET.format("** Killing Iperf Processes **"))
+            client.kill_all('iperf')
+            server.kill_all('iperf')
 
         # add the direction and protocol to the filename
         if self.udp:
@@ -160,9 +186,23 @@ class IperfClass(BaseClass):
         # set the server as the target for the client in the settings
         self.client_settings.server = server.testInterface
 
+        if self.persistent:
+            # the server stays up so only the client runs each time
+            self.logger.info(BLUE_BOLD_RESET.format("** Checking the Server **"))
+            self.attach_server(direction, server, filename)
+            if gate is not None:
+                gate.wait()
+            self.logger.info(BLUE_BOLD_RESET.format("** Starting the Client **"))
+            self.run_client(client, filename)
+            self.detach_server(direction)
+            return self.aggregated_value
+
         # run the server and client
         self.logger.info(BLUE_BOLD_RESET.format("** Starting the Server **"))
         self.start_server(server, filename)
+        self.wait_for_server(server)
+        if gate is not None:
+            gate.wait()
         self.logger.info(BLUE_BOLD_RESET.format("** Starting the Client **"))
         self.run_client(client, filename)
 
@@ -173,10 +213,91 @@ class IperfClass(BaseClass):
 
         # there seems to be a race condition with the telnet client running in a thread and the closing of the server
         self.stop = True
+        if (self.server_process is not None and
+            getattr(server, 'connection_type', None) != HostEnum.telnet):
+            # stop the server by its PID so the next call doesn't have to look for it
+            server.processes.terminate([self.server_process])
+        self.server_process = None
         server.close()
         #time.sleep(1)
         return self.aggregated_value
 
+    def attach_server(self, direction, server, filename):
+        """
+        Makes sure the persistent server is running and attaches a file to it
+
+        :param:
+
+         - `direction`: key for the server in self.servers
+         - `server`: TheHost to run the server on
+         - `filename`: base-name for the file to save the raw output
+
+        :raise: ConfigurationError if the server uses a telnet connection
+        """
+        persistent = self.servers.get(direction)
+        if persistent is None:
+            if getattr(server, 'connection_type', None) == HostEnum.telnet:
+                raise ConfigurationError("Persistent iperf servers need a connection that can run more than one command (not telnet)")
+            persistent = PersistentServer(host=server,
+                                          settings=self.server_settings)
+            self.servers[direction] = persistent
+            if self.kill_processes:
+                # clear out any servers left over from other runs
+                server.kill_all('iperf')
+
+        if persistent.ensure():
+            self.wait_for_server(server, persistent.ready)
+
+        path, filename = os.path.split(filename)
+        opened = self.storage.open(os.path.join(path, SERVER_PREFIX + filename))
+        parser = None
+        logger = self.logger.debug
+        if self.udp:
+            # the server has the data for UDP sessions
+            parser = self.parser
+            logger = self.logger.info
+        writer = LogWriter(logger=logger,
+                           open_file=TimestampWriter(open_file=opened),
+                           expression=HumanExpression.regex)
+        persistent.attach(ServerSession(opened=opened,
+                                        writer=writer,
+                                        parser=parser))
+        return
+
+    def detach_server(self, direction):
+        """
+        Detaches the current file from the persistent server
+
+        For UDP the server's output is parsed to get the aggregated value
+
+        :param:
+
+         - `direction`: key for the server in self.servers
+        """
+        persistent = self.servers[direction]
+        if not self.udp:
+            persistent.detach()
+            return
+        persistent.detach(quiet=PersistentServerConstants.default_quiet)
+        with phase(PhaseTimerConstants.parsing):
+            self.aggregated_value = self.aggregator(self.parser.intervals.values())
+        self.logger.info("Aggregated Iperf Value ({1}): {0}".format(self.aggregated_value,
+                                                                    self.aggregator.__name__))
+        self.parser.reset()
+        return
+
+    def close(self):
+        """
+        Stops any persistent servers and reports any iperf processes that were left running
+        """
+        for persistent in self.servers.itervalues():
+            persistent.stop()
+        self._servers = None
+        for host in (self.dut, self.traffic_server):
+            if hasattr(host, 'processes'):
+                host.processes.close()
+        return
+
     def downstream(self, filename):
         """
         This is slightly safer than using the call, since you don't need to know the direction string
@@ -221,7 +342,8 @@ class IperfClass(BaseClass):
         return self._parser
 
         
-    def run(self, host, settings, filename, verbose=True, timeout=10):
+    def run(self, host, settings, filename, verbose=True, timeout=10,
+            signal_ready=False):
         """
         Runs one-direction of traffic
 
@@ -232,6 +354,7 @@ class IperfClass(BaseClass):
          - `filename`: name to save raw output to
          - `verbose`: if True, emit output as it appears
          - `timeout`: readline timeout -- set to None for servers or it will raise an error
+         - `signal_ready`: if True, set the event-timer's event when the server's banner is seen (and keep the server's PID in self.server_process)
 
         :raise: socket.timeout if the readline timeout is exceeded
         """
@@ -249,7 +372,7 @@ class IperfClass(BaseClass):
             else:
                 logger = self.logger.debug
 
-            timestamper = TimestampWriter(open_file=opened)
+            timestamper = BufferedTimestampWriter(open_file=opened)
             writer = LogWriter(logger=logger,
                                open_file=timestamper,
                                expression=expression)
@@ -258,28 +381,41 @@ class IperfClass(BaseClass):
             command = IPERF.format(settings)
             self.logger.info(command)
 
-            stdin, stdout, stderr = host.exec_command(command, timeout=timeout)
+            if signal_ready and hasattr(host, 'launch'):
+                # it's the server so keep its PID to stop it with
+                self.server_process, stdin, stdout, stderr = host.launch(command, timeout=timeout)
+            else:
+                stdin, stdout, stderr = host.exec_command(command, timeout=timeout)
 
-            for line in stdout:
-                self.logger.debug(line)
-                if self.stop:
-                    return
-                writer.write(line)
-                if verbose:
-                    parser(line)
+            try:
+                for line in stdout:
+                    self.logger.debug(line)
+                    if self.stop:
+                        return
+                    writer.write(line)
+                    if (signal_ready and not self.event_timer.is_set() and
+                        IperfConstants.ready_expression.search(line)):
+                        self.event_timer.set_event()
+                    if verbose:
+                        with phase(PhaseTimerConstants.parsing):
+                            parser(line)
                 
-            for line in stderr:
-                if line:
-                    # the killing of the server is causing this to dump errors
-                    # so it's changed to debug until a solution is found
-                    self.logger.debug("Iperf.run ({0}) error: {1}".format(settings, line))
+                for line in stderr:
+                    if line:
+                        # the killing of the server is causing this to dump errors
+                        # so it's changed to debug until a solution is found
+                        self.logger.debug("Iperf.run ({0}) error: {1}".format(settings, line))
                     
-            if verbose:
-                self.aggregated_value = self.aggregator(parser.intervals.values())
-                # verbose means this is the side we care about (client for TCP, server for UDP)
-                self.logger.info("Aggregated Iperf Value ({1}): {0}".format(self.aggregated_value,
-                                                                            self.aggregator.__name__))
-                parser.reset()
+                if verbose:
+                    with phase(PhaseTimerConstants.parsing):
+                        self.aggregated_value = self.aggregator(parser.intervals.values())
+                    # verbose means this is the side we care about (client for TCP, server for UDP)
+                    self.logger.info("Aggregated Iperf Value ({1}): {0}".format(self.aggregated_value,
+                                                                                self.aggregator.__name__))
+                    parser.reset()
+            finally:
+                # write out whatever is still buffered before the file is closed
+                timestamper.close()
         return 
 
     def start_server(self, server, filename):
@@ -297,6 +433,9 @@ class IperfClass(BaseClass):
         path, filename = os.path.split(filename)
         filename = os.path.join(path, SERVER_PREFIX + filename)
 
+        # block the client until the server says it's ready
+        self.event_timer.clear()
+
         # start the thread
         self.server_thread = threading.Thread(target=self.run,
                                               name='server_thread',
@@ -304,14 +443,61 @@ class IperfClass(BaseClass):
                                                       'settings':self.server_settings,
                                                       'filename':filename,
                                                       'verbose':self.udp,
-                                                      'timeout':None})
+                                                      'timeout':None,
+                                                      'signal_ready':True})
         self.server_thread.daemon = True
         self.server_thread.start()
+        return
 
-        # block run_client for a short time
-        self.event_timer.clear()
+    def wait_for_server(self, server, ready=None):
+        """
+        Blocks until the server's banner is seen or its port is listening
+
+        :param:
+
+         - `server`: host running the iperf server
+         - `ready`: threading.Event set when the banner is seen (default: self.event_timer.event)
+
+        :raise: TunaError if the server isn't ready within self.event_timer.seconds
+        """
+        if ready is None:
+            ready = self.event_timer.event
+        # telnet can't run the probe while the server is running
+        probe = getattr(server, 'connection_type', None) != HostEnum.telnet
+        start = time.time()
+        end_time = start + self.event_timer.seconds
+        with phase(PhaseTimerConstants.server_wait):
+            while not ready.is_set() and time.time() < end_time:
+                ready.wait(PROBE_INTERVAL)
+                if not ready.is_set() and probe and self.listening(server):
+                    ready.set()
+        if not ready.is_set():
+            raise TunaError("Iperf server on {0} not ready after {1} seconds (no 'Server listening' and port not listening)".format(server,
+                                                                                                                                 self.event_timer.seconds))
+        self.logger.info("Iperf server ready after {0:.3f} seconds".format(time.time() - start))
         return
 
+    def listening(self, server):
+        """
+        Checks if there is a socket listening on the server's iperf port
+
+        :param:
+
+         - `server`: host running the iperf server
+
+        :return: True if something is listening on the port
+        """
+        port = self.server_settings.get('port')
+        if port is None:
+            port = IperfConstants.default_port
+        try:
+            stdin, stdout, stderr = server.exec_command(IperfConstants.listening_command.format(port),
+                                                        timeout=PROBE_INTERVAL * 2)
+            return any(line.strip().isdigit() and int(line) > 0 for line in stdout)
+        except Exception as error:
+            self.logger.debug("Unable to probe the iperf port: {0}".format(error))
+        return False
+
     def run_client(self, client, filename):
         """
         Runs the client iperf session
@@ -326,8 +512,7 @@ class IperfClass(BaseClass):
         path, filename = os.path.split(filename)
         filename = os.path.join(path, CLIENT_PREFIX + filename)
 
-        # run it
-        self.event_timer.wait()
+        # run it (the server was waited for in __call__)
         # for slow connections (especially on telnet and serial -- the timeout has to be longer than the interval)
         # but sometimes the user doesn't set it -- so this has gotten convoluted
         # why doesn't everyone implement ssh?
@@ -341,10 +526,11 @@ class IperfClass(BaseClass):
         else:
             timeout = max(self.client_settings.get('time'), 10) *1.5
         self.logger.info("Setting client's readline timeout to {0} seconds".format(timeout))
-        self.run(host=client, filename=filename,
-                 settings=self.client_settings,
-                 timeout=timeout,
-                 verbose=not self.udp)
+        with phase(PhaseTimerConstants.client_traffic):
+            self.run(host=client, filename=filename,
+                     settings=self.client_settings,
+                     timeout=timeout,
+                     verbose=not self.udp)
         return
 
     def version(self, connection):
@@ -0,0 +1,188 @@
+
+# python standard library
+from collections import namedtuple, OrderedDict
+import os
+import threading
+import time
+
+# this package
+from tuna import BaseClass, TunaError
+
+
+UNDERSCORE = '_'
+
+
+IperfSession = namedtuple('IperfSession', 'label direction iperf'.split())
+
+
+class StartingGate(object):
+    """
+    A barrier to synchronize the start of the iperf clients
+    """
+    def __init__(self, parties, timeout=None):
+        """
+        StartingGate constructor
+
+        :param:
+
+         - `parties`: number of threads that have to call `wait`
+         - `timeout`: seconds to wait for the others before giving up
+        """
+        self.parties = parties
+        self.timeout = timeout
+        self.arrived = 0
+        self.broken = False
+        self.condition = threading.Condition()
+        return
+
+    def wait(self):
+        """
+        Blocks until all the parties have called wait
+
+        :raise: TunaError if the gate was aborted or timed out
+        """
+        with self.condition:
+            self.arrived += 1
+            if self.arrived >= self.parties:
+                self.condition.notify_all()
+            end_time = None
+            if self.timeout is not None:
+                end_time = time.time() + self.timeout
+            while self.arrived < self.parties and not self.broken:
+                remaining = None
+                if end_time is not None:
+                    remaining = end_time - time.time()
+                    if remaining <= 0:
+                        self.broken = True
+                        self.condition.notify_all()
+                        break
+                self.condition.wait(remaining)
+            if self.broken:
+                raise TunaError("Starting gate broken ({0} of {1} sessions ready)".format(self.arrived,
+                                                                                          self.parties))
+        return
+
+    def abort(self):
+        """
+        Breaks the gate so any waiting threads raise an error
+        """
+        with self.condition:
+            self.broken = True
+            self.condition.notify_all()
+        return
+# end class StartingGate
+
+
+class IperfGroup(BaseClass):
+    """
+    A runner of simultaneous iperf sessions
+    """
+    def __init__(self, sessions, concurrent=True, timeout=None):
+        """
+        IperfGroup constructor
+
+        :param:
+
+         - `sessions`: list of IperfSession tuples
+         - `concurrent`: if False, run the sessions one after the other
+         - `timeout`: seconds to wait at the starting gate (default: wait forever)
+        """
+        super(IperfGroup, self).__init__()
+        self.sessions = sessions
+        self.concurrent = concurrent
+        self.timeout = timeout
+        self._hosts = None
+        self.killed = False
+        for session in sessions:
+            # the group takes over killing processes and the servers have to stay up
+            session.iperf.kill_processes = False
+            session.iperf.persistent = True
+        return
+
+    @property
+    def hosts(self):
+        """
+        List of the distinct hosts used by the sessions
+        """
+        if self._hosts is None:
+            self._hosts = []
+            for session in self.sessions:
+                for host in (session.iperf.dut, session.iperf.traffic_server):
+                    if not any(host is known for known in self._hosts):
+                        self._hosts.append(host)
+        return self._hosts
+
+    def run_session(self, session, filename, outcomes, errors, gate=None):
+        """
+        Runs one session (meant to be the target of a thread)
+
+        :param:
+
+         - `session`: IperfSession to run
+         - `filename`: base-name for the output files
+         - `outcomes`: dict to put the outcome in
+         - `errors`: list to append exceptions to
+         - `gate`: StartingGate to wait at once the server is ready
+        """
+        directory, filename = os.path.split(filename)
+        filename = os.path.join(directory, UNDERSCORE.join([session.label, filename]))
+        try:
+            outcomes[(session.label, session.direction)] = session.iperf(session.direction,
+                                                                         filename,
+                                                                         gate=gate)
+        except Exception as error:
+            self.log_error(error, " ({0} {1})".format(session.label, session.direction))
+            errors.append(error)
+            if gate is not None:
+                gate.abort()
+        return
+
+    def __call__(self, filename):
+        """
+        Runs all the sessions
+
+        :param:
+
+         - `filename`: base-name for the output files
+
+        :return: OrderedDict of (label, direction):value
+        :raise: TunaError if any of the sessions failed
+        """
+        if not self.killed:
+            # the servers persist so this only has to happen once
+            for host in self.hosts:
+                host.kill_all('iperf')
+            self.killed = True
+
+        outcomes = {}
+        errors = []
+        if self.concurrent:
+            gate = StartingGate(parties=len(self.sessions), timeout=self.timeout)
+            threads = [threading.Thread(target=self.run_session,
+                                        name="{0}_{1}".format(session.label, session.direction),
+                                        args=(session, filename, outcomes, errors, gate))
+                       for session in self.sessions]
+            for thread in threads:
+                thread.daemon = True
+                thread.start()
+            for thread in threads:
+                thread.join()
+        else:
+            for session in self.sessions:
+                self.run_session(session, filename, outcomes, errors)
+        if errors:
+            raise TunaError("{0} of {1} iperf sessions failed: {2}".format(len(errors),
+                                                                          len(self.sessions),
+                                                                          errors[0]))
+        return OrderedDict(((session.label, session.direction),
+                            outcomes[(session.label, session.direction)])
+                           for session in self.sessions)
+
+    def close(self):
+        """
+        Closes the sessions' iperf objects (stopping their servers)
+        """
+        for session in self.sessions:
+            session.iperf.close()
+        return
+# end class IperfGroup
@@ -52,6 +52,13 @@ class IperfConstants(object):
     no_whitespace_expression = re.compile(STRING_START + NOT_SPACES + STRING_END)
     reportexclude_expression = re.compile(STRING_START + '[cdmsvCDMSV]' + ONE_OR_MORE + STRING_END)
 
+    # server readiness
+    # the banner iperf prints once its socket is bound
+    ready_expression = re.compile('Server listening')
+    # counts the listening sockets bound to the port (used if the banner doesn't show up)
+    listening_command = "netstat -ln 2>/dev/null | grep -c ':{0} '"
+    default_port = 5001
+
 
 class IperfBaseSettings(BaseClass):
     """
@@ -0,0 +1,250 @@
+
+# python standard library
+import threading
+import time
+
+# this package
+from tuna import TunaError
+from tuna.infrastructure.baseclass import BaseThreadClass
+from iperfsettings import IperfConstants
+
+
+IPERF = 'iperf {0}'
+
+
+class PersistentServerConstants(object):
+    """
+    Constants for the PersistentServer
+    """
+    __slots__ = ()
+    alive_command = "kill -0 {0} && echo {1}"
+    alive = 'alive'
+    default_timeout = 5
+    default_quiet = 0.5
+
+
+class ServerSession(object):
+    """
+    A per-evaluation target for the persistent server's output
+    """
+    def __init__(self, opened, writer, parser=None):
+        """
+        ServerSession constructor
+
+        :param:
+
+         - `opened`: the opened file (so it can be closed)
+         - `writer`: file-like object to write the lines to
+         - `parser`: optional callable to send the lines to
+        """
+        self.opened = opened
+        self.writer = writer
+        self.parser = parser
+        return
+
+    def write(self, line):
+        """
+        Writes the line and sends it to the parser (if there is one)
+
+        :param:
+
+         - `line`: line of iperf-output
+        """
+        self.writer.write(line)
+        if self.parser is not None:
+            self.parser(line)
+        return
+
+    def close(self):
+        """
+        Closes the opened file
+        """
+        self.opened.close()
+        return
+# end class ServerSession
+
+
+class PersistentServer(BaseThreadClass):
+    """
+    An iperf server that stays up between evaluations
+    """
+    def __init__(self, host, settings, timeout=PersistentServerConstants.default_timeout):
+        """
+        PersistentServer constructor
+
+        :param:
+
+         - `host`: TheHost-like object (with `launch` and `processes`) to run the server on
+         - `settings`: IperfServerSettings (or something whose __str__ is the iperf arguments)
+         - `timeout`: seconds to wait for the PID and for the health-checks
+        """
+        super(PersistentServer, self).__init__()
+        self.host = host
+        self.settings = settings
+        self.timeout = timeout
+        self.pid = None
+        self.process = None
+        self.starts = 0
+        self.last_output = None
+        self._session = None
+        self._lock = None
+        self._started = None
+        self._ready = None
+        return
+
+    @property
+    def lock(self):
+        """
+        A lock to keep the session from changing while a line is written
+        """
+        if self._lock is None:
+            self._lock = threading.RLock()
+        return self._lock
+
+    @property
+    def ready(self):
+        """
+        An event that is set once the server reports that it's listening
+        """
+        if self._ready is None:
+            self._ready = threading.Event()
+        return self._ready
+
+    @property
+    def started(self):
+        """
+        An event that is set once the PID is known
+        """
+        if self._started is None:
+            self._started = threading.Event()
+        return self._started
+
+    def attach(self, session):
+        """
+        Sets the session to send the server's output to
+
+        :param:
+
+         - `session`: ServerSession-like object with a `write` method
+        """
+        with self.lock:
+            self._session = session
+        return
+
+    def detach(self, quiet=None):
+        """
+        Removes (and closes) the current session
+
+        :param:
+
+         - `quiet`: if given, first waits until there has been no output for this many seconds
+        """
+        if quiet is not None:
+            # UDP reports arrive after the client finishes so give them a chance to show up
+            end_time = time.time() + self.timeout
+            while (self.last_output is not None and
+                   time.time() - self.last_output < quiet and
+                   time.time() < end_time):
+                time.sleep(quiet)
+        with self.lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+        return
+
+    def run(self):
+        """
+        Runs the server and sends its output to the attached session
+
+        :postcondition:
+
+         - self.pid is the server's PID (self.process its RemoteProcess) and self.started is set
+         - self.ready is set once iperf's banner is seen
+        """
+        command = IPERF.format(self.settings)
+        self.logger.info(command)
+        process, stdin, stdout, stderr = self.host.launch(command, timeout=None)
+        if process is None:
+            self.logger.error("Unable to get the PID of '{0}'".format(command))
+            return
+        self.process = process
+        self.pid = process.pid
+        self.started.set()
+        for line in stdout:
+            self.last_output = time.time()
+            if not self.ready.is_set() and IperfConstants.ready_expression.search(line):
+                self.ready.set()
+            with self.lock:
+                if self._session is not None:
+                    self._session.write(line)
+        for line in stderr:
+            if line:
+                self.logger.debug("PersistentServer ({0}) error: {1}".format(self.settings,
+                                                                             line))
+        return
+
+    def start(self):
+        """
+        Starts the server-thread and waits for the PID
+
+        :raise: TunaError if the PID isn't found within the timeout
+        """
+        self.reset()
+        self.pid = None
+        self.started.clear()
+        self.ready.clear()
+        self.thread.start()
+        self.started.wait(self.timeout)
+        if self.pid is None:
+            raise TunaError("Unable to start the iperf server on {0}".format(self.host))
+        self.starts += 1
+        self.logger.info("Iperf server running on {0} (PID: {1})".format(self.host,
+                                                                         self.pid))
+        return
+
+    def is_alive(self):
+        """
+        Checks the server-thread and asks the host if the PID still exists
+
+        :return: True if the server is still running
+        """
+        if self.pid is None or self._thread is None or not self.thread.is_alive():
+            return False
+        try:
+            stdin, stdout, stderr = self.host.exec_command(PersistentServerConstants.alive_command.format(self.pid,
+                                                                                                          PersistentServerConstants.alive),
+                                                           timeout=self.timeout)
+            return any(PersistentServerConstants.alive in line for line in stdout)
+        except Exception as error:
+            self.logger.warning("Unable to check the iperf server: {0}".format(error))
+        return False
+
+    def ensure(self):
+        """
+        Health-checks the server and (re)starts it only if needed
+
+        :return: True if the server was (re)started, False if it was already running
+        """
+        if self.is_alive():
+            return False
+        if self.pid is not None:
+            self.logger.warning("Iperf server on {0} (PID: {1}) died, restarting it".format(self.host,
+                                                                                             self.pid))
+            self.stop()
+        self.start()
+        return True
+
+    def stop(self):
+        """
+        Kills the server and closes any attached session
+        """
+        if self.process is not None:
+            try:
+                self.host.processes.terminate([self.process])
+            except Exception as error:
+                self.logger.warning("Unable to kill the iperf server: {0}".format(error))
+            self.process = None
+        self.pid = None
+        self.detach()
+        return
+# end class PersistentServer
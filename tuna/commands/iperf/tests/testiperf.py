@@ -6,9 +6,13 @@ import random
 # third party
 from mock import MagicMock
 
+
 # this package
+from tuna import TunaError
 from tuna.parts.eventtimer import EventTimer
 from tuna.commands.iperf.iperf import IperfClass
+from tuna.commands.iperf.persistentserver import PersistentServer
+from tuna.commands.iperf.iperfgroup import IperfGroup, IperfSession, StartingGate
 
 
 class TestIperf(unittest.TestCase):
@@ -40,3 +44,111 @@ class TestIperf(unittest.TestCase):
         self.assertIsInstance(self.iperf.event_timer, EventTimer)
         self.assertEqual(sleep_time, self.iperf.event_timer.interval)
         return
+
+    def test_wait_for_server(self):
+        """
+        Does it wait for the server to be ready and raise an error if it isn't?
+        """
+        self.iperf._event_timer = EventTimer(seconds=0.1)
+        self.iperf.listening = MagicMock(return_value=False)
+
+        # the banner was seen
+        self.iperf.event_timer.set_event()
+        self.iperf.wait_for_server(self.tpc)
+        self.assertEqual(0, self.iperf.listening.call_count)
+
+        # no banner, no listening port
+        self.iperf.event_timer.clear()
+        with self.assertRaises(TunaError):
+            self.iperf.wait_for_server(self.tpc)
+
+        # no banner, but the port is listening
+        self.iperf.listening.return_value = True
+        self.iperf.wait_for_server(self.tpc)
+        self.assertTrue(self.iperf.event_timer.is_set())
+        return
+
+
+class TestPersistentServer(unittest.TestCase):
+    def setUp(self):
+        self.host = MagicMock()
+        self.server = PersistentServer(host=self.host,
+                                       settings='-s -i 1')
+        self.server.start = MagicMock()
+        self.server.stop = MagicMock()
+        return
+
+    def test_ensure_alive(self):
+        """
+        Does it leave a healthy server alone?
+        """
+        self.server.pid = '1234'
+        self.server._thread = MagicMock()
+        self.host.exec_command.return_value = (None, ['alive\n'], [])
+        self.assertFalse(self.server.ensure())
+        self.host.exec_command.assert_called_with('kill -0 1234 && echo alive',
+                                                  timeout=self.server.timeout)
+        self.assertEqual(0, self.server.start.call_count)
+        return
+
+    def test_ensure_dead(self):
+        """
+        Does it restart a server that's died?
+        """
+        self.server.pid = '1234'
+        self.server._thread = MagicMock()
+        self.host.exec_command.return_value = (None, [], [])
+        self.assertTrue(self.server.ensure())
+        self.server.stop.assert_called_with()
+        self.server.start.assert_called_with()
+        return
+
+
+class TestIperfGroup(unittest.TestCase):
+    def setUp(self):
+        self.dut = MagicMock()
+        self.up = MagicMock(return_value=1)
+        self.up.dut = self.dut
+        self.down = MagicMock(return_value=2)
+        self.down.dut = self.dut
+        # the group has to turn these on
+        self.up.persistent = self.down.persistent = False
+        self.sessions = [IperfSession(label='tpc', direction='upstream', iperf=self.up),
+                         IperfSession(label='tpc', direction='downstream', iperf=self.down)]
+        self.group = IperfGroup(sessions=self.sessions)
+        return
+
+    def test_call(self):
+        """
+        Does it run all the sessions and report them in order?
+        """
+        self.assertFalse(self.up.kill_processes)
+        self.assertTrue(self.up.persistent)
+        self.assertTrue(self.down.persistent)
+        outcomes = self.group('test.iperf')
+        self.assertEqual([(('tpc', 'upstream'), 1), (('tpc', 'downstream'), 2)],
+                         outcomes.items())
+        self.dut.kill_all.assert_called_once_with('iperf')
+        self.assertEqual('tpc_test.iperf', self.up.call_args[0][1])
+        self.assertIsInstance(self.up.call_args[1]['gate'], StartingGate)
+
+        # a failed session raises an error
+        self.down.side_effect = TunaError('boom')
+        with self.assertRaises(TunaError):
+            self.group('test.iperf')
+        return
+
+    def test_gate(self):
+        """
+        Does the starting-gate raise an error if it's aborted or times out?
+        """
+        gate = StartingGate(parties=2, timeout=0.01)
+        with self.assertRaises(TunaError):
+            gate.wait()
+
+        gate = StartingGate(parties=1)
+        gate.wait()
+        gate.abort()
+        with self.assertRaises(TunaError):
+            gate.wait()
+        return
@@ -1,12 +1,13 @@
 
 # python standard library
 import re
+import socket
 import time
 
 # this package
 from tuna import BaseClass, TunaError
 from tuna.clients.clientbase import handlesocketerrors
-from tuna.commands.command.command import TheCommand
+from tuna.commands.command import TheCommand
 
 
 class Ping(BaseClass):
@@ -14,7 +15,8 @@ class Ping(BaseClass):
     A class to ping a target
     """
     def __init__(self, connection, target, time_limit=300, threshold=5, arguments=None, operating_system=None,
-                 timeout=1, data_expression=None, trap_errors=False):
+                 timeout=1, data_expression=None, trap_errors=False, streaming=False,
+                 interval=0.2):
         """
         Ping constructor
 
@@ -28,8 +30,13 @@ class Ping(BaseClass):
          - `timeout`: seconds to allow the socket to try and read
          - `data_expression`: regular expression to match successful ping
          - `trap_errors`: If True, logs socket errors but doesn't raise exceptions
+         - `streaming`: If True, use one long-running ping (a PingStream)
+         - `interval`: seconds between the streaming ping's requests
         """
         super(Ping, self).__init__()
+        self.streaming = streaming
+        self.interval = interval
+        self._stream = None
         self.connection = connection
         self.target = target
         self.time_limit = time_limit
@@ -97,6 +104,24 @@ class Ping(BaseClass):
                                        timeout=self.timeout,
                                        trap_errors=self.trap_errors)
         return self._command
+
+    @property
+    def stream(self):
+        """
+        A PingStream with this ping's settings
+        """
+        if self._stream is None:
+            # the pingstream module uses the PingConstants so it can't be imported at the top
+            from tuna.commands.ping.pingstream import PingStream
+            self._stream = PingStream(connection=self.connection,
+                                      target=self.target,
+                                      threshold=self.threshold,
+                                      time_limit=self.time_limit,
+                                      interval=self.interval,
+                                      timeout=self.timeout,
+                                      operating_system=self.operating_system,
+                                      data_expression=self._data_expression)
+        return self._stream
                             
     @property
     @handlesocketerrors
@@ -129,6 +154,8 @@ class Ping(BaseClass):
         """
         tries to ping the target until the threshold of successes is reached
         """
+        if self.streaming:
+            return self.stream()
         stop_time = time.time() + self.timeout
         successes = 0
 
@@ -173,6 +200,7 @@ class Ping(BaseClass):
         self._arguments_target = None
         self._command = None
         self._data_expression = None
+        self._stream = None
         return
 
         
@@ -39,6 +39,8 @@ class PingBuilder(BaseClass):
                                  operating_system=self.configuration.operating_system,
                                  arguments=self.configuration.arguments,
                                  data_expression=self.configuration.data_expression,
-                                 trap_errors=self.configuration.trap_errors)
+                                 trap_errors=self.configuration.trap_errors,
+                                 streaming=self.configuration.streaming,
+                                 interval=self.configuration.interval)
         return self._product
 # end class PingBuilder        
@@ -21,6 +21,8 @@ class PingConfiguration(BaseConfiguration):
         self._timeout = None
         self._data_expression = None
         self._trap_errors = None
+        self._streaming = None
+        self._interval = None
         return
 
     @property
@@ -129,6 +131,30 @@ class PingConfiguration(BaseConfiguration):
                                                               optional=True,
                                                               default=PingConfigurationConstants.default_trap_errors)
         return self._trap_errors
+
+    @property
+    def streaming(self):
+        """
+        Boolean to use one long-running ping instead of a ping per attempt
+        """
+        if self._streaming is None:
+            self._streaming = self.configuration.getboolean(section=self.section,
+                                                            option=PingConfigurationConstants.streaming,
+                                                            optional=True,
+                                                            default=PingConfigurationConstants.default_streaming)
+        return self._streaming
+
+    @property
+    def interval(self):
+        """
+        Seconds between the streaming ping's requests
+        """
+        if self._interval is None:
+            self._interval = self.configuration.getfloat(section=self.section,
+                                                         option=PingConfigurationConstants.interval,
+                                                         optional=True,
+                                                         default=PingConfigurationConstants.default_interval)
+        return self._interval
     
     
     @property
@@ -161,7 +187,14 @@ class PingConfiguration(BaseConfiguration):
 
 # 'trap_errors'  if False, will raise an error if there is a socket error
 # otherwise it will just log it
-#trap_errors = {dtrap}""".format(section=self.section,
+#trap_errors = {dtrap}
+
+# 'streaming' if True, runs one ping and stops it once the threshold is reached
+# (instead of a separate ping for every attempt)
+# streaming = {dstreaming}
+
+# 'interval' is the seconds between the streaming ping's requests (below 0.2 needs root)
+# interval = {dinterval}""".format(section=self.section,
                                  t=PingConfigurationConstants.target,
                                time_limit=PingConfigurationConstants.default_time_limit,
                                threshold=PingConfigurationConstants.default_threshold,
@@ -169,7 +202,9 @@ class PingConfiguration(BaseConfiguration):
                                os=PingConfigurationConstants.default_os,
                                timeout=PingConfigurationConstants.default_timeout,
                                dexpression=PingConfigurationConstants.default_data_expression,
-                               dtrap=PingConfigurationConstants.default_trap_errors)
+                               dtrap=PingConfigurationConstants.default_trap_errors,
+                               dstreaming=PingConfigurationConstants.default_streaming,
+                               dinterval=PingConfigurationConstants.default_interval)
 
     @property
     def section(self):
@@ -199,6 +234,8 @@ class PingConfiguration(BaseConfiguration):
         self._timeout = None
         self._data_expression = None
         self._trap_errors = None
+        self._streaming = None
+        self._interval = None
         return
 # end class PingConfiguration    
 
@@ -219,6 +256,8 @@ class PingConfigurationConstants(object):
     threshold = 'threshold'
     time_limit = 'time_limit'
     target = 'target'
+    streaming = 'streaming'
+    interval = 'interval'
 
     # defaults
     default_trap_errors = True
@@ -227,4 +266,6 @@ class PingConfigurationConstants(object):
     default_os = None
     default_threshold = 5
     default_time_limit = 300
+    default_streaming = False
+    default_interval = 0.2
 # end PingConfigurationConstants    
@@ -0,0 +1,281 @@
+
+# python standard library
+from collections import OrderedDict
+import math
+import re
+import socket
+import threading
+
+# this package
+from tuna import BaseClass, TunaError
+from tuna.commands.ping.ping import PingConstants
+from tuna.parts.countdown.streamingstatistics import StreamingStatistics
+from tuna.parts.scheduler import monotonic
+
+
+class PingStreamConstants(object):
+    """
+    Constants for the PingStream
+    """
+    __slots__ = ()
+    linux_arguments = '-W {wait} -i {interval} -w {deadline}'
+    cygwin_arguments = '-t -w {wait_milliseconds}'
+    command = "{command} {arguments} {target}"
+    sequence_expression = r'(?:icmp_)?seq=(?P<sequence>\d+)'
+    failure_expression = r'[Uu]nreachable|[Tt]imed out|[Tt]imeout'
+    default_interval = 0.2
+    default_timeout = 1
+    default_threshold = 5
+    default_time_limit = 300
+
+
+class PingStream(BaseClass):
+    """
+    A single long-running ping whose output is checked as it arrives
+    """
+    def __init__(self, connection, target, threshold=PingStreamConstants.default_threshold,
+                 time_limit=PingStreamConstants.default_time_limit,
+                 interval=PingStreamConstants.default_interval,
+                 timeout=PingStreamConstants.default_timeout,
+                 operating_system=PingConstants.linux, arguments=None,
+                 data_expression=None):
+        """
+        PingStream constructor
+
+        :param:
+
+         - `connection`: TheHost (or paramiko SSHClient-like) to ping from
+         - `target`: IP address to ping
+         - `threshold`: number of consecutive replies needed for a success
+         - `time_limit`: seconds to try before giving up
+         - `interval`: seconds between echo requests
+         - `timeout`: seconds to wait for each reply
+         - `operating_system`: linux or cygwin (to choose the arguments)
+         - `arguments`: arguments for ping (overrides the operating system's)
+         - `data_expression`: regular expression with an `rtt` group to match a reply
+        """
+        super(PingStream, self).__init__()
+        self.connection = connection
+        self.target = target
+        self.threshold = threshold
+        self.time_limit = time_limit
+        self.interval = interval
+        self.timeout = timeout
+        self.operating_system = operating_system
+        self._arguments = arguments
+        self.expression = re.compile(data_expression or PingConstants.rtt_expression)
+        self.sequence = re.compile(PingStreamConstants.sequence_expression)
+        self.failure = re.compile(PingStreamConstants.failure_expression)
+        self.statistics = None
+        self.received = 0
+        self.lost = 0
+        self.consecutive = 0
+        self.last_sequence = None
+        return
+
+    @property
+    def arguments(self):
+        """
+        The arguments to keep the ping running (until the time-limit)
+        """
+        if self._arguments is None:
+            if self.operating_system == PingConstants.cygwin:
+                arguments = PingStreamConstants.cygwin_arguments
+            elif self.operating_system == PingConstants.linux:
+                arguments = PingStreamConstants.linux_arguments
+            else:
+                raise TunaError("Unknown Operating System: {0} (known: {1})".format(self.operating_system,
+                                                                                    ','.join(PingConstants.known_operating_systems)))
+            self._arguments = arguments.format(wait=int(math.ceil(self.timeout)),
+                                               wait_milliseconds=int(self.timeout * 1000),
+                                               interval=self.interval,
+                                               deadline=int(math.ceil(self.time_limit)))
+        return self._arguments
+
+    @property
+    def command(self):
+        """
+        The command-line for the ping
+        """
+        return PingStreamConstants.command.format(command=PingConstants.command,
+                                                  arguments=self.arguments,
+                                                  target=self.target)
+
+    def start(self):
+        """
+        Starts the ping
+
+        :return: RemoteProcess (or None), stdout
+        """
+        timeout = self.timeout + self.interval
+        self.logger.debug("Starting '{0}'".format(self.command))
+        if hasattr(self.connection, 'launch'):
+            process, stdin, stdout, stderr = self.connection.launch(self.command,
+                                                                    timeout=timeout)
+            return process, stdout
+        stdin, stdout, stderr = self.connection.exec_command(self.command,
+                                                             timeout=timeout)
+        return None, stdout
+
+    def stop(self, process, stdout):
+        """
+        Stops the ping (errors are logged, not raised)
+
+        :param:
+
+         - `process`: RemoteProcess from `start` (or None)
+         - `stdout`: the ping's output
+        """
+        try:
+            if process is not None:
+                self.connection.processes.terminate([process])
+            channel = getattr(stdout, 'channel', stdout)
+            if hasattr(channel, 'close'):
+                channel.close()
+        except Exception as error:
+            self.logger.warning("Unable to stop the ping to {0}: {1}".format(self.target, error))
+        return
+
+    def parse(self, line):
+        """
+        Updates the counts with a line of output
+
+        :param:
+
+         - `line`: a line of ping output
+
+        :return: True if the threshold of consecutive replies has been reached
+        """
+        match = self.expression.search(line)
+        if match is None:
+            if self.failure.search(line):
+                self.failed(line.strip())
+            return False
+        sequence = self.sequence.search(line)
+        if sequence is not None:
+            sequence = int(sequence.group('sequence'))
+            if self.last_sequence is not None and sequence > self.last_sequence + 1:
+                self.failed("{0} replies missing".format(sequence - self.last_sequence - 1),
+                            sequence - self.last_sequence - 1)
+            self.last_sequence = sequence
+        rtt = float(match.group(PingConstants.round_trip_time))
+        self.received += 1
+        self.consecutive += 1
+        self.statistics.add(rtt)
+        self.logger.debug("pinged {0} -- {1} out of {2} rtt: {3} ms".format(self.target,
+                                                                          self.consecutive,
+                                                                          self.threshold,
+                                                                          rtt))
+        return self.consecutive >= self.threshold
+
+    def failed(self, reason, count=1):
+        """
+        Records lost replies and re-starts the consecutive count
+
+        :param:
+
+         - `reason`: string to log
+         - `count`: number of replies that were lost
+        """
+        self.lost += count
+        if self.consecutive:
+            self.logger.info("Failed ping to {0} ({1}), setting successes to 0".format(self.target,
+                                                                                      reason))
+        self.consecutive = 0
+        return
+
+    def __call__(self):
+        """
+        Pings the target until the threshold of consecutive replies is reached
+
+        :return: True if the threshold was reached before the time-limit
+        """
+        self.statistics = StreamingStatistics()
+        self.received = self.lost = self.consecutive = 0
+        self.last_sequence = None
+        deadline = monotonic() + self.time_limit
+        process, stdout = self.start()
+        try:
+            while monotonic() < deadline:
+                try:
+                    line = stdout.readline()
+                except socket.timeout:
+                    self.failed("no reply in {0} seconds".format(self.timeout + self.interval))
+                    continue
+                if not line:
+                    # the ping quit
+                    break
+                if self.parse(line):
+                    summary = self.statistics.summary()
+                    self.logger.info("pinged {0} {1} times in a row (lost: {2}) rtt min/med/max: {3}/{4}/{5} ms".format(self.target,
+                                                                                                                       self.consecutive,
+                                                                                                                       self.lost,
+                                                                                                                       summary['min'],
+                                                                                                                       summary['med'],
+                                                                                                                       summary['max']))
+                    return True
+        finally:
+            self.stop(process, stdout)
+        self.logger.warning("Unable to ping {0} {1} times in a row (received: {2}, lost: {3})".format(self.target,
+                                                                                                     self.threshold,
+                                                                                                     self.received,
+                                                                                                     self.lost))
+        return False
+# end class PingStream
+
+
+class PingStreamGroup(BaseClass):
+    """
+    Pings several targets at the same time
+    """
+    def __init__(self, connection, targets, **kwargs):
+        """
+        PingStreamGroup constructor
+
+        :param:
+
+         - `connection`: TheHost (or paramiko SSHClient-like) to ping from
+         - `targets`: collection of addresses to ping
+         - `kwargs`: the other PingStream parameters (used for every target)
+        """
+        super(PingStreamGroup, self).__init__()
+        self.connection = connection
+        self.targets = targets
+        self.pings = [PingStream(connection=connection, target=target, **kwargs)
+                      for target in targets]
+        return
+
+    def run_ping(self, ping, outcomes):
+        """
+        Runs one ping (meant to be the target of a thread)
+
+        :param:
+
+         - `ping`: PingStream to run
+         - `outcomes`: dict to put the outcome in
+        """
+        try:
+            outcomes[ping.target] = ping()
+        except Exception as error:
+            self.log_error(error, " (pinging {0})".format(ping.target))
+            outcomes[ping.target] = False
+        return
+
+    def __call__(self):
+        """
+        Pings all the targets
+
+        :return: OrderedDict of target:True if the threshold was reached
+        """
+        outcomes = {}
+        threads = [threading.Thread(target=self.run_ping,
+                                    name="ping_{0}".format(ping.target),
+                                    args=(ping, outcomes))
+                   for ping in self.pings]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return OrderedDict((ping.target, outcomes[ping.target]) for ping in self.pings)
+# end class PingStreamGroup
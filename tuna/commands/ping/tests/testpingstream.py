@@ -0,0 +1,95 @@
+
+# python standard library
+import unittest
+import socket
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna.commands.ping.pingstream import PingStream, PingStreamGroup
+from tuna.commands.ping.ping import Ping
+
+
+REPLY = "64 bytes from 10.0.0.1: icmp_seq={0} ttl=64 time={1} ms\n"
+
+class TestPingStream(unittest.TestCase):
+    def setUp(self):
+        self.connection = MagicMock(spec=['exec_command'])
+        self.stdout = MagicMock()
+        self.connection.exec_command.return_value = (None, self.stdout, None)
+        self.ping = PingStream(connection=self.connection, target='10.0.0.1',
+                               threshold=3, time_limit=10)
+        return
+
+    def test_command(self):
+        """
+        Does it build one ping that runs until the time-limit?
+        """
+        self.assertEqual('ping -W 1 -i 0.2 -w 10 10.0.0.1', self.ping.command)
+        return
+
+    def test_threshold(self):
+        """
+        Does it stop reading (and close the output) once the threshold is reached?
+        """
+        lines = ["PING 10.0.0.1 (10.0.0.1) 56(84) bytes of data.\n"]
+        lines += [REPLY.format(sequence, 0.5 + sequence) for sequence in range(1, 6)]
+        self.stdout.readline.side_effect = lines
+        self.assertTrue(self.ping())
+        self.connection.exec_command.assert_called_once_with(self.ping.command, timeout=1.2)
+        self.assertEqual(4, self.stdout.readline.call_count)
+        self.stdout.channel.close.assert_called_with()
+        self.assertEqual(3, self.ping.received)
+        self.assertEqual(2.5, self.ping.statistics.percentile(50))
+        return
+
+    def test_losses(self):
+        """
+        Do gaps in the sequence and timeouts re-start the count?
+        """
+        self.stdout.readline.side_effect = [REPLY.format(1, 1),
+                                            REPLY.format(2, 1),
+                                            REPLY.format(5, 1),
+                                            socket.timeout(),
+                                            REPLY.format(7, 1),
+                                            REPLY.format(8, 1),
+                                            REPLY.format(9, 1)]
+        self.assertTrue(self.ping())
+        self.assertEqual(6, self.ping.received)
+        # 2 missing, 1 timeout, 1 missing
+        self.assertEqual(4, self.ping.lost)
+        return
+
+    def test_time_limit(self):
+        """
+        Does it give up when the ping quits (or the time runs out) without reaching the threshold?
+        """
+        self.stdout.readline.side_effect = [REPLY.format(1, 1), '']
+        self.assertFalse(self.ping())
+        self.ping.time_limit = 0
+        self.assertFalse(self.ping())
+        self.stdout.channel.close.assert_called_with()
+        return
+
+    def test_group(self):
+        """
+        Does the group ping each target and the Ping use the stream?
+        """
+        def exec_command(command, timeout):
+            stdout = MagicMock()
+            target = command.split()[-1]
+            stdout.readline.side_effect = ([REPLY.format(sequence, 1) for sequence in range(1, 4)]
+                                           if target == 'good' else [''])
+            return None, stdout, None
+        self.connection.exec_command.side_effect = exec_command
+        group = PingStreamGroup(connection=self.connection, targets=['good', 'bad'],
+                                threshold=3)
+        self.assertEqual([('good', True), ('bad', False)], group().items())
+
+        ping = Ping(connection=self.connection, target='good', threshold=3,
+                    operating_system='linux', streaming=True)
+        self.assertTrue(ping())
+        self.assertEqual(3, ping.stream.received)
+        return
+# end class TestPingStream
@@ -15,7 +15,9 @@ from tuna import BaseConfiguration
 from tuna.clients.simpleclient import ConnectionError
 
 from tuna.commands.command import TheCommand
+from tuna.commands.batchcommand import BatchCommand
 from tuna.parts.eventtimer import EventTimer, wait
+from tuna.infrastructure.timemap import RelativeTime
 
 
 TIMESTAMP = 'timestamp'
@@ -32,7 +34,7 @@ class Poller(BaseClass):
     A poller of devices
     """
     def __init__(self, storage, output_filename, fields,
-                 commands, timer=None, interval=1):
+                 commands, timer=None, interval=1, batch=None, scheduler=None):
         """
         Poller constructor
 
@@ -44,14 +46,18 @@ class Poller(BaseClass):
          - `commands`: dict of field:command where commands are callable objects 
          - `interval`: time (seconds) between calling the commands
          - `timer`: an EventTimer
+         - `batch`: optional BatchCommand to get all the fields in one call
+         - `scheduler`: optional Scheduler to run the polls (instead of a thread)
         """
         super(Poller, self).__init__()
         self.storage = storage
         self._output_file = None
-        self.timeout = timeout
         self.output_filename = output_filename
         self.fields = fields
         self.commands = commands
+        self.batch = batch
+        self.scheduler = scheduler
+        self.job = None
         self.new_file = True
         self.interval = interval
         self._writer = None
@@ -119,25 +125,38 @@ class Poller(BaseClass):
         stops the poller, closes the output-file
         """
         self.stop = True
+        if self.job is not None:
+            self.scheduler.cancel(self.job)
+            self.job = None
         self.output_file.close()
         return
 
-    @wait
-    def run_once(self):
+    def poll(self):
         """
         traverses commands and saves output to csv
 
         :raise: TunaError if the regular expressions matches but there's no group
         """
         output = {TIMESTAMP:datetime.datetime.now().isoformat()}
-        for field, command in self.commands.iteritems():
-            self.logger.debug("Checking field {0}".format(field))
-            output[field] = command()
+        if self.batch is not None:
+            output.update(self.batch())
+        else:
+            for field, command in self.commands.iteritems():
+                self.logger.debug("Checking field {0}".format(field))
+                output[field] = command()
 
         self.logger.debug(output)
         self.writer.writerow(output)
         return
 
+    @wait
+    def run_once(self):
+        """
+        calls `poll` (waiting for the timer first)
+        """
+        self.poll()
+        return
+
     def run(self):
         """
         repeatedly calls `run_once` until stopped
@@ -149,8 +168,13 @@ class Poller(BaseClass):
 
     def __call__(self):
         """
-        starts a thread with the `run` method
+        schedules `poll` with the scheduler or starts a thread with the `run` method
         """
+        if self.scheduler is not None:
+            self.job = self.scheduler.schedule(self.poll,
+                                               interval=self.interval,
+                                               name=self.output_filename)
+            return
         self.thread = threading.Thread(target=self.run)
         self.thread.daemon = True
         self.thread.start()
@@ -186,15 +210,18 @@ class PollerEnum(object):
     not_available = 'not_available'
     filename = 'filename'
     trap_errors = 'trap_errors'
+    batch = 'batch'
     connection = 'connection'
     plugin = 'plugin'
     component = 'component'
     timeout = 'timeout'
+    # the sections this one waits for (used by the Operation, not a command)
+    depends_on = 'depends_on'
 
     # reserved names
     reserved = [delimiter, not_available, filename, timeout,
                 interval, timeout,
-                trap_errors, connection, plugin, component]
+                trap_errors, batch, connection, plugin, component, depends_on]
     
     # defaults
     default_delimiter = ','
@@ -202,6 +229,7 @@ class PollerEnum(object):
     default_filename = 'poller_data.csv'
     default_interval = 1
     default_trap_errors = True
+    default_batch = False
     default_timeout = 10
 
 
@@ -232,6 +260,9 @@ EXAMPLE_CONFIGURATION = """# these are arbitrary commands that will be called in
 # to have it crash instead of trap socket errors
 # trap_errors = {trap_errors}
 
+# to send all the commands at once (as one script) instead of one at a time
+# batch = {batch}
+
 # everything else is of the format:
 # <column-header> = <command><delimiter><regular expression>
 # the column-header will be used in the csv-file
@@ -245,7 +276,8 @@ EXAMPLE_CONFIGURATION = """# these are arbitrary commands that will be called in
            timeout=PollerEnum.default_timeout,
            filename=PollerEnum.default_filename,
            trap_errors=PollerEnum.default_trap_errors,
-           interval=PollerEnum.default_interval)
+           interval=PollerEnum.default_interval,
+           batch=PollerEnum.default_batch)
 
 
 
@@ -272,6 +304,7 @@ class PollerConfiguration(BaseConfiguration):
         self._timeout = None
         self._trap_errors = None
         self._interval = None
+        self._batch = None
         return
 
     @property
@@ -398,6 +431,18 @@ class PollerConfiguration(BaseConfiguration):
                 optional=True,
                 default=PollerEnum.default_trap_errors)
         return self._trap_errors
+
+    @property
+    def batch(self):
+        """
+        Boolean to decide whether to send the commands as one script
+        """
+        if self._batch is None:
+            self._batch = self.configuration.get_boolean(self.section,
+                                                         PollerEnum.batch,
+                                                         optional=True,
+                                                         default=PollerEnum.default_batch)
+        return self._batch
     
     @property
     def interval(self):
@@ -412,7 +457,7 @@ class PollerConfiguration(BaseConfiguration):
             if isinstance(interval, RelativeTime):
                 interval = interval.total_seconds()
             self._interval = interval
-        return interval
+        return self._interval
 
     def reset(self):
         """
@@ -424,6 +469,7 @@ class PollerConfiguration(BaseConfiguration):
         self._delimiter = None
         self._not_available = None
         self._interval = None
+        self._batch = None
         return        
         
     def check_rep(self):
@@ -441,7 +487,7 @@ class PollerBuilder(object):
     """
     A builder of queries
     """
-    def __init__(self, connection, configuration, storage):
+    def __init__(self, connection, configuration, storage, scheduler=None):
         """
         PollerBuilder Constructor
 
@@ -450,12 +496,15 @@ class PollerBuilder(object):
          - `connection`: Connection to the device to query
          - `configuration`: built PollerConfiguration
          - `storage`: file-like object for data
+         - `scheduler`: optional Scheduler to run the poller
         """
         self.connection = connection
         self.configuration = configuration
         self.storage = storage
+        self.scheduler = scheduler
         self._product = None
         self._commands = None
+        self._batch = None
         return
 
     @property
@@ -474,6 +523,16 @@ class PollerBuilder(object):
                                       commands))
         return self._commands
 
+    @property
+    def batch(self):
+        """
+        A BatchCommand if the configuration asks for one (None otherwise)
+        """
+        if self._batch is None and self.configuration.batch:
+            self._batch = BatchCommand(connection=self.connection,
+                                       commands=self.commands)
+        return self._batch
+
     @property
     def product(self):
         """
@@ -482,9 +541,10 @@ class PollerBuilder(object):
         if self._product is None:
             self._product = Poller(output_filename=self.configuration.filename,
                                   storage=self.storage,
-                                  connection=self.connection,
+                                  batch=self.batch,
                                   fields=self.configuration.fields[:],
                                   interval=self.configuration.interval,
+                                  scheduler=self.scheduler,
                                   commands=self.commands)
         return self._product        
 # end PollerBuilder                
@@ -13,6 +13,7 @@ from tuna import TunaError
 from tuna.clients.simpleclient import ConnectionError
 from tuna.infrastructure.baseconfiguration import BaseConfiguration
 from tuna.commands.command import TheCommand
+from tuna.commands.batchcommand import BatchCommand
 
 
 TIMESTAMP = 'timestamp'
@@ -28,7 +29,7 @@ class Query(BaseClass):
     """
     A querier of devices
     """
-    def __init__(self, storage, output_filename, fields, commands):
+    def __init__(self, storage, output_filename, fields, commands, batch=None):
         """
         Query constructor
 
@@ -38,6 +39,7 @@ class Query(BaseClass):
          - `output_filename`: name of file to use to save data
          - `fields`: list of fields for headers (and keys to 'commands' dict)
          - `commands`: dict of field:command where commands are callable objects that
+         - `batch`: optional BatchCommand to get all the fields in one call
         """
         super(Query, self).__init__()
         self.storage = storage
@@ -45,6 +47,7 @@ class Query(BaseClass):
         self.output_filename = output_filename
         self.fields = fields
         self.commands = commands
+        self.batch = batch
         self.new_file = True
         self._writer = None
         return        
@@ -116,9 +119,12 @@ class Query(BaseClass):
         if extra_data is not None:
             output.update(extra_data)
                 
-        for field, command in self.commands.iteritems():
-            self.logger.debug("Checking field {0}".format(field))
-            output[field] = command()
+        if self.batch is not None:
+            output.update(self.batch())
+        else:
+            for field, command in self.commands.iteritems():
+                self.logger.debug("Checking field {0}".format(field))
+                output[field] = command()
 
         self.logger.info(output)
         self.writer.writerow(output)
@@ -155,13 +161,16 @@ class QueryEnum(object):
     filename = 'filename'
     timeout = 'timeout'
     trap_errors = 'trap_errors'
+    batch = 'batch'
     connection = 'connection'
     plugin = 'plugin'
     component = 'component'
+    # the sections this one waits for (used by the Operation, not a command)
+    depends_on = 'depends_on'
 
     # reserved names
     reserved = [delimiter, not_available, filename, timeout,
-                trap_errors, connection, plugin, component]
+                trap_errors, batch, connection, plugin, component, depends_on]
     
     # defaults
     default_delimiter = ','
@@ -169,6 +178,7 @@ class QueryEnum(object):
     default_filename = 'query.csv'
     default_timeout = 10
     default_trap_errors = True
+    default_batch = False
 
 
 class QueryConfiguration(BaseConfiguration):
@@ -193,6 +203,7 @@ class QueryConfiguration(BaseConfiguration):
         self._filename = None
         self._timeout = None
         self._trap_errors = None
+        self._batch = None
         return
 
     @property
@@ -222,6 +233,9 @@ class QueryConfiguration(BaseConfiguration):
             # to have it crash instead of trap socket errors
             # trap_errors = {trap_errors}
 
+            # to send all the commands at once (as one script) instead of one at a time
+            # batch = {batch}
+
             # everything else is of the format:
             # <column-header> = <command><delimiter><regular expression>
             # the column-header will be used in the csv-file
@@ -235,7 +249,8 @@ class QueryConfiguration(BaseConfiguration):
                        delimiter=QueryEnum.default_delimiter,
                        timeout=QueryEnum.default_timeout,
                        filename=QueryEnum.default_filename,
-                       trap_errors=QueryEnum.trap_errors))
+                       trap_errors=QueryEnum.trap_errors,
+                       batch=QueryEnum.default_batch))
         return self._example
     
     @property
@@ -352,6 +367,18 @@ class QueryConfiguration(BaseConfiguration):
                 default=QueryEnum.default_trap_errors)
         return self._trap_errors
 
+    @property
+    def batch(self):
+        """
+        Boolean to decide whether to send the commands as one script
+        """
+        if self._batch is None:
+            self._batch = self.configuration.get_boolean(self.section,
+                                                         QueryEnum.batch,
+                                                         optional=True,
+                                                         default=QueryEnum.default_batch)
+        return self._batch
+
     def reset(self):
         """
         Resets the options to None
@@ -361,6 +388,7 @@ class QueryConfiguration(BaseConfiguration):
         self._expressions = None
         self._delimiter = None
         self._not_available = None
+        self._batch = None
         return        
         
     def check_rep(self):
@@ -393,6 +421,7 @@ class QueryBuilder(object):
         self.storage = storage
         self._product = None
         self._commands = None
+        self._batch = None
         return
 
     @property
@@ -412,6 +441,16 @@ class QueryBuilder(object):
                                       commands))
         return self._commands
 
+    @property
+    def batch(self):
+        """
+        A BatchCommand if the configuration asks for one (None otherwise)
+        """
+        if self._batch is None and self.configuration.batch:
+            self._batch = BatchCommand(connection=self.connection,
+                                       commands=self.commands)
+        return self._batch
+
     @property
     def product(self):
         """
@@ -420,7 +459,7 @@ class QueryBuilder(object):
         if self._product is None:
             self._product = Query(output_filename=self.configuration.filename,
                                   storage=self.storage,
-                                  connection=self.connection,
+                                  batch=self.batch,
                                   fields=self.configuration.fields[:],
                                   commands=self.commands)
         return self._product        
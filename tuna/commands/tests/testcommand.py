@@ -12,6 +12,7 @@ from mock import Mock
 # this package
 from tuna import TunaError
 from tuna.commands.command import TheCommand, CommandConstants
+from tuna.commands.batchcommand import BatchCommand
 from tuna.infrastructure.helpers import random_string_of_letters
 
 
@@ -129,7 +130,8 @@ class TestTheCommand(unittest.TestCase):
         result = self.command()
         self.connection.exec_command.assert_called_with("{0} {1}\n".format(self.command_string,
                                                                            self.arguments),
-                                                                           timeout=self.timeout)
+                                                                           timeout=self.timeout,
+                                                                           idempotent=True)
         self.assertEqual(expected, result)
 
         # no match, no error
@@ -191,3 +193,56 @@ class TestTheCommand(unittest.TestCase):
         self.assertEqual(self.not_available, self.command())
         return
 # end TestTheCommand    
+
+
+class TestBatchCommand(unittest.TestCase):
+    def setUp(self):
+        self.connection = Mock()
+        self.connection.prefix = None
+        self.rssi = TheCommand(connection=self.connection,
+                               command='iwconfig wlan0',
+                               data_expression='Signal\slevel=(-\d+)')
+        self.noise = TheCommand(connection=self.connection,
+                                command='wl noise',
+                                data_expression='(-\d+)')
+        self.batch = BatchCommand(connection=self.connection,
+                                  commands={'rssi':self.rssi, 'noise':self.noise})
+        return
+
+    def test_script(self):
+        """
+        Does it put the markers in front of the commands?
+        """
+        for field, command in (('rssi', 'iwconfig wlan0'), ('noise', 'wl noise')):
+            self.assertIn("echo '__tuna_batch__ {0}'; echo '__tuna_batch__ {0}' >&2; {1}".format(field,
+                                                                                                 command),
+                          self.batch.script)
+        return
+
+    def test_call(self):
+        """
+        Does it split the output and apply each field's expression?
+        """
+        output = StringIO("__tuna_batch__ rssi\nwlan0 Signal level=-45 dBm\n"
+                          "__tuna_batch__ noise\n-92")
+        error = StringIO("__tuna_batch__ rssi\n__tuna_batch__ noise\n")
+        self.connection.exec_command.return_value = None, output, error
+        self.assertEqual({'rssi':'-45', 'noise':'-92'}, self.batch())
+        self.assertEqual(1, self.connection.exec_command.call_count)
+        return
+
+    def test_fallback(self):
+        """
+        Does it run the commands one at a time if the batch fails?
+        """
+        def exec_command(command, timeout, idempotent=False):
+            if '__tuna_batch__' in command:
+                raise socket.timeout()
+            if command.startswith('iwconfig'):
+                return None, StringIO('Signal level=-45\n'), StringIO('')
+            return None, StringIO('-92\n'), StringIO('')
+        self.connection.exec_command.side_effect = exec_command
+        self.assertEqual({'rssi':'-45', 'noise':'-92'}, self.batch())
+        self.assertEqual(3, self.connection.exec_command.call_count)
+        return
+# end TestBatchCommand
@@ -0,0 +1,59 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+
+# this package
+from tuna.infrastructure.configurationmap import ConfigurationMap
+from tuna.commands.query import QueryConfiguration
+from tuna.commands.poller import PollerConfiguration
+
+
+SAMPLE = """
+[QueryDUT]
+plugin = CommandQuery
+connection = DUT
+depends_on = DumpDUT, DumpTPC
+uname = uname -a,Linux
+
+[PollDUT]
+plugin = CommandPoller
+connection = DUT
+interval = 1
+depends_on =
+rssi = iwconfig wlan0,Signal level=(-?[0-9]+)
+"""
+
+class TestQueryConfiguration(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        filename = os.path.join(self.folder, 'tuna.ini')
+        with open(filename, 'w') as configuration:
+            configuration.write(SAMPLE)
+        self.configuration = ConfigurationMap(filename)
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        return
+
+    def test_query_depends_on(self):
+        """
+        Is the query's depends_on left out of the commands?
+        """
+        query = QueryConfiguration(configuration=self.configuration, section='QueryDUT')
+        self.assertEqual(['uname'], query.fields)
+        self.assertEqual({'uname': 'uname -a'}, query.commands)
+        return
+
+    def test_poller_depends_on(self):
+        """
+        Is the (empty) depends_on left out of the poller's commands?
+        """
+        poller = PollerConfiguration(configuration=self.configuration, section='PollDUT')
+        self.assertEqual(['rssi'], poller.fields)
+        self.assertEqual({'rssi': 'iwconfig wlan0'}, poller.commands)
+        return
+# end class TestQueryConfiguration
@@ -2,12 +2,14 @@
 # python standard library
 import socket
 import textwrap
-import datetime
+import threading
 
 # this package
 from tuna import BaseComponent, TunaError
 from tuna.clients.clientbase import suppresssocketerrors
 from tuna import LOG_TIMESTAMP
+from tuna.parts.storage.file_writer import TimestampWriter, BufferedTimestampWriter
+from tuna.parts.storage.file_writer import BufferedWriterConstants
 
 
 WRITEABLE = 'w'
@@ -21,6 +23,10 @@ class WatcherConstants(object):
     # defaults
     default_identifier = 'watcher'
     default_mode = WRITEABLE
+    default_stream_loop = False
+    default_buffer_lines = BufferedWriterConstants.default_capacity
+    default_flush_interval = BufferedWriterConstants.default_flush_interval
+    default_overflow = BufferedWriterConstants.default_overflow
 
     # options
     example = textwrap.dedent("""
@@ -46,7 +52,10 @@ class TheWatcher(BaseComponent):
     """
     def __init__(self, command, connection, storage,
                  identifier=None, filename=None,
-                 mode=WRITEABLE):
+                 mode=WRITEABLE, timeout=None, loop=None,
+                 buffer_lines=WatcherConstants.default_buffer_lines,
+                 flush_interval=WatcherConstants.default_flush_interval,
+                 overflow=WatcherConstants.default_overflow):
         """
         TheWatcher's Constructor
 
@@ -58,6 +67,11 @@ class TheWatcher(BaseComponent):
          - `storage`: File-like object to dump output to
          - `filename`: Name for output file
          - `mode`: mode for the file ('w' or 'a')
+         - `timeout`: readline timeout (None means block until there's output)
+         - `loop`: optional StreamLoop to read the output (instead of a thread)
+         - `buffer_lines`: most lines to buffer before writing (0 means write each line as it arrives)
+         - `flush_interval`: most seconds a buffered line waits to be written
+         - `overflow`: what to do when the buffer is full ('drop' or 'block')
         """
         super(TheWatcher, self).__init__()
         self._identifier = identifier
@@ -67,6 +81,13 @@ class TheWatcher(BaseComponent):
         self._filename = filename
         self.storage = storage
         self.mode = mode
+        self.loop = loop
+        self.buffer_lines = buffer_lines
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.task = None
+        self.output_file = None
+        self.writer = None
         self.stop = False
         return
 
@@ -106,23 +127,80 @@ class TheWatcher(BaseComponent):
         with self.storage.open(self.filename, mode=self.mode) as output_file:
             stdin, stdout, stderr = self.connection.exec_command(self.command,
                                                                  timeout=self.timeout)
-            for line in stdout:
-                timestamp = datetime.datetime.now().strftime(LOG_TIMESTAMP)
-                output_file.write("{0},{1}".format(timestamp,
-                                                   line))
-                #output_file.write(line)
-                if self.stop:
-                    break
-                
-            for line in stderr:
-                if line:
-                    self.logger.error(line)
+            self.output_file = output_file
+            self.writer = self.build_writer(output_file)
+            try:
+                for line in stdout:
+                    self.write_line(line)
+                    if self.stop:
+                        break
+
+                for line in stderr:
+                    if line:
+                        self.logger.error(line)
+            finally:
+                self.writer.close()
         return
 
+    def build_writer(self, output_file):
+        """
+        Builds the writer that timestamps the lines
+
+        :param:
+
+         - `output_file`: the opened file to write to
+
+        :return: BufferedTimestampWriter (TimestampWriter if buffer_lines is 0)
+        """
+        if not self.buffer_lines:
+            return TimestampWriter(open_file=output_file,
+                                   timestamp_format=LOG_TIMESTAMP)
+        return BufferedTimestampWriter(open_file=output_file,
+                                       timestamp_format=LOG_TIMESTAMP,
+                                       capacity=self.buffer_lines,
+                                       flush_interval=self.flush_interval,
+                                       overflow=self.overflow)
+
+    def write_line(self, line):
+        """
+        Writes the line to the output file with a timestamp
+
+        :param:
+
+         - `line`: line of output from the command
+        """
+        self.writer.write(line)
+        return
+
+    def finish(self):
+        """
+        Writes out the buffered lines and closes the file (the loop-task's on_close)
+        """
+        if hasattr(self.writer, 'close'):
+            self.writer.close()
+        self.output_file.close()
+        return
+
+    @property
+    def counters(self):
+        """
+        dict of the writer's counters (empty if it isn't buffered)
+        """
+        return getattr(self.writer, 'counters', {})
+
     def __call__(self):
         """
-        starts the `run` method in a thread
+        adds the command to the loop or starts the `run` method in a thread
         """
+        if self.loop is not None:
+            self.output_file = self.storage.open(self.filename, mode=self.mode)
+            self.writer = self.build_writer(self.output_file)
+            self.task = self.loop.exec_command(self.connection,
+                                               self.command,
+                                               callback=self.write_line,
+                                               name=str(self),
+                                               on_close=self.finish)
+            return
         self.thread = threading.Thread(target=self.run,
                                        name=str(self))
         self.thread.daemon = True                                   
@@ -134,6 +212,9 @@ class TheWatcher(BaseComponent):
         stops the runner
         """
         self.stop = True
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
         return
 
     def check_rep(self):
@@ -1,6 +1,7 @@
 
 # python standard library
 import inspect
+import threading
 
 # this package
 from tuna import MODULES_SECTION
@@ -10,7 +11,7 @@ from tuna.infrastructure.crash_handler import try_except
 from tuna import RESET
 from tuna import BOLD
 from tuna.parts.countdown.countdown import TimeTracker
-from tuna import BaseClass, TunaError
+from tuna import BaseClass, TunaError, ConfigurationError
 
 
 class Composite(BaseComponent):
@@ -21,7 +22,8 @@ class Composite(BaseComponent):
                  error=None, error_message=None,
                  identifier=None,
                  component_category=None,
-                 time_remains=None):
+                 time_remains=None,
+                 workers=None):
         """
         Composite Constructor
 
@@ -33,6 +35,7 @@ class Composite(BaseComponent):
          - `component_category`: label for error messages when reporting component actions
          - `identifier`: something to identify this when it starts the call
          - ``time_remains`` - a TimeTracker or CountdownTimer
+         - `workers`: most components to run at once when run as a graph (default is all of them)
         """
         super(Composite, self).__init__()
         self.error = error
@@ -42,6 +45,10 @@ class Composite(BaseComponent):
         self._logger = None
         self._components = components
         self._time_remains = time_remains
+        self.workers = workers
+        self.errors = []
+        self.crashed = set()
+        self.dependencies = {}
         return
 
     @property
@@ -74,17 +81,20 @@ class Composite(BaseComponent):
         self._time_remains = countdown
         return
 
-    def add(self, component):
+    def add(self, component, depends_on=None):
         """
         appends the component to self.components
 
         :param:
 
          - `component`: A Component
+         - `depends_on`: collection of components it has to wait for (None to wait for the one before it)
 
         :postcondition: component appended to components
         """
         self.components.append(component)
+        if depends_on is not None:
+            self.dependencies[component] = list(depends_on)
         return
 
     def remove(self, component):
@@ -95,6 +105,7 @@ class Composite(BaseComponent):
             self.components.remove(component)
         except ValueError as error:
             self.logger.debug(error)
+        self.dependencies.pop(component, None)
         return
 
     def __iter__(self):
@@ -130,7 +141,112 @@ class Composite(BaseComponent):
         if not hasattr(component, '__call__'):
             raise TunaError(("'{0}' has not implemented the __call__ interface. " 
                             "What a way to run a railroad.").format(component.__class__.__name__))
-        component()
+        try:
+            component()
+        except self.error as error:
+            self.errors.append(error)
+            self.crashed.add(component)
+            raise
+        return
+
+    @property
+    def failed(self):
+        """
+        True if this composite (or a composite in it) caught an error
+        """
+        return bool(self.errors) or any(getattr(component, 'failed', False) is True
+                                        for component in self.components)
+
+    def prerequisites(self):
+        """
+        Gets the components each component has to wait for
+
+        Components that weren't added with `depends_on` wait for the component before them.
+
+        :return: dict of component: set of components
+        :raise: AssertionError if a dependency isn't one of the components
+        """
+        waiting = {}
+        components = self.components
+        for index, component in enumerate(components):
+            before = self.dependencies.get(component, components[max(index - 1, 0):index])
+            for dependency in before:
+                assert dependency in components, (
+                    "'{0}' depends on '{1}' which isn't in the {2}".format(component,
+                                                                           dependency,
+                                                                           self.identifier))
+            waiting[component] = set(before)
+        return waiting
+
+    def call_node(self, component, finished, condition, uncaught):
+        """
+        Calls one component (meant to be the target of a thread)
+
+        :param:
+
+         - `component`: the component to call
+         - `finished`: list to append the component to when it's done
+         - `condition`: threading.Condition to notify when it's done
+         - `uncaught`: list to put errors this composite doesn't catch in
+        """
+        try:
+            self.one_call(component)
+        except BaseException as error:
+            uncaught.append(error)
+        with condition:
+            finished.append(component)
+            condition.notify()
+        return
+
+    def call_graph(self):
+        """
+        Calls each component once, starting each as soon as the components it depends on are done
+
+        Components whose dependencies crashed are skipped. If a component raises an error this
+        composite doesn't catch no more components are started and the error is re-raised once
+        the running components finish.
+        """
+        waiting = self.prerequisites()
+        pending = list(self.components)
+        workers = self.workers or len(pending)
+        done, skipped, finished, uncaught = set(), set(), [], []
+        condition = threading.Condition()
+        running = 0
+        self.crashed.clear()
+        with condition:
+            while pending or running:
+                skips = len(skipped)
+                for component in pending[:]:
+                    if uncaught or running >= workers:
+                        break
+                    before = waiting[component]
+                    if before & (self.crashed | skipped):
+                        pending.remove(component)
+                        skipped.add(component)
+                        self.logger.warning("Skipping '{0}' (a component it depends on crashed)".format(component))
+                    elif before <= done:
+                        pending.remove(component)
+                        self.logger.info("{b}** {l} '{o}' **{r}".format(b=BOLD, r=RESET,
+                                                                       l=self.component_category,
+                                                                       o=component))
+                        thread = threading.Thread(target=self.call_node,
+                                                  name=str(component),
+                                                  args=(component, finished, condition, uncaught))
+                        thread.daemon = True
+                        thread.start()
+                        running += 1
+                if not running:
+                    if len(skipped) > skips:
+                        # a skip can leave components that depend on it to skip
+                        continue
+                    break
+                while not finished:
+                    condition.wait()
+                while finished:
+                    done.add(finished.pop())
+                    running -= 1
+        if uncaught:
+            raise uncaught[0]
         return
 
     def __call__(self):
@@ -155,6 +271,9 @@ class Composite(BaseComponent):
 
         # the use of time-remains is meant to facilitate repeated re-use of the same component calls
         while self.time_remains():
+            if self.dependencies:
+                self.call_graph()
+                continue
             for count, component in enumerate(self.components):
                 self.logger.info(count_string.format(c=count+1,
                                                      t=total_count,
@@ -183,6 +302,17 @@ class Composite(BaseComponent):
             assert self.component_category is not None, (
                 "self.component_category must not be None")
 
+            # the graph has to be made of this composite's components and can't loop
+            waiting = self.prerequisites() if self.dependencies else {}
+            while waiting:
+                ready = [component for component, before in waiting.iteritems()
+                         if not before & set(waiting)]
+                assert ready, (
+                    "dependencies of {0} form a cycle".format(', '.join(str(component)
+                                                                        for component in waiting)))
+                for component in ready:
+                    del waiting[component]
+
             # check all your children
             for component in self.components:
                 if hasattr(component, 'check_rep'):
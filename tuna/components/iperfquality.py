@@ -13,8 +13,11 @@ from tuna.infrastructure import singletons
 from tuna.parts.storage.nullstorage import NullStorage
 from tuna.commands.iperf.iperf import IperfConfiguration, IperfClass
 from tuna.commands.iperf.sumparser import SumParser
+from tuna.commands.iperf.iperfsettings import IperfConstants
+from tuna.commands.iperf.iperfgroup import IperfGroup, IperfSession
 from tuna import GLOBAL_NAME
 from tuna.hosts.host import TheHost, HostConfiguration
+from tuna.infrastructure.metrics import METRICS
 
 
 class IperfDataConstants(object):
@@ -29,6 +32,10 @@ class IperfDataConstants(object):
     server_section_option = 'server_section'
     aggregator_option = 'aggregator'
     use_sums_option = 'use_sums'
+    persistent_server_option = 'persistent_server'
+    concurrent_option = 'concurrent'
+    candidate_folders_option = 'candidate_folders'
+    section_separator = ','
 
 
 CONFIGURATION = """
@@ -45,12 +52,29 @@ component = Iperf
 client_section = DUT
 server_section = TPC
 
+# to load the DUT from more than one traffic host, list their sections
+# the sessions will all run at the same time (each traffic host gets
+# its own port, starting at the iperf port (or 5001) and counting up)
+# server_section = TPC, TPC2
+
+# if concurrent is True and direction is 'both', run upstream and
+# downstream at the same time instead of one after the other
+# (concurrent sessions keep their servers running, so they need ssh)
+# concurrent = False
+
 # if store output is set to true, save the raw iperf files
 #store_output = True
 
+# if candidate_folders is True, each candidate's iperf files go in a sub-folder of its own
+# candidate_folders = False
+
 # if use_sums is True, don't re-add the threads, use the summed lines
 # use_sums = True
 
+# if persistent_server is True, start the iperf server once and leave it running
+# between solutions (it's only restarted if it dies) -- this needs ssh, not telnet
+# persistent_server = False
+
 # the iperf output has to be reduced to a single number
 # the default is to take the median of all outputs
 # for something else change it (only max, min, mean, median, or sum for now)
@@ -137,12 +161,14 @@ The Iperf quality metric runs iperf and returns the median bandwidth to the opti
 
 
 FILE_FORMAT = "input_{inputs}_rep_{repetition}.iperf"
+FOLDER_FILE_FORMAT = "input_{inputs}/rep_{repetition}.iperf"
 
 class IperfMetric(BaseComponent):
     """
     An aggregator of iperf output
     """
-    def __init__(self, directions, iperf, repetitions=1, aggregator=None):
+    def __init__(self, directions, iperf, repetitions=1, aggregator=None,
+                 group=None, candidate_folders=False):
         """
         IperfMetric constructor
 
@@ -152,11 +178,15 @@ class IperfMetric(BaseComponent):
          - `directions`: iterable collection of iperf directions
          - `iperf`: a built IperfClass object
          - `aggregator`: callable to reduce iperf outputs to one value
+         - `group`: an IperfGroup to run the sessions simultaneously (used instead of `iperf`)
+         - `candidate_folders`: if True, save each candidate's files in a sub-folder
         """
         super(IperfMetric, self).__init__()
+        self.candidate_folders = candidate_folders
         self.repetitions = repetitions
         self.directions = directions
         self.iperf = iperf
+        self.group = group
         self._aggregator = aggregator
         return
 
@@ -182,9 +212,14 @@ class IperfMetric(BaseComponent):
             for repetition in xrange(self.repetitions):
                 self.log_info("Iperf Repetition {0} of {1}".format(repetition+1,
                                                                       self.repetitions))
+                METRICS.iperf_repetitions.increment()
+                file_format = FOLDER_FILE_FORMAT if self.candidate_folders else FILE_FORMAT
+                filename = file_format.format(repetition=repetition,
+                                              inputs="_".join([str(item) for item in target.inputs]))
+                if self.group is not None:
+                    outcomes.extend(self.run_group(filename))
+                    continue
                 for direction in self.directions:
-                    filename = FILE_FORMAT.format(repetition=repetition,
-                                                  inputs="_".join([str(item) for item in target.inputs]))
                     outcomes.append(self.iperf(direction, filename))            
             target.output = self.aggregator(outcomes)
             self.log_info("{0} of {1} iperf repetitions: {2}".format(self.aggregator.__name__,
@@ -192,6 +227,26 @@ class IperfMetric(BaseComponent):
                                                                         target.output))
         return target.output
 
+    def run_group(self, filename):
+        """
+        Runs the group's sessions and reports them per client and per direction
+
+        :param:
+
+         - `filename`: base-name for the iperf output files
+
+        :return: list with the total (summed across clients) for each direction
+        """
+        outcomes = self.group(filename)
+        totals = OrderedDict()
+        for (label, direction), value in outcomes.iteritems():
+            self.logger.info("{0} {1}: {2}".format(label, direction, value))
+            totals[direction] = totals.get(direction, 0) + value
+        for direction, total in totals.iteritems():
+            self.log_info("{0} (all clients): {1}".format(direction, total))
+        self.log_info("All sessions: {0}".format(sum(totals.values())))
+        return totals.values()
+
     def check_rep(self):
         """
         Checks the given constructor parameters
@@ -204,8 +259,12 @@ class IperfMetric(BaseComponent):
 
     def close(self):
         """
-        This doesn't do anything
+        Closes the iperf object (stopping any persistent servers)
         """
+        if hasattr(self.iperf, 'close'):
+            self.iperf.close()
+        if self.group is not None:
+            self.group.close()
         return
 # end IperfMetric            
 
@@ -231,6 +290,10 @@ class Iperf(BasePlugin):
         self._iperf_configuration = None
         self._iperf_parser = None
         self._aggregator = None
+        self._server_sections = None
+        self._servers = None
+        self._directions = None
+        self._group = None
         return
 
     @property
@@ -254,23 +317,35 @@ class Iperf(BasePlugin):
         IperfParser or SumParser (depending on configuration)
         """
         if self._iperf_parser is None:
-            if self.configuration.get_boolean(section=self.section_header,
+            self._iperf_parser = self.build_parser(self.iperf_configuration)
+        return self._iperf_parser
+
+    def build_parser(self, iperf_configuration):
+        """
+        Builds a SumParser if the configuration asks for one
+
+        :param:
+
+         - `iperf_configuration`: IperfConfiguration whose client-settings the parser uses
+
+        :return: SumParser or None (so the IperfClass uses its default)
+        """
+        if not self.configuration.get_boolean(section=self.section_header,
                                               option=IperfDataConstants.use_sums_option,
                                               optional=True,
                                               default=False):
-                interval = 10
-                threads = 1
-                if self.iperf_configuration.client_settings.get('interval') is not None:
-                    interval = self.iperf_configuration.client_settings.get('interval')
-                elif self.iperf_configuration.client_settings.get('time') is not None:
-                    interval = self.iperf_configuration.client_settings.get('time')
-
-                if self.iperf_configuration.client_settings.get('parallel') is not None:
-                    threads = self.iperf_configuration.client_settings.get('parallel')
-                        
-                self._iperf_parser = SumParser(expected_interval=interval,
-                                               threads=threads)
-        return self._iperf_parser
+            return None
+        interval = 10
+        threads = 1
+        if iperf_configuration.client_settings.get('interval') is not None:
+            interval = iperf_configuration.client_settings.get('interval')
+        elif iperf_configuration.client_settings.get('time') is not None:
+            interval = iperf_configuration.client_settings.get('time')
+
+        if iperf_configuration.client_settings.get('parallel') is not None:
+            threads = iperf_configuration.client_settings.get('parallel')
+        return SumParser(expected_interval=interval,
+                         threads=threads)
 
 
     def host_builder(self, section):
@@ -286,17 +361,39 @@ class Iperf(BasePlugin):
                         **configuration.kwargs)
         return client
 
+    @property
+    def server_sections(self):
+        """
+        List of section names for the traffic-PCs
+        """
+        if self._server_sections is None:
+            sections = self.configuration.get(section=self.section_header,
+                                              option=IperfDataConstants.server_section_option,
+                                              optional=True)
+            if sections is None:
+                self._server_sections = [None]
+            else:
+                self._server_sections = [section.strip() for section in
+                                         sections.split(IperfDataConstants.section_separator)]
+        return self._server_sections
+
     @property
     def server(self):
         """
-        Host object for the traffic-PC
+        Host object for the (first) traffic-PC
         """
         if self._server is None:
-            section = self.configuration.get(section=self.section_header,
-                                             option=IperfDataConstants.server_section_option,
-                                             optional=True)
-            self._server = self.host_builder(section)
+            self._server = self.servers[0]
         return self._server
+
+    @property
+    def servers(self):
+        """
+        List of host objects for the traffic-PCs
+        """
+        if self._servers is None:
+            self._servers = [self.host_builder(section) for section in self.server_sections]
+        return self._servers
         
     @property
     def client(self):
@@ -348,9 +445,65 @@ class Iperf(BasePlugin):
                                      server_settings=self.iperf_configuration.server_settings,
                                      storage=self.storage,
                                      parser=self.iperf_parser,
-                                     aggregator=self.aggregator)
+                                     aggregator=self.aggregator,
+                                     persistent=self.configuration.get_boolean(section=self.section_header,
+                                                                               option=IperfDataConstants.persistent_server_option,
+                                                                               optional=True,
+                                                                               default=False))
         return self._iperf
     
+    @property
+    def directions(self):
+        """
+        List of directions to run
+        """
+        if self._directions is None:
+            directions = self.iperf_configuration.direction
+            if directions.startswith('b'):
+                self._directions = 'upstream downstream'.split()
+            else:
+                self._directions = [directions]
+        return self._directions
+
+    @property
+    def group(self):
+        """
+        An IperfGroup if there's more than one traffic-PC or concurrent is set (None otherwise)
+        """
+        if self._group is None:
+            concurrent = self.configuration.get_boolean(section=self.section_header,
+                                                        option=IperfDataConstants.concurrent_option,
+                                                        optional=True,
+                                                        default=False)
+            if not concurrent and len(self.servers) == 1:
+                return None
+            sessions = []
+            for index, (section, server) in enumerate(zip(self.server_sections, self.servers)):
+                for direction in self.directions:
+                    # each session needs its own settings (the client-settings get the server address)
+                    iperf_configuration = IperfConfiguration(configuration=self.configuration,
+                                                             section=self.section_header)
+                    if len(self.servers) > 1:
+                        # the DUT runs a server for each traffic-PC so they need different ports
+                        port = iperf_configuration.client_settings.get('port')
+                        if port is None:
+                            port = IperfConstants.default_port
+                        iperf_configuration.client_settings.set('port', int(port) + index)
+                        iperf_configuration.server_settings.set('port', int(port) + index)
+                    iperf = IperfClass(dut=self.client,
+                                       traffic_server=server,
+                                       client_settings=iperf_configuration.client_settings,
+                                       server_settings=iperf_configuration.server_settings,
+                                       storage=self.storage,
+                                       parser=self.build_parser(iperf_configuration),
+                                       aggregator=self.aggregator,
+                                       persistent=True)
+                    sessions.append(IperfSession(label=section,
+                                                 direction=direction,
+                                                 iperf=iperf))
+            self._group = IperfGroup(sessions=sessions)
+        return self._group
+
     @property
     def product(self):
         """
@@ -361,17 +514,20 @@ class Iperf(BasePlugin):
                                                  option=IperfDataConstants.repetitions_option,
                                                  optional=True,
                                                  default=1)
-
-            directions = self.iperf_configuration.direction
-            if directions.startswith('b'):
-                directions = 'upstream downstream'.split()
-
-            else:
-                directions = [directions]
+            candidate_folders = self.configuration.get_boolean(section=self.section_header,
+                                                               option=IperfDataConstants.candidate_folders_option,
+                                                               optional=True,
+                                                               default=False)
+            group = self.group
+            iperf = None
+            if group is None:
+                iperf = self.iperf
             self._product = IperfMetric(repetitions=repetitions,
-                                   directions=directions,
-                                   iperf=self.iperf,
-                                   aggregator=self.aggregator)
+                                   directions=self.directions,
+                                   iperf=iperf,
+                                   group=group,
+                                   aggregator=self.aggregator,
+                                   candidate_folders=candidate_folders)
         return self._product
 
     @property
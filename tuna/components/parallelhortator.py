@@ -0,0 +1,223 @@
+
+# python standard library
+from collections import OrderedDict
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+# this package
+from tuna import BaseClass, TunaError
+from tuna.infrastructure.configurationmap import ConfigurationMap
+from tuna.infrastructure.quartermaster import QuarterMaster
+from tuna.log_setter import LOG_FORMAT, LOG_TIMESTAMP
+from tuna.hosts.host import HostEnum
+
+
+class ParallelHortatorConstants(object):
+    """
+    Constants for the ParallelHortator
+    """
+    __slots__ = ()
+    default_section = 'DEFAULT'
+    resources_option = 'resources'
+    host_options = (HostEnum.control_ip, HostEnum.test_ip)
+    log_extension = '.log'
+    screen_prefix = '[{0}] '
+    poll_interval = 0.1
+    success = 0
+    failure = 1
+    logger_name = 'tuna'
+
+
+class ParallelHortator(BaseClass):
+    """
+    Runs the operators for separate configurations in parallel processes
+    """
+    def __init__(self, configfiles, processes=None, log_folder=None):
+        """
+        ParallelHortator constructor
+
+        :param:
+
+         - `configfiles`: list of configuration-file names (one operator each)
+         - `processes`: most operators to run at once (default is one per file)
+         - `log_folder`: folder for the operators' log-files (default is next to the configuration)
+        """
+        super(ParallelHortator, self).__init__()
+        self.configfiles = configfiles
+        self.processes = processes or len(configfiles)
+        self.log_folder = log_folder
+        self._resources = None
+        self.running = OrderedDict()
+        self.statuses = OrderedDict()
+        return
+
+    @property
+    def resources(self):
+        """
+        dict of configuration-file: frozenset of resource tags
+        """
+        if self._resources is None:
+            self._resources = {}
+            for config_file in self.configfiles:
+                configuration = ConfigurationMap(config_file)
+                tags = configuration.get_list(section=ParallelHortatorConstants.default_section,
+                                              option=ParallelHortatorConstants.resources_option,
+                                              optional=True,
+                                              default=None)
+                if tags is None:
+                    tags = [configuration.get(section, option)
+                            for section in configuration.sections
+                            for option in ParallelHortatorConstants.host_options
+                            if configuration.has_option(section, option)]
+                self._resources[config_file] = frozenset(tag.strip().lower() for tag in tags if tag)
+                self.logger.debug("{0} uses: {1}".format(config_file,
+                                                         ', '.join(sorted(self._resources[config_file]))))
+        return self._resources
+
+    def conflicts(self, config_file):
+        """
+        Checks if the configuration needs a resource a running operator is using
+
+        :param:
+
+         - `config_file`: name of the configuration file
+
+        :return: True if it shares a resource with a running operator
+        """
+        tags = self.resources[config_file]
+        return any(tags & self.resources[running] for running in self.running)
+
+    def log_name(self, config_file):
+        """
+        The log-file name for the configuration
+
+        :param:
+
+         - `config_file`: name of the configuration file
+
+        :return: path to `<config-file base-name>.log`
+        """
+        base = os.path.splitext(os.path.basename(config_file))[0]
+        folder = self.log_folder
+        if folder is None:
+            folder = os.path.dirname(config_file)
+        elif not os.path.isdir(folder):
+            os.makedirs(folder)
+        return os.path.join(folder, base + ParallelHortatorConstants.log_extension)
+
+    def isolate_logging(self, config_file):
+        """
+        Gives the (child's) logger a log-file of its own and labels its screen output
+
+        :param:
+
+         - `config_file`: name of the configuration file
+        """
+        logger = logging.getLogger(ParallelHortatorConstants.logger_name)
+        prefix = ParallelHortatorConstants.screen_prefix.format(os.path.basename(config_file))
+        for handler in logger.handlers[:]:
+            if isinstance(handler, logging.FileHandler):
+                logger.removeHandler(handler)
+            elif handler.formatter is not None:
+                handler.setFormatter(logging.Formatter(prefix + handler.formatter._fmt,
+                                                       datefmt=handler.formatter.datefmt))
+        log_file = logging.FileHandler(self.log_name(config_file))
+        log_file.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_TIMESTAMP))
+        log_file.setLevel(logging.DEBUG)
+        logger.addHandler(log_file)
+        return
+
+    def run_operator(self, config_file):
+        """
+        Builds and runs the configuration's operator (meant to run in the child process)
+
+        :param:
+
+         - `config_file`: name of the configuration file
+
+        :postcondition: the process exits with 0 on success, 1 if anything crashed
+        """
+        self.isolate_logging(config_file)
+        status = ParallelHortatorConstants.failure
+        try:
+            plugin = QuarterMaster().get_plugin('Tuna')
+            hortator = plugin(configfiles=[config_file]).product
+            hortator()
+            if not hortator.failed:
+                status = ParallelHortatorConstants.success
+            hortator.close()
+        except Exception as error:
+            self.log_error(error, " (running {0})".format(config_file))
+        sys.exit(status)
+        return
+
+    def start(self, config_file):
+        """
+        Starts a process for the configuration
+
+        :param:
+
+         - `config_file`: name of the configuration file
+        """
+        process = multiprocessing.Process(target=self.run_operator,
+                                          name=os.path.basename(config_file),
+                                          args=(config_file,))
+        process.start()
+        self.running[config_file] = process
+        self.logger.info("Started {0} (PID: {1}, log: {2})".format(config_file,
+                                                                  process.pid,
+                                                                  self.log_name(config_file)))
+        return
+
+    def __call__(self):
+        """
+        Runs all the configurations (as many at once as don't conflict)
+
+        :return: 0 if every operator succeeded, 1 otherwise
+        """
+        pending = list(self.configfiles)
+        try:
+            while pending or self.running:
+                for config_file in pending[:]:
+                    if len(self.running) >= self.processes:
+                        break
+                    if not self.conflicts(config_file):
+                        pending.remove(config_file)
+                        self.start(config_file)
+                if not self.running:
+                    raise TunaError("Unable to start any of: {0}".format(', '.join(pending)))
+                time.sleep(ParallelHortatorConstants.poll_interval)
+                for config_file, process in self.running.items():
+                    if not process.is_alive():
+                        process.join()
+                        self.statuses[config_file] = process.exitcode
+                        del self.running[config_file]
+                        self.logger.info("{0} finished (exit status: {1})".format(config_file,
+                                                                                 process.exitcode))
+        except KeyboardInterrupt:
+            self.stop()
+            raise
+        failures = [config_file for config_file, status in self.statuses.iteritems() if status]
+        for config_file in failures:
+            self.logger.error("{0} failed (see {1})".format(config_file, self.log_name(config_file)))
+        self.logger.info("{0} of {1} configurations succeeded".format(len(self.statuses) - len(failures),
+                                                                      len(self.configfiles)))
+        if failures:
+            return ParallelHortatorConstants.failure
+        return ParallelHortatorConstants.success
+
+    def stop(self):
+        """
+        Terminates the running operators
+        """
+        for config_file, process in self.running.items():
+            self.logger.warning("Terminating {0}".format(config_file))
+            process.terminate()
+            process.join()
+            self.statuses[config_file] = process.exitcode
+        self.running.clear()
+        return
+# end class ParallelHortator
@@ -0,0 +1,148 @@
+
+# python standard library
+from collections import OrderedDict
+import unittest
+import time
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna.components.composite import Composite
+from tuna import TunaError, ConfigurationError, DontCatchError
+from tuna.plugins.tunaplugin import Tuna
+
+
+class SleepyComponent(object):
+    """
+    A component that sleeps and records when it ran
+    """
+    def __init__(self, name, seconds=0.2, log=None, error=None):
+        self.name = name
+        self.seconds = seconds
+        self.log = log
+        self.error = error
+        return
+
+    def __call__(self):
+        self.log.append((self.name, 'start'))
+        time.sleep(self.seconds)
+        if self.error is not None:
+            raise self.error
+        self.log.append((self.name, 'end'))
+        return
+
+    def check_rep(self):
+        return
+
+    def close(self):
+        return
+
+    def __str__(self):
+        return self.name
+
+
+class TestCompositeGraph(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        self.composite = self.build(TunaError)
+        self.a = SleepyComponent('a', log=self.log)
+        self.b = SleepyComponent('b', log=self.log)
+        self.c = SleepyComponent('c', log=self.log)
+        return
+
+    def build(self, error):
+        return Composite(error=error,
+                         error_message='Crash',
+                         identifier='Test',
+                         component_category='Component',
+                         time_remains=MagicMock(side_effect=[True, False]))
+
+    def test_prerequisites(self):
+        """
+        Does a component without `depends_on` wait for the one before it?
+        """
+        self.composite.add(self.a)
+        self.composite.add(self.b, depends_on=[])
+        self.composite.add(self.c)
+        self.assertEqual({self.a: set(), self.b: set(), self.c: set([self.b])},
+                         self.composite.prerequisites())
+        return
+
+    def test_parallel(self):
+        """
+        Do independent components run at the same time?
+        """
+        self.composite.add(self.a, depends_on=[])
+        self.composite.add(self.b, depends_on=[])
+        self.composite.add(self.c, depends_on=[self.a, self.b])
+        start = time.time()
+        self.composite()
+        elapsed = time.time() - start
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(('c', 'start'), self.log[4])
+        self.assertEqual(set(['a', 'b']), set(name for name, event in self.log[:2]))
+
+        # the workers limit how many run at once
+        del self.log[:]
+        self.composite.workers = 1
+        self.composite.time_remains = MagicMock(side_effect=[True, False])
+        start = time.time()
+        self.composite()
+        self.assertGreaterEqual(time.time() - start, 0.6)
+        return
+
+    def test_crash(self):
+        """
+        Are the components that depend on a crashed one skipped?
+        """
+        self.a.error = TunaError('bad')
+        self.composite.add(self.a, depends_on=[])
+        self.composite.add(self.b, depends_on=[])
+        self.composite.add(self.c, depends_on=[self.a])
+        self.composite()
+        self.assertTrue(self.composite.failed)
+        self.assertIn(('b', 'end'), self.log)
+        self.assertNotIn(('c', 'start'), self.log)
+
+        # errors it doesn't catch are raised after the running components finish
+        del self.log[:]
+        self.composite = self.build(DontCatchError)
+        self.composite.add(self.a, depends_on=[])
+        self.composite.add(self.b, depends_on=[])
+        with self.assertRaises(TunaError):
+            self.composite()
+        self.assertIn(('b', 'end'), self.log)
+        return
+
+    def test_check_rep(self):
+        """
+        Does the check_rep catch cycles and strangers?
+        """
+        self.composite.add(self.a, depends_on=[self.c])
+        self.composite.add(self.b, depends_on=[self.a])
+        self.composite.add(self.c, depends_on=[self.b])
+        with self.assertRaises(ConfigurationError):
+            self.composite.check_rep()
+
+        self.composite.dependencies[self.a] = [SleepyComponent('d')]
+        with self.assertRaises(ConfigurationError):
+            self.composite.check_rep()
+        return
+
+    def test_add_plugins(self):
+        """
+        Does the Tuna plugin translate section names to components?
+        """
+        operation = MagicMock()
+        plugins = OrderedDict([('A', self.a), ('B', self.b), ('C', self.c)])
+        Tuna().add_plugins(operation, plugins, {'A': None, 'B': [''], 'C': ['A', 'B']})
+        self.assertEqual([((self.a,), {'depends_on': None}),
+                          ((self.b,), {'depends_on': []}),
+                          ((self.c,), {'depends_on': [self.a, self.b]})],
+                         operation.add.call_args_list)
+
+        with self.assertRaises(ConfigurationError):
+            Tuna().add_plugins(operation, plugins, {'A': ['D'], 'B': None, 'C': None})
+        return
+# end class TestCompositeGraph
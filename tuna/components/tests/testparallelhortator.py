@@ -0,0 +1,93 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# third-party
+from mock import MagicMock, patch
+
+# this package
+from tuna.components.parallelhortator import ParallelHortator
+from tuna.components.composite import Composite
+from tuna import TunaError
+
+
+CONFIGURATIONS = {'a.ini': "[DEFAULT]\nresources = 192.168.10.34\n",
+                  'b.ini': ("[DUT]\ncontrol_ip = 192.168.10.34\ntest_ip = 192.168.20.34\n"
+                            "username = root\n"
+                            "[TPC]\ncontrol_ip = 192.168.10.50\ntest_ip = 192.168.20.50\n"),
+                  'c_bad.ini': "[DUT]\ncontrol_ip = 192.168.10.60\ntest_ip = 192.168.20.60\n"}
+
+def fake_operator(self, config_file):
+    """
+    Stands in for the operator (in the child process)
+    """
+    time.sleep(0.2)
+    sys.exit(int('bad' in config_file))
+
+class TestParallelHortator(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.configfiles = []
+        for name in sorted(CONFIGURATIONS):
+            path = os.path.join(self.folder, name)
+            with open(path, 'w') as config_file:
+                config_file.write(CONFIGURATIONS[name])
+            self.configfiles.append(path)
+        self.hortator = ParallelHortator(configfiles=self.configfiles)
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        return
+
+    def test_resources(self):
+        """
+        Does it use the resources option or the hosts' addresses to find conflicts?
+        """
+        a, b, c = self.configfiles
+        self.assertEqual(frozenset(['192.168.10.34']), self.hortator.resources[a])
+        self.assertEqual(frozenset(['192.168.10.34', '192.168.20.34',
+                                    '192.168.10.50', '192.168.20.50']),
+                         self.hortator.resources[b])
+        self.assertEqual(frozenset(['192.168.10.60', '192.168.20.60']),
+                         self.hortator.resources[c])
+        self.hortator.running[a] = MagicMock()
+        self.assertTrue(self.hortator.conflicts(b))
+        self.assertFalse(self.hortator.conflicts(c))
+        self.assertEqual(os.path.join(self.folder, 'a.log'), self.hortator.log_name(a))
+        return
+
+    def test_call(self):
+        """
+        Does it run the non-conflicting configurations together and report failures?
+        """
+        a, b, c = self.configfiles
+        with patch.object(ParallelHortator, 'run_operator', fake_operator):
+            self.assertEqual(1, self.hortator())
+        self.assertEqual({a: 0, b: 0, c: 1}, dict(self.hortator.statuses))
+        # b had to wait for a
+        self.assertEqual(b, self.hortator.statuses.keys()[-1])
+        return
+
+    def test_failed(self):
+        """
+        Does the Composite remember that something in it crashed?
+        """
+        component = MagicMock(side_effect=TunaError('crash'))
+        operation = Composite(error=TunaError, error_message='crash',
+                              component_category='test')
+        operation.time_remains = MagicMock(side_effect=[True, False])
+        operation.add(MagicMock())
+        self.assertFalse(operation.failed)
+        operation.one_call(component)
+        self.assertTrue(operation.failed)
+        operator = Composite()
+        operator.add(operation)
+        self.assertTrue(operator.failed)
+        return
+# end class TestParallelHortator
@@ -0,0 +1,141 @@
+
+# python standard library
+import SocketServer
+import telnetlib
+import threading
+import timeit
+
+# this package
+from tuna.clients.telnetclient import TelnetOutput
+
+
+LOOPBACK = '127.0.0.1'
+ANY_PORT = 0
+END_OF_LINE = '\r\n'
+PROMPT = 'fakeprompt#'
+COMMAND = 'dmesg'
+LINE = "[{0:>12.6f}] wlan0: RX AssocResp from 00:11:22:33:44:55 (capab=0x431 status=0 aid=1)"
+LINES = 10000
+REPETITIONS = 3
+TIMEOUT = 10
+
+
+class FakeTelnetHandler(SocketServer.StreamRequestHandler):
+    """
+    Answers each line it's sent with the server's output and the prompt
+    """
+    def handle(self):
+        """
+        Sends the output until the client hangs up
+        """
+        for line in self.rfile:
+            self.wfile.write(self.server.output + PROMPT)
+            self.wfile.flush()
+        return
+# end class FakeTelnetHandler
+
+
+class FakeTelnetServer(SocketServer.ThreadingTCPServer):
+    """
+    A loopback server that pretends to be a device's telnet server
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, lines=LINES):
+        """
+        FakeTelnetServer constructor
+
+        :param:
+
+         - `lines`: number of lines of output to send for each command
+        """
+        SocketServer.ThreadingTCPServer.__init__(self, (LOOPBACK, ANY_PORT),
+                                                 FakeTelnetHandler)
+        self.output = END_OF_LINE.join(LINE.format(index * 0.001)
+                                       for index in xrange(lines)) + END_OF_LINE
+        return
+
+    def start(self):
+        """
+        Serves in a daemon thread
+
+        :return: the port the server is listening on
+        """
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self.server_address[1]
+# end class FakeTelnetServer
+
+
+def expect_reader(client):
+    """
+    Reads the output with one `expect` per line
+
+    :param:
+
+     - `client`: telnetlib.Telnet connected to the fake server
+
+    :return: count of lines read
+    """
+    client.write(COMMAND + '\n')
+    endings = [END_OF_LINE, PROMPT]
+    count = 0
+    while True:
+        index, match, text = client.expect(endings, TIMEOUT)
+        if index != 0:
+            return count
+        count += 1
+
+
+def buffered_reader(client):
+    """
+    Reads the output with the TelnetOutput
+
+    :param:
+
+     - `client`: telnetlib.Telnet connected to the fake server
+
+    :return: count of lines read
+    """
+    client.write(COMMAND + '\n')
+    output = TelnetOutput(client=client, prompt=PROMPT,
+                          end_of_line=END_OF_LINE, timeout=TIMEOUT)
+    return sum(1 for line in output if line)
+
+
+def benchmark(lines=LINES, repetitions=REPETITIONS):
+    """
+    Times both readers against the fake server
+
+    :param:
+
+     - `lines`: lines of output per command
+     - `repetitions`: times to run each reader (the best time is kept)
+
+    :return: dict of reader-name:(best seconds, lines read)
+    """
+    server = FakeTelnetServer(lines=lines)
+    port = server.start()
+    outcomes = {}
+    try:
+        for reader in (expect_reader, buffered_reader):
+            client = telnetlib.Telnet(LOOPBACK, port, TIMEOUT)
+            counts = []
+            timer = timeit.Timer(lambda: counts.append(reader(client)))
+            best = min(timer.repeat(repeat=repetitions, number=1))
+            client.close()
+            outcomes[reader.__name__] = (best, counts[-1])
+    finally:
+        server.shutdown()
+        server.server_close()
+    return outcomes
+
+
+if __name__ == '__main__':
+    outcomes = benchmark()
+    for name in ('expect_reader', 'buffered_reader'):
+        seconds, count = outcomes[name]
+        print "{0:<16} {1:>8} lines {2:>10.4f} seconds".format(name, count, seconds)
+    print "speed-up: {0:.1f}x".format(outcomes['expect_reader'][0]/outcomes['buffered_reader'][0])
@@ -2,13 +2,20 @@
 # python standard library
 import time
 import textwrap
-from threading import RLock
 
 # this package
 from tuna.clients.simpleclient import SimpleClient
 from tuna.clients.telnetclient import TelnetClient
+from tuna.clients.localclient import LocalClient
+from tuna.clients.connectionregistry import ConnectionKey, credentials_digest
+from tuna.clients.channellimiter import ChannelLimiter
+from tuna.hosts.processmanager import ProcessManager
+from tuna.infrastructure.singletons import get_connection_registry
 from tuna import BaseClass, TunaError
 from tuna.infrastructure.baseconfiguration import BaseConfiguration
+from tuna.parts.phasetimer import PhaseTimerConstants, phase
+from tuna.parts.scheduler import monotonic
+from tuna.infrastructure.metrics import METRICS
 
 
 class HostEnum(object):
@@ -28,6 +35,7 @@ class HostEnum(object):
     prefix = 'prefix'
     operating_system = 'operating_system'
     telnet = 'telnet'
+    local = 'local'
     prefix_command = '{p} {c}'
     
     options = (control_ip, password, connection_type, test_ip, username,
@@ -37,6 +45,13 @@ class HostEnum(object):
     default_type = 'ssh'
     default_timeout = 1
     default_operating_system = 'linux'
+    max_concurrent = 'max_concurrent'
+    default_max_concurrent = 4
+
+    # connection types whose clients can be shared by hosts
+    shared_types = (default_type,)
+    # connection types that can run more than one command at a time
+    concurrent_types = (default_type, local)
     
 # end HostEnum    
 
@@ -60,7 +75,7 @@ class TheHost(BaseClass):
          - `prefix`: string to add to every command sent to the connection
          - `operating_system`: os to help commands predict syntax
          - `connection_type`: Identifier for the connection (see HostEnum)
-         - `kwargs`: extra parameters for connections other than the SimpleClient
+         - `kwargs`: extra parameters for connections other than the SimpleClient (`max_concurrent` is used by the host)
         """
         super(TheHost, self).__init__()
         self.hostname = hostname
@@ -70,12 +85,17 @@ class TheHost(BaseClass):
         self.prefix = prefix
         self.operating_system = operating_system
         self.connection_type = connection_type
+        self.max_concurrent = int(kwargs.pop(HostEnum.max_concurrent,
+                                             HostEnum.default_max_concurrent))
         self.kwargs = kwargs
 
         # properties
         self._client = None
         self._client_constructors = None
-        self._lock = None
+        self._connection_key = None
+        self._registry = None
+        self._channels = None
+        self._processes = None
 
         # backward compatibility
         self.ControlInterface = hostname
@@ -84,26 +104,65 @@ class TheHost(BaseClass):
         return
 
     @property
-    def lock(self):
+    def channels(self):
+        """
+        A ChannelLimiter to limit the number of commands being started at once
+
+        Only SSH and local connections can run more than one command at a time
+        (the SimpleClient limits the number of channels left open on its transport)
+        """
+        if self._channels is None:
+            limit = 1
+            if self.connection_type in HostEnum.concurrent_types:
+                limit = self.max_concurrent
+            self._channels = ChannelLimiter(limit=limit)
+        return self._channels
+
+    @property
+    def connection_key(self):
         """
-        A re-entrant lock to protect the exec-command calls
+        A ConnectionKey to find this host's client in the connection registry
+
+        The other connection arguments (password, key_filename, etc.) go into the key's credentials
         """
-        if self._lock is None:
-            self._lock = RLock()
-        return self._lock
+        if self._connection_key is None:
+            credentials = dict((name, value) for name, value in self.kwargs.iteritems()
+                               if name != HostEnum.port)
+            self._connection_key = ConnectionKey(hostname=self.hostname,
+                                                 port=str(self.kwargs.get(HostEnum.port,
+                                                                          HostEnum.default_port)),
+                                                 username=self.username,
+                                                 connection_type=self.connection_type,
+                                                 credentials=credentials_digest(credentials))
+        return self._connection_key
 
     @property
     def client(self):
         """
         A built client (connection)
+
+        SSH clients are shared with other hosts to the same device through the connection registry
         """
         if self._client is None:
-            self._client = self.client_constructors[self.connection_type](hostname=self.hostname,
-                                                                          username=self.username,
-                                                                          timeout=self.timeout,
-                                                                          **self.kwargs)
+            if self.connection_type in HostEnum.shared_types:
+                self._registry = get_connection_registry()
+                self._client = self._registry.acquire(self.connection_key,
+                                                      self.build_client)
+            else:
+                self._client = self.build_client()
         return self._client
 
+    def build_client(self):
+        """
+        Builds a new client using the connection-type
+
+        :return: client (connection) to the device
+        """
+        return self.client_constructors[self.connection_type](hostname=self.hostname,
+                                                              username=self.username,
+                                                              timeout=self.timeout,
+                                                              **self.kwargs)
+
     @property
     def client_constructors(self):
         """
@@ -112,11 +171,11 @@ class TheHost(BaseClass):
         :return: dict of type:class definition objects
         """
         if self._client_constructors is None:
-            self._client_constructors = dict(zip((HostEnum.default_type, HostEnum.telnet),
-                                                 (SimpleClient, TelnetClient)))
+            self._client_constructors = dict(zip((HostEnum.default_type, HostEnum.telnet, HostEnum.local),
+                                                 (SimpleClient, TelnetClient, LocalClient)))
         return self._client_constructors
 
-    def exec_command(self, command, timeout=1):
+    def exec_command(self, command, timeout=1, idempotent=False):
         """
         Calls the Clients's non-blocking run to execute `prefix command`.
 
@@ -124,6 +183,7 @@ class TheHost(BaseClass):
 
          - `command`: string to send to the ssh-client
          - `timeout`: Timeout for reading from the socket (set to None for output that will be empty for a while)
+         - `idempotent`: True if the command is safe to re-send if the connection has to be re-made
 
         :rtype: Tuple
         :return: Stdin, Stdout, Stderr
@@ -131,50 +191,64 @@ class TheHost(BaseClass):
         if self.prefix is not None:
             command = HostEnum.prefix_command.format(p=self.prefix,
                                                           c=command)
-        with self.lock:
-            return self.client.exec_command(command,
-                                        timeout=timeout)
+        start = monotonic()
+        try:
+            with phase(PhaseTimerConstants.ssh_setup), self.channels:
+                return self.client.exec_command(command,
+                                                timeout=timeout,
+                                                idempotent=idempotent)
+        finally:
+            METRICS.ssh_command_seconds.observe(monotonic() - start)
             
     def close(self):
         """
-        Closes the client and sets it to None
+        Closes the client (or releases it if it's shared) and sets it to None
         """
         if self._client is not None:
             # so it doesn't create it by mistake
-            self.client.close()
+            if self._registry is not None:
+                self._registry.release(self.connection_key)
+                self._registry = None
+            else:
+                self.client.close()
             self._client = None
         return
 
+    @property
+    def processes(self):
+        """
+        A ProcessManager to keep track of the long-running commands started on the host
+        """
+        if self._processes is None:
+            self._processes = ProcessManager(host=self)
+        return self._processes
+
+    def launch(self, command, timeout=None):
+        """
+        Starts a long-running command (e.g. a server) and keeps track of its PID
+
+        :param:
+
+         - `command`: string to send to the client
+         - `timeout`: readline timeout (None for output that will be empty for a while)
+
+        :rtype: Tuple
+        :return: RemoteProcess (None if the PID couldn't be read), Stdin, Stdout, Stderr
+        """
+        return self.processes.launch(command, timeout=timeout)
+
     def kill_all(self, process):
         """
-        Kills all the process instances on the remote client. 
+        Kills all the process instances on the remote client (see the ProcessManager)
 
-        :postcondition: kill command on all process id's that match 'process' string on remote host.
+        :param:
+
+         - `process`: exact name of the executable to kill (e.g. 'iperf')
+
+        :postcondition: the tracked and untracked processes named `process` were stopped in one batch
         :raise: TunaError if couldn't kill process
         """
-        stdin, stdout, stderr = self.exec_command("ps -e | grep {0}".format(process))
-        
-        for line in stdout:
-            self.logger.debug(line)
-            if process in line and 'grep' not in line:
-                process_id = line.lstrip().split()[0]
-                command = 'kill -9 {0}'.format(process_id)
-                self.logger.debug(command)
-                stdin_2, stdout_2, stderr_2 = self.exec_command(command)
-                self.check_stderr(stderr_2)
-            elif 'Operation not permitted' in line:
-                self.logger.error(line)
-                raise TunaError("Unable to kill process '{0}' on {1}".format(process,
-                                                                                   self.client))
-        self.check_stderr(stderr)
-        stdin, stdout, stderr = self.exec_command("ps -e | grep {0}".format(process))
-        for line in stdout:
-            self.logger.debug(line)
-            if process in line and 'grep' not in line:
-                self.logger.error(line)                
-                raise TunaError("Unable to kill process '{0}' on '{1}'".format(process,
-                                                                                     self.client))
-        self.check_stderr(stderr)
+        self.processes.kill_all(process)
         return
 
     def check_stderr(self, stderr):
@@ -246,7 +320,8 @@ class HostConfiguration(BaseConfiguration):
             # address of the control-interface 
             control_ip = 192.168.10.34
 
-            # this identifies the type (only 'telnet' or 'ssh')
+            # this identifies the type ('ssh', 'telnet' or 'local')
+            # 'local' runs the commands on this machine (without ssh)
             #connection_type = {connection_type}
 
             # address of the interface to test
@@ -266,6 +341,23 @@ class HostConfiguration(BaseConfiguration):
 
             # operating_system = {operating_system}
 
+            # the number of commands this host can be starting at once (ssh and local only)
+            # max_concurrent = {max_concurrent}
+
+            # the number of commands all the hosts sharing this ssh-connection
+            # can have running at once (each one keeps a channel open until it finishes)
+            # max_channels = 8
+            # seconds to wait for one of them to finish before giving up
+            # channel_timeout = 60
+
+            # seconds between ssh keepalives (0 turns them off)
+            # keepalive = 5
+
+            # if the ssh-connection dies, the number of times to try to reconnect
+            # and the seconds to wait after the first failure (doubled after each one)
+            # reconnect_attempts = 5
+            # backoff = 0.5
+
             # there are too many options for the different connection-types
             # so you can add necessary parameters but make sure the name
             # matcheds the parameter name
@@ -274,7 +366,8 @@ class HostConfiguration(BaseConfiguration):
             """.format(section=self.section,
                        connection_type=HostEnum.default_type,
                        timeout=HostEnum.default_timeout,
-                       operating_system=HostEnum.default_operating_system))
+                       operating_system=HostEnum.default_operating_system,
+                       max_concurrent=HostEnum.default_max_concurrent))
         return self._example
 
     @property
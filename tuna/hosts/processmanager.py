@@ -0,0 +1,286 @@
+
+# python standard library
+import os
+import pipes
+import threading
+
+# this package
+from tuna import BaseClass, TunaError
+
+
+class ProcessManagerConstants(object):
+    """
+    Constants for the ProcessManager
+    """
+    __slots__ = ()
+    launch_command = "sh -c {0}"
+    launch_script = "echo $$; exec {0}"
+    terminate_command = ("sh -c '"
+                         'pids="{pids}"; live=""; '
+                         'for p in $pids; do kill -0 $p 2>/dev/null && live="$live $p"; done; '
+                         '[ -z "$live" ] && exit 0; '
+                         "kill -TERM $live; n=0; "
+                         'while [ $n -lt {tries} ]; do '
+                         'alive=""; for p in $live; do kill -0 $p 2>/dev/null && alive="$alive $p"; done; '
+                         '[ -z "$alive" ] && break; '
+                         "sleep 0.1 2>/dev/null || {{ sleep 1; n=$((n+9)); }}; n=$((n+1)); done; "
+                         '[ -z "$alive" ] && exit 0; '
+                         "kill -KILL $alive; echo killed $alive; sleep 0.1 2>/dev/null || sleep 1; "
+                         'left=""; for p in $alive; do kill -0 $p 2>/dev/null && left="$left $p"; done; '
+                         'echo alive $left'
+                         "'")
+    running_command = "sh -c 'for p in {0}; do kill -0 $p 2>/dev/null && echo $p; done'"
+    processes_command = 'ps -e'
+    check_interval = 0.1
+    default_grace = 2
+    default_timeout = 10
+    killed = 'killed'
+    alive = 'alive'
+    not_permitted = 'Operation not permitted'
+
+
+class RemoteProcess(object):
+    """
+    A process started on a host
+    """
+    def __init__(self, pid, command):
+        """
+        RemoteProcess constructor
+
+        :param:
+
+         - `pid`: the process ID (as a string) on the host
+         - `command`: the command-line that was launched
+        """
+        self.pid = pid
+        self.command = command
+        return
+
+    @property
+    def name(self):
+        """
+        The base-name of the executable (e.g. `iperf` for `/usr/bin/iperf -s`)
+        """
+        return os.path.basename(self.command.split()[0])
+
+    def __str__(self):
+        return "{0} (PID: {1})".format(self.command, self.pid)
+# end class RemoteProcess
+
+
+class ProcessManager(BaseClass):
+    """
+    A tracker and terminator of a host's long-running processes
+    """
+    def __init__(self, host, grace=ProcessManagerConstants.default_grace,
+                 timeout=ProcessManagerConstants.default_timeout):
+        """
+        ProcessManager constructor
+
+        :param:
+
+         - `host`: TheHost-like object with an `exec_command` method
+         - `grace`: seconds to wait after the SIGTERM before sending the SIGKILL
+         - `timeout`: seconds to wait for the output of the terminate command
+        """
+        super(ProcessManager, self).__init__()
+        self.host = host
+        self.grace = grace
+        self.timeout = timeout
+        self.processes = {}
+        self.lock = threading.Lock()
+        return
+
+    def launch(self, command, timeout=None):
+        """
+        Starts the command and records its PID
+
+        :param:
+
+         - `command`: command-line to run on the host
+         - `timeout`: readline timeout for the output (None for servers)
+
+        :return: RemoteProcess (None if the PID wasn't echoed), stdin, stdout, stderr
+        """
+        script = pipes.quote(ProcessManagerConstants.launch_script.format(command))
+        stdin, stdout, stderr = self.host.exec_command(ProcessManagerConstants.launch_command.format(script),
+                                                       timeout=timeout)
+        pid = stdout.readline().strip()
+        if not pid.isdigit():
+            self.logger.warning("Expected a PID from '{0}', got '{1}'".format(command, pid))
+            return None, stdin, stdout, stderr
+        return self.register(pid, command), stdin, stdout, stderr
+
+    def register(self, pid, command):
+        """
+        Adds a process started some other way
+
+        :param:
+
+         - `pid`: the process ID on the host
+         - `command`: the command-line that was run
+
+        :return: RemoteProcess
+        """
+        process = RemoteProcess(pid=str(pid), command=command)
+        with self.lock:
+            self.processes[process.pid] = process
+        self.logger.debug("Tracking {0}".format(process))
+        return process
+
+    def forget(self, processes):
+        """
+        Stops tracking the processes (without stopping them)
+
+        :param:
+
+         - `processes`: iterable of RemoteProcess
+        """
+        with self.lock:
+            for process in processes:
+                self.processes.pop(process.pid, None)
+        return
+
+    def find(self, name=None):
+        """
+        Gets the tracked processes
+
+        :param:
+
+         - `name`: only return processes whose executable has this name
+
+        :return: list of RemoteProcess
+        """
+        with self.lock:
+            processes = self.processes.values()
+        if name is None:
+            return processes
+        return [process for process in processes if process.name == name]
+
+    def strays(self, name):
+        """
+        Finds untracked processes whose executable is named `name` (one `ps -e` call)
+
+        :param:
+
+         - `name`: exact name of the executable (e.g. 'iperf' won't match 'iperf3')
+
+        :return: list of RemoteProcess
+        """
+        tracked = set(self.processes)
+        stdin, stdout, stderr = self.host.exec_command(ProcessManagerConstants.processes_command,
+                                                       timeout=self.timeout)
+        strays = []
+        for line in stdout:
+            tokens = line.split()
+            if not tokens or not tokens[0].isdigit() or tokens[0] in tracked:
+                continue
+            # the command is the last column for `ps -e`, busybox adds its arguments
+            names = [os.path.basename(token) for token in tokens[1:]]
+            if name in names:
+                strays.append(RemoteProcess(pid=tokens[0],
+                                            command=' '.join(tokens[names.index(name) + 1:])))
+        self.check_stderr(stderr)
+        return strays
+
+    def terminate(self, processes=None):
+        """
+        Stops the processes with one command (SIGTERM, then SIGKILL after the grace period)
+
+        :param:
+
+         - `processes`: RemoteProcess list (default is all the tracked processes)
+
+        :return: list of processes that were still alive after the SIGKILL
+        :raise: TunaError if the user isn't allowed to kill the processes
+        """
+        if processes is None:
+            processes = self.find()
+        if not processes:
+            return []
+        by_pid = dict((process.pid, process) for process in processes)
+        tries = max(1, int(self.grace/ProcessManagerConstants.check_interval))
+        command = ProcessManagerConstants.terminate_command.format(pids=' '.join(by_pid),
+                                                                   tries=tries)
+        self.logger.debug(command)
+        stdin, stdout, stderr = self.host.exec_command(command, timeout=self.grace + self.timeout)
+        survivors = []
+        for line in stdout:
+            tokens = line.split()
+            if not tokens:
+                continue
+            if tokens[0] == ProcessManagerConstants.killed:
+                self.logger.warning("Had to SIGKILL: {0}".format(', '.join(str(by_pid.get(pid, pid))
+                                                                             for pid in tokens[1:])))
+            elif tokens[0] == ProcessManagerConstants.alive:
+                survivors = [by_pid[pid] for pid in tokens[1:] if pid in by_pid]
+        self.check_stderr(stderr)
+        self.forget(process for process in processes if process not in survivors)
+        for process in survivors:
+            self.logger.error("Unable to kill {0} on {1}".format(process, self.host))
+        return survivors
+
+    def kill_all(self, name):
+        """
+        Stops the tracked processes named `name` and any untracked ones with exactly that name
+
+        :param:
+
+         - `name`: name of the executable (e.g. 'iperf')
+
+        :raise: TunaError if any of them couldn't be killed
+        """
+        processes = self.find(name) + self.strays(name)
+        for process in processes:
+            self.logger.debug("Killing {0}".format(process))
+        survivors = self.terminate(processes)
+        if survivors:
+            raise TunaError("Unable to kill process '{0}' on {1} ({2})".format(name,
+                                                                               self.host,
+                                                                               ', '.join(process.pid
+                                                                                         for process in survivors)))
+        return
+
+    def leaks(self):
+        """
+        Logs the tracked processes that are still running and stops them
+
+        :return: list of the RemoteProcess that were still running
+        """
+        processes = self.find()
+        if not processes:
+            return []
+        stdin, stdout, stderr = self.host.exec_command(ProcessManagerConstants.running_command.format(' '.join(process.pid
+                                                                                                              for process in processes)),
+                                                       timeout=self.timeout)
+        running = set(line.strip() for line in stdout)
+        leaked = [process for process in processes if process.pid in running]
+        for process in leaked:
+            self.logger.warning("Leaked process on {0}: {1}".format(self.host, process))
+        self.terminate(leaked)
+        self.forget(processes)
+        return leaked
+
+    def close(self):
+        """
+        Reports and stops the leaked processes (errors are logged, not raised)
+        """
+        try:
+            self.leaks()
+        except Exception as error:
+            self.logger.error("Unable to check for leaked processes: {0}".format(error))
+        return
+
+    def check_stderr(self, stderr):
+        """
+        Logs the stderr and raises an error if the kill wasn't allowed
+
+        :raise: TunaError if 'Operation not permitted' is in the output
+        """
+        for line in stderr:
+            if line.strip():
+                self.logger.error(line)
+                if ProcessManagerConstants.not_permitted in line:
+                    raise TunaError("Insufficient privileges to kill on {0}".format(self.host))
+        return
+# end class ProcessManager
@@ -0,0 +1,193 @@
+
+# python standard library
+import unittest
+import time
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna import TunaError
+from tuna.clients.localclient import LocalClient
+from tuna.hosts.processmanager import ProcessManager
+
+
+def output(*lines):
+    """
+    :return: mock exec_command output with the lines on stdout
+    """
+    return MagicMock(), iter(lines), iter([])
+
+class TestProcessManager(unittest.TestCase):
+    def setUp(self):
+        self.host = MagicMock()
+        self.manager = ProcessManager(self.host, grace=1)
+        self.manager._logger = MagicMock()
+        return
+
+    def test_launch(self):
+        """
+        Does it quote the command, read the PID it echoes and track the process?
+        """
+        stdout = MagicMock()
+        stdout.readline.return_value = '1234\n'
+        self.host.exec_command.return_value = MagicMock(), stdout, MagicMock()
+        process, stdin, out, stderr = self.manager.launch("sh -c 'iperf -s'")
+        self.host.exec_command.assert_called_with("sh -c 'echo $$; exec sh -c '\"'\"'iperf -s'\"'\"''",
+                                                  timeout=None)
+        self.assertEqual('1234', process.pid)
+        self.assertEqual('sh', process.name)
+        self.assertEqual([process], self.manager.find('sh'))
+
+        # anything but a PID isn't tracked
+        stdout.readline.return_value = 'sh: iperf: not found\n'
+        process, stdin, out, stderr = self.manager.launch('iperf -s')
+        self.assertIsNone(process)
+        self.assertEqual(1, len(self.manager.find()))
+        return
+
+    def test_terminate(self):
+        """
+        Does it send all the PIDs in one command and parse the SIGKILL and survivor lines?
+        """
+        polite = self.manager.register(11, 'iperf -s')
+        stubborn = self.manager.register(12, 'iperf -s -u')
+        undying = self.manager.register(13, 'iperf -s -p 5002')
+        self.host.exec_command.return_value = output('killed 12 13\n', 'alive 13\n')
+        survivors = self.manager.terminate()
+        self.assertEqual(1, self.host.exec_command.call_count)
+        command = self.host.exec_command.call_args[0][0]
+        self.assertEqual(['11', '12', '13'], sorted(command.split('pids="')[1].split('"')[0].split()))
+        # the grace period is given as checks every 0.1 seconds
+        self.assertIn('-lt 10 ]', command)
+        self.assertEqual([undying], survivors)
+        self.assertEqual([undying], self.manager.find())
+        self.assertIn('iperf -s -u (PID: 12)', self.manager.logger.warning.call_args[0][0])
+
+        # nothing to stop, nothing sent
+        self.host.exec_command.reset_mock()
+        self.assertEqual([], self.manager.terminate([]))
+        self.assertFalse(self.host.exec_command.called)
+        return
+
+    def test_strays(self):
+        """
+        Does it only match untracked processes whose executable has exactly the name?
+        """
+        self.manager.register(200, 'iperf -s')
+        self.host.exec_command.return_value = output('  PID TTY          TIME CMD\n',
+                                                     '  100 ?        00:00:01 iperf\n',
+                                                     '  101 ?        00:00:01 iperf3\n',
+                                                     '  200 ?        00:00:01 iperf\n',
+                                                     '  102 root      1236 S    /usr/bin/iperf -s -u\n',
+                                                     '  103 root      1236 S    python run_iperf.py\n',
+                                                     '\n')
+        strays = self.manager.strays('iperf')
+        self.host.exec_command.assert_called_with('ps -e', timeout=self.manager.timeout)
+        self.assertEqual(['100', '102'], [process.pid for process in strays])
+        self.assertEqual('/usr/bin/iperf -s -u', strays[1].command)
+        return
+
+    def test_kill_all(self):
+        """
+        Does it stop the tracked and stray processes together and raise if any survive?
+        """
+        tracked = self.manager.register(200, 'iperf -s')
+        self.manager.register(300, 'ping dut')
+        self.host.exec_command.side_effect = [output('  100 ?        00:00:01 iperf\n'),
+                                              output()]
+        self.manager.kill_all('iperf')
+        command = self.host.exec_command.call_args[0][0]
+        self.assertIn('pids="', command)
+        self.assertEqual(['100', '200'], sorted(command.split('pids="')[1].split('"')[0].split()))
+        self.assertNotIn(tracked, self.manager.find())
+        self.assertEqual(1, len(self.manager.find()))
+
+        self.host.exec_command.side_effect = [output('  100 ?        00:00:01 iperf\n'),
+                                              output('killed 100\n', 'alive 100\n')]
+        with self.assertRaises(TunaError):
+            self.manager.kill_all('iperf')
+        return
+
+    def test_leaks(self):
+        """
+        Does it report the tracked processes that are still running, stop them and stop tracking all of them?
+        """
+        self.assertEqual([], self.manager.leaks())
+        self.assertFalse(self.host.exec_command.called)
+
+        finished = self.manager.register(11, 'iperf -c dut')
+        leaked = self.manager.register(12, 'iperf -s')
+        self.host.exec_command.side_effect = [output('12\n'), output()]
+        self.assertEqual([leaked], self.manager.leaks())
+        running, terminate = [call[0][0] for call in self.host.exec_command.call_args_list]
+        self.assertIn('for p in ', running)
+        self.assertEqual(['12'], terminate.split('pids="')[1].split('"')[0].split())
+        self.assertEqual([], self.manager.find())
+        self.assertIn(str(leaked), self.manager.logger.warning.call_args[0][0])
+
+        # close logs the errors instead of raising them
+        self.manager.register(13, 'iperf -s')
+        self.host.exec_command.side_effect = RuntimeError('gone')
+        self.manager.close()
+        self.assertTrue(self.manager.logger.error.called)
+        return
+
+    def test_not_permitted(self):
+        """
+        Does it raise a TunaError if the host won't allow the kill?
+        """
+        self.manager.register(1, 'init')
+        self.host.exec_command.return_value = (MagicMock(), iter([]),
+                                               iter(['sh: kill: (1) - Operation not permitted\n']))
+        with self.assertRaises(TunaError):
+            self.manager.terminate()
+        return
+# end class TestProcessManager
+
+
+class TestLocalProcesses(unittest.TestCase):
+    def setUp(self):
+        self.client = LocalClient(hostname='localhost')
+        self.client._logger = MagicMock()
+        self.manager = ProcessManager(self.client, grace=0.3)
+        self.manager._logger = MagicMock()
+        return
+
+    def tearDown(self):
+        self.client.close()
+        return
+
+    def running(self, process):
+        """
+        :return: True if the process is still running
+        """
+        stdin, stdout, stderr = self.client.exec_command('kill -0 {0} && echo yes'.format(process.pid),
+                                                         timeout=5)
+        return stdout.read().strip() == 'yes'
+
+    def test_quoting(self):
+        """
+        Does a command with single-quotes in it get launched and found by leaks?
+        """
+        process, stdin, stdout, stderr = self.manager.launch("sh -c 'echo \"it'\"'\"'s up\"; exec sleep 30'")
+        self.assertIsNotNone(process)
+        self.assertEqual("it's up", stdout.readline().strip())
+        self.assertTrue(self.running(process))
+        self.assertEqual([process], self.manager.leaks())
+        self.assertFalse(self.running(process))
+        return
+
+    def test_sigkill(self):
+        """
+        Does a process that ignores the SIGTERM get a SIGKILL after the grace period?
+        """
+        process, stdin, stdout, stderr = self.manager.launch("sh -c 'trap \"\" TERM; echo ready; exec sleep 30'")
+        self.assertEqual('ready', stdout.readline().strip())
+        start = time.time()
+        self.assertEqual([], self.manager.terminate())
+        self.assertGreaterEqual(time.time() - start, 0.3)
+        self.assertIn(process.pid, self.manager.logger.warning.call_args[0][0])
+        self.assertFalse(self.running(process))
+        return
+# end class TestLocalProcesses
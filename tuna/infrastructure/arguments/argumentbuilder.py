@@ -1,9 +1,11 @@
 
 # python standard library
+import importlib
 import sys
 
 # this package
 from tuna.infrastructure.ryemother import RyeMother
+from tuna.infrastructure.pluginindex import PluginIndex
 from tuna import BaseClass
 from tuna.infrastructure.arguments import BaseArguments
 
@@ -24,8 +26,20 @@ class ArgumentBuilder(BaseClass):
         self.args = args
         self._rye_mother = None
         self._argument_definitions = None
+        self._index = None
         return
 
+    @property
+    def index(self):
+        """
+        A PluginIndex of the sub-commands
+        """
+        if self._index is None:
+            self._index = PluginIndex(group='tuna.subcommands',
+                                      name='subcommands',
+                                      parent_name=BaseArguments.__name__)
+        return self._index
+
     @property
     def rye_mother(self):
         """
@@ -46,6 +60,24 @@ class ArgumentBuilder(BaseClass):
             self._argument_definitions = self.rye_mother(BaseArguments)
         return self._argument_definitions
 
+    def definition(self, command):
+        """
+        Gets the class-definition for the sub-command
+
+        :param:
+
+         - `command`: name of the sub-command (e.g. 'run')
+
+        :return: BaseArguments child
+        :raise: KeyError if it's an unknown sub-command
+        """
+        for name, module_name in self.index.plugins.iteritems():
+            if name.lower() == command:
+                definition = getattr(importlib.import_module(module_name), name, None)
+                if getattr(definition, '__base__', None) is BaseArguments:
+                    return definition
+        return self.argument_definitions[command]
+
     def __call__(self):
         """
         Fake parse-args
@@ -54,7 +86,7 @@ class ArgumentBuilder(BaseClass):
         """
         args = BaseArguments(args=self.args)
         try:
-            return self.argument_definitions[args.command](args=self.args)
+            return self.definition(args.command)(args=self.args)
         except KeyError as error:
             self.logger.debug(error)
             self.logger.error("Unknown sub-command '{0}'".format(args.command))
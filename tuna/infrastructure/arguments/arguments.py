@@ -2,7 +2,7 @@
 """tuna (a metaheuristic maximizer)
 
 Usage: tuna -h | -v
-       tuna [--debug|--silent] [--pudb|--pdb] <command> [<argument>...]
+       tuna [--debug|--silent] [--pudb|--pdb] [--importtime] <command> [<argument>...]
 
 Help Options:
 
@@ -18,6 +18,7 @@ Debugging Options:
 
     --pudb       Enable the `pudb` debugger (if installed)
     --pdb        Enable the `pdb` (python's default) debugger
+    --importtime  Report how long the imports took (to standard error)
 
 Positional Arguments:
 
@@ -31,6 +32,7 @@ Available Sub-Commands:
     help   Display more help
     list   List known plugins
     check  Check a configuration
+    events Summarize an optimizer's event-file
 
 To get help for a sub-command pass `-h` as the argument. e.g.:
 
@@ -59,6 +61,7 @@ class ArgumentsConstants(object):
     silent = '--silent'
     pudb = "--pudb"
     pdb = '--pdb'
+    importtime = '--importtime'
     trace = '--trace'
     callgraph = '--callgraph'
     command = "<command>"
@@ -89,6 +92,7 @@ class BaseArguments(BaseClass):
         self._arguments = None
         self._pudb = None
         self._pdb = None
+        self._importtime = None
         self._trace = None
         self._callgraph = None
 
@@ -159,6 +163,16 @@ class BaseArguments(BaseClass):
             self._pdb = self.arguments[ArgumentsConstants.pdb]
         return self._pdb
 
+    @property
+    def importtime(self):
+        """
+        Option to report the import times (the timer is started by the tuna package)
+        :rtype: Boolean
+        """
+        if self._importtime is None:
+            self._importtime = self.arguments[ArgumentsConstants.importtime]
+        return self._importtime
+
     @property
     def trace(self):
         """
@@ -207,6 +221,7 @@ class BaseArguments(BaseClass):
         self._silent = None
         self._pudb = None
         self._pdb = None
+        self._importtime = None
         self._command = None
         return
 # end class BaseArguments    
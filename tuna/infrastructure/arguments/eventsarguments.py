@@ -0,0 +1,110 @@
+
+"""`events` sub-command
+
+Usage: tuna events -h
+       tuna events [--lines] <event-file>...
+
+Positional Arguments:
+
+    <event-file>   1 or more event-files written by an optimizer's event_log
+
+Options;
+
+    -h, --help   This help message.
+    -l, --lines  Print every event as a line of text instead of the summary
+
+"""
+
+
+# the TUNA
+from tuna.infrastructure.arguments.arguments import BaseArguments
+from tuna.infrastructure.arguments.basestrategy import BaseStrategy
+from tuna.infrastructure.crash_handler import try_except
+from tuna.parts.eventlog import EventReader
+
+
+class EventsArgumentsConstants(object):
+    """
+    Constants for the Events Arguments
+    """
+    __slots__ = ()
+    eventfiles = '<event-file>'
+    lines = '--lines'
+    statistic = "{0:<26} {1}"
+# EventsArgumentsConstants
+
+
+class Events(BaseArguments):
+    """
+    summarize an event-file
+    """
+    def __init__(self, *args, **kwargs):
+        super(Events, self).__init__(*args, **kwargs)
+        self._eventfiles = None
+        self._lines = None
+        self.sub_usage = __doc__
+        self._function = None
+        return
+
+    @property
+    def function(self):
+        """
+        sub-command function
+        """
+        if self._function is None:
+            self._function = EventsStrategy().function
+        return self._function
+
+    @property
+    def eventfiles(self):
+        """
+        List of event-file names
+        """
+        if self._eventfiles is None:
+            self._eventfiles = self.sub_arguments[EventsArgumentsConstants.eventfiles]
+        return self._eventfiles
+
+    @property
+    def lines(self):
+        """
+        True if the events should be printed instead of summarized
+        """
+        if self._lines is None:
+            self._lines = self.sub_arguments[EventsArgumentsConstants.lines]
+        return self._lines
+
+    def reset(self):
+        """
+        Resets the attributes to None
+        """
+        super(Events, self).reset()
+        self._eventfiles = None
+        self._lines = None
+        return
+# end Events
+
+
+class EventsStrategy(BaseStrategy):
+    """
+    The strategy for the `events` sub-command
+    """
+    @try_except
+    def function(self, args):
+        """
+        Prints the summaries (or the events)
+
+        :param:
+
+         - `args`: object with `eventfiles` and `lines` attributes
+        """
+        for filename in args.eventfiles:
+            reader = EventReader(filename)
+            if args.lines:
+                for line in reader.lines():
+                    print line
+                continue
+            print filename
+            for name, value in reader.summary().iteritems():
+                print EventsArgumentsConstants.statistic.format(name, value)
+        return
+# end EventsStrategy
@@ -2,7 +2,7 @@
 """`run` sub-command
 
 Usage: tuna run -h
-       tuna run [<configuration>...]
+       tuna run [--parallel <count>] [--logs <folder>] [--metrics-port <port>] [--metrics-file <file>] [--metrics-interval <seconds>] [<configuration>...]
 
 Positional Arguments:
 
@@ -11,6 +11,11 @@ Positional Arguments:
 Options;
 
     -h, --help  This help message.
+    -p, --parallel <count>  Run the configurations in up to <count> processes at once (0 means one per file)
+    -l, --logs <folder>     Folder for the parallel runs' log-files (default: next to the configurations)
+    --metrics-port <port>   Serve the metrics (Prometheus text format) on this local port
+    --metrics-file <file>   Re-write the metrics (Prometheus text format) to this file while running
+    --metrics-interval <seconds>  Seconds between writes to the metrics-file (default: 15)
 
 """
 
@@ -23,6 +28,8 @@ from tuna import RED, BOLD, RESET
 from tuna.infrastructure.arguments.arguments import BaseArguments
 from tuna.infrastructure.arguments.basestrategy import BaseStrategy
 from tuna.infrastructure.crash_handler import try_except
+from tuna.components.parallelhortator import ParallelHortator
+from tuna.infrastructure.metrics import METRICS, MetricsExporter, MetricsConstants
 
 
 class RunArgumentsConstants(object):
@@ -31,6 +38,11 @@ class RunArgumentsConstants(object):
     """
     __slots__ = ()
     configfiles = '<configuration>'
+    parallel = '--parallel'
+    logs = '--logs'
+    metrics_port = '--metrics-port'
+    metrics_file = '--metrics-file'
+    metrics_interval = '--metrics-interval'
     
     # defaults
     default_configfiles = ['tuna.ini']
@@ -44,6 +56,11 @@ class Run(BaseArguments):
     def __init__(self, *args, **kwargs):
         super(Run, self).__init__(*args, **kwargs)
         self._configfiles = None
+        self._parallel = None
+        self._logs = None
+        self._metrics_port = None
+        self._metrics_file = None
+        self._metrics_interval = None
         self.sub_usage = __doc__
         self._function = None
         return
@@ -68,12 +85,70 @@ class Run(BaseArguments):
                 self._configfiles = RunArgumentsConstants.default_configfiles
         return self._configfiles
 
+    @property
+    def parallel(self):
+        """
+        Most configurations to run at once (None if they should run in sequence)
+        """
+        if self._parallel is None:
+            parallel = self.sub_arguments[RunArgumentsConstants.parallel]
+            if parallel is not None:
+                self._parallel = int(parallel)
+        return self._parallel
+
+    @property
+    def logs(self):
+        """
+        Folder for the parallel runs' log-files (or None)
+        """
+        if self._logs is None:
+            self._logs = self.sub_arguments[RunArgumentsConstants.logs]
+        return self._logs
+
+    @property
+    def metrics_port(self):
+        """
+        Local port to serve the metrics on (or None)
+        """
+        if self._metrics_port is None:
+            port = self.sub_arguments[RunArgumentsConstants.metrics_port]
+            if port is not None:
+                self._metrics_port = int(port)
+        return self._metrics_port
+
+    @property
+    def metrics_file(self):
+        """
+        File to write the metrics to (or None)
+        """
+        if self._metrics_file is None:
+            self._metrics_file = self.sub_arguments[RunArgumentsConstants.metrics_file]
+        return self._metrics_file
+
+    @property
+    def metrics_interval(self):
+        """
+        Seconds between writes to the metrics-file
+        """
+        if self._metrics_interval is None:
+            interval = self.sub_arguments[RunArgumentsConstants.metrics_interval]
+            if interval is None:
+                self._metrics_interval = MetricsConstants.default_interval
+            else:
+                self._metrics_interval = float(interval)
+        return self._metrics_interval
+
     def reset(self):
         """
         Resets the attributes to None
         """
         super(Run, self).reset()
         self._configfiles = None
+        self._parallel = None
+        self._logs = None
+        self._metrics_port = None
+        self._metrics_file = None
+        self._metrics_interval = None
         return
 # end RunArguments        
 
@@ -89,19 +164,57 @@ class RunStrategy(BaseStrategy):
     def function(self, args):
         """
         Builds and runs the test
+
+        :return: exit status (0 on success)
         """
         self.logger.info(INFO_STRING.format("Starting The TUNA"))
         start = datetime.datetime.now()
+
+        if args.parallel is not None:
+            if args.metrics_port is not None or args.metrics_file is not None:
+                self.logger.warning("The metrics aren't exported for parallel runs")
+            status = ParallelHortator(configfiles=args.configfiles,
+                                      processes=args.parallel,
+                                      log_folder=args.logs)()
+            end = datetime.datetime.now()
+            self.logger.info(INFO_STRING.format("Total Elapsed Time: {0}".format(end-start)))
+            return status
         
         tuna = self.build_tuna(args.configfiles)
         
         if tuna is None:
-            return
-        
-        # the main run (the others are for debugging)
-        tuna()
+            return 1
+
+        exporter = self.exporter(args)
+        try:
+            # the main run (the others are for debugging)
+            tuna()
+        finally:
+            if exporter is not None:
+                exporter.stop()
+        status = int(tuna.failed)
 
         tuna.close()
         end = datetime.datetime.now()
         self.logger.info(INFO_STRING.format("Total Elapsed Time: {0}".format(end-start)))
-        return
+        return status
+
+    def exporter(self, args):
+        """
+        Starts exporting the metrics (if the arguments asked for them)
+
+        :param:
+
+         - `args`: the Run arguments
+
+        :return: started MetricsExporter or None
+        """
+        if args.metrics_port is None and args.metrics_file is None:
+            return None
+        METRICS.reset()
+        exporter = MetricsExporter(registry=METRICS,
+                                   port=args.metrics_port,
+                                   filename=args.metrics_file,
+                                   interval=args.metrics_interval)
+        exporter.start()
+        return exporter
@@ -0,0 +1,154 @@
+
+# python standard library
+import __builtin__
+import sys
+import threading
+import time
+
+
+class ImportTimerConstants(object):
+    """
+    Constants for the ImportTimer
+    """
+    __slots__ = ()
+    option = '--importtime'
+    variable = 'TUNA_IMPORTTIME'
+    limit = 30
+    header = "{0:>10} {1:>12}  {2} (imported by)".format('self(ms)', 'cumulative(ms)', 'module')
+    row = "{self:>10.1f} {cumulative:>12.1f}  {module} ({parent})"
+    total = "{0} imports timed, {1:.1f} ms in total"
+
+
+class ImportRecord(object):
+    """
+    The timing for one import statement
+    """
+    __slots__ = ('module', 'parent', 'self_seconds', 'cumulative_seconds',
+                 'children', 'children_seconds')
+
+    def __init__(self, parent):
+        """
+        ImportRecord constructor
+
+        :param:
+
+         - `parent`: name of the module doing the importing
+        """
+        self.parent = parent
+        self.module = None
+        self.self_seconds = 0
+        self.cumulative_seconds = 0
+        self.children = set()
+        self.children_seconds = 0
+        return
+# end class ImportRecord
+
+
+class ImportTimer(object):
+    """
+    A timer for the imports
+    """
+    def __init__(self):
+        """
+        ImportTimer constructor
+        """
+        self.records = []
+        self.original = None
+        self.local = threading.local()
+        return
+
+    @property
+    def stack(self):
+        """
+        The (per-thread) stack of imports that are running
+        """
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def start(self):
+        """
+        Replaces the built-in __import__ (if it hasn't already been replaced)
+        """
+        if self.original is None:
+            self.original = __builtin__.__import__
+            __builtin__.__import__ = self.timed_import
+        return
+
+    def stop(self):
+        """
+        Restores the built-in __import__
+        """
+        if self.original is not None:
+            __builtin__.__import__ = self.original
+            self.original = None
+        return
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=None, level=-1):
+        """
+        Imports the module and records the time if it added any modules
+
+        :param: the same as the built-in __import__
+        :return: the imported module
+        """
+        parent = (globals or {}).get('__name__')
+        record = ImportRecord(parent)
+        stack = self.stack
+        before = set(sys.modules)
+        stack.append(record)
+        start = time.time()
+        try:
+            return self.original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.time() - start
+            stack.pop()
+            added = set(module for module in set(sys.modules) - before
+                        if sys.modules[module] is not None)
+            if added:
+                own = added - record.children
+                if own:
+                    record.module = max(own, key=len)
+                else:
+                    record.module = name
+                record.cumulative_seconds = elapsed
+                record.self_seconds = elapsed - record.children_seconds
+                self.records.append(record)
+                if stack:
+                    stack[-1].children.update(added)
+                    stack[-1].children_seconds += elapsed
+
+    def report(self, stream=None, limit=ImportTimerConstants.limit):
+        """
+        Writes the slowest imports (by cumulative time)
+
+        :param:
+
+         - `stream`: file-like object to write to (default is sys.stderr)
+         - `limit`: most rows to write (None for all of them)
+        """
+        if stream is None:
+            stream = sys.stderr
+        records = sorted(self.records, key=lambda record: record.cumulative_seconds,
+                         reverse=True)
+        stream.write(ImportTimerConstants.header + '\n')
+        for record in records[:limit]:
+            stream.write(ImportTimerConstants.row.format(self=record.self_seconds * 1000,
+                                                         cumulative=record.cumulative_seconds * 1000,
+                                                         module=record.module,
+                                                         parent=record.parent) + '\n')
+        stream.write(ImportTimerConstants.total.format(len(records),
+                                                       sum(record.self_seconds for record in records) * 1000) + '\n')
+        return
+# end class ImportTimer
+
+IMPORT_TIMER = ImportTimer()
+
+
+def start():
+    """
+    Starts the shared ImportTimer
+
+    :return: IMPORT_TIMER
+    """
+    IMPORT_TIMER.start()
+    return IMPORT_TIMER
@@ -0,0 +1,479 @@
+
+# python standard library
+from collections import OrderedDict
+import BaseHTTPServer
+import bisect
+import os
+import threading
+import weakref
+
+# this package
+from tuna.infrastructure.baseclass import BaseClass, BaseThreadClass
+from tuna.parts.scheduler import monotonic
+
+
+class MetricsConstants(object):
+    """
+    Constants for the metrics
+    """
+    __slots__ = ()
+    prefix = 'tuna_'
+    counter = 'counter'
+    gauge = 'gauge'
+    histogram = 'histogram'
+    help_line = "# HELP {0} {1}\n"
+    type_line = "# TYPE {0} {1}\n"
+    sample = "{0}{1} {2}\n"
+    label = '{{le="{0}"}}'
+    infinity = '+Inf'
+    bucket_suffix = '_bucket'
+    sum_suffix = '_sum'
+    count_suffix = '_count'
+    # seconds
+    ssh_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    # the exporter
+    host = '127.0.0.1'
+    path = '/metrics'
+    content_type = 'text/plain; version=0.0.4'
+    default_interval = 15
+    temporary_extension = '.tmp'
+
+
+class Counter(object):
+    """
+    A number that only goes up
+    """
+    __slots__ = ('name', 'help', 'value', 'lock')
+    kind = MetricsConstants.counter
+
+    def __init__(self, name, help):
+        """
+        Counter constructor
+
+        :param:
+
+         - `name`: the metric's name
+         - `help`: description of the metric
+        """
+        self.name = name
+        self.help = help
+        self.value = 0
+        self.lock = threading.Lock()
+        return
+
+    def increment(self, amount=1):
+        """
+        Adds to the count
+
+        :param:
+
+         - `amount`: how much to add
+        """
+        with self.lock:
+            self.value += amount
+        return
+
+    def reset(self):
+        """
+        Sets the value back to 0
+        """
+        with self.lock:
+            self.value = 0
+        return
+
+    def render(self):
+        """
+        The metric in the text format
+
+        :return: string with the help, type and sample lines
+        """
+        return (MetricsConstants.help_line.format(self.name, self.help) +
+                MetricsConstants.type_line.format(self.name, self.kind) +
+                MetricsConstants.sample.format(self.name, '', self.value))
+# end class Counter
+
+
+class Gauge(Counter):
+    """
+    A number that can go up or down
+    """
+    __slots__ = ('function',)
+    kind = MetricsConstants.gauge
+
+    def __init__(self, name, help, function=None):
+        """
+        Gauge constructor
+
+        :param:
+
+         - `name`: the metric's name
+         - `help`: description of the metric
+         - `function`: callable that returns the value (instead of setting it)
+        """
+        super(Gauge, self).__init__(name, help)
+        self.function = function
+        return
+
+    def set(self, value):
+        """
+        Sets the value
+
+        :param:
+
+         - `value`: the new value
+        """
+        self.value = value
+        return
+
+    def render(self):
+        """
+        The metric in the text format (calling the function if there is one)
+
+        :return: string with the help, type and sample lines
+        """
+        if self.function is not None:
+            self.value = self.function()
+        return super(Gauge, self).render()
+# end class Gauge
+
+
+class Histogram(object):
+    """
+    Counts of observations in buckets
+    """
+    __slots__ = ('name', 'help', 'bounds', 'counts', 'total', 'count', 'lock')
+    kind = MetricsConstants.histogram
+
+    def __init__(self, name, help, bounds):
+        """
+        Histogram constructor
+
+        :param:
+
+         - `name`: the metric's name
+         - `help`: description of the metric
+         - `bounds`: sorted upper bounds of the buckets
+        """
+        self.name = name
+        self.help = help
+        self.bounds = tuple(bounds)
+        self.lock = threading.Lock()
+        self.reset()
+        return
+
+    def observe(self, value):
+        """
+        Adds an observation
+
+        :param:
+
+         - `value`: the observed value
+        """
+        bucket = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[bucket] += 1
+            self.total += value
+            self.count += 1
+        return
+
+    def reset(self):
+        """
+        Clears the observations
+        """
+        with self.lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.total = 0
+            self.count = 0
+        return
+
+    def render(self):
+        """
+        The metric in the text format
+
+        :return: string with the help, type, bucket, sum and count lines
+        """
+        lines = [MetricsConstants.help_line.format(self.name, self.help),
+                 MetricsConstants.type_line.format(self.name, self.kind)]
+        bucket = self.name + MetricsConstants.bucket_suffix
+        with self.lock:
+            counts = list(self.counts)
+            total = self.total
+        cumulative = 0
+        for bound, count in zip(self.bounds + (MetricsConstants.infinity,), counts):
+            cumulative += count
+            lines.append(MetricsConstants.sample.format(bucket,
+                                                        MetricsConstants.label.format(bound),
+                                                        cumulative))
+        lines.append(MetricsConstants.sample.format(self.name + MetricsConstants.sum_suffix,
+                                                    '', total))
+        lines.append(MetricsConstants.sample.format(self.name + MetricsConstants.count_suffix,
+                                                    '', cumulative))
+        return ''.join(lines)
+# end class Histogram
+
+
+class MetricsRegistry(BaseClass):
+    """
+    The collection of metrics
+    """
+    def __init__(self):
+        """
+        MetricsRegistry constructor
+        """
+        super(MetricsRegistry, self).__init__()
+        self.metrics = OrderedDict()
+        self.storages = weakref.WeakSet()
+        self.connection_registries = weakref.WeakSet()
+        self.started = monotonic()
+        prefix = MetricsConstants.prefix
+        self.evaluations = self.add(Counter(prefix + 'evaluations_total',
+                                            "Candidates whose quality was measured"))
+        self.evaluations_per_second = self.add(Gauge(prefix + 'evaluations_per_second',
+                                                     "Evaluations per second since the run started",
+                                                     function=self.evaluation_rate))
+        self.quality_checks = self.add(Counter(prefix + 'quality_checks_total',
+                                               "Calls to the qualities (including repeated candidates)"))
+        self.best_quality = self.add(Gauge(prefix + 'best_quality',
+                                           "Best output found so far in the current run"))
+        self.candidates = self.add(Counter(prefix + 'annealing_candidates_total',
+                                           "Candidates the annealer compared to its solution"))
+        self.accepted = self.add(Counter(prefix + 'annealing_accepted_total',
+                                         "Candidates the annealer accepted"))
+        self.acceptance_ratio = self.add(Gauge(prefix + 'annealing_acceptance_ratio',
+                                               "Fraction of the annealer's candidates it accepted",
+                                               function=lambda: self.ratio(self.accepted,
+                                                                           self.candidates)))
+        self.tabu_lookups = self.add(Counter(prefix + 'tabu_lookups_total',
+                                             "Checks of the tabu set"))
+        self.tabu_hits = self.add(Counter(prefix + 'tabu_hits_total',
+                                          "Candidates that were already in the tabu set"))
+        self.tabu_hit_ratio = self.add(Gauge(prefix + 'tabu_hit_ratio',
+                                             "Fraction of the tabu-set checks that found the candidate",
+                                             function=lambda: self.ratio(self.tabu_hits,
+                                                                         self.tabu_lookups)))
+        self.ssh_command_seconds = self.add(Histogram(prefix + 'ssh_command_seconds',
+                                                      "Seconds to start a command on a host",
+                                                      MetricsConstants.ssh_buckets))
+        self.ssh_reconnects = self.add(Counter(prefix + 'ssh_reconnects_total',
+                                               "Reconnects after an SSH connection died"))
+        self.ssh_reconnect_failures = self.add(Counter(prefix + 'ssh_reconnect_failures_total',
+                                                       "SSH reconnect attempts that failed"))
+        self.ssh_reconnect_seconds = self.add(Counter(prefix + 'ssh_reconnect_seconds_total',
+                                                      "Seconds spent reconnecting SSH connections"))
+        self.ssh_reruns = self.add(Counter(prefix + 'ssh_reruns_total',
+                                           "Idempotent commands re-sent after a reconnect"))
+        self.iperf_repetitions = self.add(Counter(prefix + 'iperf_repetitions_total',
+                                                  "Iperf repetitions run"))
+        self.storage_queue_depth = self.add(Gauge(prefix + 'storage_queue_depth',
+                                                  "Writes waiting in the asynchronous storage queues",
+                                                  function=self.queue_depth))
+        self.ssh_connections_opened = self.add(Gauge(prefix + 'ssh_connections_opened',
+                                                     "SSH connections opened by the connection registries",
+                                                     function=lambda: self.connection_count('opened')))
+        self.ssh_connections_reused = self.add(Gauge(prefix + 'ssh_connections_reused',
+                                                     "Times an open SSH connection was shared with another host",
+                                                     function=lambda: self.connection_count('reused')))
+        self.ssh_connections_active = self.add(Gauge(prefix + 'ssh_connections_active',
+                                                     "SSH connections the connection registries hold open",
+                                                     function=lambda: self.connection_count('active')))
+        return
+
+    def add(self, metric):
+        """
+        Adds a metric to the registry
+
+        :param:
+
+         - `metric`: the Counter, Gauge or Histogram to add
+
+        :return: the metric
+        """
+        self.metrics[metric.name] = metric
+        return metric
+
+    @staticmethod
+    def ratio(numerator, denominator):
+        """
+        The ratio of two counters' values
+
+        :return: numerator/denominator (0 if the denominator is 0)
+        """
+        if not denominator.value:
+            return 0
+        return float(numerator.value) / denominator.value
+
+    def evaluation_rate(self):
+        """
+        Evaluations per second since the registry was reset
+        """
+        elapsed = monotonic() - self.started
+        if elapsed <= 0:
+            return 0
+        return self.evaluations.value / elapsed
+
+    def queue_depth(self):
+        """
+        The number of items waiting in the AsyncStorage queues
+        """
+        return sum(storage.queue.qsize() for storage in list(self.storages))
+
+    def connection_count(self, counter):
+        """
+        A counter added up for the ConnectionRegistries that are alive
+
+        :param:
+
+         - `counter`: name of the count in the registries' `counters` (e.g. 'opened')
+        """
+        return sum(registry.counters[counter] for registry in list(self.connection_registries))
+
+    def reset(self):
+        """
+        Sets all the metrics back to 0 and re-starts the clock
+        """
+        for metric in self.metrics.itervalues():
+            metric.reset()
+        self.started = monotonic()
+        return
+
+    def render(self):
+        """
+        The metrics in the Prometheus text format
+
+        :return: string of all the metrics
+        """
+        return ''.join(metric.render() for metric in self.metrics.values())
+# end class MetricsRegistry
+
+METRICS = MetricsRegistry()
+
+
+class MetricsHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answers GET requests with the registry's metrics
+    """
+    def do_GET(self):
+        """
+        Sends the metrics (or a 404 for paths other than /metrics and /)
+        """
+        if self.path.split('?')[0] not in (MetricsConstants.path, '/'):
+            self.send_error(404)
+            return
+        body = self.server.registry.render()
+        self.send_response(200)
+        self.send_header('Content-Type', MetricsConstants.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return
+
+    def log_message(self, format, *args):
+        """
+        Sends the request-log to the debug log instead of stderr
+        """
+        self.server.logger.debug(format % args)
+        return
+# end class MetricsHandler
+
+
+class MetricsExporter(BaseThreadClass):
+    """
+    Publishes the metrics on a port and/or in a file
+    """
+    def __init__(self, registry=None, port=None, filename=None,
+                 interval=MetricsConstants.default_interval):
+        """
+        MetricsExporter constructor
+
+        :param:
+
+         - `registry`: the MetricsRegistry to export (default is METRICS)
+         - `port`: local TCP port to serve the metrics on (None for no server)
+         - `filename`: file to re-write with the metrics (None for no file)
+         - `interval`: seconds between writes to the file
+        """
+        super(MetricsExporter, self).__init__()
+        self.registry = registry if registry is not None else METRICS
+        self.port = port
+        self.filename = filename
+        self.interval = interval
+        self.stopped = threading.Event()
+        self._server = None
+        self.server_thread = None
+        return
+
+    @property
+    def server(self):
+        """
+        The HTTPServer for the metrics (None if there's no port)
+        """
+        if self._server is None and self.port is not None:
+            self._server = BaseHTTPServer.HTTPServer((MetricsConstants.host, self.port),
+                                                     MetricsHandler)
+            self._server.registry = self.registry
+            self._server.logger = self.logger
+        return self._server
+
+    def start(self):
+        """
+        Starts serving and writing the metrics
+        """
+        if self.port is not None:
+            try:
+                server = self.server
+            except Exception as error:
+                self.log_error(error, " (unable to serve the metrics on port {0})".format(self.port))
+            else:
+                self.server_thread = threading.Thread(target=server.serve_forever,
+                                                      name='metrics_server')
+                self.server_thread.daemon = True
+                self.server_thread.start()
+                self.logger.info("Serving the metrics at http://{0}:{1}{2}".format(MetricsConstants.host,
+                                                                                  server.server_address[1],
+                                                                                  MetricsConstants.path))
+        if self.filename is not None:
+            self.stopped.clear()
+            self.thread.name = 'metrics_file'
+            self.thread.start()
+        return
+
+    def run(self):
+        """
+        Writes the file every interval until stopped
+        """
+        while not self.stopped.wait(self.interval):
+            self.write()
+        return
+
+    def write(self):
+        """
+        Re-writes the file with the current metrics (errors are logged, not raised)
+        """
+        temporary = self.filename + MetricsConstants.temporary_extension
+        try:
+            with open(temporary, 'w') as metrics:
+                metrics.write(self.registry.render())
+            os.rename(temporary, self.filename)
+        except (IOError, OSError) as error:
+            self.logger.warning("Unable to write the metrics to {0}: {1}".format(self.filename,
+                                                                                error))
+        return
+
+    def stop(self):
+        """
+        Stops the server and the writing (writing the file one last time)
+        """
+        if self.server_thread is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self.server_thread.join()
+            self.server_thread = None
+            self._server = None
+        if self._thread is not None:
+            self.stopped.set()
+            self._thread.join()
+            self._thread = None
+            self.write()
+        return
+# end class MetricsExporter
@@ -0,0 +1,272 @@
+
+# python standard library
+import ast
+import importlib
+import inspect
+import json
+import os
+import pkgutil
+
+# this package
+from tuna import BaseClass, TunaError
+
+
+class PluginIndexConstants(object):
+    """
+    Constants for the PluginIndex
+    """
+    __slots__ = ()
+    cache_folder = os.path.join('~', '.cache', 'tuna')
+    cache_name = 'plugins_{group}_{name}.json'
+    source_extension = '.py'
+    version = 2
+
+
+class PluginIndex(BaseClass):
+    """
+    A cached map of plugin-names to module-names
+    """
+    def __init__(self, group, name, parent_name, exclusions=None,
+                 base_package='tuna', cache=None):
+        """
+        PluginIndex constructor
+
+        :param:
+
+         - `group`: group-name from the setup.py entry_points
+         - `name`: name of the entry in the group
+         - `parent_name`: class-name of the plugins' parent (e.g. 'BasePlugin')
+         - `exclusions`: module names not to index
+         - `base_package`: the distribution with the entry points
+         - `cache`: path to the cache-file (default is in ~/.cache/tuna)
+        """
+        super(PluginIndex, self).__init__()
+        self.group = group
+        self.name = name
+        self.parent_name = parent_name
+        self.exclusions = exclusions or []
+        self.base_package = base_package
+        self._cache = cache
+        self._package = None
+        self._modules = None
+        self._metadata = None
+        self._plugins = None
+        return
+
+    @property
+    def package(self):
+        """
+        (module-name, folder) of the entry point's package (found without importing it)
+        """
+        if self._package is None:
+            import pkg_resources
+            entry = pkg_resources.get_entry_info(self.base_package, self.group, self.name)
+            if entry is None:
+                raise TunaError("No '{0}' entry point in the '{1}' group of {2}".format(self.name,
+                                                                                      self.group,
+                                                                                      self.base_package))
+            loader = pkgutil.get_loader(entry.module_name)
+            if loader is None:
+                raise TunaError("Unable to find the '{0}' package".format(entry.module_name))
+            self._package = entry.module_name, loader.filename
+        return self._package
+
+    @property
+    def modules(self):
+        """
+        list of (module-name, source-file) for the modules in the package
+        """
+        if self._modules is None:
+            module_name, folder = self.package
+            prefix = module_name + '.'
+            self._modules = [(name, os.path.join(folder,
+                                                 name[len(prefix):] + PluginIndexConstants.source_extension))
+                             for loader, name, is_package in pkgutil.iter_modules([folder], prefix)
+                             if not is_package and name not in self.exclusions]
+        return self._modules
+
+    @property
+    def files(self):
+        """
+        list of [module-name, modification-time, size] for each module
+        """
+        files = []
+        for module_name, filename in self.modules:
+            try:
+                status = os.stat(filename)
+                files.append([module_name, status.st_mtime, status.st_size])
+            except OSError:
+                files.append([module_name, None, None])
+        return files
+
+    @property
+    def metadata(self):
+        """
+        [metadata-path, modification-time, version] for the installed distribution
+        """
+        if self._metadata is None:
+            import pkg_resources
+            try:
+                distribution = pkg_resources.get_distribution(self.base_package)
+            except pkg_resources.DistributionNotFound:
+                self._metadata = [None, None, None]
+            else:
+                path = getattr(distribution, 'egg_info', None) or distribution.location
+                self._metadata = [path, self.modified(path), distribution.version]
+        return self._metadata
+
+    @staticmethod
+    def modified(path):
+        """
+        The latest modification-time of the path (and the files in it, if it's a folder)
+
+        :param:
+
+         - `path`: file or folder name
+
+        :return: modification time or None if the path doesn't exist
+        """
+        if path is None or not os.path.exists(path):
+            return None
+        times = [os.path.getmtime(path)]
+        if os.path.isdir(path):
+            times.extend(os.path.getmtime(os.path.join(path, name))
+                         for name in os.listdir(path))
+        return max(times)
+
+    @property
+    def cache(self):
+        """
+        The path to the cache-file
+        """
+        if self._cache is None:
+            self._cache = os.path.join(os.path.expanduser(PluginIndexConstants.cache_folder),
+                                       PluginIndexConstants.cache_name.format(group=self.group,
+                                                                              name=self.name))
+        return self._cache
+
+    def scan(self, filename):
+        """
+        Reads the module's source for child-classes of the parent
+
+        :param:
+
+         - `filename`: path to the module's source
+
+        :return: list of class-names
+        :raise: IOError if the file can't be read, SyntaxError if it can't be parsed
+        """
+        with open(filename) as source:
+            tree = ast.parse(source.read(), filename)
+        names = []
+        nodes = list(tree.body)
+        while nodes:
+            node = nodes.pop(0)
+            if isinstance(node, ast.ClassDef):
+                if node.bases:
+                    base = node.bases[0]
+                    base_name = getattr(base, 'id', getattr(base, 'attr', None))
+                    if base_name == self.parent_name:
+                        names.append(node.name)
+            elif isinstance(node, (ast.If, ast.TryExcept, ast.TryFinally)):
+                for block in ('body', 'orelse', 'handlers', 'finalbody'):
+                    nodes.extend(getattr(node, block, []))
+            elif isinstance(node, ast.ExceptHandler):
+                nodes.extend(node.body)
+        return names
+
+    def build(self):
+        """
+        Reads (or imports) all the modules
+
+        :return: dict of plugin-name: module-name
+        """
+        plugins = {}
+        for module_name, filename in self.modules:
+            try:
+                names = self.scan(filename)
+            except (IOError, SyntaxError) as error:
+                self.logger.debug("Importing {0} ({1})".format(module_name, error))
+                module = importlib.import_module(module_name)
+                names = [name for name, definition in inspect.getmembers(module, inspect.isclass)
+                         if getattr(definition.__base__, '__name__', None) == self.parent_name]
+            for name in names:
+                plugins[name] = module_name
+        return plugins
+
+    @property
+    def plugins(self):
+        """
+        dict of plugin-name: module-name (from the cache if it's still good)
+        """
+        if self._plugins is None:
+            cached = self.load()
+            if cached is not None and self.current(cached):
+                self._plugins = cached['plugins']
+            else:
+                self._plugins = self.build()
+                self.save(self._plugins)
+        return self._plugins
+
+    def load(self):
+        """
+        Loads the cache-file
+
+        :return: dict from the cache-file or None if it can't be loaded
+        """
+        try:
+            with open(self.cache) as cache:
+                cached = json.load(cache)
+        except (IOError, ValueError) as error:
+            self.logger.debug("Unable to load the plugin index: {0}".format(error))
+            return None
+        if cached.get('version') != PluginIndexConstants.version:
+            return None
+        return cached
+
+    def current(self, cached):
+        """
+        Checks if the cached index is still good
+
+        :param:
+
+         - `cached`: dict loaded from the cache-file
+
+        :return: True if the distribution and the modules haven't changed
+        """
+        path, modified, version = cached['metadata']
+        if path is None or self.modified(path) != modified:
+            if cached['metadata'] != self.metadata:
+                self.logger.debug("The plugin index ({0}) is out of date".format(self.cache))
+                return False
+        if self._package is None:
+            self._package = tuple(cached['package'])
+        if cached['files'] != self.files:
+            self.logger.debug("The plugin index ({0}) is out of date".format(self.cache))
+            return False
+        return True
+
+    def save(self, plugins):
+        """
+        Saves the index to the cache-file (failures are logged, not raised)
+
+        :param:
+
+         - `plugins`: dict of plugin-name: module-name
+        """
+        try:
+            folder = os.path.dirname(self.cache)
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            temporary = "{0}.{1}".format(self.cache, os.getpid())
+            with open(temporary, 'w') as cache:
+                json.dump(dict(version=PluginIndexConstants.version,
+                               package=self.package,
+                               metadata=self.metadata,
+                               files=self.files,
+                               plugins=plugins), cache)
+            os.rename(temporary, self.cache)
+        except (IOError, OSError) as error:
+            self.logger.debug("Unable to save the plugin index: {0}".format(error))
+        return
+# end class PluginIndex
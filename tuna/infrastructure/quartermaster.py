@@ -7,6 +7,7 @@ import inspect
 # this package
 from tuna import BaseClass
 from tuna.infrastructure.ryemother import RyeMother
+from tuna.infrastructure.pluginindex import PluginIndex
 from tuna.plugins.base_plugin import BasePlugin
 
 
@@ -31,6 +32,8 @@ class QuarterMaster(BaseClass):
         super(QuarterMaster, self).__init__()
         self._plugins = None
         self._import_plugins = None
+        self._index = None
+        self._external_plugins = None
         self.external_modules = None
         self.parent = BasePlugin
         self.group = group
@@ -62,12 +65,37 @@ class QuarterMaster(BaseClass):
                 for module_name in self.external_modules:
                     self._plugins.update(self.import_plugins(modulename=module_name))
         return self._plugins        
+
+    @property
+    def index(self):
+        """
+        A PluginIndex for the group and name (re-built if they've been changed)
+        """
+        if (self._index is None or self._index.group != self.group or
+            self._index.name != self.name):
+            self._index = PluginIndex(group=self.group, name=self.name,
+                                      parent_name=self.parent.__name__,
+                                      exclusions=self.exclusions)
+        return self._index
+
+    @property
+    def external_plugins(self):
+        """
+        A dictionary of the plugins in the external modules
+        """
+        if self._external_plugins is None:
+            self._external_plugins = {}
+            if self.external_modules is not None:
+                for module_name in self.external_modules:
+                    self._external_plugins.update(self.import_plugins(modulename=module_name))
+        return self._external_plugins
     
     def list_plugins(self):
         """
         Prints the names of the plugins to standard out
         """
-        for name in sorted(self.plugins.keys()):
+        names = set(self.index.plugins) | set(self.external_plugins)
+        for name in sorted(names):
             print name
         return
 
@@ -83,6 +111,15 @@ class QuarterMaster(BaseClass):
         :return: An un-instantiated plugin definition
         """
         self.logger.debug("Retrieving {0}".format(name))
+        if name in self.external_plugins:
+            return self.external_plugins[name]
+        module_name = self.index.plugins.get(name)
+        if module_name is not None:
+            definition = getattr(importlib.import_module(module_name), name, None)
+            if inspect.isclass(definition) and definition.__base__ is self.parent:
+                return definition
+            self.logger.debug("{0} isn't a plugin in {1}, importing all the plugins".format(name,
+                                                                                          module_name))
         try:
             return self.plugins[name]
         except KeyError as error:
@@ -3,7 +3,6 @@
 import os
 import importlib
 import inspect
-import pkg_resources
 import pkgutil
 
 
@@ -125,6 +124,7 @@ class RyeMother(object):
             # returns True if candidate object has the correct parent class
             return hasattr(candidate, '__base__') and candidate.__base__ is parent
 
+        import pkg_resources
         children = {}
 
         module = pkg_resources.load_entry_point(self.base_package, group, name)
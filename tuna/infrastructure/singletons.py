@@ -3,6 +3,9 @@
 from tuna import DontCatchError
 from tuna.components.composite import Composite
 from tuna.parts.storage.filestorage import FileStorage
+from tuna.clients.connectionregistry import ConnectionRegistry
+from tuna.parts.scheduler import Scheduler
+from tuna.clients.streamloop import StreamLoop
 from tuna import FILE_TIMESTAMP
 
 
@@ -17,6 +20,9 @@ class SingletonEnum(object):
     __slots__ = ()
     composite = 'composite'
     filestorage = 'filestorage'
+    connectionregistry = 'connectionregistry'
+    scheduler = 'scheduler'
+    streamloop = 'streamloop'
 
 
 def get_composite(name, error=DontCatchError, error_message=None,
@@ -71,9 +77,46 @@ def get_filestorage(name, path=None,
     return singletons[SingletonEnum.filestorage][name]
 
 
+def get_connection_registry():
+    """
+    Gets the ConnectionRegistry Singleton
+
+    :return: ConnectionRegistry singleton
+    """
+    if SingletonEnum.connectionregistry not in singletons:
+        singletons[SingletonEnum.connectionregistry] = ConnectionRegistry()
+    return singletons[SingletonEnum.connectionregistry]
+
+
+def get_scheduler():
+    """
+    Gets the Scheduler Singleton
+
+    :return: Scheduler singleton
+    """
+    if SingletonEnum.scheduler not in singletons:
+        singletons[SingletonEnum.scheduler] = Scheduler()
+    return singletons[SingletonEnum.scheduler]
+
+
+def get_stream_loop():
+    """
+    Gets the StreamLoop Singleton
+
+    :return: StreamLoop singleton
+    """
+    if SingletonEnum.streamloop not in singletons:
+        singletons[SingletonEnum.streamloop] = StreamLoop()
+    return singletons[SingletonEnum.streamloop]
+
+
 def refresh():
     """
-    Clears the `singletons` dictionary
+    Clears the `singletons` dictionary (stopping the scheduler's and stream loop's threads)
     """
+    if SingletonEnum.scheduler in singletons:
+        singletons[SingletonEnum.scheduler].stop()
+    if SingletonEnum.streamloop in singletons:
+        singletons[SingletonEnum.streamloop].stop()
     singletons.clear()
     return
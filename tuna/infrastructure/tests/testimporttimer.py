@@ -0,0 +1,77 @@
+
+# python standard library
+import unittest
+import __builtin__
+import os
+import shutil
+import StringIO
+import sys
+import tempfile
+
+# this package
+from tuna.infrastructure.importtimer import ImportTimer
+
+
+class TestImportTimer(unittest.TestCase):
+    def setUp(self):
+        self.timer = ImportTimer()
+        self.folder = tempfile.mkdtemp()
+        with open(os.path.join(self.folder, 'timedouter.py'), 'w') as module:
+            module.write("import timedinner\nimport os\n")
+        with open(os.path.join(self.folder, 'timedinner.py'), 'w') as module:
+            module.write("import time\ntime.sleep(0.05)\n")
+        sys.path.insert(0, self.folder)
+        return
+
+    def tearDown(self):
+        self.timer.stop()
+        sys.path.remove(self.folder)
+        for name in ('timedouter', 'timedinner'):
+            sys.modules.pop(name, None)
+        shutil.rmtree(self.folder)
+        return
+
+    def test_start_stop(self):
+        """
+        Does it replace and restore the built-in __import__?
+        """
+        original = __builtin__.__import__
+        self.timer.start()
+        self.assertEqual(self.timer.timed_import, __builtin__.__import__)
+        self.timer.start()
+        self.assertIs(original, self.timer.original)
+        self.timer.stop()
+        self.assertIs(original, __builtin__.__import__)
+        return
+
+    def test_timed_import(self):
+        """
+        Does it time only the imports that add modules (without counting them twice)?
+        """
+        self.timer.start()
+        import timedouter
+        self.timer.stop()
+        records = dict((record.module, record) for record in self.timer.records)
+        self.assertEqual(['timedinner', 'timedouter'], sorted(records))
+        inner, outer = records['timedinner'], records['timedouter']
+        self.assertEqual('timedouter', inner.parent)
+        self.assertGreaterEqual(inner.self_seconds, 0.05)
+        self.assertGreaterEqual(outer.cumulative_seconds, inner.cumulative_seconds)
+        self.assertLess(outer.self_seconds, 0.05)
+        return
+
+    def test_report(self):
+        """
+        Does the report list the slowest imports first?
+        """
+        self.timer.start()
+        import timedouter
+        self.timer.stop()
+        output = StringIO.StringIO()
+        self.timer.report(stream=output, limit=1)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertIn('timedouter (tuna.infrastructure.tests.testimporttimer)', lines[1])
+        self.assertTrue(lines[2].startswith('2 imports timed'))
+        return
+# end class TestImportTimer
@@ -0,0 +1,205 @@
+
+# python standard library
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import Queue
+import urllib2
+import threading
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna.infrastructure.metrics import (MetricsRegistry, MetricsExporter,
+                                         Counter, Histogram, MetricsConstants)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        return
+
+    def samples(self):
+        """
+        The rendered samples as a dict of name: value
+        """
+        return dict(line.rsplit(' ', 1) for line in self.registry.render().splitlines()
+                    if not line.startswith('#'))
+
+    def test_counters(self):
+        """
+        Are the counters rendered with their help and type and cleared by reset?
+        """
+        for check in xrange(3):
+            self.registry.quality_checks.increment()
+        self.registry.best_quality.set(12.5)
+        text = self.registry.render()
+        self.assertIn("# HELP tuna_quality_checks_total ", text)
+        self.assertIn("# TYPE tuna_quality_checks_total counter\n", text)
+        self.assertIn("# TYPE tuna_best_quality gauge\n", text)
+        samples = self.samples()
+        self.assertEqual('3', samples['tuna_quality_checks_total'])
+        self.assertEqual('12.5', samples['tuna_best_quality'])
+
+        self.registry.reset()
+        samples = self.samples()
+        self.assertEqual('0', samples['tuna_quality_checks_total'])
+        self.assertEqual('0', samples['tuna_best_quality'])
+        return
+
+    def test_ratios(self):
+        """
+        Are the ratios and the rate worked out when they're rendered?
+        """
+        samples = self.samples()
+        self.assertEqual('0', samples['tuna_annealing_acceptance_ratio'])
+        self.assertEqual('0', samples['tuna_tabu_hit_ratio'])
+        self.registry.candidates.increment(4)
+        self.registry.accepted.increment()
+        self.registry.tabu_lookups.increment(10)
+        self.registry.tabu_hits.increment(5)
+        self.registry.evaluations.increment(10)
+        self.registry.started -= 5
+        samples = self.samples()
+        self.assertEqual(0.25, float(samples['tuna_annealing_acceptance_ratio']))
+        self.assertEqual(0.5, float(samples['tuna_tabu_hit_ratio']))
+        self.assertAlmostEqual(2, float(samples['tuna_evaluations_per_second']), places=1)
+        return
+
+    def test_queue_depth(self):
+        """
+        Does the queue depth add up the storages that are still alive?
+        """
+        class Storage(object):
+            pass
+        def storage(depth):
+            storage = Storage()
+            storage.queue = Queue.Queue()
+            for item in xrange(depth):
+                storage.queue.put(item)
+            self.registry.storages.add(storage)
+            return storage
+        first, second = storage(2), storage(3)
+        self.assertEqual('5', self.samples()['tuna_storage_queue_depth'])
+        del second
+        self.assertEqual('2', self.samples()['tuna_storage_queue_depth'])
+        return
+
+    def test_connections(self):
+        """
+        Do the connection gauges add up the registries that are still alive?
+        """
+        class Registry(object):
+            pass
+        def registry(opened, reused, active):
+            registry = Registry()
+            registry.counters = dict(opened=opened, reused=reused, active=active)
+            self.registry.connection_registries.add(registry)
+            return registry
+        first, second = registry(2, 5, 1), registry(1, 0, 1)
+        samples = self.samples()
+        self.assertEqual('3', samples['tuna_ssh_connections_opened'])
+        self.assertEqual('5', samples['tuna_ssh_connections_reused'])
+        self.assertEqual('2', samples['tuna_ssh_connections_active'])
+        del second
+        self.assertEqual('2', self.samples()['tuna_ssh_connections_opened'])
+        return
+
+    def test_histogram(self):
+        """
+        Are the histogram's buckets cumulative with a sum and count?
+        """
+        histogram = Histogram('tuna_test_seconds', 'test', (0.1, 1))
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value)
+        lines = histogram.render().splitlines()
+        self.assertEqual(['tuna_test_seconds_bucket{le="0.1"} 2',
+                          'tuna_test_seconds_bucket{le="1"} 3',
+                          'tuna_test_seconds_bucket{le="+Inf"} 4',
+                          'tuna_test_seconds_sum 5.65',
+                          'tuna_test_seconds_count 4'], lines[2:])
+        return
+
+    def test_threads(self):
+        """
+        Are updates from many threads at once all counted?
+        """
+        counter = Counter('tuna_test_total', 'test')
+        histogram = Histogram('tuna_test_seconds', 'test', (0.5,))
+        updates = 20000
+        def update():
+            for update in xrange(updates):
+                counter.increment()
+                histogram.observe(1)
+        threads = [threading.Thread(target=update) for thread in xrange(8)]
+        # switch threads as often as possible (without the locks this loses about a third of the updates)
+        interval = sys.getcheckinterval()
+        sys.setcheckinterval(1)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setcheckinterval(interval)
+        self.assertEqual(8 * updates, counter.value)
+        self.assertEqual([0, 8 * updates], histogram.counts)
+        self.assertEqual(8 * updates, histogram.count)
+        self.assertEqual(8 * updates, histogram.total)
+        return
+# end class TestMetricsRegistry
+
+
+class TestMetricsExporter(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.evaluations.increment(7)
+        self.folder = tempfile.mkdtemp()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        return
+
+    def test_file(self):
+        """
+        Is the metrics-file written while running and when stopped?
+        """
+        filename = os.path.join(self.folder, 'tuna.prom')
+        exporter = MetricsExporter(registry=self.registry, filename=filename,
+                                   interval=0.01)
+        exporter.start()
+        exporter.stopped.wait(0.05)
+        self.assertTrue(os.path.isfile(filename))
+        self.registry.evaluations.increment()
+        exporter.stop()
+        with open(filename) as metrics:
+            self.assertIn("tuna_evaluations_total 8\n", metrics.read())
+        self.assertFalse(os.path.exists(filename + MetricsConstants.temporary_extension))
+        return
+
+    def test_server(self):
+        """
+        Does the server answer with the metrics on the local port?
+        """
+        exporter = MetricsExporter(registry=self.registry, port=0)
+        exporter._logger = MagicMock()
+        exporter.start()
+        try:
+            port = exporter.server.server_address[1]
+            response = urllib2.urlopen("http://{0}:{1}{2}".format(MetricsConstants.host,
+                                                                  port,
+                                                                  MetricsConstants.path))
+            self.assertEqual(MetricsConstants.content_type,
+                             response.info()['Content-Type'])
+            self.assertIn("tuna_evaluations_total 7\n", response.read())
+            with self.assertRaises(urllib2.HTTPError):
+                urllib2.urlopen("http://{0}:{1}/other".format(MetricsConstants.host, port))
+        finally:
+            exporter.stop()
+        self.assertIsNone(exporter.server_thread)
+        return
+# end class TestMetricsExporter
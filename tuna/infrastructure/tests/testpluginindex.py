@@ -0,0 +1,123 @@
+
+# python standard library
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna.infrastructure.pluginindex import PluginIndex
+from tuna.infrastructure.quartermaster import QuarterMaster
+from tuna.plugins.base_plugin import BasePlugin
+
+
+SOURCE = '''
+import numpy
+class Alpha(BasePlugin):
+    pass
+class NotAPlugin(object):
+    pass
+class Beta(plugins.BasePlugin, object):
+    pass
+try:
+    import scipy
+    class Gamma(BasePlugin):
+        pass
+except ImportError:
+    class Delta(BasePlugin):
+        pass
+def function():
+    class Hidden(BasePlugin):
+        pass
+'''
+
+class TestPluginIndex(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = os.path.join(self.folder, 'cache', 'plugins.json')
+        self.index = PluginIndex(group='tuna.plugins', name='plugins',
+                                 parent_name='BasePlugin', cache=self.cache)
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        return
+
+    def test_scan(self):
+        """
+        Does it find the top-level children of the parent without importing?
+        """
+        filename = os.path.join(self.folder, 'fakeplugins.py')
+        with open(filename, 'w') as module:
+            module.write(SOURCE)
+        self.assertEqual(['Alpha', 'Beta', 'Gamma', 'Delta'], self.index.scan(filename))
+        self.assertNotIn('fakeplugins', sys.modules)
+        return
+
+    def test_cache(self):
+        """
+        Does it re-use the cache until a module changes?
+        """
+        filename = os.path.join(self.folder, 'fakeplugins.py')
+        with open(filename, 'w') as module:
+            module.write(SOURCE)
+        self.index._modules = [('fake.fakeplugins', filename)]
+        self.assertEqual('fake.fakeplugins', self.index.plugins['Alpha'])
+        with open(self.cache) as cache:
+            self.assertEqual(self.index.plugins, json.load(cache)['plugins'])
+
+        index = PluginIndex(group='tuna.plugins', name='plugins',
+                            parent_name='BasePlugin', cache=self.cache)
+        index._modules = self.index._modules
+        index.scan = MagicMock()
+        self.assertEqual(self.index.plugins, index.plugins)
+        self.assertEqual(0, index.scan.call_count)
+
+        # a change to the module makes it stale
+        with open(filename, 'a') as module:
+            module.write("class Epsilon(BasePlugin):\n    pass\n")
+        index = PluginIndex(group='tuna.plugins', name='plugins',
+                            parent_name='BasePlugin', cache=self.cache)
+        index._modules = self.index._modules
+        self.assertEqual('fake.fakeplugins', index.plugins['Epsilon'])
+        return
+
+    def test_tuna_plugins(self):
+        """
+        Does it find the same plugins the RyeMother does?
+        """
+        quartermaster = QuarterMaster()
+        quartermaster._index = PluginIndex(group='tuna.plugins', name='plugins',
+                                           parent_name='BasePlugin',
+                                           exclusions=quartermaster.exclusions,
+                                           cache=self.cache)
+        self.assertEqual(sorted(quartermaster.plugins), sorted(quartermaster.index.plugins))
+        for name, definition in quartermaster.plugins.iteritems():
+            self.assertEqual(definition.__module__, quartermaster.index.plugins[name])
+        return
+
+    def test_get_plugin(self):
+        """
+        Does get_plugin import only the plugin's module?
+        """
+        quartermaster = QuarterMaster()
+        quartermaster._index = MagicMock(group=quartermaster.group)
+        quartermaster._index.name = quartermaster.name
+        quartermaster._index.plugins = {'Sleep': 'tuna.plugins.sleep_plugin',
+                                        'Wrong': 'tuna.plugins.sleep_plugin'}
+        quartermaster._import_plugins = MagicMock()
+        sleep = quartermaster.get_plugin('Sleep')
+        self.assertEqual('Sleep', sleep.__name__)
+        self.assertIs(BasePlugin, sleep.__base__)
+        self.assertEqual(0, quartermaster._import_plugins.call_count)
+
+        # if the index is wrong it falls back to importing everything
+        quartermaster._import_plugins.return_value = {'Wrong': sleep}
+        self.assertIs(sleep, quartermaster.get_plugin('Wrong'))
+        return
+# end class TestPluginIndex
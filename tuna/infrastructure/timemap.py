@@ -10,10 +10,6 @@ from datetime import datetime
 if IN_PWEAVE:
     import os
 
-# third-party
-from dateutil.relativedelta import relativedelta
-import dateutil.parser 
-
 # this package
 from tuna import BaseClass
 from tuna import TunaError
@@ -324,6 +320,8 @@ class RelativeTime(BaseClass):
         # timedelta doesn't handle varying-units (e.g. 28 vs 30 vs 31 day in a month)
         # relativedelta does -- but it returns a datetime object, not a timedelta
         # so the adding and subtracting is to convert it to a timedelta
+        # (dateutil is imported here so it isn't imported with the configuration-map)
+        from dateutil.relativedelta import relativedelta
         self.timedelta = now + relativedelta(years=int(years),
                                              months=int(months),
                                              weeks=float(weeks),
@@ -574,6 +572,7 @@ class AbsoluteTime(BaseClass):
         :return: datetime object created from `source`
         :raise: TunaError if the string is unrecognizable
         """
+        import dateutil.parser
         try:
             return dateutil.parser.parse(source,
                                          default=self.default,
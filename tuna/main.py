@@ -22,6 +22,17 @@ def enable_debugging(args):
     return
 
 
+def report_imports():
+    """
+    Prints the import times (if the ImportTimer was started)
+    """
+    from tuna.infrastructure.importtimer import IMPORT_TIMER
+    if IMPORT_TIMER.original is not None:
+        IMPORT_TIMER.stop()
+        IMPORT_TIMER.report()
+    return
+
+
 def main():
     """
     The 'site-entry' point.
@@ -30,10 +41,15 @@ def main():
        2. Sets the logger
        3. Enables debugging (if asked for)
        4. Calls the function set by the argparse subcommand
+       5. Reports the import times (if they were timed)
+
+    :return: the sub-command's exit status (if it has one)
     """
     argue = tuna.infrastructure.arguments.ArgumentBuilder()
     args = argue()
     set_logger(args)
     enable_debugging(args)
-    args.function(args)
-    return
+    try:
+        return args.function(args)
+    finally:
+        report_imports()
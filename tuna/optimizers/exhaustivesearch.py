@@ -1,7 +1,4 @@
 
-# python standard library
-import datetime
-
 # third party
 import numpy
 
@@ -9,7 +6,11 @@ import numpy
 from tuna.components.component import BaseComponent
 from tuna import ConfigurationError
 from tuna.parts.xysolution import XYSolution
-from tuna import LOG_TIMESTAMP
+from tuna.parts.phasetimer import PHASE_TIMER, PhaseTimerConstants, phase
+from tuna.infrastructure.metrics import METRICS
+from tuna.parts.eventlog import EventLog
+from tuna.parts.storage.nullstorage import NullStorage
+from tuna.parts.storage.resultstore import ResultStore, ResultStoreConstants
 
 
 class ExhaustiveSearchConstants(object):
@@ -20,13 +21,18 @@ class ExhaustiveSearchConstants(object):
     increments_option = 'increments'
     datatype_option = 'datatype'
 
+    # the search's columns in the results
+    state_fields = (('checks', ResultStoreConstants.integer),
+                    ('best', ResultStoreConstants.integer))
+
 
 class ExhaustiveSearch(BaseComponent):
     """
     An exhaustive grid searcher
     """    
     def __init__(self, minima, maxima, increments, quality, solutions,
-                 observers=None):
+                 observers=None, phase_storage=None, phase_interval=None,
+                 event_storage=None, results=None):
         """
         ExhaustiveSearch constructor
 
@@ -38,6 +44,10 @@ class ExhaustiveSearch(BaseComponent):
          - `quality`: Object to assess quality of candidate solution
          - `observers`: composite of objects to get the best solution
          - `solutions`: object to write output to
+         - `phase_storage`: writeable object for the phase-timer's report
+         - `phase_interval`: seconds between logging the phase-times while running
+         - `event_storage`: writeable object for the events (None to only log them)
+         - `results`: ResultStore for the evaluations (default writes them to the solutions)
         """
         super(ExhaustiveSearch, self).__init__()
         self.minima = minima
@@ -46,6 +56,16 @@ class ExhaustiveSearch(BaseComponent):
         self.quality = quality
         self.observers = observers
         self.solutions = solutions
+        self.phase_storage = phase_storage
+        self.phase_interval = phase_interval
+        # the phases are only timed if there's somewhere for the times to go
+        self.timed = phase_storage is not None or phase_interval is not None
+        if self.phase_storage is None:
+            self.phase_storage = NullStorage()
+        self.events = EventLog(storage=event_storage, logger=self.logger)
+        self.results = results
+        if self.results is None:
+            self.results = ResultStore(csv_storage=self.solutions)
         return
 
     def check_rep(self):
@@ -73,8 +93,22 @@ class ExhaustiveSearch(BaseComponent):
 
     def close(self):
         """
-        Does nothing
+        Closes the solutions and phase-times' storages and the event-log
+        """
+        self.results.close()
+        self.solutions.close()
+        self.phase_storage.close()
+        self.events.close()
+        return
+
+    def reset(self):
+        """
+        Opens new files for the solutions, phase-times, events and results
         """
+        self.solutions.reset()
+        self.phase_storage.reset()
+        self.events.reset()
+        self.results.reset(state_fields=ExhaustiveSearchConstants.state_fields)
         return
 
     def carry(self, candidate):
@@ -104,36 +138,36 @@ class ExhaustiveSearch(BaseComponent):
 
         candidate.inputs -= increment
         best = candidate.copy()
+        if self.timed:
+            PHASE_TIMER.start(interval=self.phase_interval)
+        self.reset()
         self.log_info("Initial Best Solution: {0}".format(best))
         
-        self.solutions.write("Time,Solution\n")
-        #timestamp = datetime.datetime.now().strftime(LOG_TIMESTAMP)
-        #output = "{0},1,{1}\n".format(timestamp, candidate)
-        #self.solutions.write(output)
-        
         while not numpy.array_equal(candidate.inputs, self.maxima):           
             candidate.inputs = self.carry(candidate.inputs + increment)
             candidate.output = None
 
-            self.logger.debug("Trying candidate: {0}".format(candidate))
+            self.events.proposed(candidate)
 
-            if self.quality(candidate) > self.quality(best):
-                timestamp = datetime.datetime.now().strftime(LOG_TIMESTAMP)
-                output = "{0},{1}\n".format(timestamp,
-                                            candidate)
-    
-                self.log_info("New Best Solution: {0}".format(output))
+            with phase(PhaseTimerConstants.quality):
+                improved = self.quality(candidate) > self.quality(best)
+            METRICS.evaluations.increment()
+            self.events.evaluated(candidate)
+            if improved:
+                self.events.new_best(candidate)
                 best = candidate.copy()
+                METRICS.best_quality.set(best.output)
                 
             # record the path
-            timestamp = datetime.datetime.now().strftime(LOG_TIMESTAMP)
-            output = "{0},{1}\n".format(timestamp,
-                                        candidate)
-
-            self.logger.debug("Candidate Outcome: {0}".format(candidate))
-            self.solutions.write(output)                
+            with phase(PhaseTimerConstants.storage):
+                self.results.append(candidate, checks=self.quality.quality_checks,
+                                    best=int(improved))
+        with phase(PhaseTimerConstants.storage):
+            self.results.close()
         self.log_info("Quality Checks: {0} Solution: {1} ".format(self.quality.quality_checks,
                                                                      best))
+        if self.timed:
+            PHASE_TIMER.finish(storage=self.phase_storage)
         if self.observers is not None:
             self.log_info("ExhaustiveSearch giving solution to '{0}'".format(self.observers))
             self.observers(target=best)
@@ -145,7 +179,8 @@ class ExhaustiveSearchBuilder(object):
     """
     A builder of ExhaustiveSearch objects
     """
-    def __init__(self, configuration, section_header, quality, observers, solution_storage):
+    def __init__(self, configuration, section_header, quality, observers, solution_storage,
+                 phase_storage=None, event_storage=None, results=None):
         """
         ExhaustiveSearchBuilder constructor
 
@@ -156,6 +191,9 @@ class ExhaustiveSearchBuilder(object):
          - `quality`: A callable object to assess quality of a candidate solution
          - `observers: callable to send best-solution to
          - `solution_storage`: writeable object to send output to
+         - `phase_storage`: writeable object for the phase-timer's report
+         - `event_storage`: writeable object for the events
+         - `results`: ResultStore for the evaluations
         """
         self.configuration = configuration
         self.section_header = section_header
@@ -163,6 +201,9 @@ class ExhaustiveSearchBuilder(object):
         self.quality = quality
         self.observers = observers
         self.solution_storage = solution_storage
+        self.phase_storage = phase_storage
+        self.event_storage = event_storage
+        self.results = results
         return
 
     @property
@@ -186,12 +227,19 @@ class ExhaustiveSearchBuilder(object):
             if len(increments) == 1 and len(increments) < len(minima):
                 increments = len(minima) * increments
             increments = numpy.array(increments, dtype)
+            phase_interval = self.configuration.get_float(section=self.section_header,
+                                                          option=PhaseTimerConstants.interval_option,
+                                                          optional=True)
 
             self._product = ExhaustiveSearch(minima=minima,
                                              maxima=maxima,
                                              increments=increments,
                                              quality=self.quality,
                                              observers=self.observers,
-                                             solutions=self.solution_storage)
+                                             solutions=self.solution_storage,
+                                             phase_storage=self.phase_storage,
+                                             phase_interval=phase_interval,
+                                             event_storage=self.event_storage,
+                                             results=self.results)
         return self._product
 # end ExhaustiveSearchBuilder    
@@ -1,10 +1,18 @@
 
-# python standard library
-import datetime
-
 # This package
 from tuna.components.component import BaseComponent
-from tuna import LOG_TIMESTAMP
+from tuna.parts.phasetimer import PHASE_TIMER, PhaseTimerConstants, phase
+from tuna.infrastructure.metrics import METRICS
+from tuna.parts.eventlog import EventLog
+from tuna.parts.storage.nullstorage import NullStorage
+from tuna.parts.storage.resultstore import ResultStore, ResultStoreConstants
+
+
+# the restarter's columns in the results
+STATE_FIELDS = (('checks', ResultStoreConstants.integer),
+                ('restart', ResultStoreConstants.integer),
+                ('accepted', ResultStoreConstants.integer),
+                ('best', ResultStoreConstants.integer))
 
 
 class RandomRestarter(BaseComponent):
@@ -14,7 +22,8 @@ class RandomRestarter(BaseComponent):
     def __init__(self, local_stops, quality, tweak,
                  solution_storage,
                  candidate=None, 
-                 global_stop=None, observers=None):
+                 global_stop=None, observers=None, phase_storage=None,
+                 phase_interval=None, event_storage=None, results=None):
         """
         Random Restarts constructor
 
@@ -27,8 +36,13 @@ class RandomRestarter(BaseComponent):
          - `candidate` : initial candidate (takes from global_stop parameter if not given)
          - `global_stop`: callable to decide to stop (takes from local_stops if not given)
          - `observers`: Composite of objects to give final solution to
+         - `phase_storage`: writeable object for the phase-timer's report
+         - `phase_interval`: seconds between logging the phase-times while running
+         - `event_storage`: writeable object for the events (None to only log them)
+         - `results`: ResultStore for the evaluations (default writes them to the solution_storage)
         """
         super(RandomRestarter, self).__init__()
+        self.events = EventLog(storage=event_storage, logger=self.logger)
         self.tabu = set([])
         self.local_stops = local_stops
         self.tweak = tweak
@@ -37,8 +51,17 @@ class RandomRestarter(BaseComponent):
         self.candidate = candidate
         self._solution = candidate
         self.solutions = solution_storage
+        self.results = results
+        if self.results is None:
+            self.results = ResultStore(csv_storage=self.solutions)
         self._global_stop = global_stop
         self.observers = observers
+        self.phase_storage = phase_storage
+        self.phase_interval = phase_interval
+        # the phases are only timed if there's somewhere for the times to go
+        self.timed = phase_storage is not None or phase_interval is not None
+        if self.phase_storage is None:
+            self.phase_storage = NullStorage()
         return
 
     @property
@@ -101,14 +124,17 @@ class RandomRestarter(BaseComponent):
         Finds the best solution within given time
         """
         self.reset()
+        if self.timed:
+            PHASE_TIMER.start(interval=self.phase_interval)
         candidate = self.solution
         self.log_info("Initial Best Solution: {0}".format(candidate))
         # start the data log
-        self.solutions.write("Time,Checks,Solution\n")       
-        timestamp = datetime.datetime.now().strftime(LOG_TIMESTAMP)
-        output = "{0},1,{1}\n".format(timestamp, candidate)
-        self.solutions.write(output)
+        with phase(PhaseTimerConstants.storage):
+            self.results.append(candidate, checks=self.quality.quality_checks,
+                                restart=0, accepted=1, best=1)
         self.logger.info("First Candidate: {0}".format(candidate))
+        best_quality = self.quality(candidate)
+        restart = 0
         
         for local_stop in self.local_stops:
             # global search
@@ -120,28 +146,40 @@ class RandomRestarter(BaseComponent):
             while not local_stop(candidate):
                 # local-search
                 new_candidate = self.tabu_search(candidate)
-                
-                self.logger.debug("Trying candidate: {0}".format(new_candidate))
-                if self.quality(new_candidate) > self.quality(candidate):
+                accepted = self.quality(new_candidate) > self.quality(candidate)
+                if accepted:
                     candidate = new_candidate
-                    self.logger.info("Candidate '{0}' new local solution".format(candidate))
+                    self.events.accepted(candidate)
+                best = self.quality(new_candidate) > best_quality
+                if best:
+                    best_quality = self.quality(new_candidate)
+                with phase(PhaseTimerConstants.storage):
+                    self.results.append(new_candidate, checks=self.quality.quality_checks,
+                                        restart=restart, accepted=int(accepted),
+                                        best=int(best))
                     
             if self.quality(candidate) > self.quality(self.solution):
-                timestamp = datetime.datetime.now().strftime(LOG_TIMESTAMP)
-                output = "{0},{1},{2}\n".format(timestamp,
-                                                self.quality.quality_checks,
-                                                candidate)
-                self.solutions.write(output)
-                self.log_info("New Best Solution: {0}".format(output))                
+                self.events.new_best(candidate)
                 self.solution = candidate
+                METRICS.best_quality.set(candidate.output)
 
             # random restart
-            self.log_info("Random Restart")
+            self.events.restart()
+            restart += 1
             candidate = self.tabu_search()
-            self.logger.debug("Trying candidate: {0}".format(candidate))
+            best = self.quality(candidate) > best_quality
+            if best:
+                best_quality = self.quality(candidate)
+            with phase(PhaseTimerConstants.storage):
+                self.results.append(candidate, checks=self.quality.quality_checks,
+                                    restart=restart, accepted=1, best=int(best))
 
+        with phase(PhaseTimerConstants.storage):
+            self.results.close()
         self.log_info("Quality Checks: {0} Solution: {1} ".format(self.quality.quality_checks,
                                                                      self.solution))
+        if self.timed:
+            PHASE_TIMER.finish(storage=self.phase_storage)
         if self.observers is not None:
             # this is for users of the solution
             self.log_info("RandomRestarter giving solution to '{0}'".format(self.observers))
@@ -160,15 +198,25 @@ class RandomRestarter(BaseComponent):
         :return: new candidate
         """
         self.logger.debug(("Searching for a local "
-                                   "candidate not in the tabu space"))
-        new_candidate = self.tweak(candidate)
-        while (str(new_candidate.inputs) in self.tabu and
-                       not self.global_stop(self.solution)):
-                new_candidate = self.tweak(candidate)
-        self.tabu.add(str(new_candidate.inputs))
+                           "candidate not in the tabu space"))
+        with phase(PhaseTimerConstants.tweak):
+            new_candidate = self.tweak(candidate)
+        with phase(PhaseTimerConstants.tabu):
+            METRICS.tabu_lookups.increment()
+            while (str(new_candidate.inputs) in self.tabu and
+                   not self.global_stop(self.solution)):
+                METRICS.tabu_hits.increment()
+                METRICS.tabu_lookups.increment()
+                with phase(PhaseTimerConstants.tweak):
+                    new_candidate = self.tweak(candidate)
+            self.tabu.add(str(new_candidate.inputs))
 
+        self.events.proposed(new_candidate)
         # set the quality so the stop-conditions will work
-        self.quality(new_candidate)
+        with phase(PhaseTimerConstants.quality):
+            self.quality(new_candidate)
+        METRICS.evaluations.increment()
+        self.events.evaluated(new_candidate)
         return new_candidate        
 
     def check_rep(self):
@@ -181,8 +229,11 @@ class RandomRestarter(BaseComponent):
         """
         Closes solutions, quality
         """
+        self.results.close()
         self.solutions.close()
         self.quality.close()
+        self.phase_storage.close()
+        self.events.close()
         self._solution = None
         return
 
@@ -196,6 +247,9 @@ class RandomRestarter(BaseComponent):
         self.local_stops.reset()
         self._solution = None
         self.solutions.reset()
+        self.results.reset(state_fields=STATE_FIELDS)
+        self.phase_storage.reset()
+        self.events.reset()
         self.global_stop.reset()
         return
 
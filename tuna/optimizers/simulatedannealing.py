@@ -2,15 +2,23 @@
 # python standard library
 import random
 import math
-import datetime
 
 # this package
 from tuna.components.component import BaseComponent
 from tuna import BaseClass, ConfigurationError
-from tuna import LOG_TIMESTAMP
+from tuna.parts.phasetimer import PHASE_TIMER, PhaseTimerConstants, phase
+from tuna.infrastructure.metrics import METRICS
+from tuna.parts.eventlog import EventLog
+from tuna.parts.storage.nullstorage import NullStorage
+from tuna.parts.storage.resultstore import ResultStore, ResultStoreConstants
 
 
 ANNEALING_SOLUTIONS = "annealing_solutions.csv"
+# the annealer's columns in the results
+STATE_FIELDS = (('checks', ResultStoreConstants.integer),
+                ('temperature', ResultStoreConstants.real),
+                ('accepted', ResultStoreConstants.integer),
+                ('best', ResultStoreConstants.integer))
 
 
 class SimulatedAnnealer(BaseComponent):
@@ -18,7 +26,8 @@ class SimulatedAnnealer(BaseComponent):
     a Simulated Annealer optimizer
     """
     def __init__(self, temperatures, tweak, quality, candidate, stop_condition,
-                 solution_storage, observers=None):
+                 solution_storage, observers=None, phase_storage=None,
+                 phase_interval=None, event_storage=None, results=None):
         """
         SimulatedAnnealer Constructor
 
@@ -31,6 +40,10 @@ class SimulatedAnnealer(BaseComponent):
          - `stop_condition`: a condition to decide to prematurely stop
          - `solution_storage`: an writeable object to send values to
          - `observers`: a composite that takes the best solution as its argument
+         - `phase_storage`: writeable object for the phase-timer's report
+         - `phase_interval`: seconds between logging the phase-times while running
+         - `event_storage`: writeable object for the events (None to only log them)
+         - `results`: ResultStore for the evaluations (default writes them to the solution_storage)
         """
         super(SimulatedAnnealer, self).__init__()
         self.temperatures = temperatures
@@ -41,6 +54,16 @@ class SimulatedAnnealer(BaseComponent):
         self.stop_condition = stop_condition
         self.solutions = solution_storage
         self.observers = observers
+        self.phase_storage = phase_storage
+        self.phase_interval = phase_interval
+        # the phases are only timed if there's somewhere for the times to go
+        self.timed = phase_storage is not None or phase_interval is not None
+        if self.phase_storage is None:
+            self.phase_storage = NullStorage()
+        self.events = EventLog(storage=event_storage, logger=self.logger)
+        self.results = results
+        if self.results is None:
+            self.results = ResultStore(csv_storage=self.solutions)
 
         # sets have constant-time set-membership lookups
         self.tabu = set([])
@@ -77,7 +100,10 @@ class SimulatedAnnealer(BaseComponent):
         closes the quality and solutions' storage and resets the solution to None
         """
         self.quality.close()
+        self.results.close()
         self.solutions.close()        
+        self.phase_storage.close()
+        self.events.close()
         self._solution = None
         return
 
@@ -88,6 +114,9 @@ class SimulatedAnnealer(BaseComponent):
         self.temperatures.reset()
         self._solution = None
         self.solutions.reset()
+        self.results.reset(state_fields=STATE_FIELDS)
+        self.phase_storage.reset()
+        self.events.reset()
         self.stop_condition.reset()
         return
 
@@ -100,53 +129,76 @@ class SimulatedAnnealer(BaseComponent):
         # this is an attempt to allow this to run repeatedly
         # the solutions can't be a list anymore
         self.reset()
+        if self.timed:
+            PHASE_TIMER.start(interval=self.phase_interval)
         # prime the data with the first candidate
         solution = self.solution
-        self.quality(solution)
+        with phase(PhaseTimerConstants.quality):
+            self.quality(solution)
+        METRICS.evaluations.increment()
+        METRICS.best_quality.set(solution.output)
+        self.events.evaluated(solution)
         self.log_info("Initial Best Solution: {0}".format(solution))
         
         # avoid repeating the same test-spot
         self.tabu.add(str(solution.inputs))
 
-        self.solutions.write("Time,Checks,Solution\n")
-        timestamp = datetime.datetime.now().strftime(LOG_TIMESTAMP)
-        output = "{0},1,{1}\n".format(timestamp, solution)
-           
-        self.solutions.write(output)
+        with phase(PhaseTimerConstants.storage):
+            self.results.append(solution, checks=self.quality.quality_checks,
+                                accepted=1, best=1)
         self.logger.info("First Candidate: {0}".format(solution))
         for temperature in self.temperatures:
             if self.stop_condition(self.solution):
                 self.log_info('Stop condition reached with solution: {0}'.format(self.solution))
                 break
 
-            self.logger.debug("Temperature: {0}".format(temperature))
-            candidate = self.tweak(solution)
+            self.logger.debug("Temperature: %s", temperature)
+            with phase(PhaseTimerConstants.tweak):
+                candidate = self.tweak(solution)
 
             # this needs to be smarter -- what if the space is exhausted?
             self.logger.debug("Searching for a candidate not in the tabu space")
-            while str(candidate.inputs) in self.tabu and not self.stop_condition(self.solution):
-                candidate = self.tweak(solution)
-
-            self.logger.debug("Trying candidate: {0}".format(candidate))
-
-            quality_difference = self.quality(candidate) - self.quality(solution)
+            with phase(PhaseTimerConstants.tabu):
+                METRICS.tabu_lookups.increment()
+                while str(candidate.inputs) in self.tabu and not self.stop_condition(self.solution):
+                    METRICS.tabu_hits.increment()
+                    METRICS.tabu_lookups.increment()
+                    with phase(PhaseTimerConstants.tweak):
+                        candidate = self.tweak(solution)
+
+            self.events.proposed(candidate)
+
+            with phase(PhaseTimerConstants.quality):
+                quality_difference = self.quality(candidate) - self.quality(solution)
+            METRICS.evaluations.increment()
+            METRICS.candidates.increment()
+            self.events.evaluated(candidate)
             
             # since the candidate is checked to see if it's in the tabu list
             # before checking its quality, only the inputs are added to the tabu list
             self.tabu.add(str(candidate.inputs))
             
-            if (quality_difference > 0 or
-                random.random() < math.exp(quality_difference/float(temperature))):
+            accepted = (quality_difference > 0 or
+                        random.random() < math.exp(quality_difference/float(temperature)))
+            if accepted:
                 solution = candidate
-                self.logger.info("Candidate '{0}' new local solution".format(solution))
-            if self.quality(solution) > self.quality(self.solution):
-                timestamp = datetime.datetime.now().strftime(LOG_TIMESTAMP)
-                output = "{0},{1},{2}\n".format(timestamp, self.quality.quality_checks, solution)
-                self.solutions.write(output)
-                self.log_info("New Best Solution: {0}".format(output))
+                METRICS.accepted.increment()
+                self.events.accepted(solution)
+            best = self.quality(solution) > self.quality(self.solution)
+            if best:
+                self.events.new_best(solution)
                 self.solution = solution
+                METRICS.best_quality.set(solution.output)
+            with phase(PhaseTimerConstants.storage):
+                self.results.append(candidate, checks=self.quality.quality_checks,
+                                    temperature=temperature, accepted=int(accepted),
+                                    best=int(best))
+        with phase(PhaseTimerConstants.storage):
+            self.results.close()
         self.log_info("Quality Checks: {0} Solution: {1} ".format(self.quality.quality_checks,
                                                                      self.solution))
+        if self.timed:
+            PHASE_TIMER.finish(storage=self.phase_storage)
         if self.observers is not None:
             # this is for users of the solution
             self.log_info("SimulatedAnnealer giving solution to '{0}'".format(self.observers))
@@ -3,11 +3,10 @@
 import datetime
 from datetime import timedelta
 
-# third party
-import numpy
-
 # this package
 from tuna import BaseClass, TunaError, BOLD, RESET
+from tuna.parts.countdown.streamingstatistics import StreamingStatistics
+from tuna.parts.countdown.streamingstatistics import StreamingConstants
 
 
 DEBUG = 'debug'
@@ -41,34 +40,47 @@ class TimeTracker(BaseClass):
     """
     A tracker of elapsed time
     """
-    def __init__(self, log_level=DEBUG):
+    def __init__(self, log_level=DEBUG, window=StreamingConstants.default_window):
         """
-        :param: `log_level`: level at which to report elapsed times (default='debug')
+        :param:
+
+         - `log_level`: level at which to report elapsed times (default='debug')
+         - `window`: number of recent elapsed times to keep
         """
         super(TimeTracker, self).__init__()
         self._logger = None
         self.log_level = log_level
+        self.window = window
         self.start = None
-        self._times = None
+        self._statistics = None
         self._log = None
         return
 
+    @property
+    def statistics(self):
+        """
+        StreamingStatistics of the elapsed times (in seconds)
+        """
+        if self._statistics is None:
+            self._statistics = StreamingStatistics(window=self.window)
+        return self._statistics
+
     @property
     def times(self):
         """
-        collection of elapsed times
+        list of the most recent elapsed times
         """
-        if self._times is None:
-            self._times = []
-        return self._times
+        return list(self.statistics.window)
 
     @times.setter
     def times(self, times):
         """
         :param: ``times`` - collection
-        :postcondition: self._times set to times
+        :postcondition: self.statistics re-started with the times
         """
-        self._times = times
+        self._statistics = None
+        for item in times:
+            self.append(item)
         return
 
     @property
@@ -90,24 +102,24 @@ class TimeTracker(BaseClass):
 
     def append(self, item):
         """
-        Appends the item to the times array
+        Adds the item to the statistics
 
         :param:
 
-         - `item`: item to append to self.times (a numpy array)
+         - `item`: elapsed seconds
 
-        :postcondition: self.times contains item
+        :postcondition: self.statistics (and self.times) updated with item
         """
-        self.times = numpy.append(self.times, [item])
+        self.statistics.add(item)
         return
 
     def percentile(self, percentile):
         """
         calculates the percentile (e.g. 50 gets the median (the 50% item))
 
-        :return: value for percintile of self.times as a timedelta
+        :return: value (estimated once the window overflows) for the percentile as a timedelta
         """
-        return timedelta(seconds=numpy.percentile(self.times, percentile))
+        return timedelta(seconds=self.statistics.percentile(percentile))
 
     def log_update(self, elapsed):
         """
@@ -120,13 +132,9 @@ class TimeTracker(BaseClass):
 
         elapsed_string = ELAPSED_STRING.format(elapsed)
         self.log(elapsed_string)
-        self.log(STAT_STRING.format(min=self.percentile(MIN_PERCENTILE),
-                                    q1=self.percentile(Q1_PERCENTILE),
-                                    med=self.percentile(MEDIAN_PERCENTILE),
-                                    q3=self.percentile(Q3_PERCENTILE),
-                                    max=self.percentile(MAX_PERCENTILE),
-                                    mean=timedelta(seconds=numpy.mean(self.times)),
-                                    std=timedelta(seconds=numpy.std(self.times))))
+        summary = self.statistics.summary()
+        self.log(STAT_STRING.format(**dict((key, timedelta(seconds=value))
+                                           for key, value in summary.iteritems())))
         return
 
 
@@ -141,7 +149,7 @@ class TimeTracker(BaseClass):
             self.start = datetime.datetime.now()            
             return True
         elapsed = datetime.datetime.now() - self.start
-        # numpy can't handle timedeltas
+        # the statistics are kept in seconds
         self.append(elapsed.total_seconds())
         self.start = None
         self.log_update(elapsed)
@@ -240,7 +248,7 @@ class CountdownTimer(TimeTracker):
             self.start = self.last_time = call_time
             return CONTINUE
 
-        # convert to seconds so numpy can calculate statistics
+        # convert to seconds for the statistics
         elapsed, self.last_time = call_time - self.last_time, call_time
 
         self.append(elapsed.total_seconds())
@@ -265,12 +273,12 @@ class CountdownTimer(TimeTracker):
          - ``self.total_time`` is None
          - ``self.repetitions`` is 0
          - ``self.start`` is None
-         - ``self._times`` is None
+         - ``self._statistics`` is None
         """
         self.start = UNSET
         self.end_time = UNSET
         self.total_time = UNSET
         self.repetitions = 0
-        self._times = None
+        self._statistics = None
         return
 # end class CountdownTimer
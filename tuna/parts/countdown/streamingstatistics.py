@@ -0,0 +1,223 @@
+
+# python standard library
+from collections import deque
+import math
+
+
+class StreamingConstants(object):
+    """
+    Constants for the streaming statistics
+    """
+    __slots__ = ()
+    markers = 5
+    default_window = 100
+    quartiles = (25, 50, 75)
+    minimum = 0
+    maximum = 100
+
+
+class P2Quantile(object):
+    """
+    A constant-memory estimator of one quantile
+    """
+    def __init__(self, percentile):
+        """
+        P2Quantile constructor
+
+        :param:
+
+         - `percentile`: the percentile to estimate (e.g. 50 for the median)
+        """
+        self.percentile = percentile
+        self.p = percentile/100.
+        self.count = 0
+        self.heights = []
+        self.positions = range(StreamingConstants.markers)
+        self.desired = [0, 2 * self.p, 4 * self.p, 2 + 2 * self.p, 4]
+        self.increments = [0, self.p/2, self.p, (1 + self.p)/2, 1]
+        return
+
+    def add(self, value):
+        """
+        Adds a value to the estimate
+
+        :param:
+
+         - `value`: a number
+        """
+        self.count += 1
+        heights = self.heights
+        if self.count <= StreamingConstants.markers:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        positions = self.positions
+        for index in xrange(cell + 1, StreamingConstants.markers):
+            positions[index] += 1
+        for index in xrange(StreamingConstants.markers):
+            self.desired[index] += self.increments[index]
+        for index in (1, 2, 3):
+            self.adjust(index)
+        return
+
+    def adjust(self, index):
+        """
+        Moves the marker one position if it has drifted from where it should be
+
+        :param:
+
+         - `index`: the marker to check (1, 2 or 3)
+        """
+        heights, positions = self.heights, self.positions
+        drift = self.desired[index] - positions[index]
+        if not ((drift >= 1 and positions[index + 1] - positions[index] > 1) or
+                (drift <= -1 and positions[index - 1] - positions[index] < -1)):
+            return
+        step = 1 if drift > 0 else -1
+        below, here, above = positions[index - 1], positions[index], positions[index + 1]
+        height = heights[index] + step/float(above - below) * (
+            (here - below + step) * (heights[index + 1] - heights[index])/float(above - here) +
+            (above - here - step) * (heights[index] - heights[index - 1])/float(here - below))
+        if not heights[index - 1] < height < heights[index + 1]:
+            # the parabola overshot a neighbor, use a straight line instead
+            height = heights[index] + step * ((heights[index + step] - heights[index]) /
+                                              float(positions[index + step] - here))
+        heights[index] = height
+        positions[index] += step
+        return
+
+    @property
+    def value(self):
+        """
+        The current estimate of the quantile (None if there are no values)
+        """
+        if not self.count:
+            return None
+        if self.count <= StreamingConstants.markers:
+            import numpy
+            return numpy.percentile(self.heights, self.percentile)
+        return self.heights[2]
+# end class P2Quantile
+
+
+class StreamingStatistics(object):
+    """
+    Count, mean, variance, extremes and quartiles updated in constant time
+    """
+    def __init__(self, window=StreamingConstants.default_window):
+        """
+        StreamingStatistics constructor
+
+        :param:
+
+         - `window`: number of recent values to keep (0 or None keeps none)
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.squares = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.quantiles = dict((percentile, P2Quantile(percentile))
+                              for percentile in StreamingConstants.quartiles)
+        self.window = deque(maxlen=window or 0)
+        return
+
+    def add(self, value):
+        """
+        Adds a value to the statistics
+
+        :param:
+
+         - `value`: a number
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta/self.count
+        self.squares += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        for quantile in self.quantiles.itervalues():
+            quantile.add(value)
+        if self.window.maxlen:
+            self.window.append(value)
+        return
+
+    @property
+    def exact(self):
+        """
+        True if every value added is still in the window
+        """
+        return 0 < self.count <= len(self.window)
+
+    @property
+    def variance(self):
+        """
+        The population variance of the values
+        """
+        if not self.count:
+            return 0.0
+        return self.squares/self.count
+
+    @property
+    def std(self):
+        """
+        The population standard deviation of the values
+        """
+        return math.sqrt(self.variance)
+
+    def percentile(self, percentile):
+        """
+        Gets (or estimates) the percentile
+
+        :param:
+
+         - `percentile`: number from 0 to 100
+
+        :return: value at the percentile (None if there are no values)
+        """
+        if not self.count:
+            return None
+        import numpy
+        if self.exact:
+            return numpy.percentile(self.window, percentile)
+        if percentile <= StreamingConstants.minimum:
+            return self.minimum
+        if percentile >= StreamingConstants.maximum:
+            return self.maximum
+        if percentile in self.quantiles:
+            return self.quantiles[percentile].value
+        points = ([StreamingConstants.minimum] + list(StreamingConstants.quartiles) +
+                  [StreamingConstants.maximum])
+        values = ([self.minimum] + [self.quantiles[quartile].value
+                                    for quartile in StreamingConstants.quartiles] +
+                  [self.maximum])
+        return numpy.interp(percentile, points, values)
+
+    def summary(self):
+        """
+        The min, quartiles, max, mean and standard deviation
+
+        :return: dict with min, q1, med, q3, max, mean, std keys
+        """
+        return dict(min=self.percentile(StreamingConstants.minimum),
+                    q1=self.percentile(25),
+                    med=self.percentile(50),
+                    q3=self.percentile(75),
+                    max=self.percentile(StreamingConstants.maximum),
+                    mean=self.mean,
+                    std=self.std)
+# end class StreamingStatistics
@@ -0,0 +1,91 @@
+
+# python standard library
+import unittest
+import random
+from datetime import timedelta
+
+# third party
+from mock import MagicMock
+import numpy
+
+# this package
+from tuna.parts.countdown.streamingstatistics import P2Quantile, StreamingStatistics
+from tuna.parts.countdown.countdown import TimeTracker, INFO
+
+
+class TestP2Quantile(unittest.TestCase):
+    def test_small(self):
+        """
+        Is it exact until the five markers are filled?
+        """
+        quantile = P2Quantile(50)
+        self.assertIsNone(quantile.value)
+        for value in (4, 20):
+            quantile.add(value)
+        self.assertEqual(12, quantile.value)
+        return
+
+    def test_estimate(self):
+        """
+        Is the estimate close to the actual quantile?
+        """
+        values = [random.gauss(10, 2) for index in range(10000)]
+        for percentile in (25, 50, 75):
+            quantile = P2Quantile(percentile)
+            for value in values:
+                quantile.add(value)
+            self.assertAlmostEqual(numpy.percentile(values, percentile),
+                                   quantile.value, delta=0.1)
+        return
+# end class TestP2Quantile
+
+
+class TestStreamingStatistics(unittest.TestCase):
+    def test_moments(self):
+        """
+        Do the mean, standard deviation and extremes match numpy's?
+        """
+        statistics = StreamingStatistics(window=None)
+        values = [random.uniform(0, 100) for index in range(random.randrange(10, 1000))]
+        for value in values:
+            statistics.add(value)
+        self.assertEqual(0, len(statistics.window))
+        self.assertAlmostEqual(numpy.mean(values), statistics.mean)
+        self.assertAlmostEqual(numpy.std(values), statistics.std)
+        self.assertEqual(min(values), statistics.percentile(0))
+        self.assertEqual(max(values), statistics.percentile(100))
+        return
+
+    def test_window(self):
+        """
+        Are the percentiles exact until the window overflows?
+        """
+        statistics = StreamingStatistics(window=10)
+        values = [random.uniform(0, 100) for index in range(10)]
+        for value in values:
+            statistics.add(value)
+        self.assertTrue(statistics.exact)
+        self.assertEqual(numpy.percentile(values, 30), statistics.percentile(30))
+        statistics.add(50)
+        self.assertFalse(statistics.exact)
+        self.assertEqual(10, len(statistics.window))
+        self.assertEqual(statistics.quantiles[50].value, statistics.percentile(50))
+        summary = statistics.summary()
+        self.assertTrue(summary['min'] <= summary['q1'] <= summary['med'] <= summary['q3'] <= summary['max'])
+        return
+
+    def test_time_tracker(self):
+        """
+        Does the TimeTracker log the same summary as before for a few times?
+        """
+        tracker = TimeTracker(log_level=INFO)
+        tracker._logger = MagicMock()
+        tracker.append(4.0)
+        tracker.append(20.0)
+        self.assertEqual([4.0, 20.0], tracker.times)
+        self.assertEqual(timedelta(seconds=8), tracker.percentile(25))
+        self.assertEqual(timedelta(seconds=12), tracker.percentile(50))
+        tracker.log_update(timedelta(seconds=20))
+        self.assertIn('StD: 0:00:08', tracker._logger.info.call_args[0][0])
+        return
+# end class TestStreamingStatistics
@@ -0,0 +1,336 @@
+
+# python standard library
+from collections import OrderedDict
+import array
+import logging
+import struct
+import sys
+import time
+
+# this package
+from tuna import BaseClass, TunaError
+from tuna.parts.phasetimer import PhaseTimerConstants, phase
+
+
+class EventLogConstants(object):
+    """
+    Constants for the EventLog
+    """
+    __slots__ = ()
+    # the events (the values are stored in the file)
+    proposed = 0
+    evaluated = 1
+    accepted = 2
+    new_best = 3
+    restart = 4
+    names = ('proposed', 'evaluated', 'accepted', 'new_best', 'restart')
+    levels = (logging.DEBUG, logging.DEBUG, logging.INFO, logging.INFO, logging.INFO)
+    bold = (False, False, False, True, True)
+    messages = ("Trying candidate: {candidate}",
+                "Candidate Outcome: {candidate}",
+                "Candidate '{candidate}' new local solution",
+                "New Best Solution: {candidate} (evaluation {evaluation})",
+                "Random Restart")
+
+    # events below this level aren't logged if they're being recorded
+    recorded_level = logging.INFO
+
+    # the configuration option
+    option = 'event_log'
+
+    # the file
+    magic = 'TUNAEV01'
+    block_header = struct.Struct('<II')
+    columns = (('times', 'd'), ('kinds', 'B'), ('evaluations', 'I'),
+               ('outputs', 'd'), ('widths', 'H'), ('inputs', 'd'))
+    block_size = 4096
+    line = "{time:.6f} {kind:<9} {evaluation:>8} {output} {inputs}"
+    not_a_number = float('nan')
+
+
+class EventLog(BaseClass):
+    """
+    A recorder of the optimizers' events
+    """
+    def __init__(self, storage=None, logger=None,
+                 block_size=EventLogConstants.block_size):
+        """
+        EventLog constructor
+
+        :param:
+
+         - `storage`: file-like object for the events (None to only log them)
+         - `logger`: logger for the events' messages (default is this class's)
+         - `block_size`: events to keep before writing them
+        """
+        super(EventLog, self).__init__()
+        self.storage = storage
+        if logger is not None:
+            self._logger = logger
+        self.block_size = block_size
+        self.evaluation = 0
+        self.columns = None
+        self.clear()
+        return
+
+    def clear(self):
+        """
+        Creates empty columns
+        """
+        self.columns = OrderedDict((name, array.array(type_code))
+                                   for name, type_code in EventLogConstants.columns)
+        self.times = self.columns['times']
+        self.kinds = self.columns['kinds']
+        self.evaluations = self.columns['evaluations']
+        self.outputs = self.columns['outputs']
+        self.widths = self.columns['widths']
+        self.inputs = self.columns['inputs']
+        return
+
+    def reset(self):
+        """
+        Starts a new run (re-opening the storage and writing the marker)
+        """
+        self.clear()
+        self.evaluation = 0
+        if self.storage is not None:
+            self.storage.reset()
+            self.storage.write(EventLogConstants.magic)
+        return
+
+    def event(self, kind, candidate=None):
+        """
+        Records the event and logs its message (if the level is enabled and the event isn't per-candidate or isn't being recorded)
+
+        :param:
+
+         - `kind`: one of the EventLogConstants events
+         - `candidate`: the solution the event is about
+        """
+        if kind == EventLogConstants.evaluated:
+            self.evaluation += 1
+        level = EventLogConstants.levels[kind]
+        if self.storage is not None:
+            self.record(kind, candidate)
+            if level < EventLogConstants.recorded_level:
+                return
+        if self.logger.isEnabledFor(level):
+            with phase(PhaseTimerConstants.logging):
+                message = EventLogConstants.messages[kind].format(candidate=candidate,
+                                                                 evaluation=self.evaluation)
+                if EventLogConstants.bold[kind]:
+                    self.log_info(message)
+                else:
+                    self.logger.log(level, message)
+        return
+
+    def record(self, kind, candidate):
+        """
+        Adds the event to the columns (writing them if there's a block's worth)
+
+        :param:
+
+         - `kind`: one of the EventLogConstants events
+         - `candidate`: the solution the event is about (or None)
+        """
+        self.times.append(time.time())
+        self.kinds.append(kind)
+        self.evaluations.append(self.evaluation)
+        if candidate is None:
+            self.outputs.append(EventLogConstants.not_a_number)
+            self.widths.append(0)
+        else:
+            output = candidate.output
+            self.outputs.append(EventLogConstants.not_a_number if output is None
+                                else output)
+            self.widths.append(len(candidate.inputs))
+            self.inputs.extend(candidate.inputs)
+        if len(self.kinds) >= self.block_size:
+            self.flush()
+        return
+
+    def proposed(self, candidate):
+        """
+        The optimizer is going to try the candidate
+        """
+        self.event(EventLogConstants.proposed, candidate)
+        return
+
+    def evaluated(self, candidate):
+        """
+        The candidate's quality was checked
+        """
+        self.event(EventLogConstants.evaluated, candidate)
+        return
+
+    def accepted(self, candidate):
+        """
+        The candidate became the current solution
+        """
+        self.event(EventLogConstants.accepted, candidate)
+        return
+
+    def new_best(self, candidate):
+        """
+        The candidate is the best solution so far
+        """
+        self.event(EventLogConstants.new_best, candidate)
+        return
+
+    def restart(self):
+        """
+        The optimizer is starting over with a random candidate
+        """
+        self.event(EventLogConstants.restart)
+        return
+
+    def flush(self):
+        """
+        Writes the columns to the storage as a block and empties them
+        """
+        if self.storage is None or not self.kinds:
+            return
+        block = [EventLogConstants.block_header.pack(len(self.kinds), len(self.inputs))]
+        for column in self.columns.itervalues():
+            if sys.byteorder != 'little':
+                column.byteswap()
+            block.append(column.tostring())
+        self.storage.write(''.join(block))
+        self.clear()
+        return
+
+    def close(self):
+        """
+        Writes what's left and closes the storage
+        """
+        if self.storage is not None:
+            self.flush()
+            self.storage.close()
+        return
+# end class EventLog
+
+
+class EventReader(BaseClass):
+    """
+    A reader of the EventLog's files
+    """
+    def __init__(self, filename):
+        """
+        EventReader constructor
+
+        :param:
+
+         - `filename`: path to the event-file
+        """
+        super(EventReader, self).__init__()
+        self.filename = filename
+        return
+
+    def blocks(self):
+        """
+        Generates the blocks in the file
+
+        :yield: OrderedDict of column-name: array
+        :raise: TunaError if the file isn't an event-file or is cut short
+        """
+        header = EventLogConstants.block_header
+        with open(self.filename, 'rb') as source:
+            if source.read(len(EventLogConstants.magic)) != EventLogConstants.magic:
+                raise TunaError("'{0}' isn't an event-file".format(self.filename))
+            while True:
+                packed = source.read(header.size)
+                if not packed:
+                    break
+                if len(packed) != header.size:
+                    raise TunaError("'{0}' ends in the middle of a block".format(self.filename))
+                count, input_count = header.unpack(packed)
+                columns = OrderedDict()
+                for name, type_code in EventLogConstants.columns:
+                    column = array.array(type_code)
+                    length = input_count if name == 'inputs' else count
+                    data = source.read(length * column.itemsize)
+                    if len(data) != length * column.itemsize:
+                        raise TunaError("'{0}' ends in the middle of a block".format(self.filename))
+                    column.fromstring(data)
+                    if sys.byteorder != 'little':
+                        column.byteswap()
+                    columns[name] = column
+                yield columns
+        return
+
+    def events(self):
+        """
+        Generates the events
+
+        :yield: (time, event-name, evaluation, output, inputs) tuples
+        """
+        for columns in self.blocks():
+            inputs = columns['inputs']
+            start = 0
+            for time_, kind, evaluation, output, width in zip(columns['times'],
+                                                              columns['kinds'],
+                                                              columns['evaluations'],
+                                                              columns['outputs'],
+                                                              columns['widths']):
+                yield (time_, EventLogConstants.names[kind], evaluation, output,
+                       inputs[start:start + width].tolist())
+                start += width
+        return
+
+    def lines(self):
+        """
+        Generates the events as lines of text
+        """
+        for time_, kind, evaluation, output, inputs in self.events():
+            yield EventLogConstants.line.format(time=time_, kind=kind,
+                                                evaluation=evaluation,
+                                                output=output, inputs=inputs)
+        return
+
+    def summary(self):
+        """
+        Summarizes the events
+
+        :return: OrderedDict of statistic-name: value
+        """
+        counts = [0] * len(EventLogConstants.names)
+        first = last = None
+        evaluations = 0
+        best = None
+        for columns in self.blocks():
+            times = columns['times']
+            kinds = columns['kinds']
+            if not kinds:
+                continue
+            if first is None:
+                first = times[0]
+            last = times[-1]
+            evaluations = max(evaluations, max(columns['evaluations']))
+            for kind in xrange(len(counts)):
+                counts[kind] += kinds.count(kind)
+            if EventLogConstants.new_best in kinds:
+                index = len(kinds) - 1 - kinds[::-1].index(EventLogConstants.new_best)
+                start = sum(columns['widths'][:index])
+                best = (times[index], columns['evaluations'][index],
+                        columns['outputs'][index],
+                        columns['inputs'][start:start + columns['widths'][index]].tolist())
+
+        summary = OrderedDict()
+        summary['events'] = sum(counts)
+        for name, count in zip(EventLogConstants.names, counts):
+            summary[name] = count
+        summary['evaluations'] = evaluations
+        seconds = (last - first) if first is not None else 0
+        summary['seconds'] = seconds
+        summary['evaluations_per_second'] = evaluations / seconds if seconds else 0
+        evaluated = counts[EventLogConstants.evaluated]
+        summary['acceptance_ratio'] = (float(counts[EventLogConstants.accepted]) / evaluated
+                                       if evaluated else 0)
+        if best is not None:
+            found, evaluation, output, inputs = best
+            summary['best_output'] = output
+            summary['best_inputs'] = inputs
+            summary['best_evaluation'] = evaluation
+            summary['best_found_after_seconds'] = found - first
+        return summary
+# end class EventReader
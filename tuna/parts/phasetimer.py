@@ -0,0 +1,387 @@
+
+# python standard library
+import threading
+
+# this package
+from tuna import TunaError
+from tuna.infrastructure.baseclass import BaseThreadClass
+from tuna.parts.scheduler import monotonic
+
+
+class PhaseTimerConstants(object):
+    """
+    Constants for the PhaseTimer
+    """
+    __slots__ = ()
+    # the phases
+    tweak = 'tweak'
+    tabu = 'tabu'
+    quality = 'quality'
+    ssh_setup = 'ssh_setup'
+    server_wait = 'server_wait'
+    client_traffic = 'client_traffic'
+    parsing = 'parsing'
+    storage = 'storage'
+    logging = 'logging'
+
+    # the optimizers' options
+    report_option = 'phase_report'
+    interval_option = 'phase_interval'
+
+    separator = '.'
+    buckets = 32
+    microseconds = 10**6
+    percentiles = (0.5, 0.9, 0.99)
+
+    # the report
+    columns = ('phase', 'count', 'total_s', 'run_percent', 'per_evaluation_ms',
+               'mean_ms', 'min_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms')
+    bucket_column = 'lt_{0:g}ms'
+    header = "{0:<40} {1:>8} {2:>10} {3:>6} {4:>12} {5:>10} {6:>10}".format('phase', 'count', 'total(s)',
+                                                                          'run%', 'per-eval(ms)',
+                                                                          'p50(ms)', 'max(ms)')
+    row = "{phase:<40} {count:>8} {total_s:>10.3f} {run_percent:>6.1f} {per_evaluation_ms:>12.3f} {p50_ms:>10.3f} {max_ms:>10.3f}"
+    footer = "{0} evaluations in {1:.3f} seconds"
+    busy = ("The phase-timer is already timing the run in '{0}' -- only one optimizer "
+            "running at a time can have a phase_report or phase_interval")
+
+
+class PhaseRecord(object):
+    """
+    The count, total and histogram for a phase
+    """
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'buckets')
+
+    def __init__(self):
+        """
+        PhaseRecord constructor
+        """
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = 0.0
+        self.buckets = [0] * PhaseTimerConstants.buckets
+        return
+
+    def add(self, seconds):
+        """
+        Adds a time to the record
+
+        :param:
+
+         - `seconds`: how long the phase took
+        """
+        self.count += 1
+        self.total += seconds
+        if self.minimum is None or seconds < self.minimum:
+            self.minimum = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        bucket = int(seconds * PhaseTimerConstants.microseconds).bit_length()
+        self.buckets[min(bucket, PhaseTimerConstants.buckets - 1)] += 1
+        return
+
+    def percentile(self, fraction):
+        """
+        Estimates a percentile from the histogram
+
+        :param:
+
+         - `fraction`: the percentile as a fraction (e.g. 0.9)
+
+        :return: upper edge (in seconds) of the bucket the percentile falls in
+        """
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                break
+        return min(float(2**bucket) / PhaseTimerConstants.microseconds, self.maximum)
+# end class PhaseRecord
+
+
+class Phase(object):
+    """
+    Times one pass through a phase
+    """
+    __slots__ = ('timer', 'name', 'label', 'start')
+
+    def __init__(self, timer, name):
+        """
+        Phase constructor
+
+        :param:
+
+         - `timer`: the PhaseTimer to record the time with
+         - `name`: name of the phase
+        """
+        self.timer = timer
+        self.name = name
+        self.label = None
+        self.start = None
+        return
+
+    def __enter__(self):
+        stack = self.timer.stack
+        if stack:
+            self.label = stack[-1] + PhaseTimerConstants.separator + self.name
+        else:
+            self.label = self.name
+        stack.append(self.label)
+        self.start = monotonic()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        elapsed = monotonic() - self.start
+        self.timer.stack.pop()
+        self.timer.record(self.label, elapsed)
+        return False
+# end class Phase
+
+
+class NullPhase(object):
+    """
+    A phase that isn't timed
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return False
+# end class NullPhase
+
+NULL_PHASE = NullPhase()
+
+
+class PhaseTimer(BaseThreadClass):
+    """
+    A timer for the phases of an optimizer's evaluations
+    """
+    def __init__(self):
+        """
+        PhaseTimer constructor
+        """
+        super(PhaseTimer, self).__init__()
+        self.records = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = monotonic()
+        self.interval = None
+        self.stopped = threading.Event()
+        self.enabled = False
+        self.owner = None
+        return
+
+    @property
+    def stack(self):
+        """
+        The (per-thread) stack of phase-names the thread is in
+        """
+        try:
+            return self.local.stack
+        except AttributeError:
+            self.local.stack = []
+            return self.local.stack
+
+    def phase(self, name):
+        """
+        A context manager to time a phase
+
+        :param:
+
+         - `name`: name of the phase (e.g. PhaseTimerConstants.tweak)
+
+        :return: Phase to use in a `with` statement (NULL_PHASE if the timer is off)
+        """
+        if not self.enabled:
+            return NULL_PHASE
+        return Phase(self, name)
+
+    def record(self, name, seconds):
+        """
+        Adds a time to a phase's record
+
+        :param:
+
+         - `name`: full (dotted) name of the phase
+         - `seconds`: how long the phase took
+        """
+        with self.lock:
+            record = self.records.get(name)
+            if record is None:
+                record = self.records[name] = PhaseRecord()
+            record.add(seconds)
+        return
+
+    def reset(self):
+        """
+        Clears the records and re-starts the run's clock
+        """
+        super(PhaseTimer, self).reset()
+        with self.lock:
+            self.records = {}
+            self.started = monotonic()
+        return
+
+    def start(self, interval=None):
+        """
+        Starts timing a run (in the calling thread)
+
+        :param:
+
+         - `interval`: seconds between logging the table while running (None for never)
+
+        :raise: TunaError if another (live) thread's run is being timed
+        """
+        current = threading.current_thread()
+        with self.lock:
+            owner = self.owner
+            if owner is not None and owner is not current and owner.is_alive():
+                raise TunaError(PhaseTimerConstants.busy.format(owner.name))
+            self.owner = current
+        self.stop()
+        self.reset()
+        self.enabled = True
+        self.interval = interval
+        if interval:
+            self.stopped.clear()
+            self.thread.name = 'phase_timer'
+            self.thread.start()
+        return
+
+    def run(self):
+        """
+        Logs the table every interval until stopped
+        """
+        while not self.stopped.wait(self.interval):
+            for line in self.summary():
+                self.logger.info(line)
+        return
+
+    def stop(self):
+        """
+        Stops the thread that logs the table (if it's running)
+        """
+        self.stopped.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+        return
+
+    @property
+    def elapsed(self):
+        """
+        Seconds since the run started
+        """
+        return monotonic() - self.started
+
+    @property
+    def evaluations(self):
+        """
+        The number of times the top-level quality phase was entered
+        """
+        record = self.records.get(PhaseTimerConstants.quality)
+        if record is None:
+            return 0
+        return record.count
+
+    def rows(self):
+        """
+        The report's rows
+
+        :return: list of (dict of column: value, histogram) tuples sorted by phase
+        """
+        with self.lock:
+            records = [(name, record.count, record.total, record.minimum,
+                        record.maximum, list(record.buckets),
+                        [record.percentile(fraction) for fraction in PhaseTimerConstants.percentiles])
+                       for name, record in self.records.iteritems()]
+        elapsed = self.elapsed or 1.0
+        evaluations = self.evaluations or 1
+        rows = []
+        for name, count, total, minimum, maximum, buckets, percentiles in sorted(records):
+            p50, p90, p99 = [seconds * 1000 for seconds in percentiles]
+            rows.append((dict(phase=name,
+                              count=count,
+                              total_s=total,
+                              run_percent=100 * total / elapsed,
+                              per_evaluation_ms=1000 * total / evaluations,
+                              mean_ms=1000 * total / count,
+                              min_ms=1000 * (minimum or 0),
+                              p50_ms=p50,
+                              p90_ms=p90,
+                              p99_ms=p99,
+                              max_ms=1000 * maximum), buckets))
+        return rows
+
+    def summary(self):
+        """
+        The table as lines of text (for the log)
+
+        :return: list of strings
+        """
+        lines = [PhaseTimerConstants.header]
+        lines.extend(PhaseTimerConstants.row.format(**row) for row, buckets in self.rows())
+        lines.append(PhaseTimerConstants.footer.format(self.evaluations, self.elapsed))
+        return lines
+
+    def write(self, storage):
+        """
+        Writes the report as csv
+
+        :param:
+
+         - `storage`: opened file-like object to write to
+        """
+        rows = self.rows()
+        used = [bucket for bucket in xrange(PhaseTimerConstants.buckets)
+                if any(buckets[bucket] for row, buckets in rows)]
+        if used:
+            used = range(used[0], used[-1] + 1)
+        header = list(PhaseTimerConstants.columns)
+        header.extend(PhaseTimerConstants.bucket_column.format(2.0**bucket / 1000)
+                      for bucket in used)
+        storage.write(','.join(header) + '\n')
+        for row, buckets in rows:
+            values = [str(row[column]) for column in PhaseTimerConstants.columns]
+            values.extend(str(buckets[bucket]) for bucket in used)
+            storage.write(','.join(values) + '\n')
+        return
+
+    def finish(self, storage=None):
+        """
+        Ends a run -- stops the thread, turns the timer off, logs the table and writes the report
+
+        :param:
+
+         - `storage`: opened file-like object for the report (None to only log it)
+        """
+        self.stop()
+        self.enabled = False
+        with self.lock:
+            self.owner = None
+        for line in self.summary():
+            self.logger.info(line)
+        if storage is not None:
+            self.write(storage)
+        return
+# end class PhaseTimer
+
+PHASE_TIMER = PhaseTimer()
+
+
+def phase(name):
+    """
+    Times a phase with the shared PhaseTimer
+
+    :param:
+
+     - `name`: name of the phase
+
+    :return: Phase to use in a `with` statement (NULL_PHASE if the timer is off)
+    """
+    return PHASE_TIMER.phase(name)
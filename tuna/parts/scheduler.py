@@ -0,0 +1,278 @@
+
+# python standard library
+import ctypes
+import ctypes.util
+import heapq
+import itertools
+import math
+import os
+import Queue
+import threading
+import time
+
+# this package
+from tuna.infrastructure.baseclass import BaseThreadClass
+
+
+CLOCK_MONOTONIC = 1
+NANOSECONDS = 1e-9
+
+
+class timespec(ctypes.Structure):
+    """
+    The struct filled by clock_gettime
+    """
+    _fields_ = [('tv_sec', ctypes.c_long),
+                ('tv_nsec', ctypes.c_long)]
+# end class timespec
+
+
+try:
+    from time import monotonic
+except ImportError:
+    try:
+        _librt = ctypes.CDLL(ctypes.util.find_library('rt') or 'librt.so.1',
+                             use_errno=True)
+        _clock_gettime = _librt.clock_gettime
+        _timespecs = threading.local()
+
+        def monotonic():
+            """
+            Seconds from the monotonic clock
+
+            :return: float seconds since some unspecified starting point
+            :raise: OSError if the clock can't be read
+            """
+            try:
+                now, reference = _timespecs.now
+            except AttributeError:
+                now = timespec()
+                reference = ctypes.byref(now)
+                _timespecs.now = now, reference
+            if _clock_gettime(CLOCK_MONOTONIC, reference) != 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno))
+            return now.tv_sec + now.tv_nsec * NANOSECONDS
+    except (OSError, AttributeError):
+        monotonic = time.time
+
+
+class SchedulerConstants(object):
+    """
+    Constants for the Scheduler
+    """
+    __slots__ = ()
+    default_workers = 4
+    stop_timeout = 1
+
+
+class ScheduledJob(object):
+    """
+    A periodic callable held by the Scheduler
+    """
+    def __init__(self, target, interval, start, name=None):
+        """
+        ScheduledJob constructor
+
+        :param:
+
+         - `target`: callable to call every interval
+         - `interval`: seconds between calls
+         - `start`: monotonic time of the first call (the phase)
+         - `name`: identifier for the log messages
+        """
+        if interval <= 0:
+            raise ValueError("The interval has to be positive, not {0}".format(interval))
+        self.target = target
+        self.interval = interval
+        self.start = start
+        self.name = name
+        if self.name is None:
+            self.name = getattr(target, '__name__', str(target))
+        self.deadline = start
+        self.running = False
+        self.cancelled = False
+        self.runs = 0
+        self.missed = 0
+        self.errors = 0
+        return
+
+    def next_deadline(self, now):
+        """
+        The first deadline after now that's a whole number of intervals from the start
+
+        :param:
+
+         - `now`: current monotonic time
+
+        :return: monotonic time of the next deadline
+        """
+        periods = int(math.floor((now - self.start)/self.interval)) + 1
+        return self.start + periods * self.interval
+
+    def __str__(self):
+        return "{0} (every {1} seconds)".format(self.name, self.interval)
+# end class ScheduledJob
+
+
+class Scheduler(BaseThreadClass):
+    """
+    A runner of periodic jobs on a shared pool of threads
+    """
+    def __init__(self, workers=SchedulerConstants.default_workers):
+        """
+        Scheduler constructor
+
+        :param:
+
+         - `workers`: number of threads to run the jobs with
+        """
+        super(Scheduler, self).__init__()
+        self.workers = workers
+        self.heap = []
+        self.jobs = []
+        self.sequence = itertools.count()
+        self.queue = Queue.Queue()
+        self.condition = threading.Condition()
+        self.threads = []
+        self.stopped = False
+        return
+
+    def schedule(self, target, interval, name=None, delay=0):
+        """
+        Adds a periodic job (and starts the scheduler if it isn't running)
+
+        :param:
+
+         - `target`: callable that takes no arguments
+         - `interval`: seconds between calls
+         - `name`: identifier for the log messages
+         - `delay`: seconds to wait before the first call
+
+        :return: ScheduledJob (to pass to `cancel`)
+        """
+        job = ScheduledJob(target=target, interval=interval,
+                           start=monotonic() + delay, name=name)
+        with self.condition:
+            self.jobs.append(job)
+            heapq.heappush(self.heap, (job.deadline, next(self.sequence), job))
+            self.condition.notify()
+        self.start()
+        return job
+
+    def cancel(self, job):
+        """
+        Stops calling the job (a call that's already running will finish)
+
+        :param:
+
+         - `job`: ScheduledJob returned by `schedule`
+        """
+        with self.condition:
+            job.cancelled = True
+            if job in self.jobs:
+                self.jobs.remove(job)
+            self.condition.notify()
+        return
+
+    def start(self):
+        """
+        Starts the dispatcher and worker threads if they aren't running
+        """
+        with self.condition:
+            if self.threads:
+                return
+            self.stopped = False
+            self.reset()
+            self.threads = [threading.Thread(target=self.work,
+                                             name="scheduler_worker_{0}".format(index))
+                            for index in xrange(self.workers)]
+            for thread in self.threads:
+                thread.daemon = True
+                thread.start()
+            self.thread.start()
+        return
+
+    def run(self):
+        """
+        Sends the jobs to the workers as their deadlines come up
+        """
+        with self.condition:
+            while not self.stopped:
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                deadline, sequence, job = self.heap[0]
+                now = monotonic()
+                if deadline > now:
+                    self.condition.wait(deadline - now)
+                    continue
+                heapq.heappop(self.heap)
+                if job.cancelled:
+                    continue
+                # deadlines that went by while the dispatcher was behind
+                missed = int((now - deadline)/job.interval)
+                if job.running:
+                    missed += 1
+                else:
+                    job.running = True
+                    self.queue.put(job)
+                if missed:
+                    job.missed += missed
+                    self.logger.warning("{0} missed {1} deadline(s) ({2} total), skipping".format(job.name,
+                                                                                                 missed,
+                                                                                                 job.missed))
+                job.deadline = job.next_deadline(now)
+                heapq.heappush(self.heap, (job.deadline, next(self.sequence), job))
+        return
+
+    def work(self):
+        """
+        Calls the jobs taken off the queue (the target of the worker threads)
+        """
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            try:
+                job.target()
+            except Exception as error:
+                job.errors += 1
+                self.log_error(error, " (scheduled job {0})".format(job.name))
+            finally:
+                with self.condition:
+                    job.running = False
+                    job.runs += 1
+        return
+
+    @property
+    def counters(self):
+        """
+        dict of jobs, runs, missed and errors totals
+        """
+        with self.condition:
+            return dict(jobs=len(self.jobs),
+                        runs=sum(job.runs for job in self.jobs),
+                        missed=sum(job.missed for job in self.jobs),
+                        errors=sum(job.errors for job in self.jobs))
+
+    def stop(self, timeout=SchedulerConstants.stop_timeout):
+        """
+        Stops the dispatcher and the workers (running calls are allowed to finish)
+
+        :param:
+
+         - `timeout`: seconds to wait for each thread to stop
+        """
+        with self.condition:
+            self.stopped = True
+            threads, self.threads = self.threads, []
+            self.condition.notify_all()
+        for thread in threads:
+            self.queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return
+# end class Scheduler
@@ -0,0 +1,301 @@
+
+# python standard library
+import os
+import Queue
+import threading
+import time
+
+# this package
+from tuna import TunaError
+from tuna.infrastructure.baseclass import BaseThreadClass
+from tuna.infrastructure.metrics import METRICS
+
+
+class AsyncStorageConstants(object):
+    """
+    Constants for the AsyncStorage
+    """
+    __slots__ = ()
+    default_queue_size = 1000
+    batch_size = 1024 * 1024
+    write = 'write'
+    flush = 'flush'
+    stop = 'stop'
+    default_timeout = 30
+
+
+class AsyncStorage(BaseThreadClass):
+    """
+    A storage wrapper that writes from a thread
+    """
+    def __init__(self, storage, queue_size=AsyncStorageConstants.default_queue_size,
+                 timeout=AsyncStorageConstants.default_timeout):
+        """
+        AsyncStorage constructor
+
+        :param:
+
+         - `storage`: the storage to write to (opened or not)
+         - `queue_size`: most writes to hold before `write` has to wait
+         - `timeout`: most seconds to wait for a flush or for the thread to stop
+        """
+        super(AsyncStorage, self).__init__()
+        self.storage = storage
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.queue = Queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.error = None
+        self.closed = False
+        self.max_depth = 0
+        self.waits = 0
+        self.lines = 0
+        self.batches = 0
+        self.bytes_written = 0
+        self.write_seconds = 0
+        self.max_write_seconds = 0
+        METRICS.storages.add(self)
+        return
+
+    @property
+    def name(self):
+        """
+        The name of the wrapped storage
+        """
+        return getattr(self.storage, 'name', None)
+
+    def open(self, name, *args, **kwargs):
+        """
+        Opens the wrapped storage
+
+        :param:
+
+         - `name`: name for the file
+         - `args, kwargs`: passed to the storage's `open`
+
+        :return: AsyncStorage wrapped around the opened storage
+        """
+        return AsyncStorage(storage=self.storage.open(name, *args, **kwargs),
+                            queue_size=self.queue_size,
+                            timeout=self.timeout)
+
+    def put(self, item):
+        """
+        Puts the item on the queue (starting the thread if needed)
+
+        :param:
+
+         - `item`: (kind, payload) tuple
+        :raise: TunaError if the storage is closed or the thread failed
+        """
+        self.check_error()
+        if self.closed:
+            raise TunaError("`write` called on a closed AsyncStorage ({0})".format(self.name))
+        with self.lock:
+            if self._thread is None:
+                self.thread.start()
+        try:
+            self.queue.put_nowait(item)
+        except Queue.Full:
+            self.waits += 1
+            self.queue.put(item)
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return
+
+    def write(self, text):
+        """
+        Queues the text to be written
+
+        :param:
+
+         - `text`: string to write
+        """
+        self.put((AsyncStorageConstants.write, text))
+        return
+
+    def writeline(self, text):
+        """
+        Queues the text with a newline added
+        """
+        self.write("{0}\n".format(text))
+        return
+
+    def writelines(self, texts):
+        """
+        Queues the strings (as one write)
+
+        :param:
+
+         - `texts`: collection of strings
+        """
+        self.write(''.join(texts))
+        return
+
+    def flush(self, fsync=False):
+        """
+        Waits until everything written so far has been written to the storage
+
+        :param:
+
+         - `fsync`: if True, also has the operating system put it on the disk
+
+        :raise: TunaError if the thread failed or the flush timed out
+        """
+        if self._thread is None and not fsync:
+            return
+        done = threading.Event()
+        self.put((AsyncStorageConstants.flush, (done, fsync)))
+        if not done.wait(self.timeout):
+            raise TunaError("Flush of {0} didn't finish in {1} seconds".format(self.name,
+                                                                              self.timeout))
+        self.check_error()
+        return
+
+    def fsync(self):
+        """
+        Flushes and then syncs the file to the disk
+        """
+        self.flush(fsync=True)
+        return
+
+    def run(self):
+        """
+        Takes everything waiting on the queue and writes it as one batch
+        """
+        while True:
+            kind, payload = self.queue.get()
+            texts = []
+            size = 0
+            # coalesce whatever else is already waiting
+            while kind == AsyncStorageConstants.write:
+                texts.append(payload)
+                size += len(payload)
+                if size >= AsyncStorageConstants.batch_size:
+                    kind = None
+                    break
+                try:
+                    kind, payload = self.queue.get_nowait()
+                except Queue.Empty:
+                    kind = None
+            if texts:
+                self.write_batch(texts)
+            if kind == AsyncStorageConstants.flush:
+                done, fsync = payload
+                self.sync(fsync)
+                done.set()
+            elif kind == AsyncStorageConstants.stop:
+                return
+        return
+
+    def write_batch(self, texts):
+        """
+        Writes the texts to the storage in one call and times it
+
+        :param:
+
+         - `texts`: list of strings
+        """
+        if self.error is not None:
+            return
+        text = ''.join(texts)
+        start = time.time()
+        try:
+            self.storage.write(text)
+        except Exception as error:
+            self.error = error
+            self.log_error(error, " (lost {0} writes)".format(len(texts)))
+            return
+        elapsed = time.time() - start
+        self.lines += len(texts)
+        self.batches += 1
+        self.bytes_written += len(text)
+        self.write_seconds += elapsed
+        if elapsed > self.max_write_seconds:
+            self.max_write_seconds = elapsed
+        return
+
+    def sync(self, fsync):
+        """
+        Flushes the storage's file (and fsyncs it)
+
+        :param:
+
+         - `fsync`: if True, call os.fsync on the file
+        """
+        if self.error is not None:
+            return
+        try:
+            opened = getattr(self.storage, 'file', self.storage)
+            if hasattr(opened, 'flush'):
+                opened.flush()
+            if fsync and hasattr(opened, 'fileno'):
+                os.fsync(opened.fileno())
+        except Exception as error:
+            self.error = error
+            self.log_error(error, " (flushing {0})".format(self.name))
+        return
+
+    @property
+    def counters(self):
+        """
+        dict of queue-depth, max-depth, waits, lines, batches, bytes and write-seconds
+        """
+        return dict(queue_depth=self.queue.qsize(),
+                    max_depth=self.max_depth,
+                    waits=self.waits,
+                    lines=self.lines,
+                    batches=self.batches,
+                    bytes_written=self.bytes_written,
+                    write_seconds=self.write_seconds,
+                    max_write_seconds=self.max_write_seconds)
+
+    def check_error(self):
+        """
+        Raises the writer-thread's error (once)
+
+        :raise: TunaError if the thread failed to write
+        """
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise TunaError("Unable to write to {0}: {1}".format(self.name, error))
+        return
+
+    def close(self):
+        """
+        Writes whatever is queued then closes the storage
+
+        :raise: TunaError if the thread failed to write
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self._thread is not None:
+            self.queue.put((AsyncStorageConstants.stop, None))
+            self._thread.join(self.timeout)
+            if self._thread.is_alive():
+                self.logger.error("{0} items still queued for {1} after {2} seconds".format(self.queue.qsize(),
+                                                                                            self.name,
+                                                                                            self.timeout))
+        if hasattr(self.storage, 'close'):
+            self.storage.close()
+        self.logger.debug("Closed {0}: {1}".format(self.name, self.counters))
+        self.check_error()
+        return
+
+    def __getattr__(self, attribute):
+        """
+        A pass-through to the storage (e.g. `path` or `mode`)
+        """
+        if attribute == 'storage':
+            raise AttributeError(attribute)
+        return getattr(self.storage, attribute)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+        return
+# end class AsyncStorage
@@ -1,23 +1,104 @@
 
 # python standard library
+from collections import deque
 import datetime
 import re
+import threading
+import time
 now = datetime.datetime.now
 
+# this package
+from tuna.infrastructure.baseclass import BaseThreadClass
+from tuna.parts.scheduler import monotonic
+
+
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%S'
+MICROSECONDS = '{0}.{1:06d}'
+MICROSECOND = 10**6
+
+
+class Timestamps(object):
+    """
+    A converter of seconds to timestamp strings that caches the formatted seconds
+    """
+    def __init__(self, timestamp_format=None):
+        """
+        Timestamps constructor
+
+        :param:
+
+         - `timestamp_format`: strftime format (None for isoformat)
+        """
+        self.timestamp_format = timestamp_format
+        self.microseconds = timestamp_format is None
+        self.cacheable = timestamp_format is None or '%f' not in timestamp_format
+        if timestamp_format is None:
+            self.timestamp_format = ISO_FORMAT
+        self.second = None
+        self.prefix = None
+        self.offset = None
+        self.anchor()
+        return
+
+    def anchor(self):
+        """
+        Re-takes the wall-clock time matching the monotonic clock
+        """
+        self.offset = time.time() - monotonic()
+        return
+
+    def wall(self, seconds):
+        """
+        Converts wall-clock seconds to a timestamp
+
+        :param:
+
+         - `seconds`: seconds since the epoch (e.g. from time.time())
+
+        :return: formatted timestamp
+        """
+        if not self.cacheable:
+            return datetime.datetime.fromtimestamp(seconds).strftime(self.timestamp_format)
+        second = int(seconds)
+        if second != self.second:
+            self.prefix = datetime.datetime.fromtimestamp(second).strftime(self.timestamp_format)
+            self.second = second
+        if not self.microseconds:
+            return self.prefix
+        microseconds = int((seconds - second) * MICROSECOND)
+        if not microseconds:
+            return self.prefix
+        return MICROSECONDS.format(self.prefix, microseconds)
+
+    def __call__(self, stamp):
+        """
+        Converts a monotonic time to a timestamp
+
+        :param:
+
+         - `stamp`: time from the monotonic clock
+
+        :return: formatted timestamp
+        """
+        return self.wall(stamp + self.offset)
+# end class Timestamps
+
 
 class TimestampWriter(object):
     """
     A class to add timestamps to lines being written to files
     """
-    def __init__(self, open_file):
+    def __init__(self, open_file, timestamp_format=None):
         """
         TimestampWriter constructor
 
         :param:
 
          - `open_file`: a file opened for writing
+         - `timestamp_format`: strftime format for the timestamps (None for isoformat)
         """
         self.open_file = open_file
+        self.timestamps = Timestamps(timestamp_format)
         return
 
     def write(self, line):
@@ -28,12 +109,222 @@ class TimestampWriter(object):
 
          - `line`: string to write to output
         """
-        self.open_file.write('{0},{1}'.format(now().isoformat(), line))
+        self.open_file.write('{0},{1}'.format(self.timestamps.wall(time.time()), line))
         #self.open_file.write(line)
         return
 # end TimestampWriter        
 
 
+class BufferedWriterConstants(object):
+    """
+    Constants for the BufferedTimestampWriter
+    """
+    __slots__ = ()
+    default_capacity = 10000
+    default_flush_size = 64 * 1024
+    default_flush_interval = 1
+    default_backoff = 0.5
+    drop = 'drop'
+    block = 'block'
+    policies = (drop, block)
+    default_overflow = drop
+    stop_timeout = 5
+
+
+class BufferedTimestampWriter(BaseThreadClass):
+    """
+    A timestamp-writer that writes the lines in batches from a thread
+    """
+    def __init__(self, open_file, timestamp_format=None,
+                 capacity=BufferedWriterConstants.default_capacity,
+                 flush_size=BufferedWriterConstants.default_flush_size,
+                 flush_interval=BufferedWriterConstants.default_flush_interval,
+                 overflow=BufferedWriterConstants.default_overflow,
+                 backoff=BufferedWriterConstants.default_backoff):
+        """
+        BufferedTimestampWriter constructor
+
+        :param:
+
+         - `open_file`: a file opened for writing (it isn't closed by the writer)
+         - `timestamp_format`: strftime format for the timestamps (None for isoformat)
+         - `capacity`: most lines to hold before the overflow policy is used
+         - `flush_size`: bytes of lines that trigger a flush
+         - `flush_interval`: most seconds a line waits before it's flushed
+         - `overflow`: 'drop' or 'block' (see BufferedWriterConstants)
+         - `backoff`: most seconds a 'block' writer waits for room
+
+        :raise: ValueError if the overflow policy isn't known
+        """
+        super(BufferedTimestampWriter, self).__init__()
+        if overflow not in BufferedWriterConstants.policies:
+            raise ValueError("Unknown overflow policy '{0}' (use one of {1})".format(overflow,
+                                                                                   BufferedWriterConstants.policies))
+        self.open_file = open_file
+        self.timestamps = Timestamps(timestamp_format)
+        self.capacity = capacity
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.backoff = backoff
+        self.buffer = deque()
+        self.buffered_bytes = 0
+        # the default RLock is much slower (and nothing re-enters it)
+        self.condition = threading.Condition(threading.Lock())
+        self.closed = False
+        self.writing = False
+        self.flushing = False
+        self.lines = 0
+        self.dropped = 0
+        self.backoffs = 0
+        self.flushes = 0
+        self.bytes_written = 0
+        return
+
+    def write(self, line):
+        """
+        Adds the line (and the time) to the buffer
+
+        :param:
+
+         - `line`: string to write to output
+        """
+        stamp = monotonic()
+        with self.condition:
+            if self.closed:
+                raise ValueError("I/O operation on a closed BufferedTimestampWriter")
+            self.lines += 1
+            if self._thread is None:
+                self.thread.start()
+            if len(self.buffer) >= self.capacity:
+                self.condition.notify_all()
+                if self.overflow == BufferedWriterConstants.drop:
+                    old_stamp, old_line = self.buffer.popleft()
+                    self.buffered_bytes -= len(old_line)
+                    self.dropped += 1
+                else:
+                    self.backoffs += 1
+                    end_time = monotonic() + self.backoff
+                    while len(self.buffer) >= self.capacity and not self.closed:
+                        remaining = end_time - monotonic()
+                        if remaining <= 0:
+                            break
+                        self.condition.wait(remaining)
+                    if len(self.buffer) >= self.capacity:
+                        self.dropped += 1
+                        return
+            self.buffer.append((stamp, line))
+            self.buffered_bytes += len(line)
+            if self.buffered_bytes >= self.flush_size or len(self.buffer) >= self.capacity:
+                self.condition.notify_all()
+        return
+
+    def take(self):
+        """
+        Waits until it's time to flush then empties the buffer
+
+        :return: list of (monotonic time, line) or None once closed and empty
+        """
+        with self.condition:
+            while True:
+                if self.buffer:
+                    age = monotonic() - self.buffer[0][0]
+                    if (self.closed or self.flushing or
+                        self.buffered_bytes >= self.flush_size or
+                        len(self.buffer) >= self.capacity or
+                        age >= self.flush_interval):
+                        batch = list(self.buffer)
+                        self.buffer.clear()
+                        self.buffered_bytes = 0
+                        self.writing = True
+                        # let any blocked writers know there's room
+                        self.condition.notify_all()
+                        return batch
+                    self.condition.wait(self.flush_interval - age)
+                    continue
+                self.flushing = False
+                self.condition.notify_all()
+                if self.closed:
+                    return None
+                self.condition.wait()
+
+    def run(self):
+        """
+        Writes the batches to the file (the target of the thread)
+        """
+        while True:
+            batch = self.take()
+            if batch is None:
+                return
+            try:
+                self.timestamps.anchor()
+                text = ''.join(['{0},{1}'.format(self.timestamps(stamp), line)
+                                for stamp, line in batch])
+                self.open_file.write(text)
+                self.flushes += 1
+                self.bytes_written += len(text)
+            except Exception as error:
+                self.log_error(error, " (lost {0} lines)".format(len(batch)))
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+        return
+
+    def flush(self, timeout=BufferedWriterConstants.stop_timeout):
+        """
+        Writes the buffered lines now and waits for them to be written
+
+        :param:
+
+         - `timeout`: most seconds to wait for the write
+        """
+        end_time = monotonic() + timeout
+        with self.condition:
+            if self._thread is None:
+                return
+            self.flushing = True
+            self.condition.notify_all()
+            while self.buffer or self.writing:
+                remaining = end_time - monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+        return
+
+    @property
+    def counters(self):
+        """
+        dict of lines, dropped, backoffs, flushes and bytes_written totals
+        """
+        return dict(lines=self.lines,
+                    dropped=self.dropped,
+                    backoffs=self.backoffs,
+                    flushes=self.flushes,
+                    bytes_written=self.bytes_written)
+
+    def close(self, timeout=BufferedWriterConstants.stop_timeout):
+        """
+        Writes whatever is left and stops the thread (the file is left open)
+
+        :param:
+
+         - `timeout`: most seconds to wait for the last write
+        """
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.dropped:
+            self.logger.warning("Dropped {0} of {1} lines (buffer full)".format(self.dropped,
+                                                                                 self.lines))
+        return
+# end class BufferedTimestampWriter
+
+
 class LogWriter(object):
     """
     A writer to a log and a file
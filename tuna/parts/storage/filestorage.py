@@ -1,14 +1,16 @@
 
 # python standard library
 import os
+import errno
 import shutil
 import datetime
 import re
 import copy
+import threading
 
 # this package
 from base_storage import BaseStorage
-#from tuna import BaseClass
+from tuna import BaseClass
 from tuna import FILE_TIMESTAMP
 from tuna import TunaError
 
@@ -21,6 +23,10 @@ UNDERSCORE = '_'
 FILENAME_SUFFIX = UNDERSCORE + DIGIT + ONE_OR_MORE
 IN_PWEAVE = __name__ == '__builtin__'
 AMBIGUOUS = "Ambiguous call: 'overwrite' True and mode 'a'"
+COUNT_WIDTH = 4
+INDEXED_NAME = re.compile(r"^(?P<base>.+)_(?P<count>\d+)$")
+EXCLUSIVE = os.O_CREAT | os.O_EXCL | os.O_WRONLY
+SHARDS = {'hour': '%Y_%m_%d_%H'}
 
 
 if IN_PWEAVE:
@@ -71,12 +77,102 @@ if IN_PWEAVE:
     print name            
 
 
+class NameIndex(BaseClass):
+    """
+    An allocator of unused file-names in a directory
+    """
+    def __init__(self, path):
+        """
+        NameIndex constructor
+
+        :param:
+
+         - `path`: the directory the names are in
+        """
+        super(NameIndex, self).__init__()
+        self.path = path
+        self.counts = None
+        self.lock = threading.Lock()
+        return
+
+    def scan(self):
+        """
+        Lists the directory and records the highest count for each name
+
+        :postcondition: self.counts maps (base, extension) to the highest count
+        """
+        self.counts = {}
+        for name in os.listdir(self.path):
+            base, extension = os.path.splitext(name)
+            match = INDEXED_NAME.match(base)
+            if match is None:
+                continue
+            key = (match.group('base'), extension)
+            count = int(match.group('count'))
+            if count > self.counts.get(key, 0):
+                self.counts[key] = count
+        self.logger.debug("Indexed {0} names in {1}".format(len(self.counts), self.path))
+        return
+
+    def claim(self, name):
+        """
+        Creates an empty file with the name (or the next free count-name)
+
+        :param:
+
+         - `name`: the base-name (no path) to try first
+
+        :return: full path of the file that was created
+        :raise: OSError if the file can't be created for any reason but existing
+        """
+        base, extension = os.path.splitext(name)
+        key = (base, extension)
+        with self.lock:
+            candidate = name
+            while True:
+                full_name = os.path.join(self.path, candidate)
+                try:
+                    os.close(os.open(full_name, EXCLUSIVE))
+                    return full_name
+                except OSError as error:
+                    if error.errno != errno.EEXIST:
+                        raise
+                if self.counts is None:
+                    self.scan()
+                count = self.counts.get(key, 0) + 1
+                self.counts[key] = count
+                candidate = "{b}_{c}{e}".format(b=base,
+                                                c=str(count).zfill(COUNT_WIDTH),
+                                                e=extension)
+        return
+# end class NameIndex
+
+name_indices = {}
+name_indices_lock = threading.Lock()
+
+def name_index(path):
+    """
+    Gets the NameIndex for the directory (creating it if needed)
+
+    :param:
+
+     - `path`: the directory
+
+    :return: NameIndex shared by everything writing to the directory
+    """
+    path = os.path.abspath(path)
+    with name_indices_lock:
+        if path not in name_indices:
+            name_indices[path] = NameIndex(path)
+        return name_indices[path]
+
+
 class FileStorage(BaseStorage):
     """
     A class to store data to a file
     """
     def __init__(self, path=None, timestamp=FILE_TIMESTAMP,
-                 name=None, overwrite=False, mode=WRITEABLE):
+                 name=None, overwrite=False, mode=WRITEABLE, shard=None):
         """
         FileStorage constructor
 
@@ -84,6 +180,7 @@ class FileStorage(BaseStorage):
 
          - `path`: path to prepend to all files (default is current directory)
          - `timestamp`: strftime format to timestamp file-names
+         - `shard`: strftime format (or 'hour') for sub-folders to spread the files over
          - `name`: Filename to use
          - `overwrite`: If true, clobber existing file with same name
          - `mode`: file mode (e.g. 'a' for append)
@@ -92,6 +189,7 @@ class FileStorage(BaseStorage):
         self._path = None
         self.path = path
         self.timestamp = timestamp
+        self.shard = shard
 
         # these are to support the `with` statement
         self.name = name
@@ -131,6 +229,23 @@ class FileStorage(BaseStorage):
         self._path = path
         return
 
+    def folder(self, now=None):
+        """
+        The folder (path and shard) that files are put in
+
+        :param:
+
+         - `now`: datetime to use for the shard (default is now)
+
+        :return: path with the shard's sub-folder (if set) added
+        """
+        if self.shard is None:
+            return self.path
+        if now is None:
+            now = datetime.datetime.now()
+        return os.path.join(self.path,
+                            now.strftime(SHARDS.get(self.shard, self.shard)))
+
     def safe_name(self, name, overwrite=False):
         """
         Adds a timestamp if formatted for it, increments if already exists
@@ -141,26 +256,22 @@ class FileStorage(BaseStorage):
          - `overwrite`: if True, don't mangle the name
 
         :return: unique name with full path
+        :postcondition: unless `overwrite`, an empty file with the name exists
         """
-        name = name.format(timestamp=datetime.datetime.now().strftime(self.timestamp))
-        full_name = os.path.join(self.path, name)
-        
+        now = datetime.datetime.now()
+        name = name.format(timestamp=now.strftime(self.timestamp))
+        full_name = os.path.join(self.folder(now), name)
+        directory, name = os.path.split(full_name)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError as error:
+                # another thread may have just made it
+                if error.errno != errno.EEXIST:
+                    raise
         if overwrite:
             return full_name
-        
-        if os.path.exists(full_name):
-            base, extension = os.path.splitext(name)
-
-
-            expression = r"{b}{s}{e}".format(b=base,
-                                             s=FILENAME_SUFFIX,
-                                             e=extension)
-            regex = re.compile(expression)
-            count = sum(1 for name in os.listdir(self.path) if regex.match(name))
-            count = str(count + 1).zfill(4)
-            name = "{b}_{c}{e}".format(b=base, c=count, e=extension)
-            full_name = os.path.join(self.path, name)
-        return full_name
+        return name_index(directory).claim(name)
 
     def open(self, name, overwrite=False, mode=WRITEABLE, return_copy=True):
         """
@@ -201,6 +312,23 @@ class FileStorage(BaseStorage):
             self.logger.debug("File is None")
         return
 
+    def flush(self):
+        """
+        Flushes the file's buffer
+        """
+        if self.file is not None:
+            self.file.flush()
+        return
+
+    def fsync(self):
+        """
+        Flushes the file and has the operating system write it to the disk
+        """
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        return
+
     def __enter__(self):
         """
         Support for the 'with' statement
@@ -0,0 +1,313 @@
+
+# python standard library
+from collections import OrderedDict
+import sqlite3
+import time
+
+# third-party
+import numpy
+
+# this package
+from tuna import BaseClass, TunaError
+
+
+class ResultStoreConstants(object):
+    """
+    Constants for the result store
+    """
+    __slots__ = ()
+    # the configuration option
+    option = 'results_database'
+
+    # the column types
+    real = 'REAL'
+    integer = 'INTEGER'
+    text = 'TEXT'
+
+    table = 'results'
+    input_column = 'input_{0}'
+    leading_columns = (('timestamp', real), ('evaluation', integer))
+    result_columns = (('output', real), ('uncertainty', real))
+    indexes = ('evaluation', 'output')
+    create_table = "CREATE TABLE IF NOT EXISTS {table} ({columns})"
+    create_index = "CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})"
+    insert = "INSERT INTO {table} VALUES ({markers})"
+    pragmas = ('PRAGMA journal_mode=WAL', 'PRAGMA synchronous=NORMAL')
+    batch_size = 1000
+    fetch_size = 10000
+
+
+class ResultStore(BaseClass):
+    """
+    A batched store of the optimizers' results
+    """
+    def __init__(self, storage=None, filename=None, csv_storage=None,
+                 batch_size=ResultStoreConstants.batch_size):
+        """
+        ResultStore constructor
+
+        :param:
+
+         - `storage`: FileStorage to get the database's path from (None for no database)
+         - `filename`: name for the database-file (can have a {timestamp})
+         - `csv_storage`: writeable object for the CSV view of the rows (or None)
+         - `batch_size`: rows to keep before writing them
+        """
+        super(ResultStore, self).__init__()
+        self.storage = storage
+        self.filename = filename
+        self.csv_storage = csv_storage
+        self.batch_size = batch_size
+        self.path = None
+        self.connection = None
+        self.insert = None
+        self.state_fields = ()
+        self.columns = None
+        self.rows = []
+        self.evaluation = 0
+        return
+
+    def reset(self, state_fields=()):
+        """
+        Starts a new run (closing the last database and opening a new one)
+
+        :param:
+
+         - `state_fields`: (name, type) pairs for the optimizer's state columns
+        """
+        self.close()
+        self.state_fields = tuple(state_fields)
+        self.columns = None
+        self.rows = []
+        self.evaluation = 0
+        if self.storage is not None and self.filename is not None:
+            self.path = self.storage.safe_name(self.filename)
+            self.logger.debug("Storing the results in {0}".format(self.path))
+            self.connection = sqlite3.connect(self.path)
+            for pragma in ResultStoreConstants.pragmas:
+                self.connection.execute(pragma)
+        return
+
+    def define(self, width):
+        """
+        Sets the columns (creating the table and writing the CSV header)
+
+        :param:
+
+         - `width`: the number of inputs the candidates have
+        """
+        self.columns = (list(ResultStoreConstants.leading_columns) +
+                        [(ResultStoreConstants.input_column.format(index), ResultStoreConstants.real)
+                         for index in xrange(width)] +
+                        list(ResultStoreConstants.result_columns) +
+                        list(self.state_fields))
+        if self.connection is not None:
+            definitions = ', '.join("{0} {1}".format(name, type_) for name, type_ in self.columns)
+            self.connection.execute(ResultStoreConstants.create_table.format(table=ResultStoreConstants.table,
+                                                                             columns=definitions))
+            self.insert = ResultStoreConstants.insert.format(table=ResultStoreConstants.table,
+                                                             markers=','.join('?' * len(self.columns)))
+        if self.csv_storage is not None:
+            self.csv_storage.write(','.join(name for name, type_ in self.columns) + '\n')
+        return
+
+    def append(self, candidate, **state):
+        """
+        Adds a row for the candidate (writing the rows if there's a batch's worth)
+
+        :param:
+
+         - `candidate`: evaluated solution (with `inputs` and `output`)
+         - `state`: values for the state columns
+        """
+        self.evaluation += 1
+        inputs = candidate.inputs
+        if self.columns is None:
+            self.define(len(inputs))
+        output = candidate.output
+        row = [time.time(), self.evaluation]
+        row.extend(numpy.asarray(inputs, dtype=float).tolist())
+        row.append(None if output is None else float(output))
+        row.append(getattr(candidate, 'uncertainty', None))
+        row.extend([state.get(name) for name, type_ in self.state_fields])
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+        return
+
+    def flush(self):
+        """
+        Writes the rows to the database and the CSV storage
+
+        :raise: TunaError if the database can't be written to
+        """
+        if not self.rows:
+            return
+        if self.connection is not None:
+            try:
+                with self.connection:
+                    self.connection.executemany(self.insert, self.rows)
+            except sqlite3.Error as error:
+                raise TunaError("Unable to store the results in {0}: {1}".format(self.path,
+                                                                                error))
+        if self.csv_storage is not None:
+            self.csv_storage.write(''.join([','.join(map(self.text, row)) + '\n'
+                                            for row in self.rows]))
+        self.rows = []
+        return
+
+    @staticmethod
+    def text(value):
+        """
+        The value as CSV text (floats keep all their digits)
+
+        :return: '' for None, repr for floats, str for anything else
+        """
+        if value is None:
+            return ''
+        if type(value) is float:
+            return repr(value)
+        return str(value)
+
+    def close(self):
+        """
+        Writes what's left, indexes the table and closes the database
+        """
+        self.flush()
+        if self.connection is not None:
+            if self.columns is not None:
+                with self.connection:
+                    for column in ResultStoreConstants.indexes:
+                        self.connection.execute(ResultStoreConstants.create_index.format(table=ResultStoreConstants.table,
+                                                                                         column=column))
+            self.connection.close()
+            self.connection = None
+        return
+# end class ResultStore
+
+
+class ResultReader(BaseClass):
+    """
+    A reader of the ResultStore's databases
+    """
+    def __init__(self, database):
+        """
+        ResultReader constructor
+
+        :param:
+
+         - `database`: path to the database-file
+        """
+        super(ResultReader, self).__init__()
+        self.database = database
+        self._connection = None
+        self._columns = None
+        return
+
+    @property
+    def connection(self):
+        """
+        Connection to the database
+        """
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.database)
+        return self._connection
+
+    @property
+    def columns(self):
+        """
+        list of the table's column-names
+        """
+        if self._columns is None:
+            rows = self.connection.execute("PRAGMA table_info({0})".format(ResultStoreConstants.table))
+            self._columns = [row[1] for row in rows]
+            if not self._columns:
+                raise TunaError("'{0}' has no results".format(self.database))
+        return self._columns
+
+    def check(self, name):
+        """
+        Checks that the name is one of the columns
+
+        :return: name
+        :raise: TunaError if it isn't
+        """
+        if name not in self.columns:
+            raise TunaError("Unknown column '{0}' (the columns are {1})".format(name,
+                                                                                 ', '.join(self.columns)))
+        return name
+
+    def column(self, name):
+        """
+        The column's values (NULLs become NaN)
+
+        :param:
+
+         - `name`: name of the column
+
+        :return: numpy array of floats in evaluation order
+        """
+        cursor = self.connection.execute("SELECT {0} FROM {1} ORDER BY evaluation".format(self.check(name),
+                                                                                         ResultStoreConstants.table))
+        return numpy.fromiter((numpy.nan if value is None else value
+                               for value, in cursor), dtype=float)
+
+    def best(self, count=1, column='output'):
+        """
+        The rows with the highest values
+
+        :param:
+
+         - `count`: the number of rows
+         - `column`: the column to sort by
+
+        :return: list of OrderedDicts of column-name: value
+        """
+        cursor = self.connection.execute("SELECT * FROM {0} WHERE {1} IS NOT NULL ORDER BY {1} DESC LIMIT ?".format(ResultStoreConstants.table,
+                                                                                                                  self.check(column)),
+                                         (count,))
+        return [OrderedDict(zip(self.columns, row)) for row in cursor]
+
+    def summary(self):
+        """
+        Summarizes the results
+
+        :return: OrderedDict of statistic-name: value
+        """
+        rows, first, last, minimum, maximum, mean = self.connection.execute(
+            "SELECT COUNT(*), MIN(timestamp), MAX(timestamp), MIN(output), MAX(output), AVG(output) FROM {0}".format(ResultStoreConstants.table)).fetchone()
+        summary = OrderedDict()
+        summary['rows'] = rows
+        summary['seconds'] = (last - first) if rows else 0
+        summary['minimum_output'] = minimum
+        summary['maximum_output'] = maximum
+        summary['mean_output'] = mean
+        return summary
+
+    def export_csv(self, stream):
+        """
+        Writes the table as comma-separated values
+
+        :param:
+
+         - `stream`: writeable object
+        """
+        text = ResultStore.text
+        stream.write(','.join(self.columns) + '\n')
+        cursor = self.connection.execute("SELECT * FROM {0} ORDER BY evaluation".format(ResultStoreConstants.table))
+        rows = cursor.fetchmany(ResultStoreConstants.fetch_size)
+        while rows:
+            stream.write(''.join([','.join(map(text, row)) + '\n'
+                                  for row in rows]))
+            rows = cursor.fetchmany(ResultStoreConstants.fetch_size)
+        return
+
+    def close(self):
+        """
+        Closes the connection
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        return
+# end class ResultReader
@@ -2,6 +2,7 @@
 # this package 
 from tuna import BaseClass
 from tuna import TunaError
+from tuna.parts.storage.asyncstorage import AsyncStorage
 
 
 def check_opened(method):
@@ -25,9 +26,18 @@ class StorageComposite(BaseClass):
     """
     A composite for storages
     """
-    def __init__(self):
+    def __init__(self, asynchronous=False):
+        """
+        StorageComposite constructor
+
+        :param:
+
+         - `asynchronous`: if True, write to the opened storages from threads (see AsyncStorage)
+        """
+        super(StorageComposite, self).__init__()
         self._storages = None
         self.open_storages = None
+        self.asynchronous = asynchronous
         return
 
     @property
@@ -104,6 +114,35 @@ class StorageComposite(BaseClass):
          - `name`: name to give opened file
         """
         self.open_storages = [storage.open(name) for storage in self.storages]
+        if self.asynchronous:
+            self.open_storages = [AsyncStorage(storage=storage)
+                                  for storage in self.open_storages]
+        return
+
+    @check_opened
+    def flush(self):
+        """
+        Flushes the opened storages (waiting for any queued writes)
+
+        :raise: TunaError if storages not opened
+        """
+        for storage in self.open_storages:
+            if hasattr(storage, 'flush'):
+                storage.flush()
+        return
+
+    @check_opened
+    def fsync(self):
+        """
+        Flushes the opened storages and has them synced to the disk
+
+        :raise: TunaError if storages not opened
+        """
+        for storage in self.open_storages:
+            if hasattr(storage, 'fsync'):
+                storage.fsync()
+            elif hasattr(storage, 'flush'):
+                storage.flush()
         return
 
     def close(self):
@@ -0,0 +1,88 @@
+
+# python standard library
+import unittest
+import random
+import threading
+
+# third party
+from mock import MagicMock
+
+# this package
+from tuna import TunaError
+from tuna.parts.storage.asyncstorage import AsyncStorage
+
+
+class TestAsyncStorage(unittest.TestCase):
+    def setUp(self):
+        self.storage = MagicMock(name='storage')
+        self.writer = AsyncStorage(storage=self.storage, queue_size=100)
+        return
+
+    def test_constructor(self):
+        """
+        Does it build without starting a thread?
+        """
+        self.assertIsNone(self.writer._thread)
+        self.assertEqual(0, self.writer.counters['queue_depth'])
+        self.writer.close()
+        self.storage.close.assert_called_with()
+        return
+
+    def test_coalesce(self):
+        """
+        Does it write everything queued while the storage was busy in one call?
+        """
+        release = threading.Event()
+        started = threading.Event()
+        def write(text):
+            started.set()
+            release.wait(1)
+        self.storage.write.side_effect = write
+        self.writer.write('first\n')
+        self.assertTrue(started.wait(1))
+        lines = ["{0}\n".format(index) for index in range(random.randrange(2, 50))]
+        for line in lines:
+            self.writer.write(line)
+        self.assertEqual(len(lines), self.writer.counters['max_depth'])
+        release.set()
+        self.writer.close()
+        self.assertEqual(2, self.storage.write.call_count)
+        self.storage.write.assert_called_with(''.join(lines))
+        self.assertEqual(len(lines) + 1, self.writer.counters['lines'])
+        self.assertEqual(2, self.writer.counters['batches'])
+        self.storage.close.assert_called_with()
+        with self.assertRaises(TunaError):
+            self.writer.write('late\n')
+        return
+
+    def test_flush(self):
+        """
+        Does flush wait for the writes and flush the file?
+        """
+        self.writer.write('line\n')
+        self.writer.flush()
+        self.storage.write.assert_called_with('line\n')
+        self.storage.file.flush.assert_called_with()
+        self.assertEqual(0, self.writer.counters['queue_depth'])
+        return
+
+    def test_open(self):
+        """
+        Does open wrap the opened storage?
+        """
+        opened = self.writer.open('name.csv')
+        self.storage.open.assert_called_with('name.csv')
+        self.assertIs(self.storage.open.return_value, opened.storage)
+        self.assertEqual(self.writer.queue_size, opened.queue_size)
+        return
+
+    def test_error(self):
+        """
+        Does an error in the thread get raised on the next call?
+        """
+        self.storage.write.side_effect = IOError('disk full')
+        self.writer.write('line\n')
+        with self.assertRaises(TunaError):
+            self.writer.flush()
+        return
+# end class TestAsyncStorage
@@ -0,0 +1,123 @@
+
+# python standard library
+import unittest
+import random
+import datetime
+import threading
+from StringIO import StringIO
+
+# third party
+from mock import MagicMock
+
+# this package
+from tuna import LOG_TIMESTAMP
+from tuna.parts.storage.file_writer import Timestamps, BufferedTimestampWriter
+
+
+class TestTimestamps(unittest.TestCase):
+    def test_isoformat(self):
+        """
+        Does it match datetime's isoformat (with and without microseconds)?
+        """
+        timestamps = Timestamps()
+        start = random.randrange(10**9)
+        for seconds in (start, start + 0.5, start + 0.25, start + 1.123456, start + 3600):
+            self.assertEqual(datetime.datetime.fromtimestamp(seconds).isoformat(),
+                             timestamps.wall(seconds))
+        return
+
+    def test_format(self):
+        """
+        Does it use the format (and convert the monotonic times)?
+        """
+        timestamps = Timestamps(LOG_TIMESTAMP)
+        seconds = random.randrange(10**9) + 0.75
+        self.assertEqual(datetime.datetime.fromtimestamp(seconds).strftime(LOG_TIMESTAMP),
+                         timestamps.wall(seconds))
+        timestamps.offset = seconds - 10
+        self.assertEqual(timestamps.wall(seconds), timestamps(10))
+        return
+# end class TestTimestamps
+
+
+class TestBufferedTimestampWriter(unittest.TestCase):
+    def setUp(self):
+        self.open_file = StringIO()
+        return
+
+    def test_constructor(self):
+        """
+        Does it build and check the overflow policy?
+        """
+        writer = BufferedTimestampWriter(open_file=self.open_file)
+        self.assertEqual(0, writer.counters['lines'])
+        with self.assertRaises(ValueError):
+            BufferedTimestampWriter(open_file=self.open_file, overflow='ignore')
+        return
+
+    def test_batch(self):
+        """
+        Does it write the lines in one batch once closed?
+        """
+        open_file = MagicMock()
+        writer = BufferedTimestampWriter(open_file=open_file,
+                                         timestamp_format=LOG_TIMESTAMP,
+                                         flush_interval=10)
+        lines = ["line {0}\n".format(index) for index in range(random.randrange(10, 100))]
+        for line in lines:
+            writer.write(line)
+        self.assertEqual(0, open_file.write.call_count)
+        writer.close()
+        self.assertEqual(1, open_file.write.call_count)
+        text = open_file.write.call_args[0][0]
+        self.assertEqual(lines, [line.split(',', 1)[1] for line in text.splitlines(True)])
+        self.assertEqual(len(lines), writer.counters['lines'])
+        self.assertEqual(1, writer.counters['flushes'])
+        with self.assertRaises(ValueError):
+            writer.write('late\n')
+        return
+
+    def test_drop(self):
+        """
+        Does it drop the oldest lines when the buffer is full?
+        """
+        release = threading.Event()
+        open_file = MagicMock()
+        open_file.write.side_effect = lambda text: release.wait(1)
+        writer = BufferedTimestampWriter(open_file=open_file, capacity=2,
+                                         flush_interval=0)
+        writer.write('first\n')
+        # wait for the writer to be blocked on the first flush
+        while not writer.writing:
+            release.wait(0.01)
+        for index in range(5):
+            writer.write("{0}\n".format(index))
+        self.assertEqual(3, writer.counters['dropped'])
+        release.set()
+        writer.close()
+        text = open_file.write.call_args[0][0]
+        self.assertEqual(['3\n', '4\n'], [line.split(',', 1)[1] for line in text.splitlines(True)])
+        return
+
+    def test_block(self):
+        """
+        Does it wait for room (then give up) when the policy is block?
+        """
+        release = threading.Event()
+        open_file = MagicMock()
+        open_file.write.side_effect = lambda text: release.wait(1)
+        writer = BufferedTimestampWriter(open_file=open_file, capacity=1,
+                                         flush_interval=0, overflow='block',
+                                         backoff=0.01)
+        writer.write('first\n')
+        while not writer.writing:
+            release.wait(0.01)
+        writer.write('second\n')
+        writer.write('third\n')
+        self.assertEqual(1, writer.counters['backoffs'])
+        self.assertEqual(1, writer.counters['dropped'])
+        release.set()
+        writer.close()
+        self.assertTrue(open_file.write.call_args[0][0].endswith('second\n'))
+        return
+# end class TestBufferedTimestampWriter
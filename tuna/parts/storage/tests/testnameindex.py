@@ -0,0 +1,87 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import datetime
+
+# this package
+from tuna.parts.storage.filestorage import NameIndex, FileStorage, name_index
+
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.index = NameIndex(self.path)
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def test_claim(self):
+        """
+        Does it create the file and count up once the name is taken?
+        """
+        self.assertEqual(os.path.join(self.path, 'a.txt'), self.index.claim('a.txt'))
+        self.assertTrue(os.path.isfile(os.path.join(self.path, 'a.txt')))
+        self.assertIsNone(self.index.counts)
+        self.assertEqual(os.path.join(self.path, 'a_0001.txt'), self.index.claim('a.txt'))
+        self.assertEqual(os.path.join(self.path, 'a_0002.txt'), self.index.claim('a.txt'))
+        self.assertEqual(os.path.join(self.path, 'b.txt'), self.index.claim('b.txt'))
+        return
+
+    def test_scan(self):
+        """
+        Does it start after the highest count already in the directory (and skip taken names)?
+        """
+        for name in ('a.txt', 'a_0003.txt', 'a_0001.csv', 'b_0007.txt'):
+            open(os.path.join(self.path, name), 'w').close()
+        self.assertEqual(os.path.join(self.path, 'a_0004.txt'), self.index.claim('a.txt'))
+        # a name created behind the index's back is skipped
+        open(os.path.join(self.path, 'a_0005.txt'), 'w').close()
+        self.assertEqual(os.path.join(self.path, 'a_0006.txt'), self.index.claim('a.txt'))
+        return
+
+    def test_threads(self):
+        """
+        Do threads claiming the same name all get different files?
+        """
+        names = []
+        def claim():
+            for repetition in range(20):
+                names.append(name_index(self.path).claim('same.iperf'))
+        threads = [threading.Thread(target=claim) for thread in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(100, len(set(names)))
+        self.assertEqual(100, len(os.listdir(self.path)))
+        return
+
+    def test_shared(self):
+        """
+        Does name_index return the same index for the same directory?
+        """
+        self.assertIs(name_index(self.path), name_index(self.path + os.sep))
+        return
+
+    def test_shard(self):
+        """
+        Does the FileStorage put the files in sub-folders?
+        """
+        storage = FileStorage(path=self.path, shard='hour')
+        now = datetime.datetime.now()
+        opened = storage.open('input_1/rep_0.iperf')
+        opened.close()
+        self.assertEqual(os.path.join(self.path, now.strftime('%Y_%m_%d_%H'),
+                                      'input_1', 'rep_0.iperf'),
+                         opened.name)
+        opened = storage.open('input_1/rep_0.iperf')
+        opened.close()
+        self.assertTrue(opened.name.endswith('rep_0_0001.iperf'))
+        return
+# end class TestNameIndex
@@ -0,0 +1,119 @@
+
+# python standard library
+import unittest
+import tempfile
+import shutil
+import os
+import StringIO
+
+# third-party
+from mock import MagicMock
+import numpy
+
+# this package
+from tuna import TunaError
+from tuna.parts.xysolution import XYSolution
+from tuna.parts.storage.resultstore import ResultStore, ResultReader, ResultStoreConstants
+
+
+STATE_FIELDS = (('checks', ResultStoreConstants.integer),
+                ('temperature', ResultStoreConstants.real))
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'results.db')
+        self.storage = MagicMock()
+        self.storage.safe_name.return_value = self.path
+        self.csv = StringIO.StringIO()
+        self.store = ResultStore(storage=self.storage, filename='results.db',
+                                 csv_storage=self.csv, batch_size=3)
+        self.store.reset(state_fields=STATE_FIELDS)
+        return
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+        return
+
+    def add(self, count):
+        """
+        Adds count candidates with outputs 0.1, 1.1, ...
+        """
+        for index in xrange(count):
+            candidate = XYSolution(inputs=numpy.array([index, index * 2]),
+                                   output=index + 0.1)
+            self.store.append(candidate, checks=index + 1, temperature=100.0 / (index + 1))
+        return
+
+    def test_append(self):
+        """
+        Does it write typed rows to the database and the CSV storage?
+        """
+        self.storage.safe_name.assert_called_with('results.db')
+        self.add(2)
+        self.store.close()
+        lines = self.csv.getvalue().splitlines()
+        self.assertEqual(['timestamp', 'evaluation', 'input_0', 'input_1', 'output',
+                          'uncertainty', 'checks', 'temperature'],
+                         lines[0].split(','))
+        row = lines[2].split(',')
+        self.assertEqual(['2', '1.0', '2.0', '1.1', '', '2', '50.0'], row[1:])
+
+        reader = ResultReader(self.path)
+        self.assertEqual(lines[0].split(','), reader.columns)
+        self.assertEqual([0.0, 1.0], reader.column('input_0').tolist())
+        # the state the optimizer didn't give is NULL
+        self.assertTrue(numpy.isnan(reader.column('uncertainty')).all())
+        reader.close()
+        return
+
+    def test_batches(self):
+        """
+        Are the rows only written when there's a batch of them?
+        """
+        self.add(2)
+        # only the header so far
+        self.assertEqual(1, len(self.csv.getvalue().splitlines()))
+        self.add(1)
+        self.assertEqual(4, len(self.csv.getvalue().splitlines()))
+        self.assertEqual([], self.store.rows)
+
+        # reset starts a new run
+        self.store.reset(state_fields=STATE_FIELDS)
+        self.assertEqual(0, self.store.evaluation)
+        return
+
+    def test_reader(self):
+        """
+        Does the reader find the best rows, summarize them and check the column-names?
+        """
+        self.add(5)
+        self.store.close()
+        reader = ResultReader(self.path)
+        best = reader.best(count=2)
+        self.assertEqual([4.1, 3.1], [row['output'] for row in best])
+        self.assertEqual(5, best[0]['checks'])
+        summary = reader.summary()
+        self.assertEqual(5, summary['rows'])
+        self.assertEqual(0.1, summary['minimum_output'])
+        self.assertEqual(4.1, summary['maximum_output'])
+        self.assertAlmostEqual(2.1, summary['mean_output'])
+        with self.assertRaises(TunaError):
+            reader.column('output; DROP TABLE results')
+        reader.close()
+        return
+
+    def test_export_csv(self):
+        """
+        Is the exported CSV the same as the CSV the store wrote?
+        """
+        self.add(4)
+        self.store.close()
+        reader = ResultReader(self.path)
+        output = StringIO.StringIO()
+        reader.export_csv(output)
+        reader.close()
+        self.assertEqual(self.csv.getvalue(), output.getvalue())
+        return
+# end class TestResultStore
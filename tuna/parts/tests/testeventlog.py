@@ -0,0 +1,187 @@
+
+# python standard library
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+# third-party
+from mock import MagicMock, patch
+import numpy
+
+# this package
+from tuna import TunaError
+from tuna.parts.eventlog import EventLog, EventReader, EventLogConstants
+from tuna.parts.phasetimer import PhaseTimerConstants
+from tuna.parts.xysolution import XYSolution
+
+
+class FileAdapter(object):
+    """
+    A stand-in for the StorageAdapter that writes to a real file
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = None
+        return
+
+    def reset(self):
+        self.file = open(self.filename, 'wb')
+        return
+
+    def write(self, text):
+        self.file.write(text)
+        return
+
+    def close(self):
+        self.file.close()
+        return
+
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'events.tev')
+        self.logger = MagicMock()
+        self.logger.isEnabledFor.side_effect = lambda level: level >= logging.INFO
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        return
+
+    def candidate(self, inputs, output=None):
+        return XYSolution(inputs=numpy.array(inputs), output=output)
+
+    def test_lazy_messages(self):
+        """
+        Are messages only built for the levels that are enabled?
+        """
+        events = EventLog(logger=self.logger)
+        candidate = MagicMock()
+        events.proposed(candidate)
+        events.evaluated(candidate)
+        # the DEBUG messages never turned the candidate into a string
+        self.assertEqual(0, candidate.__str__.call_count)
+        self.assertEqual(0, self.logger.log.call_count)
+        self.assertEqual(1, events.evaluation)
+
+        events.accepted(candidate)
+        self.assertEqual(1, self.logger.log.call_count)
+        self.assertEqual(logging.INFO, self.logger.log.call_args[0][0])
+        events.new_best(candidate)
+        self.assertEqual(1, self.logger.info.call_count)
+        self.assertIn("(evaluation 1)", self.logger.info.call_args[0][0])
+        return
+
+    def test_recorded_messages(self):
+        """
+        Are the per-candidate messages skipped when the events are recorded (even with DEBUG enabled)?
+        """
+        self.logger.isEnabledFor.side_effect = lambda level: True
+        events = EventLog(storage=FileAdapter(self.filename), logger=self.logger)
+        events.reset()
+        candidate = self.candidate([1, 2], output=3)
+        events.proposed(candidate)
+        events.evaluated(candidate)
+        self.assertEqual(0, self.logger.log.call_count)
+        self.assertEqual(2, len(events.kinds))
+        events.accepted(candidate)
+        events.new_best(candidate)
+        self.assertEqual(1, self.logger.log.call_count)
+        self.assertEqual(1, self.logger.info.call_count)
+        events.close()
+
+        # without the event file they're logged
+        events = EventLog(logger=self.logger)
+        events.proposed(candidate)
+        self.assertEqual(logging.DEBUG, self.logger.log.call_args[0][0])
+        return
+
+    def test_logging_phase(self):
+        """
+        Is the logging phase only entered when a message is built?
+        """
+        events = EventLog(logger=self.logger)
+        candidate = MagicMock()
+        with patch('tuna.parts.eventlog.phase') as phase:
+            events.proposed(candidate)
+            events.evaluated(candidate)
+            self.assertEqual(0, phase.call_count)
+            events.accepted(candidate)
+            phase.assert_called_once_with(PhaseTimerConstants.logging)
+        return
+
+    def test_round_trip(self):
+        """
+        Does the reader get back the events the log wrote (across blocks)?
+        """
+        events = EventLog(storage=FileAdapter(self.filename), logger=self.logger,
+                          block_size=3)
+        events.reset()
+        first = self.candidate([1, 2], 0.5)
+        second = self.candidate([3.25, 4, 5])
+        events.proposed(second)
+        second.output = 7.0
+        events.evaluated(second)
+        events.new_best(second)
+        events.restart()
+        events.evaluated(first)
+        events.close()
+
+        read = list(EventReader(self.filename).events())
+        self.assertEqual(['proposed', 'evaluated', 'new_best', 'restart', 'evaluated'],
+                         [event[1] for event in read])
+        self.assertEqual([0, 1, 1, 1, 2], [event[2] for event in read])
+        self.assertTrue(numpy.isnan(read[0][3]))
+        self.assertEqual(7.0, read[1][3])
+        self.assertEqual([3.25, 4, 5], read[2][4])
+        self.assertEqual([], read[3][4])
+        self.assertEqual([1, 2], read[4][4])
+        self.assertEqual(len(read), len(list(EventReader(self.filename).lines())))
+        return
+
+    def test_summary(self):
+        """
+        Does the summary count the events and find the last new best?
+        """
+        events = EventLog(storage=FileAdapter(self.filename), logger=self.logger,
+                          block_size=2)
+        events.reset()
+        for output in (1, 3, 2):
+            candidate = self.candidate([output, output], output)
+            events.proposed(candidate)
+            events.evaluated(candidate)
+            if output == 1:
+                events.accepted(candidate)
+            if output == 3:
+                events.new_best(candidate)
+        events.close()
+        summary = EventReader(self.filename).summary()
+        self.assertEqual(8, summary['events'])
+        self.assertEqual(3, summary['proposed'])
+        self.assertEqual(3, summary['evaluations'])
+        self.assertEqual(1, summary['new_best'])
+        self.assertAlmostEqual(1/3., summary['acceptance_ratio'])
+        self.assertEqual(3, summary['best_output'])
+        self.assertEqual([3, 3], summary['best_inputs'])
+        self.assertEqual(2, summary['best_evaluation'])
+        return
+
+    def test_bad_file(self):
+        """
+        Does the reader raise a TunaError for files it can't read?
+        """
+        with open(self.filename, 'wb') as bad:
+            bad.write('Time,Checks,Solution\n')
+        with self.assertRaises(TunaError):
+            list(EventReader(self.filename).blocks())
+
+        with open(self.filename, 'wb') as short:
+            short.write(EventLogConstants.magic +
+                        EventLogConstants.block_header.pack(10, 20) + 'x')
+        with self.assertRaises(TunaError):
+            list(EventReader(self.filename).blocks())
+        return
+# end class TestEventLog
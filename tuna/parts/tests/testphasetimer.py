@@ -0,0 +1,208 @@
+
+# python standard library
+import unittest
+import threading
+import StringIO
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna import TunaError
+from tuna.parts.phasetimer import PhaseTimer, PhaseRecord, PhaseTimerConstants
+from tuna.parts.phasetimer import NULL_PHASE
+
+
+class TestPhaseRecord(unittest.TestCase):
+    def setUp(self):
+        self.record = PhaseRecord()
+        return
+
+    def test_add(self):
+        """
+        Does adding a time update the count, total, extremes and histogram?
+        """
+        self.assertEqual(PhaseTimerConstants.buckets, len(self.record.buckets))
+        self.record.add(0.0000005)
+        self.record.add(0.003)
+        self.record.add(10**6)
+        self.assertEqual(3, self.record.count)
+        self.assertEqual(0.0000005, self.record.minimum)
+        self.assertEqual(10**6, self.record.maximum)
+        self.assertAlmostEqual(10**6 + 0.0030005, self.record.total)
+        # under a microsecond
+        self.assertEqual(1, self.record.buckets[0])
+        # 3000 microseconds is between 2**11 and 2**12
+        self.assertEqual(1, self.record.buckets[12])
+        # too big for the histogram
+        self.assertEqual(1, self.record.buckets[-1])
+        self.assertEqual(3, sum(self.record.buckets))
+        return
+
+    def test_percentile(self):
+        """
+        Are the percentiles the upper edges of the buckets they fall in?
+        """
+        self.assertEqual(0, self.record.percentile(0.5))
+        for seconds in [0.001] * 9 + [0.1]:
+            self.record.add(seconds)
+        # 1000 microseconds is in the bucket below 1024
+        self.assertEqual(0.001024, self.record.percentile(0.5))
+        self.assertEqual(0.001024, self.record.percentile(0.9))
+        # the last bucket's edge (0.131072) is more than the maximum
+        self.assertEqual(0.1, self.record.percentile(0.99))
+        return
+# end class TestPhaseRecord
+
+
+class TestPhaseTimer(unittest.TestCase):
+    def setUp(self):
+        self.timer = PhaseTimer()
+        self.timer._logger = MagicMock()
+        return
+
+    def test_off(self):
+        """
+        Does the timer hand out the shared no-op phase until it's started?
+        """
+        self.assertIs(NULL_PHASE, self.timer.phase(PhaseTimerConstants.quality))
+        with self.timer.phase(PhaseTimerConstants.quality):
+            pass
+        self.assertEqual({}, self.timer.records)
+        self.assertEqual([], self.timer.stack)
+
+        self.timer.start()
+        self.assertIsNot(NULL_PHASE, self.timer.phase(PhaseTimerConstants.quality))
+        self.timer.finish()
+        self.assertIs(NULL_PHASE, self.timer.phase(PhaseTimerConstants.quality))
+        return
+
+    def test_nesting(self):
+        """
+        Are phases inside of other phases recorded with dotted names?
+        """
+        self.timer.start()
+        for evaluation in xrange(3):
+            with self.timer.phase(PhaseTimerConstants.tweak):
+                pass
+            with self.timer.phase(PhaseTimerConstants.quality):
+                with self.timer.phase(PhaseTimerConstants.client_traffic):
+                    with self.timer.phase(PhaseTimerConstants.parsing):
+                        pass
+        self.assertEqual(['quality', 'quality.client_traffic',
+                          'quality.client_traffic.parsing', 'tweak'],
+                         sorted(self.timer.records))
+        self.assertEqual(3, self.timer.records['quality.client_traffic'].count)
+        self.assertEqual(3, self.timer.evaluations)
+        self.assertEqual([], self.timer.stack)
+
+        # an exception leaves the phase (and is still raised)
+        with self.assertRaises(ValueError):
+            with self.timer.phase(PhaseTimerConstants.quality):
+                raise ValueError("iperf crashed")
+        self.assertEqual(4, self.timer.evaluations)
+        self.assertEqual([], self.timer.stack)
+
+        # starting a new run clears the records
+        self.timer.start()
+        self.assertEqual({}, self.timer.records)
+        return
+
+    def test_threads(self):
+        """
+        Does each thread keep its own stack of phases?
+        """
+        def server():
+            with self.timer.phase(PhaseTimerConstants.parsing):
+                pass
+            return
+        self.timer.start()
+        with self.timer.phase(PhaseTimerConstants.quality):
+            thread = threading.Thread(target=server)
+            thread.start()
+            thread.join()
+        self.assertEqual(['parsing', 'quality'], sorted(self.timer.records))
+        return
+
+    def test_write(self):
+        """
+        Does the csv-report have a row (with the histogram) for each phase?
+        """
+        self.timer.start()
+        self.timer.record(PhaseTimerConstants.quality, 0.003)
+        self.timer.record(PhaseTimerConstants.quality, 0.001)
+        self.timer.record(PhaseTimerConstants.tweak, 0.0001)
+        output = StringIO.StringIO()
+        self.timer.write(output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(3, len(lines))
+        header = lines[0].split(',')
+        self.assertEqual(list(PhaseTimerConstants.columns), header[:len(PhaseTimerConstants.columns)])
+        # the histogram runs from the tweak's bucket (64 to 128 microseconds) to the quality's
+        self.assertEqual('lt_0.128ms', header[len(PhaseTimerConstants.columns)])
+        self.assertEqual('lt_4.096ms', header[-1])
+
+        quality = dict(zip(header, lines[1].split(',')))
+        self.assertEqual('quality', quality['phase'])
+        self.assertEqual(2, int(quality['count']))
+        self.assertAlmostEqual(2.0, float(quality['per_evaluation_ms']))
+        self.assertEqual(1, int(quality['lt_1.024ms']))
+        self.assertEqual(1, int(quality['lt_4.096ms']))
+        self.assertEqual('tweak', lines[2].split(',')[0])
+        return
+
+    def test_interval(self):
+        """
+        Does it log the table while running if given an interval?
+        """
+        self.timer.start(interval=0.01)
+        with self.timer.phase(PhaseTimerConstants.quality):
+            self.timer.stopped.wait(0.05)
+        self.timer.finish()
+        self.assertFalse(self.timer.thread.is_alive())
+        calls = self.timer.logger.info.call_count
+        # at least one table while running and one at the end
+        self.assertGreater(calls, len(self.timer.summary()))
+        self.timer.finish()
+        self.assertEqual(calls + len(self.timer.summary()), self.timer.logger.info.call_count)
+        return
+
+    def test_concurrent_start(self):
+        """
+        Does it refuse to start a run while another thread's run is being timed?
+        """
+        started = threading.Event()
+        done = threading.Event()
+        def optimizer(finish=True):
+            self.timer.start()
+            started.set()
+            done.wait()
+            if finish:
+                self.timer.finish()
+            return
+        thread = threading.Thread(target=optimizer)
+        thread.start()
+        started.wait()
+        with self.assertRaises(TunaError):
+            self.timer.start()
+        # the first run's records weren't touched
+        self.timer.record(PhaseTimerConstants.quality, 0.001)
+        self.assertEqual(1, self.timer.evaluations)
+        done.set()
+        thread.join()
+
+        # once it's finished another run can start
+        self.timer.start()
+        # the same thread can start again
+        self.timer.start()
+        self.timer.finish()
+
+        # a thread that died without finishing doesn't hold the timer
+        started.clear()
+        thread = threading.Thread(target=optimizer, kwargs={'finish': False})
+        thread.start()
+        thread.join()
+        self.timer.start()
+        self.timer.finish()
+        return
+# end class TestPhaseTimer
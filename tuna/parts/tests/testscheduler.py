@@ -0,0 +1,117 @@
+
+# python standard library
+import unittest
+import random
+import threading
+
+# third-party
+from mock import MagicMock
+
+# this package
+from tuna.parts.scheduler import Scheduler, ScheduledJob, monotonic
+
+
+class TestScheduledJob(unittest.TestCase):
+    def setUp(self):
+        self.target = MagicMock(name='target')
+        self.interval = random.randrange(1, 10)
+        self.start = random.randrange(100)
+        self.job = ScheduledJob(target=self.target,
+                                interval=self.interval,
+                                start=self.start,
+                                name='job')
+        return
+
+    def test_constructor(self):
+        """
+        Does it build?
+        """
+        self.assertEqual(self.start, self.job.deadline)
+        self.assertEqual(0, self.job.missed)
+        with self.assertRaises(ValueError):
+            ScheduledJob(target=self.target, interval=0, start=self.start)
+        return
+
+    def test_next_deadline(self):
+        """
+        Does it keep the deadlines in phase with the start no matter when it's asked?
+        """
+        # just after the start
+        self.assertEqual(self.start + self.interval,
+                         self.job.next_deadline(self.start + 0.1))
+
+        # exactly on a deadline goes to the next one
+        self.assertEqual(self.start + 2 * self.interval,
+                         self.job.next_deadline(self.start + self.interval))
+
+        # late by several intervals
+        periods = random.randrange(2, 10)
+        self.assertEqual(self.start + (periods + 1) * self.interval,
+                         self.job.next_deadline(self.start + periods * self.interval + 0.5))
+        return
+# end class TestScheduledJob
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = Scheduler(workers=2)
+        return
+
+    def tearDown(self):
+        self.scheduler.stop()
+        return
+
+    def test_schedule(self):
+        """
+        Does it call the job repeatedly using only its own threads?
+        """
+        called = threading.Event()
+        calls = []
+        def target():
+            calls.append(monotonic())
+            if len(calls) == 3:
+                called.set()
+        threads = threading.active_count()
+        job = self.scheduler.schedule(target, interval=0.01)
+        # one dispatcher and the workers no matter how many jobs
+        for index in xrange(10):
+            self.scheduler.schedule(MagicMock(), interval=0.01)
+        self.assertEqual(threads + 1 + self.scheduler.workers,
+                         threading.active_count())
+        self.assertTrue(called.wait(1))
+        self.assertGreaterEqual(job.runs, 2)
+        self.assertEqual(11, self.scheduler.counters['jobs'])
+        return
+
+    def test_missed(self):
+        """
+        Does it skip (and count) the deadlines of a job that's still running?
+        """
+        release = threading.Event()
+        started = threading.Event()
+        def target():
+            started.set()
+            release.wait(1)
+        job = self.scheduler.schedule(target, interval=0.01)
+        self.assertTrue(started.wait(1))
+        end = monotonic() + 1
+        while job.missed < 3 and monotonic() < end:
+            release.wait(0.01)
+        release.set()
+        self.assertGreaterEqual(job.missed, 3)
+        # the missed calls weren't queued up
+        self.assertEqual(0, self.scheduler.queue.qsize())
+        return
+
+    def test_cancel(self):
+        """
+        Does it stop calling a cancelled job?
+        """
+        target = MagicMock(name='target')
+        job = self.scheduler.schedule(target, interval=0.01, delay=10)
+        self.scheduler.cancel(job)
+        self.assertTrue(job.cancelled)
+        self.assertEqual(0, self.scheduler.counters['jobs'])
+        self.assertFalse(target.called)
+        return
+# end class TestScheduler
@@ -128,7 +128,7 @@ class CommandDump(BasePlugin):
                                         option='mode',
                                             optional=True,
                                             default=DumpConstants.default_mode)
-        options = 'connection timeout mode plugin component'.split() + self.configuration.defaults.keys()
+        options = 'connection timeout mode plugin component depends_on'.split() + self.configuration.defaults.keys()
         identifiers = [identifier for identifier in self.configuration.options(self.section_header)
                        if identifier not in options]
         self._product = SimpleComposite()
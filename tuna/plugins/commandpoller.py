@@ -118,7 +118,8 @@ class CommandPoller(BasePlugin):
         client = self.host_builder(connection_section)
         self._product = PollerBuilder(connection=client,
                                       configuration=self.query_configuration,
-                                      storage=self.storage).product
+                                      storage=self.storage,
+                                      scheduler=singletons.get_scheduler()).product
         return self._product
         
     def fetch_config(self):
@@ -45,6 +45,9 @@ connection = DUT
 # to have it crash instead of trap socket errors
 # trap_errors = False
 
+# to send all the commands at once (as one script) instead of one at a time
+# batch = False
+
 # everything else is of the format:
 # <column-header> = <command><delimiter><regular expression>
 # the column-header will be used in the csv-file
@@ -28,6 +28,19 @@ connection = DUT
 # or 'w' (write to separate files)
 # mode = w
 
+# to read all the watchers' output from one shared thread
+# instead of a thread per watcher
+# stream_loop = False
+
+# the lines are buffered and written in batches
+# buffer_lines is the most lines to hold (0 writes each line as it arrives)
+# flush_interval is the most seconds a line waits to be written
+# overflow is what to do when the buffer is full:
+# drop (throw away the oldest line) or block (wait for room)
+# buffer_lines = 10000
+# flush_interval = 1
+# overflow = drop
+
 # the commands to dump should take the form
 <identifier 1> = <command 1>
 <identifer 2> = <command 2>
@@ -108,7 +121,26 @@ class CommandWatcher(BasePlugin):
                                         option='mode',
                                             optional=True,
                                             default=WatcherConstants.default_mode)
-        options = 'connection mode plugin component'.split() + self.configuration.defaults.keys()
+        loop = None
+        if self.configuration.get_boolean(section=self.section_header,
+                                          option='stream_loop',
+                                          optional=True,
+                                          default=WatcherConstants.default_stream_loop):
+            loop = singletons.get_stream_loop()
+        buffer_lines = self.configuration.get_int(section=self.section_header,
+                                                  option='buffer_lines',
+                                                  optional=True,
+                                                  default=WatcherConstants.default_buffer_lines)
+        flush_interval = self.configuration.get_float(section=self.section_header,
+                                                      option='flush_interval',
+                                                      optional=True,
+                                                      default=WatcherConstants.default_flush_interval)
+        overflow = self.configuration.get(section=self.section_header,
+                                          option='overflow',
+                                          optional=True,
+                                          default=WatcherConstants.default_overflow)
+        options = ('connection mode stream_loop buffer_lines flush_interval overflow '
+                   'plugin component depends_on').split() + self.configuration.defaults.keys()
         identifiers = [identifier for identifier in self.configuration.options(self.section_header)
                        if identifier not in options]
         self._product = SimpleComposite()
@@ -118,6 +150,10 @@ class CommandWatcher(BasePlugin):
                                                                         storage=self.storage,
                                                                         connection=client,
                                                                         identifier=identifier,
+                                                                        loop=loop,
+                                                                        buffer_lines=buffer_lines,
+                                                                        flush_interval=flush_interval,
+                                                                        overflow=overflow,
                                                                         mode=mode))
         return self._product
         
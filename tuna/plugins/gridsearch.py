@@ -6,12 +6,8 @@ from collections import OrderedDict
 import numpy
 
 # this package
-from tuna.infrastructure import singletons
-from tuna.parts.storage.storageadapter import StorageAdapter
-from tuna.parts.storage.nullstorage import NullStorage
-
-from tuna import GLOBAL_NAME
 from base_plugin import BasePlugin
+from storageoptions import StorageOptions, storage_configuration
 
 from tuna.optimizers.exhaustivesearch import ExhaustiveSearchBuilder
 from tuna.optimizers.exhaustivesearch import ExhaustiveSearchConstants
@@ -52,10 +48,10 @@ components = <comma-separated list of sections with component options>
 # {maxima} = 1500,3000
 # {increments} = 50
 
-# to save the data give a file name to 'store_output'
-# if commented out it won't save anything
-# store_output = grid_search.csv
+{storage}
 '''.format(section=SECTION,
+           storage=storage_configuration(name='grid_search',
+                                         phases='checking the quality, storing and logging'),
            minima=ExhaustiveSearchConstants.minima_option,
            maxima=ExhaustiveSearchConstants.maxima_option,
            increments=ExhaustiveSearchConstants.increments_option,
@@ -65,7 +61,7 @@ components = <comma-separated list of sections with component options>
 output_documentation = __name__ == '__builtin__'
 
 
-class GridSearch(BasePlugin):
+class GridSearch(StorageOptions, BasePlugin):
     """
     A grid-searching plugin
     """
@@ -74,27 +70,8 @@ class GridSearch(BasePlugin):
         GridSearch plugin Constructor
         """
         super(GridSearch, self).__init__(*args, **kwargs)
-        self._storage = None
         return
 
-    @property
-    def storage(self):
-        """
-        A storage for solutions
-        """
-        if self._storage is None:
-            filename =  self.configuration.get(section=self.section_header,
-                                              option='store_output',
-                                              optional=True)
-            if filename is not None:
-                storage = singletons.get_filestorage(name=GLOBAL_NAME)
-
-                self._storage = StorageAdapter(storage=storage, filename=filename)
-                self._storage.open()
-            else:
-                self._storage = NullStorage()
-        return self._storage                
-
     @property
     def sections(self):
         """
@@ -144,6 +121,9 @@ class GridSearch(BasePlugin):
                                                 section_header=self.section_header,
                                                 quality=quality,
                                                 solution_storage=self.storage,
+                                                phase_storage=self.phase_storage,
+                                                event_storage=self.event_storage,
+                                                results=self.results,
                                                 observers=observers).product
         return self._product
         
@@ -6,11 +6,8 @@ from collections import OrderedDict
 import numpy
 
 # this package
-from tuna.infrastructure import singletons
-from tuna import GLOBAL_NAME
 from base_plugin import BasePlugin
-from tuna.parts.storage.storageadapter import StorageAdapter
-from tuna.parts.storage.nullstorage import NullStorage
+from storageoptions import StorageOptions, storage_configuration
 
 from tuna.optimizers.randomrestarts import RandomRestarter
 
@@ -37,9 +34,7 @@ CONFIGURATION = '''[{section}]
 # the plugin has to be the actual class name
 plugin = RandomRestarts
 
-# to assess how things went, set store_output to a filename and it will
-# save the solutions found to it (comma-separated)
-# store_output = annealing_solutions_{{{{timestamp}}}}.csv
+{storage}
 
 # the components are the things that are given the input values
 # to get the output values (e.g. a component that measures iperf)
@@ -85,6 +80,8 @@ tweak_type = GaussianConvolution
 #{ideal} = <stop if this value is reached>
 #{delta} = <difference from ideal to tolerate (default={delta_default})>
 '''.format(section=ANNEALINGSECTION,
+           storage=storage_configuration(name='restarts',
+                                         phases='tweaking, tabu-searching, checking the quality, storing and logging'),
            num_type=GaussianConvolutionConstants.number_type,
            location=GaussianConvolutionConstants.location,
            loc_default=GaussianConvolutionConstants.location_default,
@@ -104,7 +101,7 @@ tweak_type = GaussianConvolution
 output_documentation = __name__ == '__builtin__'
 
 
-class RandomRestarts(BasePlugin):
+class RandomRestarts(StorageOptions, BasePlugin):
     """
     A hill-climbing with random-restarts plugin
     """
@@ -115,26 +112,8 @@ class RandomRestarts(BasePlugin):
         """
         super(RandomRestarts, self).__init__(*args, **kwargs)
         self._tweak = None
-        self._storage = None
         return
 
-    @property
-    def storage(self):
-        """
-        A storage for solutions
-        """
-        if self._storage is None:
-            filename =  self.configuration.get(section=self.section_header,
-                                              option='store_output',
-                                              optional=True)
-            if filename is not None:
-                storage = singletons.get_filestorage(name=GLOBAL_NAME)
-
-                self._storage = StorageAdapter(storage=storage, filename=filename)
-            else:
-                self._storage = NullStorage()
-        return self._storage                
-
     @property
     def tweak(self):
         """
@@ -217,7 +196,11 @@ class RandomRestarts(BasePlugin):
                                           candidate=candidate,
                                           solution_storage=self.storage,
                                           global_stop=stop_conditions.global_stop_condition,
-                                          observers=observers)
+                                          observers=observers,
+                                          phase_storage=self.phase_storage,
+                                          phase_interval=self.phase_interval,
+                                          event_storage=self.event_storage,
+                                          results=self.results)
         return self._product
         
     def fetch_config(self):
@@ -7,11 +7,8 @@ from collections import OrderedDict
 import numpy
 
 # this package
-from tuna.infrastructure import singletons
-from tuna import GLOBAL_NAME
 from base_plugin import BasePlugin
-from tuna.parts.storage.storageadapter import StorageAdapter
-from tuna.parts.storage.nullstorage import NullStorage
+from storageoptions import StorageOptions, storage_configuration
 
 from tuna.optimizers.simulatedannealing import SimulatedAnnealer
 from tuna.optimizers.simulatedannealing import TimeTemperatureGeneratorConstants
@@ -38,9 +35,7 @@ CONFIGURATION = '''[{section}]
 # just has to match an option in the TUNA section
 plugin = SimulatedAnnealing
 
-# to assess how things went, set store_output to a filename and it will
-# save the solutions found to it (comma-separated)
-# store_output = annealing_solutions_{{{{timestamp}}}}.csv
+{storage}
 
 # the components are the things that are given the input values
 # to get the output values (e.g. a component that measures iperf)
@@ -83,6 +78,8 @@ components = <comma-separated list of sections with component options>
 {ideal} = <stop if this value is reached>
 {delta} = <difference from ideal to tolerate (default={delta_default})>
 '''.format(section=ANNEALINGSECTION,
+           storage=storage_configuration(name='annealing',
+                                         phases='tweaking, tabu-searching, checking the quality, storing and logging'),
            start=TimeTemperatureGeneratorConstants.start,
            stop=TimeTemperatureGeneratorConstants.stop,
            alpha=TimeTemperatureGeneratorConstants.alpha,
@@ -104,7 +101,7 @@ components = <comma-separated list of sections with component options>
 output_documentation = __name__ == '__builtin__'
 
 
-class SimulatedAnnealing(BasePlugin):
+class SimulatedAnnealing(StorageOptions, BasePlugin):
     """
     A simulated annealing plugin
     """
@@ -115,26 +112,8 @@ class SimulatedAnnealing(BasePlugin):
         """
         super(SimulatedAnnealing, self).__init__(*args, **kwargs)
         self._tweak = None
-        self._storage = None
         return
 
-    @property
-    def storage(self):
-        """
-        A storage for solutions
-        """
-        if self._storage is None:
-            filename =  self.configuration.get(section=self.section_header,
-                                              option='store_output',
-                                              optional=True)
-            if filename is not None:
-                storage = singletons.get_filestorage(name=GLOBAL_NAME)
-
-                self._storage = StorageAdapter(storage=storage, filename=filename)
-            else:
-                self._storage = NullStorage()
-        return self._storage                
-
     @property
     def tweak(self):
         """
@@ -219,7 +198,11 @@ class SimulatedAnnealing(BasePlugin):
                                           candidate=candidate,
                                           solution_storage=self.storage,
                                           stop_condition=stop_condition,
-                                          observers=observers)
+                                          observers=observers,
+                                          phase_storage=self.phase_storage,
+                                          phase_interval=self.phase_interval,
+                                          event_storage=self.event_storage,
+                                          results=self.results)
         return self._product
         
     def fetch_config(self):
@@ -0,0 +1,165 @@
+
+# this package
+from tuna.infrastructure import singletons
+from tuna.parts.storage.storageadapter import StorageAdapter
+from tuna.parts.storage.asyncstorage import AsyncStorage
+from tuna.parts.storage.nullstorage import NullStorage
+from tuna.parts.phasetimer import PhaseTimerConstants
+from tuna.parts.eventlog import EventLogConstants
+from tuna.parts.storage.resultstore import ResultStore, ResultStoreConstants
+from tuna import GLOBAL_NAME
+
+
+class StorageOptionsConstants(object):
+    """
+    Constants for the StorageOptions
+    """
+    __slots__ = ()
+    store_output = 'store_output'
+    async_storage = 'async_storage'
+
+
+STORAGE_CONFIGURATION = '''# to assess how things went, set {store_output} to a filename and it will
+# save every evaluation to it (comma-separated, with a header naming the columns)
+# {store_output} = {name}_solutions_{{{{timestamp}}}}.csv
+# set {async_storage} to True to write the solutions from a separate thread
+# (so a slow file-system doesn't hold up the search)
+# {async_storage} = False
+
+# to time each phase of the search (the phases are {phases})
+# set {phase_report} to a filename to save the times (and their histograms)
+# {phase_report} = {name}_phases_{{{{timestamp}}}}.csv
+# or set {phase_interval} to log them every so many seconds while it runs
+# (either one also logs them when it's done)
+# {phase_interval} = 600
+
+# to save the optimizer's events (candidates tried, new best solutions, etc.)
+# in a compact binary file set {event_log} to a filename
+# (`tuna events <filename>` summarizes it)
+# {event_log} = {name}_events_{{{{timestamp}}}}.tev
+
+# to save every evaluation (its inputs, output and the optimizer's state)
+# in an SQLite database set {results_database} to a filename
+# (the database is indexed so large runs can be queried quickly)
+# {results_database} = {name}_results_{{{{timestamp}}}}.db'''
+
+
+def storage_configuration(name, phases):
+    """
+    Gets the sample configuration for the storage options
+
+    :param:
+
+     - `name`: prefix for the sample filenames (e.g. 'annealing')
+     - `phases`: the phases the optimizer times (e.g. 'checking the quality, storing and logging')
+
+    :return: comment-block for the plugin's CONFIGURATION
+    """
+    return STORAGE_CONFIGURATION.format(name=name,
+                                        phases=phases,
+                                        store_output=StorageOptionsConstants.store_output,
+                                        async_storage=StorageOptionsConstants.async_storage,
+                                        phase_report=PhaseTimerConstants.report_option,
+                                        phase_interval=PhaseTimerConstants.interval_option,
+                                        event_log=EventLogConstants.option,
+                                        results_database=ResultStoreConstants.option)
+
+
+class StorageOptions(object):
+    """
+    A mix-in for plugins to build the optimizers' storages from their options
+
+    :precondition: the class using it has `configuration` and `section_header` properties
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        StorageOptions constructor (passes the arguments on to the next class)
+        """
+        super(StorageOptions, self).__init__(*args, **kwargs)
+        self._storage = None
+        self._phase_storage = None
+        self._event_storage = None
+        self._results = None
+        return
+
+    @property
+    def storage(self):
+        """
+        A storage for the solutions (NullStorage if there's no store_output)
+        """
+        if self._storage is None:
+            threaded = self.configuration.get_boolean(section=self.section_header,
+                                                      option=StorageOptionsConstants.async_storage,
+                                                      optional=True,
+                                                      default=False)
+            self._storage = self.file_storage(StorageOptionsConstants.store_output,
+                                              threaded=threaded)
+            if self._storage is None:
+                self._storage = NullStorage()
+        return self._storage
+
+    @property
+    def phase_storage(self):
+        """
+        A storage for the phase-timer's report (None if there's no phase_report)
+        """
+        if self._phase_storage is None:
+            self._phase_storage = self.file_storage(PhaseTimerConstants.report_option)
+        return self._phase_storage
+
+    @property
+    def phase_interval(self):
+        """
+        Seconds between logging the phase-times (None to only log them at the end)
+        """
+        return self.configuration.get_float(section=self.section_header,
+                                            option=PhaseTimerConstants.interval_option,
+                                            optional=True)
+
+    @property
+    def event_storage(self):
+        """
+        A storage for the optimizer's events (None if there's no event_log)
+        """
+        if self._event_storage is None:
+            self._event_storage = self.file_storage(EventLogConstants.option)
+        return self._event_storage
+
+    @property
+    def results(self):
+        """
+        A ResultStore for the evaluations (None if there's no results_database)
+
+        The rows are also written to the `storage` as CSV.
+        """
+        if self._results is None:
+            filename = self.configuration.get(section=self.section_header,
+                                              option=ResultStoreConstants.option,
+                                              optional=True)
+            if filename is not None:
+                self._results = ResultStore(storage=singletons.get_filestorage(name=GLOBAL_NAME),
+                                            filename=filename,
+                                            csv_storage=self.storage)
+        return self._results
+
+    def file_storage(self, option, threaded=False):
+        """
+        Builds an (unopened) storage for the file named by the option
+
+        :param:
+
+         - `option`: name of the option in the plugin's section with the filename
+         - `threaded`: if True, write to the file from a separate thread (AsyncStorage)
+
+        :return: StorageAdapter or None if the option isn't set
+        """
+        filename = self.configuration.get(section=self.section_header,
+                                          option=option,
+                                          optional=True)
+        if filename is None:
+            return None
+        storage = singletons.get_filestorage(name=GLOBAL_NAME)
+        if threaded:
+            storage = AsyncStorage(storage=storage)
+        return StorageAdapter(storage=storage, filename=filename)
+# end class StorageOptions
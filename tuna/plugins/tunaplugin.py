@@ -31,6 +31,9 @@ SUBFOLDER  = 'subfolder'
 COMPILED_EXTENSION = '.compiled'
 FILE_STORAGE_NAME = 'infrastructure'
 TIMESTAMP = 'timestamp'
+SHARD = 'shard'
+DEPENDS_ON = 'depends_on'
+WORKERS = 'workers'
 
 CONFIGURATION = '''[{0}]
 # the option names are just identifiers
@@ -73,10 +76,19 @@ CONFIGURATION = '''[{0}]
 # if you want to store files in a sub-folder:
 # {1} = <name>
 
+# if you want the files split into a sub-folder for every hour
+# {2} = hour
+
+# a plugin's section can list the sections on the same line that it has to wait for
+# {3} = <comma-separated-list of sections> (leave it empty to start right away)
+# once any plugin on a line has it, the line's plugins run at the same time (where they can)
+# to limit how many plugins on a line run at once:
+# {4} = <count>
+
 # If you get a ParserError check:
 #   - is everything flush-left?
 #   - no inline comments? (this won't raise a Parser error but it will create an error later)
-'''.format(SECTION, SUBFOLDER)
+'''.format(SECTION, SUBFOLDER, SHARD, DEPENDS_ON, WORKERS)
 
 
 
@@ -223,6 +235,12 @@ class Tuna(BasePlugin):
 
             # the next loop is going to start building plugins, so we need to set the FileStorage now
             self.initialize_file_storage(configuration)
+
+            # the most plugins an operation will run at once (if they declare dependencies)
+            workers = configuration.get_int(section=DEFAULT,
+                                            option=WORKERS,
+                                            optional=True,
+                                            default=None)
             
             for operation_name in names:
                 # every option in the TUNA section gets an operation
@@ -230,7 +248,10 @@ class Tuna(BasePlugin):
                                       error=DontCatchError,
                                       error_message='{0} Crash'.format(operation_name),
                                       component_category=operation_name,
-                                      time_remains=countdown)
+                                      time_remains=countdown,
+                                      workers=workers)
+                plugins = OrderedDict()
+                dependencies = {}
 
                 #traverse this line to get plugins
                 # get_list is a list of comma-separated strings in the operation line
@@ -258,7 +279,12 @@ class Tuna(BasePlugin):
                     except TypeError as error:
                         self.log_error(error)
                         raise ConfigurationError('Could not build "{0}" plugin'.format(plugin_name))
-                    operation.add(plugin)
+                    plugins[plugin_section_name] = plugin
+                    dependencies[plugin_section_name] = configuration.get_list(plugin_section_name,
+                                                                               DEPENDS_ON,
+                                                                               optional=True,
+                                                                               default=None)
+                self.add_plugins(operation, plugins, dependencies)
                 operator.add(operation)
 
             hortator.add(operator)
@@ -266,6 +292,32 @@ class Tuna(BasePlugin):
             self.save_configuration(configuration)
         return hortator
 
+    def add_plugins(self, operation, plugins, dependencies):
+        """
+        Adds the plugins to the operation with the plugins they depend on
+
+        :param:
+
+         - `operation`: the Composite for the operation-line
+         - `plugins`: OrderedDict of section-name: plugin product
+         - `dependencies`: dict of section-name: list of section-names it depends on (or None)
+
+        :raise: ConfigurationError if a plugin depends on a section that isn't on its line
+        """
+        for section_name, plugin in plugins.iteritems():
+            depends_on = dependencies[section_name]
+            if depends_on is not None:
+                names = [name for name in depends_on if name]
+                for name in names:
+                    if name not in plugins:
+                        raise ConfigurationError(("'{0}' depends on '{1}' which isn't on the"
+                                                  " line with it ({2})").format(section_name,
+                                                                                name,
+                                                                                ', '.join(plugins)))
+                depends_on = [plugins[name] for name in names]
+            operation.add(plugin, depends_on=depends_on)
+        return
+
     def initialize_file_storage(self, configuration):
         """
         This has to be called before the plugins are built so the path will be set
@@ -282,6 +334,8 @@ class Tuna(BasePlugin):
             self.file_storage.path = configuration.defaults[SUBFOLDER]
         if TIMESTAMP in configuration.defaults:
             self.file_storage.timestamp = configuration.defaults[TIMESTAMP]
+        if SHARD in configuration.defaults:
+            self.file_storage.shard = configuration.defaults[SHARD]
         return
 
     def save_configuration(self, configuration):
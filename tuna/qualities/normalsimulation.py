@@ -1,9 +1,4 @@
 
-# third-party
-import scipy
-from scipy import stats
-import matplotlib.pyplot as plt
-
 # this package
 from tuna.qualities.basesimulation import BaseSimulation
 
@@ -11,6 +6,11 @@ from tuna.qualities.basesimulation import BaseSimulation
 IN_PWEAVE = __name__ == '__builtin__'
 
 
+if IN_PWEAVE:
+    import scipy
+    import matplotlib.pyplot as plt
+
+
 class NormalSimulation(BaseSimulation):
     """
     Normal data
@@ -34,6 +34,7 @@ class NormalSimulation(BaseSimulation):
         The y-values for the given x-values        
         """
         if self._range is None:
+            from scipy import stats
             self._range = stats.norm.pdf(self.domain)
             if self.functions is not None:
                 for function in self.functions:
@@ -121,6 +122,7 @@ class NoisySimulation(BaseSimulation):
         the noisy data
         """
         if self._range is None:
+            from scipy import stats
             self._range = stats.norm.rvs(size=self.domain_end-self.domain_start + 1)
             if self.functions is not None:
                 for function in self.functions:
@@ -2,6 +2,7 @@
 # this package
 from tuna.components.composite import Composite
 from tuna.infrastructure.quartermaster import QuarterMaster
+from tuna.infrastructure.metrics import METRICS
 from tuna import DontCatchError, MODULES_SECTION
 
 
@@ -23,6 +24,7 @@ class QualityComposite(Composite):
         # since the quality-components are buried in a list
         # this is here to help see how efficient the optimizers are
         self.quality_checks += 1
+        METRICS.quality_checks.increment()
         output = None
         for component in self.components:
             returned = component(*args, **kwargs)